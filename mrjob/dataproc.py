@@ -42,15 +42,19 @@ except ImportError:
 import mrjob
 from mrjob.compat import map_version
 from mrjob.conf import combine_dicts
+from mrjob.fs.caching import CachingFilesystem
 from mrjob.fs.composite import CompositeFilesystem
 from mrjob.fs.local import LocalFilesystem
+from mrjob.fs.local import _save_md5sum_cache
 from mrjob.fs.gcs import GCSFilesystem
 from mrjob.logs.counters import _pick_counters
 from mrjob.fs.gcs import parse_gcs_uri
 from mrjob.fs.gcs import is_gcs_uri
+from mrjob.fs.gcs import _http_with_retries
 from mrjob.options import _allowed_keys
 from mrjob.options import _combiners
 from mrjob.options import _deprecated_aliases
+from mrjob.parallel import _map_in_threads
 from mrjob.parse import is_uri
 from mrjob.py2 import PY2
 from mrjob.runner import MRJobRunner
@@ -70,6 +74,11 @@ _DATAPROC_API_REGION = 'global'
 _DATAPROC_MIN_WORKERS = 2
 _GCE_API_VERSION = 'v1'
 
+# don't make more than this many Dataproc API calls per second, across
+# all threads and runners in this process
+_DATAPROC_API_RATE = 5
+_DATAPROC_API_BURST = 10
+
 _DEFAULT_INSTANCE_TYPE = 'n1-standard-1'
 
 # default imageVersion to use on Dataproc. This may be updated with each
@@ -242,6 +251,7 @@ class DataprocRunnerOptionStore(RunnerOptionStore):
             'num_task_instances': 0,
 
             'cloud_fs_sync_secs': _DEFAULT_CLOUD_FS_SYNC_SECS,
+            'cloud_upload_threads': 4,
 
             'max_hours_idle': _DEFAULT_MAX_HOURS_IDLE,
             'sh_bin': ['/bin/sh', '-ex'],
@@ -306,7 +316,9 @@ class DataprocJobRunner(MRJobRunner):
         # BEGIN - setup directories
         base_tmpdir = self._get_tmpdir(self._opts['cloud_tmp_dir'])
 
-        self._cloud_tmp_dir = _check_and_fix_fs_dir(base_tmpdir)
+        # store the tmp dir we picked, like the EMR runner does
+        self._opts['cloud_tmp_dir'] = _check_and_fix_fs_dir(base_tmpdir)
+        self._cloud_tmp_dir = self._opts['cloud_tmp_dir']
 
         # use job key to make a unique tmp dir
         self._job_tmpdir = self._cloud_tmp_dir + self._job_key + '/'
@@ -323,8 +335,13 @@ class DataprocJobRunner(MRJobRunner):
 
         # manage local files that we want to upload to GCS. We'll add them
         # to this manager just before we need them.
-        fs_files_dir = self._job_tmpdir + 'files/'
-        self._upload_mgr = UploadDirManager(fs_files_dir)
+        if self._opts['cloud_dedup_uploads']:
+            # share files between jobs, named by their md5 sum
+            self._upload_mgr = UploadDirManager(
+                self._dedup_upload_dir(), digest=self.fs.md5sum)
+        else:
+            fs_files_dir = self._job_tmpdir + 'files/'
+            self._upload_mgr = UploadDirManager(fs_files_dir)
 
         self._bootstrap = self._bootstrap_python() + self._parse_bootstrap()
 
@@ -362,7 +379,9 @@ class DataprocJobRunner(MRJobRunner):
 
             api_client = discovery.build(
                 _DATAPROC_API_ENDPOINT, _DATAPROC_API_VERSION,
-                credentials=credentials)
+                http=credentials.authorize(_http_with_retries(
+                    _DATAPROC_API_ENDPOINT,
+                    rate=_DATAPROC_API_RATE, burst=_DATAPROC_API_BURST)))
             self._api_client = api_client.projects().regions()
 
         return self._api_client
@@ -378,6 +397,11 @@ class DataprocJobRunner(MRJobRunner):
         self._gcs_fs = GCSFilesystem()
 
         self._fs = CompositeFilesystem(self._gcs_fs, LocalFilesystem())
+
+        if self._opts['fs_cache_secs']:
+            self._fs = CachingFilesystem(
+                self._fs, self._opts['fs_cache_secs'])
+
         return self._fs
 
     def _get_tmpdir(self, given_tmpdir):
@@ -435,14 +459,14 @@ class DataprocJobRunner(MRJobRunner):
         if not self._opts['check_input_paths']:
             return
 
-        for path in self._input_paths:
-            if path == '-':
-                continue  # STDIN always exists
+        # STDIN always exists, and we can't check non-GCS URIs
+        # (hope for the best)
+        paths = [path for path in self._input_paths
+                 if path != '-' and (is_gcs_uri(path) or not is_uri(path))]
 
-            if is_uri(path) and not is_gcs_uri(path):
-                continue  # can't check non-GCS URIs, hope for the best
-
-            if not self.fs.exists(path):
+        # check all paths at once
+        for path, exists in zip(paths, self.fs.exists_many(paths)):
+            if not exists:
                 raise AssertionError(
                     'Input path %s does not exist!' % (path,))
 
@@ -498,17 +522,42 @@ class DataprocJobRunner(MRJobRunner):
                 self._upload_mgr.add(step['jar'])
 
     def _upload_local_files_to_fs(self):
-        """Copy local files tracked by self._upload_mgr to FS."""
+        """Copy local files tracked by self._upload_mgr to FS, uploading
+        up to *cloud_upload_threads* files at once.
+
+        If *cloud_dedup_uploads* is set, skip files that are already on GCS.
+        """
         bucket_name, _ = parse_gcs_uri(self._job_tmpdir)
         self._create_fs_tmp_bucket(bucket_name)
 
         log.info('Copying non-input files into %s' % self._upload_mgr.prefix)
 
-        for path, gcs_uri in self._upload_mgr.path_to_uri().items():
+        to_upload = []
+
+        path_uri_pairs = sorted(self._upload_mgr.path_to_uri().items())
+
+        # done hashing local files (see cloud_dedup_uploads)
+        _save_md5sum_cache()
+
+        if self._opts['cloud_dedup_uploads']:
+            # check which files are already on GCS all at once
+            already_uploaded = self.fs.exists_many(
+                [gcs_uri for _, gcs_uri in path_uri_pairs],
+                max_threads=self._opts['cloud_upload_threads'])
+        else:
+            already_uploaded = [False] * len(path_uri_pairs)
+
+        for (path, gcs_uri), exists in zip(path_uri_pairs, already_uploaded):
+            if exists:
+                log.debug('%s already uploaded to %s' % (path, gcs_uri))
+                continue
+
             log.debug('uploading %s -> %s' % (path, gcs_uri))
+            to_upload.append((path, gcs_uri))
 
-            # TODO - mtai @ davidmarin - Implement put function for other FSs
-            self.fs.put(path, gcs_uri)
+        # TODO - mtai @ davidmarin - Implement put function for other FSs
+        _map_in_threads(lambda args: self.fs.put(*args),
+                        to_upload, self._opts['cloud_upload_threads'])
 
         self._wait_for_fs_sync()
 
@@ -65,8 +65,10 @@ from mrjob.aws import s3_location_constraint_for_region
 from mrjob.compat import map_version
 from mrjob.compat import version_gte
 from mrjob.conf import combine_dicts
+from mrjob.fs.caching import CachingFilesystem
 from mrjob.fs.composite import CompositeFilesystem
 from mrjob.fs.local import LocalFilesystem
+from mrjob.fs.local import _save_md5sum_cache
 from mrjob.fs.s3 import S3Filesystem
 from mrjob.fs.s3 import wrap_aws_conn
 from mrjob.fs.ssh import SSHFilesystem
@@ -88,6 +90,7 @@ from mrjob.logs.step import _ls_emr_step_syslogs
 from mrjob.options import _allowed_keys
 from mrjob.options import _combiners
 from mrjob.options import _deprecated_aliases
+from mrjob.parallel import _map_in_threads
 from mrjob.parse import is_s3_uri
 from mrjob.parse import is_uri
 from mrjob.parse import iso8601_to_datetime
@@ -96,10 +99,11 @@ from mrjob.parse import parse_s3_uri
 from mrjob.parse import _parse_progress_from_job_tracker
 from mrjob.parse import _parse_progress_from_resource_manager
 from mrjob.patched_boto import _patched_describe_cluster
-from mrjob.patched_boto import _patched_describe_step
 from mrjob.patched_boto import _patched_list_steps
 from mrjob.pool import _est_time_to_hour
+from mrjob.pool import _load_pool_index
 from mrjob.pool import _pool_hash_and_name
+from mrjob.pool import _save_pool_index
 from mrjob.py2 import PY2
 from mrjob.py2 import string_types
 from mrjob.py2 import urlopen
@@ -163,9 +167,40 @@ _MAX_SSH_RETRIES = 20
 # ssh should fail right away if it can't bind a port
 _WAIT_FOR_SSH_TO_FAIL = 1.0
 
+# S3 responds with one of these if another locker's conditional write
+# won (Precondition Failed, or Conflict if the writes were simultaneous)
+_S3_LOST_CONDITIONAL_WRITE_STATUSES = (409, 412)
+
+# S3 (or something S3-compatible) responds with this if it doesn't
+# support conditional writes
+_S3_NOT_IMPLEMENTED = 501
+
 # amount of time to wait between checks for available pooled clusters
 _POOLING_SLEEP_INTERVAL = 30.01  # Add .1 seconds so minutes arent spot on.
 
+# how many clusters to inspect at once when looking for one to join
+_POOL_INSPECTION_THREADS = 8
+
+# don't make more than this many EMR (or IAM) API calls per second, across
+# all threads and runners in this process (inspecting clusters in a pool
+# takes several calls per cluster). Stays well under the rate at which
+# EMR starts throttling us.
+_EMR_API_RATE = 5
+_EMR_API_BURST = 10
+
+# when waiting for steps, check this many times more often than
+# check_cluster_every right after a step changes state or is almost done
+_CHECK_CLUSTER_SPEEDUP = 6.0
+
+# a step is "almost done" once it's this far along (a percentage)
+_ALMOST_DONE_PROGRESS = 90.0
+
+# how many times to try uploading each part of a multipart upload, and
+# how long to back off between tries
+_UPLOAD_PART_MAX_TRIES = 5
+_UPLOAD_PART_BACKOFF = 1.0
+_UPLOAD_PART_BACKOFF_MULTIPLIER = 2.0
+
 # bootstrap action which automatically terminates idle clusters
 _MAX_HOURS_IDLE_BOOTSTRAP_ACTION_PATH = os.path.join(
     os.path.dirname(mrjob.__file__),
@@ -254,18 +289,9 @@ def _repeat(api_call, *args, **kwargs):
 
     Yields one or more responses.
     """
-    # the _delay kwarg sleeps that many seconds before each API call
-    # (including the first). This was added for audit-emr-usage; should
-    # re-visit if we need to use more generally. See #1091
-
     marker = None
 
-    _delay = kwargs.pop('_delay', None)
-
     while True:
-        if _delay:
-            time.sleep(_delay)
-
         resp = api_call(*args, marker=marker, **kwargs)
         yield resp
 
@@ -348,22 +374,25 @@ def _make_lock_uri(cloud_tmp_dir, cluster_id, step_num):
     return cloud_tmp_dir + 'locks/' + cluster_id + '/' + str(step_num)
 
 
+def _lock_expired(key, mins_to_expiration):
+    """Is the lock in *key* more than *mins_to_expiration* minutes old?"""
+    # EMRJobRunner should start using a cluster within about a second of
+    # locking it, so if it's been a while, then it probably crashed and we
+    # can just use this cluster.
+    if mins_to_expiration is None:
+        return False
+
+    last_modified = iso8601_to_datetime(key.last_modified)
+    age = datetime.utcnow() - last_modified
+    return age > timedelta(minutes=mins_to_expiration)
+
+
 def _lock_acquire_step_1(s3_fs, lock_uri, job_key, mins_to_expiration=None):
     bucket_name, key_prefix = parse_s3_uri(lock_uri)
     bucket = s3_fs.get_bucket(bucket_name)
     key = bucket.get_key(key_prefix)
 
-    # EMRJobRunner should start using a cluster within about a second of
-    # locking it, so if it's been a while, then it probably crashed and we
-    # can just use this cluster.
-    key_expired = False
-    if key and mins_to_expiration is not None:
-        last_modified = iso8601_to_datetime(key.last_modified)
-        age = datetime.utcnow() - last_modified
-        if age > timedelta(minutes=mins_to_expiration):
-            key_expired = True
-
-    if key is None or key_expired:
+    if key is None or _lock_expired(key, mins_to_expiration):
         key = bucket.new_key(key_prefix)
         key.set_contents_from_string(job_key.encode('utf_8'))
         return key
@@ -376,12 +405,95 @@ def _lock_acquire_step_2(key, job_key):
     return (key_value == job_key.encode('utf_8'))
 
 
+def _lock_acquire_conditionally(s3_fs, lock_uri, job_key,
+                                mins_to_expiration=None):
+    """Take the lock at ``lock_uri`` with a conditional write, so that
+    S3 decides which of several concurrent lockers gets it: we only create
+    the lock if it doesn't exist yet, and only replace an expired lock if
+    nobody else has replaced it since we read it.
+
+    Returns True if we got the lock, False if someone else has it. Raises
+    :py:class:`boto.exception.S3ResponseError` if S3 doesn't support
+    conditional writes.
+
+    Some S3-compatible stores accept conditional writes but ignore the
+    condition. To catch this, we try to create the lock again once we've
+    written it, which should fail. If it doesn't, we return None: we wrote
+    the lock, but can't tell whether someone else did too.
+    """
+    bucket_name, key_name = parse_s3_uri(lock_uri)
+    bucket = s3_fs.get_bucket(bucket_name)
+    key = bucket.get_key(key_name)
+
+    if key is None:
+        headers = {'If-None-Match': '*'}
+    elif _lock_expired(key, mins_to_expiration):
+        headers = {'If-Match': key.etag}
+    else:
+        return False
+
+    try:
+        bucket.new_key(key_name).set_contents_from_string(
+            job_key.encode('utf_8'), headers=headers)
+    except boto.exception.S3ResponseError as ex:
+        # someone else wrote the lock first
+        if ex.status in _S3_LOST_CONDITIONAL_WRITE_STATUSES:
+            return False
+        raise
+
+    # the lock exists now, so S3 should refuse to create it again
+    try:
+        bucket.new_key(key_name).set_contents_from_string(
+            job_key.encode('utf_8'), headers={'If-None-Match': '*'})
+    except boto.exception.S3ResponseError as ex:
+        if ex.status in _S3_LOST_CONDITIONAL_WRITE_STATUSES:
+            return True
+        raise
+
+    return None
+
+
 def _attempt_to_acquire_lock(s3_fs, lock_uri, sync_wait_time, job_key,
-                             mins_to_expiration=None):
+                             mins_to_expiration=None, conditional=True):
     """Returns True if this session successfully took ownership of the lock
     specified by ``lock_uri``.
+
+    By default, we take the lock with a conditional write, and know
+    right away whether we got it. If *conditional* is false (or S3 doesn't
+    support conditional writes), we write the lock, wait *sync_wait_time*
+    seconds, and then check that nobody else has overwritten it. If S3
+    accepts conditional writes but ignores the condition, we wait and
+    check the lock in the same way.
+
+    .. versionchanged:: 0.5.7
+
+       added *conditional*
     """
-    key = _lock_acquire_step_1(s3_fs, lock_uri, job_key, mins_to_expiration)
+    if conditional:
+        try:
+            got_lock = _lock_acquire_conditionally(
+                s3_fs, lock_uri, job_key, mins_to_expiration)
+        except boto.exception.S3ResponseError as ex:
+            if ex.status != _S3_NOT_IMPLEMENTED:
+                raise
+            log.warning('S3 does not support conditional writes; locking'
+                        ' %s the old way (see s3_strong_consistency)' %
+                        lock_uri)
+            key = _lock_acquire_step_1(
+                s3_fs, lock_uri, job_key, mins_to_expiration)
+        else:
+            if got_lock is not None:
+                return got_lock
+
+            # we wrote the lock, but so might have someone else
+            log.warning('S3 ignored conditional write to %s; checking the'
+                        ' lock the old way (see s3_strong_consistency)' %
+                        lock_uri)
+            key = s3_fs.get_s3_key(lock_uri)
+    else:
+        key = _lock_acquire_step_1(
+            s3_fs, lock_uri, job_key, mins_to_expiration)
+
     if key is None:
         return False
 
@@ -389,6 +501,14 @@ def _attempt_to_acquire_lock(s3_fs, lock_uri, sync_wait_time, job_key,
     return _lock_acquire_step_2(key, job_key)
 
 
+def _is_retriable_upload_error(ex):
+    """Is *ex* a transient error that we should retry when uploading
+    a part of a file to S3?"""
+    return ((isinstance(ex, boto.exception.S3ResponseError) and
+             (ex.status >= 500 or ex.error_code == 'RequestTimeout')) or
+            isinstance(ex, socket.error))
+
+
 def _get_reason(cluster_or_step):
     """Extract statechangereason.message from a boto Cluster or Step.
 
@@ -398,6 +518,19 @@ def _get_reason(cluster_or_step):
         'message', '').rstrip()
 
 
+def _next_check_interval(interval, min_interval, max_interval,
+                         speed_up=False):
+    """How long to wait before checking on our steps again.
+
+    If *speed_up* is true (e.g. because a step just started), go back to
+    *min_interval*. Otherwise, double *interval*, up to *max_interval*.
+    """
+    if speed_up:
+        return min_interval
+    else:
+        return min(interval * 2, max_interval)
+
+
 class EMRRunnerOptionStore(RunnerOptionStore):
 
     ALLOWED_KEYS = _allowed_keys('emr')
@@ -431,8 +564,12 @@ class EMRRunnerOptionStore(RunnerOptionStore):
             'num_task_instances': 0,
             'pool_name': 'default',
             'pool_wait_minutes': 0,
+            'cloud_download_part_size': 16,  # 16 MB
+            'cloud_download_threads': 4,
             'cloud_fs_sync_secs': 5.0,
             'cloud_upload_part_size': 100,  # 100 MB
+            'cloud_upload_threads': 4,
+            's3_strong_consistency': True,
             'sh_bin': ['/bin/sh', '-ex'],
             'ssh_bin': ['ssh'],
             # don't use a list because it makes it hard to read option values
@@ -615,6 +752,10 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
         """
         super(EMRJobRunner, self).__init__(**kwargs)
 
+        # SSHFilesystem, set when we create self.fs (which happens below,
+        # so this has to come first)
+        self._ssh_fs = None
+
         # if we're going to create a bucket to use as temp space, we don't
         # want to actually create it until we run the job (Issue #50).
         # This variable helps us create the bucket as needed
@@ -638,8 +779,13 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
 
         # manage local files that we want to upload to S3. We'll add them
         # to this manager just before we need them.
-        s3_files_dir = self._cloud_tmp_dir + 'files/'
-        self._upload_mgr = UploadDirManager(s3_files_dir)
+        if self._opts['cloud_dedup_uploads']:
+            # share files between jobs, named by their md5 sum
+            self._upload_mgr = UploadDirManager(
+                self._dedup_upload_dir(), digest=self.fs.md5sum)
+        else:
+            s3_files_dir = self._cloud_tmp_dir + 'files/'
+            self._upload_mgr = UploadDirManager(s3_files_dir)
 
         # manage working dir for bootstrap script
         self._bootstrap_dir_mgr = BootstrapWorkingDirManager()
@@ -843,7 +989,9 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
                 aws_access_key_id=self._opts['aws_access_key_id'],
                 aws_secret_access_key=self._opts['aws_secret_access_key'],
                 aws_security_token=self._opts['aws_security_token'],
-                s3_endpoint=self._opts['s3_endpoint'])
+                s3_endpoint=self._opts['s3_endpoint'],
+                download_part_size=self._get_download_part_size(),
+                download_threads=self._opts['cloud_download_threads'])
 
             if self._opts['ec2_key_pair_file']:
                 self._ssh_fs = SSHFilesystem(
@@ -856,6 +1004,10 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
                 self._ssh_fs = None
                 self._fs = CompositeFilesystem(s3_fs, LocalFilesystem())
 
+            if self._opts['fs_cache_secs']:
+                self._fs = CachingFilesystem(
+                    self._fs, self._opts['fs_cache_secs'])
+
         return self._fs
 
     def _run(self):
@@ -897,14 +1049,14 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
         """Make sure all input exists before continuing with our job.
         """
         if self._opts['check_input_paths']:
-            for path in self._input_paths:
-                if path == '-':
-                    continue  # STDIN always exists
-
-                if is_uri(path) and not is_s3_uri(path):
-                    continue  # can't check non-S3 URIs, hope for the best
-
-                if not self.fs.exists(path):
+            # STDIN always exists, and we can't check non-S3 URIs
+            # (hope for the best)
+            paths = [path for path in self._input_paths
+                     if path != '-' and (is_s3_uri(path) or not is_uri(path))]
+
+            # check all paths at once
+            for path, exists in zip(paths, self.fs.exists_many(paths)):
+                if not exists:
                     raise AssertionError(
                         'Input path %s does not exist!' % (path,))
 
@@ -995,13 +1147,54 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
                     self._upload_mgr.add(step[key])
 
     def _upload_local_files_to_s3(self):
-        """Copy local files tracked by self._upload_mgr to S3."""
+        """Copy local files tracked by self._upload_mgr to S3.
+
+        Files small enough to upload in one piece are uploaded in parallel;
+        bigger files are uploaded one at a time, with their parts uploaded
+        in parallel. Either way, we make at most *cloud_upload_threads*
+        requests at once.
+
+        If *cloud_dedup_uploads* is set, skip files that are already on S3.
+        """
         self._create_s3_tmp_bucket_if_needed()
 
         log.info('Copying local files to %s...' % self._upload_mgr.prefix)
 
-        for path, s3_uri in self._upload_mgr.path_to_uri().items():
+        part_size = self._get_upload_part_size()
+
+        small_files = []
+        big_files = []
+
+        path_uri_pairs = sorted(self._upload_mgr.path_to_uri().items())
+
+        # done hashing local files (see cloud_dedup_uploads)
+        _save_md5sum_cache()
+
+        if self._opts['cloud_dedup_uploads']:
+            # check which files are already on S3 all at once
+            already_uploaded = self.fs.exists_many(
+                [s3_uri for _, s3_uri in path_uri_pairs],
+                max_threads=self._opts['cloud_upload_threads'])
+        else:
+            already_uploaded = [False] * len(path_uri_pairs)
+
+        for (path, s3_uri), exists in zip(path_uri_pairs, already_uploaded):
+            if exists:
+                log.debug('  %s already uploaded to %s' % (path, s3_uri))
+                continue
+
             log.debug('  %s -> %s' % (path, s3_uri))
+
+            fsize = os.stat(path).st_size
+            if self._should_use_multipart_upload(fsize, part_size, path):
+                big_files.append((s3_uri, path))
+            else:
+                small_files.append((s3_uri, path))
+
+        _map_in_threads(lambda args: self._upload_contents(*args),
+                        small_files, self._opts['cloud_upload_threads'])
+
+        for s3_uri, path in big_files:
             self._upload_contents(s3_uri, path)
 
     def _upload_contents(self, s3_uri, path):
@@ -1029,18 +1222,47 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
             s3_key.set_contents_from_filename(path)
 
     def _upload_parts(self, mpul, path, fsize, part_size):
+        """Upload the parts of a multipart upload in parallel."""
         offsets = range(0, fsize, part_size)
 
-        for i, offset in enumerate(offsets):
+        def upload_part(i):
             part_num = i + 1
 
             log.debug("uploading %d/%d of %s" % (
                 part_num, len(offsets), path))
-            chunk_bytes = min(part_size, fsize - offset)
+            chunk_bytes = min(part_size, fsize - offsets[i])
+
+            self._upload_part(mpul, path, part_num, offsets[i], chunk_bytes)
+
+        _map_in_threads(upload_part, range(len(offsets)),
+                        self._opts['cloud_upload_threads'])
+
+    def _upload_part(self, mpul, path, part_num, offset, chunk_bytes):
+        """Upload a single part of a multipart upload, retrying it (and
+        only it) if we get a transient error."""
+        backoff = _UPLOAD_PART_BACKOFF
+
+        for tries in range(1, _UPLOAD_PART_MAX_TRIES + 1):
+            try:
+                with filechunkio.FileChunkIO(
+                        path, 'r', offset=offset, bytes=chunk_bytes) as fp:
+                    mpul.upload_part_from_file(fp, part_num)
+                return
+            except Exception as ex:
+                if (tries < _UPLOAD_PART_MAX_TRIES and
+                        _is_retriable_upload_error(ex)):
+                    log.info('Got retriable error uploading part %d of %s:'
+                             ' %r' % (part_num, path, ex))
+                    log.info('Backing off for %.1f seconds' % backoff)
+                    time.sleep(backoff)
+                    backoff *= _UPLOAD_PART_BACKOFF_MULTIPLIER
+                else:
+                    raise
 
-            with filechunkio.FileChunkIO(
-                    path, 'r', offset=offset, bytes=chunk_bytes) as fp:
-                mpul.upload_part_from_file(fp, part_num)
+    def _get_download_part_size(self):
+        # part size is in MB, like cloud_upload_part_size
+        return int(
+            (self._opts['cloud_download_part_size'] or 0) * 1024 * 1024)
 
     def _get_upload_part_size(self):
         # part size is in MB, as the minimum is 5 MB
@@ -1213,6 +1435,10 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
                 except Exception as e:
                     log.exception(e)
 
+        # close multiplexed SSH connections used to fetch logs
+        if self._ssh_fs:
+            self._ssh_fs.close()
+
         # stop the cluster if it belongs to us (it may have stopped on its
         # own already, but that's fine)
         # don't stop it if it was created due to --pool because the user
@@ -1266,7 +1492,13 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
 
     def _wait_for_s3_eventual_consistency(self):
         """Sleep for a little while, to give S3 a chance to sync up.
+
+        S3 has read-after-write consistency, so we only do this if
+        :mrjob-opt:`s3_strong_consistency` is false.
         """
+        if self._opts['s3_strong_consistency']:
+            return
+
         log.debug('Waiting %.1fs for S3 eventual consistency...' %
                   self._opts['cloud_fs_sync_secs'])
         time.sleep(self._opts['cloud_fs_sync_secs'])
@@ -1810,13 +2042,19 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
         if self._ssh_fs and version_gte(self.get_image_version(), '4.3.0'):
             self._ssh_fs.use_sudo_over_ssh()
 
-    def _job_steps(self, max_steps=None):
+    def _job_steps(self, max_steps=None, emr_conn=None):
         """Get the steps we submitted for this job in chronological order,
         ignoring steps from other jobs.
 
         Generally, you want to set *max_steps*, so we can make as few API
         calls as possible.
+
+        *emr_conn* is an EMR connection to re-use (by default, we make a new
+        one).
         """
+        if emr_conn is None:
+            emr_conn = self.make_emr_conn()
+
         # the API yields steps in reversed order. Once we've found the expected
         # number of steps, stop.
         #
@@ -1824,12 +2062,27 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
         # is what we want for now.
         return list(reversed(list(islice(
             (step for step in
-             _yield_all_steps(self.make_emr_conn(), self.get_cluster_id())
+             _yield_all_steps(emr_conn, self.get_cluster_id())
              if step.name.startswith(self._job_key)),
             max_steps))))
 
+    def _describe_job_steps(self, emr_conn, max_steps):
+        """Get the current state of our steps (see :py:meth:`_job_steps`).
+        This usually takes a single ``ListSteps`` call, since our steps
+        are the most recent ones on the cluster.
+
+        Returns a map from step ID to step.
+        """
+        return dict((step.id, step)
+                    for step in self._job_steps(max_steps, emr_conn=emr_conn))
+
     def _wait_for_steps_to_complete(self):
-        """Wait for every step of the job to complete, one by one."""
+        """Wait for every step of the job to complete, one by one.
+
+        Rather than polling each step separately, we fetch all our steps
+        with a single ``ListSteps`` call on each check, and adjust how
+        long we wait between checks (see :py:func:`_next_check_interval`).
+        """
         num_steps = len(self._get_steps())
 
         # if there's a master node setup script, we'll treat that as
@@ -1860,149 +2113,204 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
         else:
             start = 0
 
-        for step_num, step in enumerate(job_steps, start=start):
-            # this will raise an exception if a step fails
-            if step_num == -1:
-                log.info(
-                    'Waiting for master node setup step (%s) to complete...' %
-                    step.id)
-            else:
-                log.info('Waiting for step %d of %d (%s) to complete...' % (
-                    step_num + 1, num_steps, step.id))
+        step_ids = [step.id for step in job_steps]
 
-            self._wait_for_step_to_complete(step.id, step_num, num_steps)
+        max_interval = self._opts['check_cluster_every']
+        min_interval = max_interval / _CHECK_CLUSTER_SPEEDUP
+        interval = min_interval
 
-    def _wait_for_step_to_complete(
-            self, step_id, step_num=None, num_steps=None):
-        """Helper for _wait_for_step_to_complete(). Wait for
-        step with the given ID to complete, and fetch counters.
-        If it fails, attempt to diagnose the error, and raise an
-        exception.
+        emr_conn = self.make_emr_conn()
 
-        :param step_id: the s-XXXXXXX step ID on EMR
-        :param step_num: which step this is out of the steps
-                         belonging to our job (0-indexed)
-        :param num_steps: number of steps in our job
+        # index into step_ids of the step we're waiting for
+        i = 0
+        self._start_waiting_for_step(step_ids[i], i + start, num_steps)
+        last_state = None
 
-        *step_num* and *num_steps* are optional and only used when raising
-        a :py:class:`~mrjob.step.StepFailedException`.
+        while True:
+            # don't antagonize EMR's throttling
+            log.debug('Waiting %.1f seconds...' % interval)
+            time.sleep(interval)
 
-        This also adds an item to self._log_interpretations
-        """
+            id_to_step = self._describe_job_steps(emr_conn, max_steps)
+
+            # steps run one at a time, so several of ours may have
+            # finished since we last checked
+            step = id_to_step[step_ids[i]]
+            while step.status.state not in ('PENDING', 'RUNNING'):
+                # this will raise an exception if a step fails
+                self._handle_finished_step(step, i + start, num_steps)
+
+                i += 1
+                if i >= len(step_ids):
+                    return
+
+                self._start_waiting_for_step(step_ids[i], i + start, num_steps)
+                step = id_to_step[step_ids[i]]
+
+            # only fetch the cluster (once) if the step is waiting on it
+            if step.status.state == 'PENDING':
+                cluster = self._describe_cluster()
+            else:
+                cluster = None
+
+            progress = self._log_step_state(step, i + start, cluster)
+
+            state_changed = ((step.id, step.status.state) != last_state)
+            last_state = (step.id, step.status.state)
+
+            interval = _next_check_interval(
+                interval, min_interval, max_interval,
+                speed_up=(state_changed or
+                          (progress is not None and
+                           progress >= _ALMOST_DONE_PROGRESS)))
+
+    def _start_waiting_for_step(self, step_id, step_num, num_steps):
+        """Log that we're waiting for the given step, and add a log
+        interpretation for it (see :py:meth:`_handle_finished_step`)."""
         log_interpretation = dict(step_id=step_id)
 
-        # suppress warnings about missing job ID for script-runner.jar
         if step_num == -1:
+            log.info(
+                'Waiting for master node setup step (%s) to complete...' %
+                step_id)
+
+            # suppress warnings about missing job ID for script-runner.jar
             log_interpretation['no_job'] = True
             self._mns_log_interpretation = log_interpretation
         else:
+            log.info('Waiting for step %d of %d (%s) to complete...' % (
+                step_num + 1, num_steps, step_id))
+
             self._log_interpretations.append(log_interpretation)
 
-        emr_conn = self.make_emr_conn()
+    def _log_step_state(self, step, step_num, cluster=None):
+        """Log the state of a step that is ``PENDING`` or ``RUNNING``, and
+        open the SSH tunnel if the cluster is ready.
 
-        while True:
-            # don't antagonize EMR's throttling
-            log.debug('Waiting %.1f seconds...' %
-                      self._opts['check_cluster_every'])
-            time.sleep(self._opts['check_cluster_every'])
-
-            step = _patched_describe_step(emr_conn, self._cluster_id, step_id)
+        *cluster* is our cluster, as returned by ``DescribeCluster``; if
+        it's not set and the step is ``PENDING``, we'll fetch it.
 
-            if step.status.state == 'PENDING':
+        Returns how far along the step is (a percentage) if we could
+        find out from the job tracker/resource manager, and ``None``
+        otherwise.
+        """
+        if step.status.state == 'PENDING':
+            if cluster is None:
                 cluster = self._describe_cluster()
 
-                reason = _get_reason(cluster)
-                reason_desc = (': %s' % reason) if reason else ''
+            reason = _get_reason(cluster)
+            reason_desc = (': %s' % reason) if reason else ''
+
+            # we can open the ssh tunnel if cluster is ready (see #1115)
+            if cluster.status.state in ('RUNNING', 'WAITING'):
+                self._set_up_ssh_tunnel()
 
-                # we can open the ssh tunnel if cluster is ready (see #1115)
-                if cluster.status.state in ('RUNNING', 'WAITING'):
-                    self._set_up_ssh_tunnel()
+            log.info('  PENDING (cluster is %s%s)' % (
+                cluster.status.state, reason_desc))
+            return None
 
-                log.info('  PENDING (cluster is %s%s)' % (
-                    cluster.status.state, reason_desc))
-                continue
+        time_running_desc = ''
 
-            if step.status.state == 'RUNNING':
-                time_running_desc = ''
+        startdatetime = getattr(
+            getattr(step.status, 'timeline', ''), 'startdatetime', '')
+        if startdatetime:
+            start = iso8601_to_timestamp(startdatetime)
+            time_running_desc = ' for %.1fs' % (time.time() - start)
 
-                startdatetime = getattr(
-                    getattr(step.status, 'timeline', ''), 'startdatetime', '')
-                if startdatetime:
-                    start = iso8601_to_timestamp(startdatetime)
-                    time_running_desc = ' for %.1fs' % (time.time() - start)
+        # now is the time to tunnel, if we haven't already
+        self._set_up_ssh_tunnel()
+        log.info('  RUNNING%s' % time_running_desc)
 
-                # now is the time to tunnel, if we haven't already
-                self._set_up_ssh_tunnel()
-                log.info('  RUNNING%s' % time_running_desc)
+        # don't log progress for master node setup step, because
+        # it doesn't appear in job tracker
+        if step_num >= 0:
+            return self._log_step_progress()
+        else:
+            return None
 
-                # don't log progress for master node setup step, because
-                # it doesn't appear in job tracker
-                if step_num >= 0:
-                    self._log_step_progress()
+    def _handle_finished_step(self, step, step_num=None, num_steps=None):
+        """Helper for :py:meth:`_wait_for_steps_to_complete`. Handle a
+        step that is no longer ``PENDING`` or ``RUNNING``, and fetch
+        counters. If it failed, attempt to diagnose the error, and raise an
+        exception.
 
-                continue
+        :param step: the step, as returned by ``ListSteps``
+        :param step_num: which step this is out of the steps
+                         belonging to our job (0-indexed)
+        :param num_steps: number of steps in our job
 
-            # we're done, will return at the end of this
-            if step.status.state == 'COMPLETED':
-                log.info('  COMPLETED')
-                # will fetch counters, below, and then return
-            else:
-                # step has failed somehow. *reason* seems to only be set
-                # when job is cancelled (e.g. 'Job terminated')
-                reason = _get_reason(step)
-                reason_desc = (' (%s)' % reason) if reason else ''
+        *step_num* and *num_steps* are optional and only used when raising
+        a :py:class:`~mrjob.step.StepFailedException`.
 
-                log.info('  %s%s' % (
-                    step.status.state, reason_desc))
+        This uses the log interpretation added by
+        :py:meth:`_start_waiting_for_step`.
+        """
+        if step_num == -1:
+            log_interpretation = self._mns_log_interpretation
+        else:
+            log_interpretation = self._log_interpretations[-1]
 
-                # print cluster status; this might give more context
-                # why step didn't succeed
-                cluster = self._describe_cluster()
-                reason = _get_reason(cluster)
-                reason_desc = (': %s' % reason) if reason else ''
-                log.info('Cluster %s %s %s%s' % (
-                    cluster.id,
-                    'was' if 'ED' in cluster.status.state else 'is',
-                    cluster.status.state,
-                    reason_desc))
-
-                if cluster.status.state in (
-                        'TERMINATING', 'TERMINATED', 'TERMINATED_WITH_ERRORS'):
-                    # was it caused by a pooled cluster self-terminating?
-                    # (if so, raise _PooledClusterSelfTerminatedException)
-                    self._check_for_pooled_cluster_self_termination(
-                        cluster, step)
-                    # was it caused by IAM roles?
-                    self._check_for_missing_default_iam_roles(cluster)
-                    # was it caused by a key pair from the wrong region?
-                    self._check_for_key_pair_from_wrong_region(cluster)
-                    # was it because a bootstrap action failed?
-                    self._check_for_failed_bootstrap_action(cluster)
-
-            # step is done (either COMPLETED, FAILED, INTERRUPTED). so
-            # try to fetch counters
-            if step.status.state != 'CANCELLED':
-                if step_num >= 0:
-                    counters = self._pick_counters(log_interpretation)
-                    if counters:
-                        log.info(_format_counters(counters))
-                    else:
-                        log.warning('No counters found')
+        # we're done, will return at the end of this
+        if step.status.state == 'COMPLETED':
+            log.info('  COMPLETED')
+            # will fetch counters, below, and then return
+        else:
+            # step has failed somehow. *reason* seems to only be set
+            # when job is cancelled (e.g. 'Job terminated')
+            reason = _get_reason(step)
+            reason_desc = (' (%s)' % reason) if reason else ''
 
-            if step.status.state == 'COMPLETED':
-                return
+            log.info('  %s%s' % (
+                step.status.state, reason_desc))
+
+            # print cluster status; this might give more context
+            # why step didn't succeed
+            cluster = self._describe_cluster()
+            reason = _get_reason(cluster)
+            reason_desc = (': %s' % reason) if reason else ''
+            log.info('Cluster %s %s %s%s' % (
+                cluster.id,
+                'was' if 'ED' in cluster.status.state else 'is',
+                cluster.status.state,
+                reason_desc))
+
+            if cluster.status.state in (
+                    'TERMINATING', 'TERMINATED', 'TERMINATED_WITH_ERRORS'):
+                # was it caused by a pooled cluster self-terminating?
+                # (if so, raise _PooledClusterSelfTerminatedException)
+                self._check_for_pooled_cluster_self_termination(
+                    cluster, step)
+                # was it caused by IAM roles?
+                self._check_for_missing_default_iam_roles(cluster)
+                # was it caused by a key pair from the wrong region?
+                self._check_for_key_pair_from_wrong_region(cluster)
+                # was it because a bootstrap action failed?
+                self._check_for_failed_bootstrap_action(cluster)
+
+        # step is done (either COMPLETED, FAILED, INTERRUPTED). so
+        # try to fetch counters
+        if step.status.state != 'CANCELLED':
+            if step_num >= 0:
+                counters = self._pick_counters(log_interpretation)
+                if counters:
+                    log.info(_format_counters(counters))
+                else:
+                    log.warning('No counters found')
 
-            if step.status.state == 'FAILED':
-                error = self._pick_error(log_interpretation)
-                if error:
-                    log.error('Probable cause of failure:\n\n%s\n\n' %
-                              _format_error(error))
+        if step.status.state == 'COMPLETED':
+            return
+
+        if step.status.state == 'FAILED':
+            error = self._pick_error(log_interpretation)
+            if error:
+                log.error('Probable cause of failure:\n\n%s\n\n' %
+                          _format_error(error))
 
-            raise StepFailedException(
-                step_num=step_num, num_steps=num_steps,
-                # "Step 0 of ... failed" looks weird
-                step_desc=(
-                    'Master node setup step' if step_num == -1 else None))
+        raise StepFailedException(
+            step_num=step_num, num_steps=num_steps,
+            # "Step 0 of ... failed" looks weird
+            step_desc=(
+                'Master node setup step' if step_num == -1 else None))
 
     def _log_step_progress(self):
         """Tunnel to the job tracker/resource manager and log the
@@ -2010,9 +2318,11 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
 
         (This takes no arguments; we just assume the most recent running
         job is ours, which should be correct for EMR.)
+
+        Returns progress as a percentage, or ``None`` if unknown.
         """
         if not self._show_tracker_progress:
-            return
+            return None
 
         tunnel_config = self._ssh_tunnel_config()
 
@@ -2031,15 +2341,20 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
                 if map_progress is not None:
                     log.info('   map %3d%% reduce %3d%%' % (
                         map_progress, reduce_progress))
+                    # count map and reduce as halves of the job
+                    return (map_progress + reduce_progress) / 2.0
             else:
                 progress = _parse_progress_from_resource_manager(
                     tunnel_html)
                 if progress is not None:
                     log.info('   %5.1f%% complete' % progress)
+                    return progress
         finally:
             if tunnel_handle is not None:
                 tunnel_handle.close()
 
+        return None
+
     def _check_for_pooled_cluster_self_termination(self, cluster, step):
         """If failure could have been due to a pooled cluster self-terminating,
         raise _PooledClusterSelfTerminatedException"""
@@ -2121,6 +2436,11 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
 
     ### LOG PARSING (implementation of LogInterpretationMixin) ###
 
+    def _log_interpretation_cache_prefix(self):
+        """Job and application IDs are only unique within a cluster,
+        so cache log interpretations by cluster ID."""
+        return self._cluster_id
+
     def _check_for_failed_bootstrap_action(self, cluster):
         """If our bootstrap actions failed, parse the stderr to find
         out why."""
@@ -2800,6 +3120,10 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
 
         The most desirable clusters come *last* in the list.
 
+        We remember each cluster's pool hash and name on disk (see
+        :py:func:`~mrjob.pool._load_pool_index`), so we usually only make
+        API calls for clusters that are actually in our pool.
+
         :return: tuple of (:py:class:`botoemr.emrobject.Cluster`,
                            num_steps_in_cluster)
         """
@@ -2835,8 +3159,41 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
         # list of (sort_key, cluster_id, num_steps)
         key_cluster_steps_list = []
 
-        def add_if_match(cluster):
-            log.debug('  Considering joining cluster %s...' % cluster.id)
+        # cluster ID -> pool hash and name (see mrjob.pool)
+        pool_index = _load_pool_index()
+        now = time.time()
+
+        def add_if_match(cluster_id):
+            log.debug('  Considering joining cluster %s...' % cluster_id)
+
+            # this may be a retry due to locked clusters
+            if cluster_id in exclude:
+                log.debug('    %s: excluded' % cluster_id)
+                return
+
+            # match pool name, and (bootstrap) hash. These never change,
+            # so we only have to look them up once per cluster. Most
+            # clusters in a busy account won't match, and we can skip
+            # them without any more API calls.
+            if cluster_id not in pool_index:
+                bootstrap_actions = _yield_all_bootstrap_actions(
+                    emr_conn, cluster_id)
+                pool_hash, pool_name = _pool_hash_and_name(bootstrap_actions)
+                pool_index[cluster_id] = dict(
+                    pool_hash=pool_hash, pool_name=pool_name)
+
+            index_entry = pool_index[cluster_id]
+            index_entry['last_seen'] = now
+
+            if req_hash != index_entry['pool_hash']:
+                log.debug('    %s: pool hash mismatch' % cluster_id)
+                return
+
+            if self._opts['pool_name'] != index_entry['pool_name']:
+                log.debug('    %s: pool name mismatch' % cluster_id)
+                return
+
+            cluster = _patched_describe_cluster(emr_conn, cluster_id)
 
             # skip if user specified a key pair and it doesn't match
             if (self._opts['ec2_key_pair'] and
@@ -2844,30 +3201,12 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
                 getattr(getattr(cluster,
                                 'ec2instanceattributes', None),
                         'ec2keyname', None)):
-                log.debug('    ec2 key pair mismatch')
-                return
-
-            # this may be a retry due to locked clusters
-            if cluster.id in exclude:
-                log.debug('    excluded')
+                log.debug('    %s: ec2 key pair mismatch' % cluster_id)
                 return
 
             # only take persistent clusters
             if cluster.autoterminate != 'false':
-                log.debug('    not persistent')
-                return
-
-            # match pool name, and (bootstrap) hash
-            bootstrap_actions = _yield_all_bootstrap_actions(
-                emr_conn, cluster.id)
-            pool_hash, pool_name = _pool_hash_and_name(bootstrap_actions)
-
-            if req_hash != pool_hash:
-                log.debug('    pool hash mismatch')
-                return
-
-            if self._opts['pool_name'] != pool_name:
-                log.debug('    pool name mismatch')
+                log.debug('    %s: not persistent' % cluster_id)
                 return
 
             if self._opts['release_label']:
@@ -2876,7 +3215,7 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
                 release_label = getattr(cluster, 'releaselabel', '')
 
                 if release_label != self._opts['release_label']:
-                    log.debug('    release label mismatch')
+                    log.debug('    %s: release label mismatch' % cluster_id)
                     return
 
                 # used below
@@ -2890,7 +3229,7 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
                 # be a full major.minor.patch, so checking matching
                 # prefixes should be sufficient.
                 if not image_version.startswith(self._opts['image_version']):
-                    log.debug('    image version mismatch')
+                    log.debug('    %s: image version mismatch' % cluster_id)
                     return
 
                 max_steps = map_version(
@@ -2906,27 +3245,28 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
                     a.lower() for a in applications)
 
                 if not expected_applications <= cluster_applications:
-                    log.debug('    missing applications: %s' % ', '.join(
-                        sorted(expected_applications - cluster_applications)))
+                    log.debug('    %s: missing applications: %s' % (
+                        cluster_id, ', '.join(sorted(
+                            expected_applications - cluster_applications))))
                     return
 
             emr_configurations = _decode_configurations_from_api(
                 getattr(cluster, 'configurations', []))
             if self._opts['emr_configurations'] != emr_configurations:
-                log.debug('    emr configurations mismatch')
+                log.debug('    %s: emr configurations mismatch' % cluster_id)
                 return
 
             subnet = getattr(
                 cluster.ec2instanceattributes, 'ec2subnetid', None)
             if subnet != (self._opts['subnet'] or None):
-                log.debug('    subnet mismatch')
+                log.debug('    %s: subnet mismatch' % cluster_id)
                 return
 
             steps = _list_all_steps(emr_conn, cluster.id)
 
             # don't add more steps than EMR will allow/display through the API
             if len(steps) + num_steps > max_steps:
-                log.debug('    no room for our steps')
+                log.debug('    %s: no room for our steps' % cluster_id)
                 return
 
             # in rare cases, cluster can be WAITING *and* have incomplete
@@ -2940,7 +3280,7 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
                      is None) and
                     getattr(step.status, 'state', None) not in
                         ('CANCELLED', 'INTERRUPTED')):
-                    log.debug('    unfinished steps')
+                    log.debug('    %s: unfinished steps' % cluster_id)
                     return
 
             # total compute units per group
@@ -2958,7 +3298,8 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
 
                 # unknown, new kind of role; bail out!
                 if role not in ('core', 'master', 'task'):
-                    log.debug('    unknown instance group role: %s' % role)
+                    log.debug('    %s: unknown instance group role: %s' % (
+                        cluster_id, role))
                     return
 
                 req_instance_type = role_to_req_instance_type[role]
@@ -2967,7 +3308,7 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
                     mem = EC2_INSTANCE_TYPE_TO_MEMORY.get(ig.instancetype, 0.0)
                     req_mem = role_to_req_mem.get(role, 0.0)
                     if mem < req_mem:
-                        log.debug('    too little memory')
+                        log.debug('    %s: too little memory' % cluster_id)
                         return
 
                 # if bid price is too low, don't count compute units
@@ -3012,7 +3353,7 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
                 if req_num_instances > role_to_matched_instances[role]:
                     cu = role_to_cu.get(role, 0.0)
                     if cu < req_cu:
-                        log.debug('    too few compute units')
+                        log.debug('    %s: too few compute units' % cluster_id)
                         return
 
             # make a sort key
@@ -3020,13 +3361,18 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
                         role_to_cu['master'],
                         _est_time_to_hour(cluster))
 
-            log.debug('    OK')
+            log.debug('    %s: OK' % cluster_id)
             key_cluster_steps_list.append((sort_key, cluster.id, len(steps)))
 
-        for cluster_summary in _yield_all_clusters(
-                emr_conn, cluster_states=['WAITING']):
-            cluster = _patched_describe_cluster(emr_conn, cluster_summary.id)
-            add_if_match(cluster)
+        cluster_ids = [
+            cluster_summary.id for cluster_summary in _yield_all_clusters(
+                emr_conn, cluster_states=['WAITING'])]
+
+        # inspect clusters in parallel (emr_conn keeps us from making
+        # API calls faster than _EMR_API_RATE)
+        _map_in_threads(add_if_match, cluster_ids, _POOL_INSPECTION_THREADS)
+
+        _save_pool_index(pool_index)
 
         return [(cluster_id, cluster_num_steps) for
                 (sort_key, cluster_id, cluster_num_steps)
@@ -3056,16 +3402,22 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
                     ': ' if cluster_info_list else '',
                     ', '.join(c for c,n in reversed(cluster_info_list))))
             if cluster_info_list:
-                cluster_id, num_steps = cluster_info_list[-1]
-                status = _attempt_to_acquire_lock(
-                    self.fs, self._lock_uri(cluster_id, num_steps),
-                    self._opts['cloud_fs_sync_secs'], self._job_key)
-                if status:
-                    log.debug('Acquired lock on cluster %s', cluster_id)
-                    return cluster_id
-                else:
-                    log.debug("Can't acquire lock on cluster %s", cluster_id)
-                    exclude.add(cluster_id)
+                # try the best cluster first, and stop as soon as we get
+                # a lock. If we don't get any locks, look again (there
+                # may be new clusters)
+                for cluster_id, cluster_num_steps in reversed(
+                        cluster_info_list):
+                    status = _attempt_to_acquire_lock(
+                        self.fs, self._lock_uri(cluster_id, cluster_num_steps),
+                        self._opts['cloud_fs_sync_secs'], self._job_key,
+                        conditional=self._opts['s3_strong_consistency'])
+                    if status:
+                        log.debug('Acquired lock on cluster %s', cluster_id)
+                        return cluster_id
+                    else:
+                        log.debug("Can't acquire lock on cluster %s",
+                                  cluster_id)
+                        exclude.add(cluster_id)
             elif max_wait_time == 0:
                 return None
             else:
@@ -3095,8 +3447,7 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
         """
         things_to_hash = [
             # exclude mrjob.tar.gz because it's only created if the
-            # job starts its own cluster (also, its hash changes every time
-            # since the tarball contains different timestamps).
+            # job starts its own cluster (we hash mrjob's version instead).
             # The filenames/md5sums are sorted because we need to
             # ensure the order they're added doesn't affect the hash
             # here. Previously this used a dict, but Python doesn't
@@ -3168,7 +3519,7 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
                 lambda ex: isinstance(
                     ex, boto.https_connection.InvalidCertificateException))
 
-        return wrap_aws_conn(conn)
+        return wrap_aws_conn(conn, rate=_EMR_API_RATE, burst=_EMR_API_BURST)
 
     def _describe_cluster(self):
         emr_conn = self.make_emr_conn()
@@ -3289,7 +3640,8 @@ class EMRJobRunner(MRJobRunner, LogInterpretationMixin):
             host=host,
             security_token=self._opts['aws_security_token'])
 
-        return wrap_aws_conn(raw_iam_conn)
+        return wrap_aws_conn(
+            raw_iam_conn, rate=_EMR_API_RATE, burst=_EMR_API_BURST)
 
     # Spark
 
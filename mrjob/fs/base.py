@@ -15,11 +15,16 @@ import logging
 import os.path
 import posixpath
 
+from mrjob.parallel import _map_in_threads
+from mrjob.parallel import _read_ahead
 from mrjob.parse import is_uri
 from mrjob.parse import urlparse
 
 log = logging.getLogger(__name__)
 
+# default max number of threads a *_many() method uses at once
+_DEFAULT_MAX_THREADS = 8
+
 
 class Filesystem(object):
     """Some simple filesystem operations that are common across the local
@@ -36,6 +41,12 @@ class Filesystem(object):
     * :py:class:`mrjob.fs.s3.S3Filesystem`: ``s3://bucket/path``,
       ``s3n://bucket/path``
     * :py:class:`mrjob.fs.ssh.SSHFilesystem`: ``ssh://hostname/path``
+
+    Methods ending in ``_many()`` (:py:meth:`ls_many`, :py:meth:`exists_many`,
+    :py:meth:`cat_many`, :py:meth:`put_many`) do the same thing as their
+    single-path counterparts on many paths at once, using up to
+    *max_threads* threads between them, so that we aren't waiting on one
+    network round trip after another.
     """
 
     def can_handle_path(self, path):
@@ -48,6 +59,21 @@ class Filesystem(object):
             for line in self._cat_file(filename):
                 yield line
 
+    def cat_many(self, path_globs, max_threads=_DEFAULT_MAX_THREADS):
+        """Like :py:meth:`cat`, for each of *path_globs* in turn. Globs are
+        listed concurrently, and the next few files are read in the
+        background while we yield lines from the current one.
+
+        .. versionadded:: 0.5.7
+        """
+        paths = []
+        for glob_paths in self.ls_many(path_globs, max_threads=max_threads):
+            paths.extend(glob_paths)
+
+        for line in _read_ahead(paths, self._cat_file,
+                                max_threads=max_threads):
+            yield line
+
     def du(self, path_glob):
         """Get the total size of files matching ``path_glob``
 
@@ -65,9 +91,29 @@ class Filesystem(object):
         """
         raise NotImplementedError
 
+    def ls_many(self, path_globs, max_threads=_DEFAULT_MAX_THREADS):
+        """Like :py:meth:`ls`, for several globs at once. Returns a list
+        containing the list of paths matching each of *path_globs*.
+
+        .. versionadded:: 0.5.7
+        """
+        return _map_in_threads(
+            lambda path_glob: list(self.ls(path_glob)),
+            path_globs, max_threads)
+
     def _cat_file(self, path):
         raise NotImplementedError
 
+    def _tail_file(self, path, num_bytes):
+        """Return the last *num_bytes* bytes of the file at *path* (or
+        the whole file, if it's smaller), without reading the rest of it.
+        Doesn't decompress files.
+
+        Raises :py:class:`NotImplementedError` if this filesystem can't
+        efficiently read the end of a file.
+        """
+        raise NotImplementedError
+
     def exists(self, path_glob):
         """Does the given path/URI exist?
 
@@ -75,6 +121,14 @@ class Filesystem(object):
         """
         raise NotImplementedError
 
+    def exists_many(self, path_globs, max_threads=_DEFAULT_MAX_THREADS):
+        """Like :py:meth:`exists`, for several globs at once. Returns a list
+        of booleans, one for each of *path_globs*.
+
+        .. versionadded:: 0.5.7
+        """
+        return _map_in_threads(self.exists, path_globs, max_threads)
+
     def join(self, path, *paths):
         """Join *paths* onto *path* (which may be a URI)"""
         all_paths = (path,) + paths
@@ -115,6 +169,23 @@ class Filesystem(object):
                     ' alias will be removed in v0.6.0')
         return self.join(dirname, filename)
 
+    def put(self, src, path):
+        """Upload a local file *src* to *path*.
+
+        Corresponds roughly to: ``hadoop fs -put src path``
+
+        .. versionadded:: 0.5.7
+        """
+        raise NotImplementedError
+
+    def put_many(self, src_path_pairs, max_threads=_DEFAULT_MAX_THREADS):
+        """Like :py:meth:`put`, for a sequence of ``(src, path)`` pairs.
+
+        .. versionadded:: 0.5.7
+        """
+        _map_in_threads(lambda src_path: self.put(*src_path),
+                        src_path_pairs, max_threads)
+
     def rm(self, path_glob):
         """Recursively delete the given file/directory, if it exists
 
@@ -0,0 +1,220 @@
+# Copyright 2016 Yelp
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+import threading
+import time
+from functools import wraps
+
+try:
+    from collections import OrderedDict
+except ImportError:  # Python 2.6
+    OrderedDict = None
+
+from mrjob.fs.base import _DEFAULT_MAX_THREADS
+from mrjob.fs.base import Filesystem
+from mrjob.parse import is_uri
+
+log = logging.getLogger(__name__)
+
+# default max number of results to remember
+_DEFAULT_MAX_ENTRIES = 1000
+
+# methods that aren't part of Filesystem, but that change files. Calling
+# any of these through CachingFilesystem clears the cache.
+_OTHER_METHODS_THAT_WRITE = set([
+    'delete_keys',  # S3Filesystem
+    '_put_many',
+    'create_bucket',
+    'delete_bucket',
+    'make_s3_key',  # only used to write keys
+])
+
+
+class CachingFilesystem(Filesystem):
+    """Wrap a filesystem (typically a
+    :py:class:`~mrjob.fs.composite.CompositeFilesystem`), and remember
+    the results of :py:meth:`ls`, :py:meth:`exists`, :py:meth:`du`, and
+    :py:meth:`md5sum` for *cache_secs* seconds, so that we don't have to
+    go over the network (or launch the JVM) to ask the same question twice.
+
+    Only results for URIs are cached; the local filesystem is fast, and
+    mrjob writes local files directly rather than through a filesystem
+    object.
+
+    Calling a method that changes files (:py:meth:`rm`, :py:meth:`touchz`,
+    :py:meth:`mkdir`, ``put()``, etc.) through this object clears the cache.
+    Changes made some other way (e.g. by Hadoop) won't be noticed until
+    cached results expire.
+
+    Any other attribute is passed through to the wrapped filesystem.
+
+    .. versionadded:: 0.5.7
+    """
+    def __init__(self, fs, cache_secs, max_entries=_DEFAULT_MAX_ENTRIES):
+        """
+        :param fs: the filesystem to wrap
+        :param cache_secs: how long to remember results, in seconds
+        :param max_entries: how many results to remember. If there are more
+                            than this, forget the least recently used ones.
+        """
+        super(CachingFilesystem, self).__init__()
+        self.fs = fs
+        self._cache_secs = cache_secs
+        self._max_entries = max_entries
+
+        # map from (method name, path) to (time cached, result), least
+        # recently used first. Python 2.6 has no OrderedDict, so there we
+        # forget arbitrary entries instead.
+        if OrderedDict:
+            self._cache = OrderedDict()
+        else:
+            self._cache = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # don't recurse if __init__() hasn't set self.fs yet
+        if name == 'fs':
+            raise AttributeError(name)
+
+        attr = getattr(self.fs, name)
+
+        if name in _OTHER_METHODS_THAT_WRITE and callable(attr):
+            @wraps(attr)
+            def write_method(*args, **kwargs):
+                try:
+                    return attr(*args, **kwargs)
+                finally:
+                    self.clear_cache()
+
+            return write_method
+
+        return attr
+
+    def clear_cache(self):
+        """Forget all cached results."""
+        with self._lock:
+            self._cache.clear()
+
+    def _cache_get(self, key):
+        """Return ``(True, result)`` if *key* is in the cache and hasn't
+        expired, and ``(False, None)`` otherwise."""
+        now = time.time()
+
+        with self._lock:
+            entry = self._cache.pop(key, None)
+            if entry is None:
+                return False, None
+
+            if now - entry[0] > self._cache_secs:
+                return False, None
+
+            # re-insert, so this is now the most recently used entry
+            self._cache[key] = entry
+
+            return True, entry[1]
+
+    def _cache_put(self, key, result):
+        with self._lock:
+            self._cache.pop(key, None)
+            self._cache[key] = (time.time(), result)
+
+            while len(self._cache) > self._max_entries:
+                if OrderedDict:
+                    self._cache.popitem(last=False)
+                else:
+                    self._cache.popitem()
+
+    def _cached(self, method, path):
+        if not is_uri(path):
+            return getattr(self.fs, method)(path)
+
+        key = (method, path)
+
+        found, result = self._cache_get(key)
+        if not found:
+            result = getattr(self.fs, method)(path)
+            self._cache_put(key, result)
+
+        return result
+
+    def can_handle_path(self, path):
+        return self.fs.can_handle_path(path)
+
+    def du(self, path_glob):
+        return self._cached('du', path_glob)
+
+    def ls(self, path_glob):
+        if not is_uri(path_glob):
+            for path in self.fs.ls(path_glob):
+                yield path
+            return
+
+        found, paths = self._cache_get(('ls', path_glob))
+
+        if not found:
+            paths = list(self.fs.ls(path_glob))
+            self._cache_put(('ls', path_glob), paths)
+
+        for path in paths:
+            yield path
+
+    def _cat_file(self, path):
+        return self.fs._cat_file(path)
+
+    def _tail_file(self, path, num_bytes):
+        return self.fs._tail_file(path, num_bytes)
+
+    def exists(self, path_glob):
+        # if we already know there are files in path_glob, it exists
+        found, paths = self._cache_get(('ls', path_glob))
+        if found and paths:
+            return True
+
+        return self._cached('exists', path_glob)
+
+    def join(self, path, *paths):
+        return self.fs.join(path, *paths)
+
+    def md5sum(self, path_glob):
+        return self._cached('md5sum', path_glob)
+
+    def mkdir(self, path):
+        try:
+            return self.fs.mkdir(path)
+        finally:
+            self.clear_cache()
+
+    def put(self, src, path):
+        try:
+            return self.fs.put(src, path)
+        finally:
+            self.clear_cache()
+
+    def put_many(self, src_path_pairs, max_threads=_DEFAULT_MAX_THREADS):
+        try:
+            return self.fs.put_many(src_path_pairs, max_threads=max_threads)
+        finally:
+            self.clear_cache()
+
+    def rm(self, path_glob):
+        try:
+            return self.fs.rm(path_glob)
+        finally:
+            self.clear_cache()
+
+    def touchz(self, path):
+        try:
+            return self.fs.touchz(path)
+        finally:
+            self.clear_cache()
@@ -14,6 +14,7 @@
 # limitations under the License.
 import logging
 
+from mrjob.fs.base import _DEFAULT_MAX_THREADS
 from mrjob.fs.base import Filesystem
 
 
@@ -46,13 +47,18 @@ class CompositeFilesystem(Filesystem):
         :py:class:`IOError`, save the exception and try the rest. If none
         succeed, re-raise the first exception.
         """
+        return self._try_filesystems(
+            path, lambda fs: getattr(fs, action)(path, *args, **kwargs))
 
+    def _try_filesystems(self, path, func):
+        """Call ``func(fs)`` on each filesystem object that can handle
+        *path*, as in :py:meth:`_do_action`."""
         first_exception = None
 
         for fs in self.filesystems:
             if fs.can_handle_path(path):
                 try:
-                    return getattr(fs, action)(path, *args, **kwargs)
+                    return func(fs)
                 except IOError as e:
                     if first_exception is None:
                         first_exception = e
@@ -72,6 +78,9 @@ class CompositeFilesystem(Filesystem):
         for line in self._do_action('_cat_file', path):
             yield line
 
+    def _tail_file(self, path, num_bytes):
+        return self._do_action('_tail_file', path, num_bytes)
+
     def mkdir(self, path):
         return self._do_action('mkdir', path)
 
@@ -81,6 +90,32 @@ class CompositeFilesystem(Filesystem):
     def join(self, path, *paths):
         return self._do_action('join', path, *paths)
 
+    def put(self, src, path):
+        # path is the second argument, so we can't use _do_action()
+        return self._try_filesystems(path, lambda fs: fs.put(src, path))
+
+    def put_many(self, src_path_pairs, max_threads=_DEFAULT_MAX_THREADS):
+        """Hand each ``(src, path)`` pair to the first filesystem that can
+        handle *path*, so that filesystems can upload their share of the
+        files however is fastest (e.g. batching ``hadoop fs -put``).
+
+        Unlike :py:meth:`put`, this doesn't fall back to other filesystems
+        if one raises :py:class:`IOError`.
+        """
+        fs_pairs = [[] for _ in self.filesystems]
+
+        for src, path in src_path_pairs:
+            for i, fs in enumerate(self.filesystems):
+                if fs.can_handle_path(path):
+                    fs_pairs[i].append((src, path))
+                    break
+            else:
+                raise IOError("Can't handle path: %s" % path)
+
+        for fs, pairs in zip(self.filesystems, fs_pairs):
+            if pairs:
+                fs.put_many(pairs, max_threads=max_threads)
+
     def rm(self, path_glob):
         return self._do_action('rm', path_glob)
 
@@ -15,13 +15,19 @@
 import fnmatch
 import logging
 import mimetypes
+import threading
 
 from mrjob.fs.base import Filesystem
+from mrjob.parallel import _prefetch
 from mrjob.parse import urlparse
+from mrjob.retry import RetryWrapper
+from mrjob.retry import _shared_token_bucket
 from mrjob.runner import GLOB_RE
+from mrjob.util import _ChunkReader
 from mrjob.util import read_file
 
 try:
+    import httplib2
     from oauth2client.client import GoogleCredentials
     from googleapiclient import discovery
     from googleapiclient import errors as google_errors
@@ -29,14 +35,13 @@ try:
 except ImportError:
     # don't require googleapiclient; MRJobs don't actually need it when running
     # inside hadoop streaming
+    httplib2 = None
     GoogleCredentials = None
     discovery = None
     google_errors = None
     google_http = None
 
 import io
-import os
-import tempfile
 import base64
 import binascii
 
@@ -48,6 +53,112 @@ _GCS_API_VERSION = 'v1'
 _BINARY_MIMETYPE = 'application/octet-stream'
 _LS_FIELDS_TO_RETURN = 'nextPageToken,items(name,size,timeCreated,md5Hash)'
 
+# when we only need some metadata, ask for less, so responses are smaller
+_LS_NAME_FIELDS = 'nextPageToken,items(name)'
+_LS_SIZE_FIELDS = 'nextPageToken,items(name,size)'
+
+# max number of objects to list per request (this is also the GCS maximum)
+_LS_MAX_RESULTS = 1000
+
+# max number of requests in a batch (this is the GCS maximum)
+_MAX_BATCH_SIZE = 100
+
+# when streaming a file, download it in chunks of this many bytes
+_DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# ...and download up to this many chunks while the caller is still
+# reading the current one
+_DOWNLOAD_CHUNKS_AHEAD = 1
+
+# if a Google API tells us to slow down (HTTP 429), how long to wait (in
+# seconds) before trying again?
+_GCP_BACKOFF = 1
+_GCP_BACKOFF_MULTIPLIER = 2
+_GCP_MAX_BACKOFF = 64
+_GCP_MAX_TRIES = 10
+
+# if lots of calls to the same API are being throttled at once, only retry
+# this many per second (across this whole process), with bursts of up to
+# _GCP_RETRY_BURST. Past that, we back off as far as we can and wait our turn
+_GCP_RETRY_RATE = 1
+_GCP_RETRY_BURST = 10
+
+_TOO_MANY_REQUESTS = 429
+
+
+class _TooManyRequestsError(Exception):
+    """Raised inside :py:func:`_http_with_retries` when we get an
+    HTTP 429 response, so that we can retry."""
+    def __init__(self, resp, content):
+        super(_TooManyRequestsError, self).__init__(resp.status)
+        self.resp = resp
+        self.content = content
+
+
+class _RaiseOnTooManyRequests(object):
+    """Wrap an :py:class:`httplib2.Http` object's ``request()`` method,
+    raising :py:class:`_TooManyRequestsError` on HTTP 429."""
+    def __init__(self, request):
+        self._request = request
+
+    def request(self, *args, **kwargs):
+        resp, content = self._request(*args, **kwargs)
+        if resp.status == _TOO_MANY_REQUESTS:
+            raise _TooManyRequestsError(resp, content)
+        return resp, content
+
+
+def _http_with_retries(api_name, rate=None, burst=1, http=None):
+    """Return an :py:class:`httplib2.Http` object that retries (with
+    jittered exponential backoff) when *api_name* tells us we're making
+    too many requests. Retries are limited by a retry budget shared by
+    everything in this process that uses *api_name*.
+
+    It's safe to retry on HTTP 429 (even for requests that change
+    things) because the request wasn't processed.
+
+    :type rate: float
+    :param rate: if set, make at most this many requests per second (plus
+                 bursts of up to *burst* requests) to *api_name*, across
+                 this whole process
+    :param http: the :py:class:`httplib2.Http` object to patch (by
+                 default, we make a new one)
+
+    Pass the result to ``credentials.authorize()``.
+    """
+    if http is None:
+        http = httplib2.Http()
+
+    rate_limiter = None
+    if rate:
+        rate_limiter = _shared_token_bucket(
+            'gcp:%s' % api_name, rate, burst=burst)
+
+    retry_budget = _shared_token_bucket(
+        'gcp:%s:retries' % api_name, _GCP_RETRY_RATE, burst=_GCP_RETRY_BURST)
+
+    wrapped = RetryWrapper(
+        _RaiseOnTooManyRequests(http.request),
+        retry_if=lambda ex: isinstance(ex, _TooManyRequestsError),
+        backoff=_GCP_BACKOFF,
+        multiplier=_GCP_BACKOFF_MULTIPLIER,
+        max_tries=_GCP_MAX_TRIES,
+        max_backoff=_GCP_MAX_BACKOFF,
+        jitter=True,
+        rate_limiter=rate_limiter,
+        retry_budget=retry_budget)
+
+    def request(*args, **kwargs):
+        try:
+            return wrapped.request(*args, **kwargs)
+        except _TooManyRequestsError as ex:
+            # out of tries; let googleapiclient handle the error
+            return ex.resp, ex.content
+
+    http.request = request
+
+    return http
+
 
 def _base64_to_hex(base64_encoded):
     base64_decoded = base64.decodestring(base64_encoded)
@@ -83,28 +194,51 @@ class GCSFilesystem(Filesystem):
     """
     def __init__(self):
         self._api_client = None
+        self._credentials = None
+
+        # httplib2.Http objects aren't thread-safe, so each thread makes
+        # requests with its own (see _thread_http())
+        self._local = threading.local()
 
     @property
     def api_client(self):
         if not self._api_client:
-            credentials = GoogleCredentials.get_application_default()
+            self._credentials = GoogleCredentials.get_application_default()
             self._api_client = discovery.build(
-                _GCS_API_ENDPOINT, _GCS_API_VERSION, credentials=credentials)
+                _GCS_API_ENDPOINT, _GCS_API_VERSION,
+                http=self._credentials.authorize(
+                    _http_with_retries(_GCS_API_ENDPOINT)))
 
         return self._api_client
 
+    def _thread_http(self):
+        """Get an authorized :py:class:`httplib2.Http` object for use
+        by the current thread only. Returns ``None`` (use the API client's
+        own HTTP object) if the API client wasn't created by us."""
+        if not hasattr(self._local, 'http'):
+            self.api_client  # make sure we have credentials
+
+            if self._credentials is None:
+                return None
+
+            self._local.http = self._credentials.authorize(
+                _http_with_retries(_GCS_API_ENDPOINT))
+
+        return self._local.http
+
     def can_handle_path(self, path):
         return is_gcs_uri(path)
 
     def du(self, path_glob):
         """Get the size of all files matching path_glob."""
-        return sum(item['size'] for item in self._ls_detailed(path_glob))
+        return sum(item['size'] for item in
+                   self._ls_detailed(path_glob, fields=_LS_SIZE_FIELDS))
 
     def ls(self, path_glob):
-        for item in self._ls_detailed(path_glob):
+        for item in self._ls_detailed(path_glob, fields=_LS_NAME_FIELDS):
             yield item['_uri']
 
-    def _ls_detailed(self, path_glob):
+    def _ls_detailed(self, path_glob, fields=_LS_FIELDS_TO_RETURN):
         """Recursively list files on GCS and includes some metadata about them:
         - object name
         - size
@@ -114,6 +248,10 @@ class GCSFilesystem(Filesystem):
         *path_glob* can include ``?`` to match single characters or
         ``*`` to match 0 or more characters. Both ``?`` and ``*`` can match
         ``/``.
+
+        *fields* is the fields to ask GCS for (``name`` and ``nextPageToken``
+        are required). Results are fetched a page at a time, so we don't
+        list more than we need to.
         """
 
         scheme = urlparse(path_glob).scheme
@@ -127,12 +265,13 @@ class GCSFilesystem(Filesystem):
             dir_glob = path_glob + '*'
 
         list_request = self.api_client.objects().list(
-            bucket=bucket_name, prefix=base_name, fields=_LS_FIELDS_TO_RETURN)
+            bucket=bucket_name, prefix=base_name, fields=fields,
+            maxResults=_LS_MAX_RESULTS)
 
         uri_prefix = '%s://%s' % (scheme, bucket_name)
         while list_request:
             try:
-                resp = list_request.execute()
+                resp = list_request.execute(http=self._thread_http())
             except google_errors.HttpError as e:
                 if e.resp.status == 404:
                     return
@@ -155,7 +294,8 @@ class GCSFilesystem(Filesystem):
 
                 item['_uri'] = uri
                 item['bucket'] = bucket_name
-                item['size'] = int(item['size'])
+                if 'size' in item:
+                    item['size'] = int(item['size'])
                 yield item
 
             list_request = self.api_client.objects().list_next(
@@ -171,17 +311,13 @@ class GCSFilesystem(Filesystem):
         return _base64_to_hex(item['md5Hash'])
 
     def _cat_file(self, gcs_uri):
-        tmp_fd, tmp_path = tempfile.mkstemp()
-
-        with os.fdopen(tmp_fd, 'w+b') as tmp_fileobj:
-            self._download_io(gcs_uri, tmp_fileobj)
+        # stream the file in chunks, rather than downloading it all to
+        # a temp file first
+        fileobj = _ChunkReader(_prefetch(
+            self._download_chunks(gcs_uri), _DOWNLOAD_CHUNKS_AHEAD))
 
-            tmp_fileobj.seek(0)
-
-            line_gen = read_file(
-                gcs_uri, fileobj=tmp_fileobj, yields_lines=False)
-            for current_line in line_gen:
-                yield current_line
+        return read_file(gcs_uri, fileobj=fileobj, yields_lines=False,
+                         cleanup=fileobj.close)
 
     def mkdir(self, dest):
         """Make a directory. This does nothing on GCS because there are
@@ -204,14 +340,33 @@ class GCSFilesystem(Filesystem):
         return any(paths)
 
     def rm(self, path_glob):
-        """Remove all files matching the given glob."""
-        bucket_name, base_name = _path_glob_to_parsed_gcs_uri(path_glob)
+        """Remove all files matching the given glob.
+
+        Objects are deleted in batches of up to 100 per HTTP request.
+        """
+        items = list(self._ls_detailed(path_glob, fields=_LS_NAME_FIELDS))
+
+        errors = []
 
-        for item in self._ls_detailed(path_glob):
-            req = self.api_client.objects().delete(
-                bucket=bucket_name, object=item['name'])
-            log.debug("deleting " + item['_uri'])
-            req.execute()
+        def callback(request_id, response, exception):
+            # objects can disappear between listing and deleting them
+            if exception is not None and not (
+                    isinstance(exception, google_errors.HttpError) and
+                    exception.resp.status == 404):
+                errors.append(exception)
+
+        for i in range(0, len(items), _MAX_BATCH_SIZE):
+            batch = self.api_client.new_batch_http_request(callback=callback)
+
+            for item in items[i:i + _MAX_BATCH_SIZE]:
+                log.debug("deleting " + item['_uri'])
+                batch.add(self.api_client.objects().delete(
+                    bucket=item['bucket'], object=item['name']))
+
+            batch.execute(http=self._thread_http())
+
+            if errors:
+                raise errors[0]
 
     def touchz(self, dest_uri):
         with io.BytesIO() as io_obj:
@@ -223,12 +378,30 @@ class GCSFilesystem(Filesystem):
             return self._upload_io(io_obj, dest_uri)
 
     def _download_io(self, src_uri, io_obj):
+        for chunk in self._download_chunks(src_uri):
+            io_obj.write(chunk)
+
+        return io_obj
+
+    def _download_chunks(self, src_uri):
+        """Download *src_uri*, yielding chunks of bytes."""
         bucket_name, object_name = parse_gcs_uri(src_uri)
 
-        # Chunked file download
+        # Chunked file download. MediaIoBaseDownload writes each chunk to
+        # buf; we empty it out after every chunk
+        buf = io.BytesIO()
+
         req = self.api_client.objects().get_media(
             bucket=bucket_name, object=object_name)
-        downloader = google_http.MediaIoBaseDownload(io_obj, req)
+
+        # we're probably in a background thread (see _cat_file()), so
+        # don't share the API client's HTTP object
+        http = self._thread_http()
+        if http is not None:
+            req.http = http
+
+        downloader = google_http.MediaIoBaseDownload(
+            buf, req, chunksize=_DOWNLOAD_CHUNK_SIZE)
 
         done = False
         while not done:
@@ -245,25 +418,41 @@ class GCSFilesystem(Filesystem):
             if status:
                 log.debug("Download %d%%." % int(status.progress() * 100))
 
+            chunk = buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+
+            if chunk:
+                yield chunk
+
         log.debug("Download Complete for %s", src_uri)
-        return io_obj
 
     def _upload_io(self, io_obj, dest_uri, metadata=False):
         bucket, name = parse_gcs_uri(dest_uri)
-        if self.exists(dest_uri):
-            raise Exception("File already exists: " + dest_uri)
 
         mimetype, _ = mimetypes.guess_type(dest_uri)
         mimetype = mimetype or _BINARY_MIMETYPE
 
-        # Chunked file upload
+        # Chunked file upload. ifGenerationMatch=0 means only upload if
+        # the object doesn't already exist, without having to check first
         media = google_http.MediaIoBaseUpload(io_obj, mimetype, resumable=True)
         upload_req = self.api_client.objects().insert(
-            bucket=bucket, name=name, media_body=media)
+            bucket=bucket, name=name, media_body=media, ifGenerationMatch=0)
+
+        # we may be uploading several files at once, in separate threads
+        http = self._thread_http()
 
         upload_resp = None
         while upload_resp is None:
-            status, upload_resp = upload_req.next_chunk()
+            try:
+                status, upload_resp = upload_req.next_chunk(http=http)
+            except google_errors.HttpError as e:
+                # 412 is "precondition failed"
+                if e.resp.status == 412:
+                    raise Exception("File already exists: " + dest_uri)
+
+                raise
+
             if status:
                 log.debug("Uploaded %d%%." % int(status.progress() * 100))
 
@@ -271,7 +460,7 @@ class GCSFilesystem(Filesystem):
 
         if metadata:
             return self.api_client.objects().get(
-                bucket=bucket, object=name).execute()
+                bucket=bucket, object=name).execute(http=http)
 
     def list_buckets(self, project, prefix=None):
         """List buckets on GCS."""
@@ -280,14 +469,14 @@ class GCSFilesystem(Filesystem):
             list_kwargs['prefix'] = prefix
 
         req = self.api_client.buckets().list(**list_kwargs)
-        resp = req.execute()
+        resp = req.execute(http=self._thread_http())
 
         buckets_to_return = resp.get('items') or []
         return buckets_to_return
 
     def get_bucket(self, bucket):
         req = self.api_client.buckets().get(bucket=bucket)
-        return req.execute()
+        return req.execute(http=self._thread_http())
 
     def create_bucket(self, project, name,
                       location=None, object_ttl_days=None):
@@ -307,11 +496,11 @@ class GCSFilesystem(Filesystem):
             body['lifecycle'] = dict(rule=[lifecycle_rule])
 
         req = self.api_client.buckets().insert(project=project, body=body)
-        return req.execute()
+        return req.execute(http=self._thread_http())
 
     def delete_bucket(self, bucket):
         req = self.api_client.buckets().delete(bucket=bucket)
-        return req.execute()
+        return req.execute(http=self._thread_http())
 
 
 # The equivalent S3 methods are in parse.py but it's cleaner to keep them
@@ -15,6 +15,7 @@
 # limitations under the License.
 import logging
 import os.path
+import posixpath
 import re
 from io import BytesIO
 from subprocess import Popen
@@ -22,6 +23,7 @@ from subprocess import PIPE
 from subprocess import CalledProcessError
 
 from mrjob.compat import uses_yarn
+from mrjob.fs.base import _DEFAULT_MAX_THREADS
 from mrjob.fs.base import Filesystem
 from mrjob.py2 import to_string
 from mrjob.parse import is_uri
@@ -43,6 +45,10 @@ _HADOOP_LS_NO_SUCH_FILE = re.compile(br'^lsr?: .*No such file.*$')
 # used by rm() (see below)
 _HADOOP_RM_NO_SUCH_FILE = re.compile(br'^rmr?: .*No such file.*$')
 
+# max number of paths to pass to a single invocation of hadoop fs, so
+# we don't run up against limits on command line length
+_MAX_PATHS_PER_INVOCATION = 500
+
 # find version string in "Hadoop 0.20.203" etc.
 _HADOOP_VERSION_RE = re.compile(br'^.*?(?P<version>(\d|\.)+).*?$')
 
@@ -309,16 +315,40 @@ class HadoopFilesystem(Filesystem):
         except CalledProcessError:
             raise IOError("Could not check path %s" % path_glob)
 
-    def _put(self, local_path, target):
-        # used by HadoopMRJobRunner._upload_to_hdfs()
-
-        # not exposing this method because it's not part of the general FS
-        # interface. Probably want to add cp() at some point
+    def put(self, local_path, target):
         self.invoke_hadoop(['fs', '-put', local_path, target])
 
+    def put_many(self, src_path_pairs, max_threads=_DEFAULT_MAX_THREADS):
+        """Upload files, using one invocation of ``hadoop fs -put`` for
+        all files that keep their names and go into the same directory,
+        since each invocation launches a JVM."""
+        dir_to_srcs = {}
+        renamed = []
+
+        for src, path in src_path_pairs:
+            target_dir, name = posixpath.split(path)
+            if name == os.path.basename(src):
+                dir_to_srcs.setdefault(target_dir, []).append(src)
+            else:
+                renamed.append((src, path))
+
+        for target_dir, srcs in sorted(dir_to_srcs.items()):
+            self._put_many(srcs, target_dir)
+
+        super(HadoopFilesystem, self).put_many(
+            renamed, max_threads=max_threads)
+
+    def _put_many(self, local_paths, target_dir):
+        """Upload *local_paths* into *target_dir* (which should already
+        exist), keeping their names. Uses as few invocations of
+        ``hadoop fs -put`` as possible."""
+        for paths in _batches(local_paths):
+            self.invoke_hadoop(['fs', '-put'] + paths + [target_dir])
+
     def rm(self, path_glob):
         if not is_uri(path_glob):
             super(HadoopFilesystem, self).rm(path_glob)
+            return
 
         version = self.get_hadoop_version()
         if uses_yarn(version):
@@ -338,3 +368,12 @@ class HadoopFilesystem(Filesystem):
             self.invoke_hadoop(['fs', '-touchz', dest])
         except CalledProcessError:
             raise IOError("Could not touchz %s" % dest)
+
+
+def _batches(paths):
+    """Split *paths* into lists of at most
+    :py:data:`_MAX_PATHS_PER_INVOCATION` paths."""
+    paths = list(paths)
+
+    for i in range(0, len(paths), _MAX_PATHS_PER_INVOCATION):
+        yield paths[i:i + _MAX_PATHS_PER_INVOCATION]
@@ -12,16 +12,34 @@
 # limitations under the License.
 import glob
 import hashlib
+import json
 import logging
 import os
 import shutil
+import threading
 
 from mrjob.fs.base import Filesystem
 from mrjob.parse import is_uri
+from mrjob.util import _atomic_write_path
+from mrjob.util import _user_cache_dir
 from mrjob.util import read_file
 
 log = logging.getLogger(__name__)
 
+# map from absolute path to (size, mtime, md5sum) of local files we've
+# already hashed; shared by all LocalFilesystems so that runners in the
+# same process don't have to hash the same file twice
+_md5sum_cache = {}
+
+# paths in _md5sum_cache that we haven't written to the cache file yet
+_unsaved_md5sums = set()
+
+# cache files we've already read into _md5sum_cache
+_md5sum_cache_files_read = set()
+
+# held while using the variables above (but not while hashing files)
+_md5sum_cache_lock = threading.Lock()
+
 
 class LocalFilesystem(Filesystem):
     """Filesystem for local files. Typically you will get one of these via
@@ -45,6 +63,12 @@ class LocalFilesystem(Filesystem):
     def _cat_file(self, filename):
         return read_file(filename)
 
+    def _tail_file(self, path, num_bytes):
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(f.tell() - num_bytes, 0))
+            return f.read()
+
     def mkdir(self, path):
         if not os.path.isdir(path):
             os.makedirs(path)
@@ -52,6 +76,13 @@ class LocalFilesystem(Filesystem):
     def exists(self, path_glob):
         return bool(glob.glob(path_glob))
 
+    def put(self, src, path):
+        dest_dir = os.path.dirname(path)
+        if dest_dir:
+            self.mkdir(dest_dir)
+
+        shutil.copyfile(src, path)
+
     def rm(self, path_glob):
         for path in glob.glob(path_glob):
             if os.path.isdir(path):
@@ -79,5 +110,103 @@ class LocalFilesystem(Filesystem):
         return md5.hexdigest()
 
     def md5sum(self, path):
-        with open(path, 'rb') as f:
-            return self._md5sum_file(f)
+        """Generate the md5 sum of the file at ``path``.
+
+        We remember the result until the file's size or modification time
+        changes, both in memory and in ``md5sums.json`` in mrjob's cache
+        directory (``~/.cache/mrjob`` by default), so later runs don't have
+        to hash the same files again. New md5 sums are written to
+        ``md5sums.json`` in one batch, once the runner is done hashing
+        files to upload.
+
+        .. versionchanged:: 0.5.7
+
+           cache md5 sums of files
+        """
+        abs_path = os.path.abspath(path)
+        st = os.stat(abs_path)
+        size_and_mtime = (st.st_size, st.st_mtime)
+
+        with _md5sum_cache_lock:
+            _read_md5sum_cache()
+            cached = _md5sum_cache.get(abs_path)
+
+        if cached and tuple(cached[:2]) == size_and_mtime:
+            return cached[2]
+
+        with open(abs_path, 'rb') as f:
+            md5sum = self._md5sum_file(f)
+
+        with _md5sum_cache_lock:
+            _md5sum_cache[abs_path] = size_and_mtime + (md5sum,)
+            _unsaved_md5sums.add(abs_path)
+
+        return md5sum
+
+
+def _read_md5sum_cache():
+    """Load the md5 sum cache file into memory, if we haven't already.
+    Call this while holding ``_md5sum_cache_lock``."""
+    cache_path = _md5sum_cache_path()
+    if cache_path in _md5sum_cache_files_read:
+        return
+
+    _md5sum_cache_files_read.add(cache_path)
+
+    for path, entry in _read_md5sum_cache_file(cache_path).items():
+        # what we've hashed in this process is more up-to-date
+        _md5sum_cache.setdefault(path, tuple(entry))
+
+
+def _save_md5sum_cache():
+    """Write md5 sums we've computed since we last called this to the
+    md5 sum cache file, so that later runs can use them. Runners call
+    this once they're done hashing files to upload."""
+    with _md5sum_cache_lock:
+        if not _unsaved_md5sums:
+            return
+
+        cache_path = _md5sum_cache_path()
+
+        # re-read the file, in case another process has added to it
+        cache = _read_md5sum_cache_file(cache_path)
+        for path in _unsaved_md5sums:
+            cache[path] = _md5sum_cache[path]
+
+        _unsaved_md5sums.clear()
+
+        _write_md5sum_cache_file(cache_path, cache)
+
+
+def _md5sum_cache_path():
+    """Where to cache md5 sums of local files between runs."""
+    return os.path.join(_user_cache_dir(), 'md5sums.json')
+
+
+def _read_md5sum_cache_file(cache_path):
+    """Read a map from absolute path to ``[size, mtime, md5sum]`` from
+    *cache_path*. Returns ``{}`` if the file is missing or unreadable."""
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+
+    if not isinstance(cache, dict):
+        return {}
+
+    return cache
+
+
+def _write_md5sum_cache_file(cache_path, cache):
+    """Write *cache* to *cache_path*, leaving out files that no longer
+    exist. If we can't, log it and move on."""
+    cache = dict((path, list(entry)) for path, entry in cache.items()
+                 if os.path.exists(path))
+
+    try:
+        with _atomic_write_path(cache_path) as tmp_path:
+            with open(tmp_path, 'w') as f:
+                json.dump(cache, f)
+    except (IOError, OSError) as ex:
+        log.debug("Couldn't cache md5 sums in %s: %s" % (cache_path, ex))
@@ -14,6 +14,7 @@
 import fnmatch
 import logging
 import socket
+import threading
 
 try:
     import boto
@@ -25,11 +26,15 @@ except ImportError:
 
 from mrjob.aws import s3_endpoint_for_region
 from mrjob.fs.base import Filesystem
+from mrjob.parallel import _map_in_threads
+from mrjob.parallel import _read_ahead
 from mrjob.parse import is_s3_uri
 from mrjob.parse import parse_s3_uri
 from mrjob.parse import urlparse
 from mrjob.retry import RetryWrapper
+from mrjob.retry import _shared_token_bucket
 from mrjob.runner import GLOB_RE
+from mrjob.util import _ChunkReader
 from mrjob.util import read_file
 
 
@@ -38,7 +43,30 @@ log = logging.getLogger(__name__)
 # if EMR throttles us, how long to wait (in seconds) before trying again?
 _EMR_BACKOFF = 20
 _EMR_BACKOFF_MULTIPLIER = 1.5
-_EMR_MAX_TRIES = 20  # this takes about a day before we run out of tries
+# this takes about a day before we run out of tries (about half that,
+# on average, since we back off with jitter)
+_EMR_MAX_TRIES = 20
+
+# if lots of calls to the same endpoint are being throttled at once, only
+# retry this many per second (across this whole process), with bursts of
+# up to _AWS_RETRY_BURST. Past that, throttled calls wait their turn
+_AWS_RETRY_RATE = 1
+_AWS_RETRY_BURST = 10
+
+# download keys bigger than this in parts, with ranged GETs
+_DEFAULT_DOWNLOAD_PART_SIZE = 16 * 1024 * 1024
+
+# how many parts of a key to download at once
+_DEFAULT_DOWNLOAD_THREADS = 4
+
+# how many prefixes to list at once when expanding globs
+_LIST_THREADS = 8
+
+# S3 lets us delete up to this many keys with one request
+_MAX_KEYS_PER_DELETE = 1000
+
+# how many multi-object delete requests to make at once
+_DELETE_THREADS = 4
 
 
 def s3_key_to_uri(s3_key):
@@ -46,9 +74,22 @@ def s3_key_to_uri(s3_key):
     return 's3://%s/%s' % (s3_key.bucket.name, s3_key.name)
 
 
-def wrap_aws_conn(raw_conn):
+def wrap_aws_conn(raw_conn, rate=None, burst=1):
     """Wrap a given boto Connection object so that it can retry when
-    throttled."""
+    throttled.
+
+    Retries back off with random jitter, and are limited by a retry
+    budget shared by every connection to the same host in this process.
+
+    :type rate: float
+    :param rate: if set, make at most this many calls per second (plus
+                 bursts of up to *burst* calls) to *raw_conn*'s host,
+                 across every connection to that host in this process
+
+    .. versionchanged:: 0.5.7
+
+       added *rate* and *burst*; back off with jitter
+    """
     def retry_if(ex):
         """Retry if we get a server error indicating throttling. Also
         handle spurious 505s that are thought to be part of a load
@@ -61,11 +102,24 @@ def wrap_aws_conn(raw_conn):
                  ex.args in ((104, 'Connection reset by peer'),
                              (110, 'Connection timed out'))))
 
+    host = getattr(raw_conn, 'host', None)
+
+    rate_limiter = None
+    if rate:
+        rate_limiter = _shared_token_bucket(
+            'aws:%s' % host, rate, burst=burst)
+
+    retry_budget = _shared_token_bucket(
+        'aws:%s:retries' % host, _AWS_RETRY_RATE, burst=_AWS_RETRY_BURST)
+
     return RetryWrapper(raw_conn,
                         retry_if=retry_if,
                         backoff=_EMR_BACKOFF,
                         multiplier=_EMR_BACKOFF_MULTIPLIER,
-                        max_tries=_EMR_MAX_TRIES)
+                        max_tries=_EMR_MAX_TRIES,
+                        jitter=True,
+                        rate_limiter=rate_limiter,
+                        retry_budget=retry_budget)
 
 
 class S3Filesystem(Filesystem):
@@ -76,13 +130,24 @@ class S3Filesystem(Filesystem):
     """
 
     def __init__(self, aws_access_key_id=None, aws_secret_access_key=None,
-                 aws_security_token=None, s3_endpoint=None):
+                 aws_security_token=None, s3_endpoint=None,
+                 download_part_size=None, download_threads=None):
         """
         :param aws_access_key_id: Your AWS access key ID
         :param aws_secret_access_key: Your AWS secret access key
         :param aws_security_token: security token for use with temporary
                                    AWS credentials
         :param s3_endpoint: If set, always use this endpoint
+        :param download_part_size: Download keys bigger than this many bytes
+                                   in parts, using ranged GETs. ``0`` means
+                                   to always download keys in one piece.
+                                   Default is 16 MiB.
+        :param download_threads: How many parts of a key to download at
+                                 once. Default is 4.
+
+        .. versionchanged:: 0.5.7
+
+           Added *download_part_size* and *download_threads*
         """
         super(S3Filesystem, self).__init__()
         self._s3_endpoint = s3_endpoint
@@ -90,6 +155,22 @@ class S3Filesystem(Filesystem):
         self._aws_secret_access_key = aws_secret_access_key
         self._aws_security_token = aws_security_token
 
+        if download_part_size is None:
+            download_part_size = _DEFAULT_DOWNLOAD_PART_SIZE
+        self._download_part_size = download_part_size
+
+        if download_threads is None:
+            download_threads = _DEFAULT_DOWNLOAD_THREADS
+        self._download_threads = download_threads
+
+        # map from host to (wrapped) S3 connection
+        self._s3_conns = {}
+        self._s3_conns_lock = threading.Lock()
+
+        # map from bucket name to location (region), or None if we
+        # weren't allowed to look it up
+        self._bucket_locations = {}
+
     def can_handle_path(self, path):
         return is_s3_uri(path)
 
@@ -101,48 +182,105 @@ class S3Filesystem(Filesystem):
         """Recursively list files on S3.
 
         *path_glob* can include ``?`` to match single characters or
-        ``*`` to match 0 or more characters. Both ``?`` and ``*`` can match
-        ``/``.
+        ``*`` to match 0 or more characters. In the last part of the path,
+        both ``?`` and ``*`` can match ``/``.
 
         .. versionchanged:: 0.5.0
 
             You no longer need a trailing slash to list "directories" on S3;
             both ``ls('s3://b/dir')`` and `ls('s3://b/dir/')` will list
             all keys starting with ``dir/``.
-        """
 
-        # clean up the  base uri to ensure we have an equal uri to boto (s3://)
-        # just in case we get passed s3n://
+        .. versionchanged:: 0.5.7
+
+            Wildcards in "directory" names (e.g. ``s3://b/2016-*/part-*``)
+            match only within that directory level, so we don't have to
+            list every key under ``s3://b/2016-``.
+        """
         scheme = urlparse(path_glob).scheme
 
-        # support globs
-        glob_match = GLOB_RE.match(path_glob)
+        for key in self.ls_keys(path_glob):
+            yield '%s://%s/%s' % (scheme, key.bucket.name, key.name)
 
-        # we're going to search for all keys starting with base_uri
+    def ls_keys(self, path_glob):
+        """Like :py:meth:`ls`, but yield boto Keys rather than URIs.
+
+        .. versionadded:: 0.5.7
+        """
+        # cut off path_glob at the first wildcard, so that urlparse()
+        # doesn't mistake "?" for the start of a query string
+        glob_match = GLOB_RE.match(path_glob)
         if glob_match:
-            # cut it off at first wildcard
             base_uri = glob_match.group(1)
         else:
             base_uri = path_glob
 
         bucket_name, base_name = parse_s3_uri(base_uri)
+        key_glob = base_name + path_glob[len(base_uri):]
+
+        bucket = self.get_bucket(bucket_name)
+
+        # expand wildcards in "directory" names one level at a time, so
+        # that we only list keys under directories that match
+        dir_globs = key_glob.split('/')
+        name_glob = dir_globs.pop()
 
+        prefixes = ['']
+        for dir_glob in dir_globs:
+            if GLOB_RE.match(dir_glob):
+                prefixes = self._expand_prefixes(bucket, prefixes, dir_glob)
+            else:
+                prefixes = [prefix + dir_glob + '/' for prefix in prefixes]
+
+        # wildcards in the last part of the glob can match "/". Also
         # allow subdirectories of the path/glob
-        if path_glob and not path_glob.endswith('/'):
-            dir_glob = path_glob + '/*'
+        name_match = GLOB_RE.match(name_glob)
+        if name_match:
+            name_base = name_match.group(1)
         else:
-            dir_glob = path_glob + '*'
+            name_base = name_glob
 
-        bucket = self.get_bucket(bucket_name)
-        for key in bucket.list(base_name):
-            uri = "%s://%s/%s" % (scheme, bucket_name, key.name)
+        if name_glob:
+            subdir_glob = name_glob + '/*'
+        else:
+            subdir_glob = '*'
+
+        for prefix in prefixes:
+            for key in bucket.list(prefix + name_base):
+                name = key.name[len(prefix):]
 
-            # enforce globbing
-            if not (fnmatch.fnmatchcase(uri, path_glob) or
-                    fnmatch.fnmatchcase(uri, dir_glob)):
-                continue
+                # enforce globbing
+                if not (fnmatch.fnmatchcase(name, name_glob) or
+                        fnmatch.fnmatchcase(name, subdir_glob)):
+                    continue
 
-            yield uri
+                yield key
+
+    def _expand_prefixes(self, bucket, prefixes, dir_glob):
+        """Return a list of "directories" (prefixes ending in ``/``) in
+        *bucket* that are inside one of *prefixes* and whose name
+        matches *dir_glob*. We list the contents of *prefixes* at once,
+        in separate threads.
+        """
+        glob_match = GLOB_RE.match(dir_glob)
+        if glob_match:
+            dir_base = glob_match.group(1)
+        else:
+            dir_base = dir_glob
+
+        def expand_prefix(prefix):
+            # list only the top level of each prefix
+            return [
+                entry.name for entry in
+                bucket.list(prefix + dir_base, delimiter='/')
+                if entry.name.endswith('/') and
+                fnmatch.fnmatchcase(entry.name[len(prefix):-1], dir_glob)]
+
+        return [
+            subdir
+            for subdirs in _map_in_threads(
+                expand_prefix, prefixes, _LIST_THREADS)
+            for subdir in subdirs]
 
     def md5sum(self, path):
         k = self.get_s3_key(path)
@@ -151,9 +289,65 @@ class S3Filesystem(Filesystem):
     def _cat_file(self, filename):
         # stream lines from the s3 key
         s3_key = self.get_s3_key(filename)
+
+        if self._should_download_in_parts(s3_key):
+            fileobj = _ChunkReader(self._download_parts(s3_key))
+            cleanup = fileobj.close
+        else:
+            fileobj = s3_key
+            cleanup = None
+
         # yields_lines=False: warn read_file that s3_key yields chunks of bytes
         return read_file(
-            s3_key_to_uri(s3_key), fileobj=s3_key, yields_lines=False)
+            s3_key_to_uri(s3_key), fileobj=fileobj, yields_lines=False,
+            cleanup=cleanup)
+
+    def _tail_file(self, path, num_bytes):
+        s3_key = self.get_s3_key(path)
+        if s3_key is None:
+            raise IOError('Key %r does not exist' % path)
+
+        if s3_key.size == 0:
+            return b''
+
+        # a suffix range (bytes=-N) would also work, but the size is
+        # already known from when we fetched the key
+        return s3_key.get_contents_as_string(
+            headers={'Range': 'bytes=%d-%d' % (
+                max(s3_key.size - num_bytes, 0), s3_key.size - 1)})
+
+    def _should_download_in_parts(self, s3_key):
+        """Is *s3_key* big enough that we should download it in parts?"""
+        return (self._download_part_size > 0 and
+                self._download_threads > 1 and
+                s3_key.size > self._download_part_size)
+
+    def _download_parts(self, s3_key):
+        """Download *s3_key* with concurrent ranged GETs, and yield
+        the parts in order."""
+        part_size = self._download_part_size
+        size = s3_key.size
+
+        byte_ranges = [(start, min(start + part_size, size) - 1)
+                       for start in range(0, size, part_size)]
+
+        log.debug('downloading %s in %d parts' % (
+            s3_key_to_uri(s3_key), len(byte_ranges)))
+
+        def download_part(byte_range):
+            # each thread needs its own Key object, since boto Keys keep
+            # track of the response they're reading from
+            part_key = s3_key.bucket.new_key(s3_key.name)
+            # If-Match: fail rather than mix parts from two versions of
+            # the key, if it's replaced while we're downloading it
+            yield part_key.get_contents_as_string(
+                headers={'Range': 'bytes=%d-%d' % byte_range,
+                         'If-Match': s3_key.etag})
+
+        return _read_ahead(
+            byte_ranges, download_part,
+            max_threads=self._download_threads,
+            max_bytes=self._download_threads * part_size)
 
     def mkdir(self, dest):
         """Make a directory. This does nothing on S3 because there are
@@ -174,13 +368,38 @@ class S3Filesystem(Filesystem):
             paths = []
         return any(paths)
 
+    def put(self, src, path):
+        self.make_s3_key(path).set_contents_from_filename(src)
+
     def rm(self, path_glob):
         """Remove all files matching the given glob."""
-        for uri in self.ls(path_glob):
-            key = self.get_s3_key(uri)
-            if key:
-                log.debug('deleting ' + uri)
-                key.delete()
+        self.delete_keys(self.ls_keys(path_glob))
+
+    def delete_keys(self, keys):
+        """Delete the given boto Keys, using multi-object delete requests
+        of up to 1000 keys each, several at a time.
+
+        *keys* may be a generator (e.g. from :py:meth:`ls_keys`); we
+        start deleting as soon as we have the first batch, and only hold
+        a few batches in memory at once.
+
+        .. versionadded:: 0.5.7
+        """
+        def delete_batch(batch):
+            bucket, key_names = batch
+
+            log.debug('deleting %d keys from s3://%s/' % (
+                len(key_names), bucket.name))
+
+            # quiet=True: only tell us about keys we couldn't delete
+            result = bucket.delete_keys(key_names, quiet=True)
+
+            if result.errors:
+                error = result.errors[0]
+                raise IOError('Could not delete s3://%s/%s: %s' % (
+                    bucket.name, error.key, error.message))
+
+        _map_in_threads(delete_batch, _delete_batches(keys), _DELETE_THREADS)
 
     def touchz(self, dest):
         """Make an empty file in the given location. Raises an error if
@@ -197,7 +416,7 @@ class S3Filesystem(Filesystem):
     # need to do something S3-specific (e.g. setting file permissions)
 
     def make_s3_conn(self, region=''):
-        """Create a connection to S3.
+        """Get a connection to S3.
 
         :param region: region to use to choose S3 endpoint.
 
@@ -208,6 +427,11 @@ class S3Filesystem(Filesystem):
 
         :return: a :py:class:`boto.s3.connection.S3Connection`, wrapped in a
                  :py:class:`mrjob.retry.RetryWrapper`
+
+        .. versionchanged:: 0.5.7
+
+           Connections are re-used, rather than creating a new one every
+           time.
         """
         # give a non-cryptic error message if boto isn't installed
         if boto is None:
@@ -216,22 +440,34 @@ class S3Filesystem(Filesystem):
         # self._s3_endpoint overrides region
         host = self._s3_endpoint or s3_endpoint_for_region(region)
 
-        log.debug('creating S3 connection (to %s)' % host)
+        with self._s3_conns_lock:
+            if host not in self._s3_conns:
+                log.debug('creating S3 connection (to %s)' % host)
 
-        raw_s3_conn = boto.connect_s3(
-            aws_access_key_id=self._aws_access_key_id,
-            aws_secret_access_key=self._aws_secret_access_key,
-            host=host,
-            security_token=self._aws_security_token)
-        return wrap_aws_conn(raw_s3_conn)
+                raw_s3_conn = boto.connect_s3(
+                    aws_access_key_id=self._aws_access_key_id,
+                    aws_secret_access_key=self._aws_secret_access_key,
+                    host=host,
+                    security_token=self._aws_security_token)
+                self._s3_conns[host] = wrap_aws_conn(raw_s3_conn)
+
+            return self._s3_conns[host]
 
     def get_bucket(self, bucket_name):
         """Get the bucket, connecting through the appropriate endpoint."""
+        if self._s3_endpoint:
+            return self.make_s3_conn().get_bucket(bucket_name)
+
+        # once we know where the bucket is, go straight to its endpoint,
+        # without checking that it exists
+        if bucket_name in self._bucket_locations:
+            location = self._bucket_locations[bucket_name]
+            s3_conn = self.make_s3_conn(location or '')
+            return s3_conn.get_bucket(bucket_name, validate=False)
+
         s3_conn = self.make_s3_conn()
 
         bucket = s3_conn.get_bucket(bucket_name)
-        if self._s3_endpoint:
-            return bucket
 
         try:
             location = bucket.get_location()
@@ -242,13 +478,16 @@ class S3Filesystem(Filesystem):
             if e.status == 403:
                 log.warning('Could not infer endpoint for bucket %s; '
                             'assuming %s', bucket_name, s3_conn.host)
+                self._bucket_locations[bucket_name] = None
                 return bucket
 
             raise
 
+        self._bucket_locations[bucket_name] = location
+
         if (s3_endpoint_for_region(location) != s3_conn.host):
             s3_conn = self.make_s3_conn(location)
-            bucket = s3_conn.get_bucket(bucket_name)
+            bucket = s3_conn.get_bucket(bucket_name, validate=False)
 
         return bucket
 
@@ -300,3 +539,24 @@ class S3Filesystem(Filesystem):
         """Create a bucket on S3, optionally setting location constraint."""
         return self.make_s3_conn().create_bucket(
             bucket_name, location=location)
+
+
+def _delete_batches(keys):
+    """Group consecutive boto Keys from the same bucket into
+    ``(bucket, [key_name, ...])`` batches of up to
+    :py:data:`_MAX_KEYS_PER_DELETE` keys, yielding each batch as soon as
+    it's full."""
+    bucket = None
+    key_names = []
+
+    for key in keys:
+        if key_names and (key.bucket.name != bucket.name or
+                          len(key_names) >= _MAX_KEYS_PER_DELETE):
+            yield bucket, key_names
+            key_names = []
+
+        bucket = key.bucket
+        key_names.append(key.name)
+
+    if key_names:
+        yield bucket, key_names
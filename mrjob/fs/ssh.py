@@ -13,7 +13,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import logging
+import os
 import re
+import shutil
+import tempfile
+import threading
 
 from io import BytesIO
 from mrjob.fs.base import Filesystem
@@ -21,6 +25,7 @@ from mrjob.ssh import _ssh_cat
 from mrjob.ssh import _ssh_copy_key
 from mrjob.ssh import _ssh_ls
 from mrjob.ssh import _ssh_slave_addresses
+from mrjob.ssh import _ssh_stop_control_master
 from mrjob.util import random_identifier
 from mrjob.util import read_file
 
@@ -38,10 +43,18 @@ class SSHFilesystem(Filesystem):
     :py:class:`~mrjob.fs.local.LocalFilesystem`.
     """
 
-    def __init__(self, ssh_bin, ec2_key_pair_file):
+    def __init__(self, ssh_bin, ec2_key_pair_file, multiplex=None):
         """
         :param ssh_bin: path to ``ssh`` binary
         :param ec2_key_pair_file: path to an SSH keyfile
+        :param multiplex: if true, keep one persistent connection to each
+                          host (using ``ControlMaster``), rather than
+                          re-connecting for every command. Defaults to
+                          true except on Windows.
+
+        .. versionchanged:: 0.5.7
+
+           Added *multiplex*.
         """
         super(SSHFilesystem, self).__init__()
         self._ssh_bin = ssh_bin
@@ -52,6 +65,17 @@ class SSHFilesystem(Filesystem):
         # keep track of which hosts we've copied our key to, and
         # what the (random) name of the key file is on that host
         self._host_to_key_filename = {}
+        self._key_lock = threading.Lock()
+
+        if multiplex is None:
+            multiplex = (os.name != 'nt')
+        self._multiplex = multiplex
+
+        # local dir containing control sockets for multiplexed connections,
+        # and the path of the control socket for each host
+        self._control_dir = None
+        self._host_to_control_path = {}
+        self._control_lock = threading.Lock()
 
         # keep track of the slave hosts accessible through each host
         self._host_to_slave_hosts = {}
@@ -83,15 +107,61 @@ class SSHFilesystem(Filesystem):
 
         host = addr.split('!')[0]
 
-        if host not in self._host_to_key_filename:
-            # copy the key if we haven't already
-            keyfile = 'mrjob-%s.pem' % random_identifier()
-            _ssh_copy_key(
-                self._ssh_bin, host, self._ec2_key_pair_file, keyfile)
-            # don't set above; _ssh_copy_key() may throw an IOError
-            self._host_to_key_filename[host] = keyfile
+        # hold the lock so that threads listing different slaves don't
+        # each copy the key
+        with self._key_lock:
+            if host not in self._host_to_key_filename:
+                # copy the key if we haven't already
+                keyfile = 'mrjob-%s.pem' % random_identifier()
+                _ssh_copy_key(
+                    self._ssh_bin, host, self._ec2_key_pair_file, keyfile,
+                    control_path=self._control_path_for(host))
+                # don't set above; _ssh_copy_key() may throw an IOError
+                self._host_to_key_filename[host] = keyfile
+
+            return self._host_to_key_filename[host]
+
+    def _control_path_for(self, addr):
+        """Get the path of the control socket to use when SSHing to *addr*
+        (or to the first host in *addr*, if it's a bang path), or ``None``
+        if multiplexing is disabled."""
+        if not self._multiplex:
+            return None
+
+        host = addr.split('!')[0]
 
-        return self._host_to_key_filename[host]
+        with self._control_lock:
+            if host not in self._host_to_control_path:
+                if self._control_dir is None:
+                    self._control_dir = tempfile.mkdtemp(prefix='mrjob-ssh-')
+
+                # Unix socket paths are limited to about 100 characters,
+                # so don't put hostnames in them
+                self._host_to_control_path[host] = os.path.join(
+                    self._control_dir, str(len(self._host_to_control_path)))
+
+            return self._host_to_control_path[host]
+
+    def close(self):
+        """Close any multiplexed connections and remove their control
+        sockets. It's safe to keep using this filesystem afterwards; it'll
+        just open new connections."""
+        with self._control_lock:
+            for host, control_path in sorted(
+                    self._host_to_control_path.items()):
+                try:
+                    _ssh_stop_control_master(
+                        self._ssh_bin, host, self._ec2_key_pair_file,
+                        control_path)
+                except Exception as e:
+                    log.debug("couldn't close SSH connection to %s: %r" % (
+                        host, e))
+
+            if self._control_dir:
+                shutil.rmtree(self._control_dir, ignore_errors=True)
+
+            self._control_dir = None
+            self._host_to_control_path = {}
 
     def _ssh_ls(self, uri):
         """Helper for ls(); obeys globbing"""
@@ -109,6 +179,7 @@ class SSHFilesystem(Filesystem):
             m.group('filesystem_path'),
             keyfile,
             sudo=self._sudo,
+            control_path=self._control_path_for(addr),
         )
 
         for line in output:
@@ -132,9 +203,27 @@ class SSHFilesystem(Filesystem):
             ssh_match.group('filesystem_path'),
             keyfile,
             sudo=self._sudo,
+            control_path=self._control_path_for(addr),
         )
         return read_file(filename, fileobj=BytesIO(output))
 
+    def _tail_file(self, path, num_bytes):
+        ssh_match = _SSH_URI_RE.match(path)
+        addr = ssh_match.group('hostname') or self._address_of_master()
+
+        keyfile = self._key_filename_for(addr)
+
+        return _ssh_cat(
+            self._ssh_bin,
+            addr,
+            self._ec2_key_pair_file,
+            ssh_match.group('filesystem_path'),
+            keyfile,
+            sudo=self._sudo,
+            control_path=self._control_path_for(addr),
+            num_bytes=num_bytes,
+        )
+
     def mkdir(self, dest):
         raise IOError()  # not implemented
 
@@ -155,7 +244,8 @@ class SSHFilesystem(Filesystem):
         """Get a list of the slave hosts reachable through *hosts*"""
         if force or host not in self._host_to_slave_hosts:
             self._host_to_slave_hosts[host] = _ssh_slave_addresses(
-                self._ssh_bin, host, self._ec2_key_pair_file)
+                self._ssh_bin, host, self._ec2_key_pair_file,
+                control_path=self._control_path_for(host))
 
         return self._host_to_slave_hosts[host]
 
@@ -0,0 +1,441 @@
+# Copyright 2016 Yelp
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import fnmatch
+import getpass
+import json
+import logging
+import os
+import os.path
+import posixpath
+import socket
+import threading
+
+from mrjob.fs.base import Filesystem
+from mrjob.parse import is_uri
+from mrjob.parse import urlparse
+from mrjob.py2 import HTTPConnection
+from mrjob.py2 import HTTPException
+from mrjob.py2 import HTTPSConnection
+from mrjob.py2 import quote
+from mrjob.py2 import to_string
+from mrjob.py2 import urlencode
+from mrjob.runner import GLOB_RE
+from mrjob.util import _ChunkReader
+from mrjob.util import read_file
+
+log = logging.getLogger(__name__)
+
+# how many bytes to read at a time when streaming a file
+_READ_SIZE = 64 * 1024
+
+# HTTP statuses that mean "go talk to this other server" (e.g. a datanode)
+_REDIRECT_STATUSES = (301, 302, 303, 307)
+
+
+class WebHDFSFilesystem(Filesystem):
+    """Filesystem for ``hdfs://`` URIs that talks to the `WebHDFS`_
+    (or HttpFS) REST API over HTTP, rather than running ``hadoop fs``.
+
+    Each thread keeps one connection open to each host it talks to
+    (the namenode and any datanodes), so most operations cost a single
+    HTTP request rather than a JVM startup.
+
+    Typically you will get one of these via ``HadoopJobRunner().fs``, by
+    setting :mrjob-opt:`webhdfs_url`.
+
+    .. _WebHDFS:
+       https://hadoop.apache.org/docs/stable/hadoop-project-dist/
+       hadoop-hdfs/WebHDFS.html
+
+    .. versionadded:: 0.5.7
+    """
+    def __init__(self, webhdfs_url, user=None):
+        """
+        :param webhdfs_url: base URL of the WebHDFS server (e.g.
+                            ``http://namenode:50070``). ``https://`` URLs
+                            are also supported.
+        :param user: user to act as (passed as ``user.name``). Defaults to
+                     ``$HADOOP_USER_NAME``, or the current user.
+        """
+        super(WebHDFSFilesystem, self).__init__()
+
+        url = urlparse(webhdfs_url)
+        if url.scheme not in ('http', 'https') or not url.netloc:
+            raise ValueError('Bad WebHDFS URL: %r' % webhdfs_url)
+
+        self._scheme = url.scheme
+        self._netloc = url.netloc
+        self._hostname = url.hostname
+        self._api_path = url.path.rstrip('/') + '/webhdfs/v1'
+
+        self._user = (user or os.environ.get('HADOOP_USER_NAME') or
+                      getpass.getuser())
+
+        # per-thread map from (scheme, netloc) to an open connection
+        self._local = threading.local()
+
+    def can_handle_path(self, path):
+        """We handle ``hdfs:///...`` URIs, and ``hdfs://`` URIs on the
+        same host as our WebHDFS server (the namenode's RPC and HTTP
+        ports differ, so we ignore ports). We leave other namenodes to
+        :py:class:`~mrjob.fs.hadoop.HadoopFilesystem`."""
+        url = urlparse(path)
+        if url.scheme != 'hdfs':
+            return False
+
+        return not url.netloc or url.hostname == self._hostname
+
+    def du(self, path_glob):
+        """Get the size of a file or directory (recursively), or 0
+        if it doesn't exist."""
+        return sum(size for uri, size in self._ls_with_sizes(path_glob))
+
+    def ls(self, path_glob):
+        """Recursively list files on HDFS.
+
+        *path_glob* can include ``?`` to match single characters or
+        ``*`` to match 0 or more characters. Both ``?`` and ``*`` can match
+        ``/``.
+        """
+        # list everything up front, so that if WebHDFS fails partway
+        # through, the IOError reaches CompositeFilesystem (which can then
+        # fall back to hadoop fs) rather than whoever is iterating
+        return iter([uri for uri, size in self._ls_with_sizes(path_glob)])
+
+    def _ls_with_sizes(self, path_glob):
+        """Yield ``(uri, size)`` for each file matching *path_glob*."""
+        glob_match = GLOB_RE.match(path_glob)
+
+        if not glob_match:
+            for uri, status in self._walk(path_glob):
+                if status['type'] != 'DIRECTORY':
+                    yield uri, status['length']
+            return
+
+        # allow subdirectories of the path/glob
+        if path_glob.endswith('/'):
+            dir_glob = path_glob + '*'
+        else:
+            dir_glob = path_glob + '/*'
+
+        for uri, status in self._walk(_glob_base_dir(glob_match.group(1))):
+            if status['type'] == 'DIRECTORY':
+                continue
+
+            if (fnmatch.fnmatchcase(uri, path_glob) or
+                    fnmatch.fnmatchcase(uri, dir_glob)):
+                yield uri, status['length']
+
+    def _walk(self, uri):
+        """Yield ``(uri, status)`` for *uri* (if it's a file) or everything
+        inside it (if it's a directory). *status* is a ``FileStatus``
+        dictionary from WebHDFS. Yields nothing if *uri* doesn't exist."""
+        prefix = _uri_prefix(uri)
+
+        dirs = [self._hdfs_path(uri)]
+
+        while dirs:
+            path = dirs.pop()
+
+            status, data = self._json_request('GET', path, 'LISTSTATUS')
+            if status == 404:
+                continue
+
+            file_statuses = data['FileStatuses']['FileStatus']
+
+            # LISTSTATUS on a file returns just that file
+            if (len(file_statuses) == 1 and
+                    not file_statuses[0]['pathSuffix'] and
+                    file_statuses[0]['type'] != 'DIRECTORY'):
+                yield prefix + path, file_statuses[0]
+                continue
+
+            for file_status in file_statuses:
+                child_path = posixpath.join(path, file_status['pathSuffix'])
+
+                yield prefix + child_path, file_status
+
+                if file_status['type'] == 'DIRECTORY':
+                    dirs.append(child_path)
+
+    def _cat_file(self, filename):
+        resp, conn = self._open(filename)
+
+        def chunks():
+            while True:
+                chunk = resp.read(_READ_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+        def cleanup():
+            resp.close()
+            conn.close()
+
+        return read_file(filename, fileobj=_ChunkReader(chunks()),
+                         yields_lines=False, cleanup=cleanup)
+
+    def _open(self, uri):
+        """Start downloading *uri*. Return the response and the connection
+        it came from, which is not shared with anything else and should be
+        closed when done."""
+        conn = self._get_connection(self._scheme, self._netloc)
+        resp = self._send(
+            conn, 'GET', self._op_url(self._hdfs_path(uri), 'OPEN'))
+
+        if resp.status in _REDIRECT_STATUSES:
+            # WebHDFS redirects us to a datanode. Download from it on
+            # a connection of our own, since we'll be streaming
+            location = resp.getheader('Location')
+            resp.read()
+
+            url = urlparse(location)
+            conn = self._new_connection(url.scheme, url.netloc)
+            resp = self._send(conn, 'GET', _path_and_query(url))
+        else:
+            # HttpFS sends the data back directly, so we can't reuse this
+            # connection until we've read the whole file
+            self._drop_connection(self._scheme, self._netloc)
+
+        if resp.status != 200:
+            data = resp.read()
+            conn.close()
+            raise IOError('Could not stream %s: %s' % (
+                uri, _error_message(resp.status, data)))
+
+        return resp, conn
+
+    def exists(self, path_glob):
+        """Does the given path exist? *path_glob* may be a file,
+        a directory (even an empty one), or a glob."""
+        glob_match = GLOB_RE.match(path_glob)
+
+        if not glob_match:
+            status, data = self._json_request(
+                'GET', self._hdfs_path(path_glob), 'GETFILESTATUS')
+            return status != 404
+
+        for uri, status in self._walk(_glob_base_dir(glob_match.group(1))):
+            if fnmatch.fnmatchcase(uri, path_glob):
+                return True
+
+        return False
+
+    def mkdir(self, path):
+        # MKDIRS creates parent directories too, like hadoop fs -mkdir -p
+        status, data = self._json_request(
+            'PUT', self._hdfs_path(path), 'MKDIRS')
+        if status == 404 or not data.get('boolean'):
+            raise IOError('Could not mkdir %s' % path)
+
+    def rm(self, path_glob):
+        if not is_uri(path_glob):
+            return super(WebHDFSFilesystem, self).rm(path_glob)
+
+        glob_match = GLOB_RE.match(path_glob)
+
+        if not glob_match:
+            self._delete(path_glob)
+            return
+
+        # delete each matching file or directory, skipping things inside
+        # directories we already deleted
+        deleted_dirs = []
+
+        for uri, status in sorted(
+                self._walk(_glob_base_dir(glob_match.group(1)))):
+            if not fnmatch.fnmatchcase(uri, path_glob):
+                continue
+
+            if any(uri.startswith(d + '/') for d in deleted_dirs):
+                continue
+
+            self._delete(uri)
+
+            if status['type'] == 'DIRECTORY':
+                deleted_dirs.append(uri)
+
+    def _delete(self, uri):
+        # a missing path is fine; we wanted it gone anyway
+        self._json_request('DELETE', self._hdfs_path(uri), 'DELETE',
+                           recursive='true')
+
+    def touchz(self, dest):
+        status, data = self._json_request(
+            'GET', self._hdfs_path(dest), 'GETFILESTATUS')
+
+        if status != 404:
+            if data['FileStatus']['length'] != 0:
+                raise IOError('Non-empty file %r already exists!' % (dest,))
+            return
+
+        self._create(dest, b'', 0)
+
+    def put(self, local_path, target):
+        with open(local_path, 'rb') as f:
+            self._create(target, f, os.path.getsize(local_path))
+
+    def _create(self, uri, body, size):
+        """Write *body* (bytes or a file object) to *uri*, which must
+        not already exist."""
+        conn = self._get_connection(self._scheme, self._netloc)
+        resp = self._send(
+            conn, 'PUT',
+            self._op_url(self._hdfs_path(uri), 'CREATE', overwrite='false'))
+        data = resp.read()
+
+        if resp.status not in _REDIRECT_STATUSES:
+            raise IOError('Could not create %s: %s' % (
+                uri, _error_message(resp.status, data)))
+
+        # send the actual data to the datanode WebHDFS redirected us to
+        url = urlparse(resp.getheader('Location'))
+        conn = self._get_connection(url.scheme, url.netloc)
+        resp = self._send(
+            conn, 'PUT', _path_and_query(url), body=body,
+            headers={'Content-Length': str(size),
+                     'Content-Type': 'application/octet-stream'},
+            retry=False)
+        data = resp.read()
+
+        if resp.status != 201:
+            raise IOError('Could not create %s: %s' % (
+                uri, _error_message(resp.status, data)))
+
+    ### HTTP ###
+
+    def _hdfs_path(self, uri):
+        """Get the path part of an ``hdfs://`` URI, making sure it's on
+        our namenode (see :py:meth:`can_handle_path`)."""
+        if not self.can_handle_path(uri):
+            raise IOError("Can't access %s through WebHDFS at %s" % (
+                uri, self._netloc))
+
+        return urlparse(uri).path or '/'
+
+    def _op_url(self, path, op, **params):
+        params['op'] = op
+        params['user.name'] = self._user
+
+        return '%s%s?%s' % (
+            self._api_path, quote(path), urlencode(sorted(params.items())))
+
+    def _json_request(self, method, path, op, **params):
+        """Make a request to the WebHDFS server, and return its status
+        and decoded JSON response. Raise :py:class:`IOError` for errors other
+        than 404 (not found)."""
+        conn = self._get_connection(self._scheme, self._netloc)
+        resp = self._send(conn, method, self._op_url(path, op, **params))
+        data = resp.read()
+
+        if resp.status == 404:
+            return 404, None
+
+        if resp.status != 200:
+            raise IOError('WebHDFS %s failed for %s: %s' % (
+                op, path, _error_message(resp.status, data)))
+
+        return resp.status, json.loads(to_string(data))
+
+    def _send(self, conn, method, url, body=None, headers=None, retry=True):
+        """Send a request on *conn*, and return the response.
+
+        If the request fails because the server closed a kept-alive
+        connection, reconnect and try once more (unless *retry* is false).
+        Raise :py:class:`IOError` if that doesn't work either.
+        """
+        log.debug('> %s %s://%s%s' % (
+            method, _conn_scheme(conn), _conn_netloc(conn), url))
+
+        try:
+            return _request(conn, method, url, body, headers)
+        except IOError:
+            if not retry:
+                raise
+            return _request(conn, method, url, body, headers)
+
+    def _get_connection(self, scheme, netloc):
+        """Get this thread's connection to *netloc*, opening one if
+        necessary."""
+        connections = self._connections()
+
+        if (scheme, netloc) not in connections:
+            connections[(scheme, netloc)] = self._new_connection(
+                scheme, netloc)
+
+        return connections[(scheme, netloc)]
+
+    def _drop_connection(self, scheme, netloc):
+        self._connections().pop((scheme, netloc), None)
+
+    def _connections(self):
+        if not hasattr(self._local, 'connections'):
+            self._local.connections = {}
+
+        return self._local.connections
+
+    def _new_connection(self, scheme, netloc):
+        if scheme == 'https':
+            return HTTPSConnection(netloc)
+        else:
+            return HTTPConnection(netloc)
+
+
+def _request(conn, method, url, body, headers):
+    """Send a request on *conn*, and return the response. If that fails,
+    close *conn* and raise :py:class:`IOError`."""
+    try:
+        conn.request(method, url, body=body, headers=headers or {})
+        return conn.getresponse()
+    except (HTTPException, socket.error) as ex:
+        conn.close()
+        if isinstance(ex, IOError):
+            raise
+        raise IOError('%s %s failed: %r' % (method, url, ex))
+
+
+def _uri_prefix(uri):
+    """Get the ``hdfs://netloc`` part of an ``hdfs://`` URI."""
+    url = urlparse(uri)
+    return '%s://%s' % (url.scheme, url.netloc)
+
+
+def _glob_base_dir(uri_before_glob):
+    """Get the directory to list to find matches for a glob, given the
+    part of the glob before the first wildcard."""
+    return uri_before_glob[:uri_before_glob.rfind('/') + 1]
+
+
+def _path_and_query(url):
+    if url.query:
+        return '%s?%s' % (url.path, url.query)
+    else:
+        return url.path
+
+
+def _conn_scheme(conn):
+    return 'https' if isinstance(conn, HTTPSConnection) else 'http'
+
+
+def _conn_netloc(conn):
+    return '%s:%d' % (conn.host, conn.port)
+
+
+def _error_message(status, data):
+    """Turn an error response from WebHDFS into a readable message."""
+    try:
+        exception = json.loads(to_string(data))['RemoteException']
+        return '%s: %s' % (exception['exception'], exception['message'])
+    except (ValueError, KeyError, TypeError):
+        return 'HTTP status %d' % status
@@ -29,9 +29,11 @@ except ImportError:
 from mrjob.compat import translate_jobconf
 from mrjob.compat import uses_yarn
 from mrjob.conf import combine_dicts
+from mrjob.fs.caching import CachingFilesystem
 from mrjob.fs.composite import CompositeFilesystem
 from mrjob.fs.hadoop import HadoopFilesystem
 from mrjob.fs.local import LocalFilesystem
+from mrjob.fs.webhdfs import WebHDFSFilesystem
 from mrjob.logs.counters import _format_counters
 from mrjob.logs.counters import _pick_counters
 from mrjob.logs.errors import _format_error
@@ -192,9 +194,20 @@ class HadoopJobRunner(MRJobRunner, LogInterpretationMixin):
         filesystem.
         """
         if self._fs is None:
-            self._fs = CompositeFilesystem(
-                HadoopFilesystem(self._opts['hadoop_bin']),
-                LocalFilesystem())
+            filesystems = [HadoopFilesystem(self._opts['hadoop_bin']),
+                           LocalFilesystem()]
+
+            # try WebHDFS first for hdfs:// URIs
+            if self._opts['webhdfs_url']:
+                filesystems.insert(
+                    0, WebHDFSFilesystem(self._opts['webhdfs_url']))
+
+            self._fs = CompositeFilesystem(*filesystems)
+
+            if self._opts['fs_cache_secs']:
+                self._fs = CachingFilesystem(
+                    self._fs, self._opts['fs_cache_secs'])
+
         return self._fs
 
     def get_hadoop_version(self):
@@ -376,14 +389,17 @@ class HadoopJobRunner(MRJobRunner, LogInterpretationMixin):
     def _check_input_exists(self):
         """Make sure all input exists before continuing with our job.
         """
-        for path in self._input_paths:
-            if path == '-':
-                continue  # STDIN always exists
+        if not self._opts['check_input_paths']:
+            return
+
+        # STDIN always exists
+        paths = [path for path in self._input_paths if path != '-']
 
-            if self._opts['check_input_paths']:
-                if not self.fs.exists(path):
-                    raise AssertionError(
-                        'Input path %s does not exist!' % (path,))
+        # check all paths at once (each check may launch a JVM)
+        for path, exists in zip(paths, self.fs.exists_many(paths)):
+            if not exists:
+                raise AssertionError(
+                    'Input path %s does not exist!' % (path,))
 
     def _add_job_files_for_upload(self):
         """Add files needed for running the job (setup and input)
@@ -400,12 +416,14 @@ class HadoopJobRunner(MRJobRunner, LogInterpretationMixin):
         self.fs.mkdir(self._upload_mgr.prefix)
 
         log.info('Copying local files to %s...' % self._upload_mgr.prefix)
-        for path, uri in self._upload_mgr.path_to_uri().items():
-            self._upload_to_hdfs(path, uri)
 
-    def _upload_to_hdfs(self, path, target):
-        log.debug('  %s -> %s' % (path, target))
-        self.fs._put(path, target)
+        src_path_pairs = sorted(self._upload_mgr.path_to_uri().items())
+        for path, uri in src_path_pairs:
+            log.debug('  %s -> %s' % (path, uri))
+
+        # HadoopFilesystem uploads files that keep their names with one
+        # "hadoop fs -put" per directory
+        self.fs.put_many(src_path_pairs)
 
     def _dump_stdin_to_local_file(self):
         """Dump sys.stdin to a local file, and return the path to it."""
@@ -340,7 +340,7 @@ class MRJobLauncher(object):
         _add_runner_options(
             self.dataproc_emr_opt_group,
             ((_pick_runner_opts('dataproc') & _pick_runner_opts('emr')) -
-             _pick_runner_opts('base')))
+             _pick_runner_opts('hadoop') - _pick_runner_opts('base')))
 
         # options for running the job on Dataproc
         self.dataproc_opt_group = OptionGroup(
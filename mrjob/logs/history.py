@@ -37,6 +37,20 @@ _HISTORY_LOG_PATH_RE = re.compile(
     r'(?P<job_id>job_\d+_\d{4})'
     r'[_-]\d+[_-]hadoop[_-](?P<suffix>\S*)$')
 
+# the "type" field at the start of a record in a YARN history file. This
+# lets us skip records we don't care about without decoding them (some
+# records, like MAP_ATTEMPT_FINISHED, are huge)
+_YARN_HISTORY_RECORD_TYPE_RE = re.compile(
+    r'^{\s*"type"\s*:\s*"(?P<type>\w+)"')
+
+# attempt and container IDs in a record in a YARN history file, so that
+# we can map one to the other without decoding the record
+_YARN_HISTORY_ATTEMPT_ID_RE = re.compile(
+    r'"attemptId"\s*:\s*"(?P<attempt_id>[^"\\]*)"')
+
+_YARN_HISTORY_CONTAINER_ID_RE = re.compile(
+    r'"containerId"\s*:\s*"(?P<container_id>[^"\\]*)"')
+
 # escape sequence in pre-YARN history file. Characters inside COUNTERS
 # fields are double escaped
 _PRE_YARN_HISTORY_ESCAPE_RE = re.compile(r'\\(.)')
@@ -165,6 +179,25 @@ def _parse_yarn_history_log(lines):
         if not line.startswith('{'):
             continue
 
+        # history files for big jobs can be hundreds of megabytes, mostly
+        # task progress records we don't need. Check the record's type
+        # before decoding it.
+        m = _YARN_HISTORY_RECORD_TYPE_RE.match(line)
+        if m and not _yarn_history_record_type_is_used(m.group('type')):
+            # all we might need is a container_id -> attempt_id mapping
+            if '"containerId"' not in line:
+                continue
+
+            container_id_m = _YARN_HISTORY_CONTAINER_ID_RE.search(line)
+            attempt_id_m = _YARN_HISTORY_ATTEMPT_ID_RE.search(line)
+            if container_id_m and attempt_id_m:
+                result.setdefault('container_to_attempt_id', {})
+                result['container_to_attempt_id'][
+                    container_id_m.group('container_id')] = (
+                        attempt_id_m.group('attempt_id'))
+                continue
+            # otherwise, decode the record to be safe
+
         try:
             record = json.loads(line)
         except:
@@ -238,6 +271,13 @@ def _parse_yarn_history_log(lines):
     return result
 
 
+def _yarn_history_record_type_is_used(record_type):
+    """Does :py:func:`_parse_yarn_history_log` need to decode records
+    of this type (other than to map container IDs to attempt IDs)?"""
+    return (record_type.endswith('_ATTEMPT_FAILED') or
+            record_type in ('TASK_FINISHED', 'JOB_FINISHED'))
+
+
 def _extract_yarn_counters(counters_record):
     """Convert Avro-Json counter data structure to our
     group -> counter -> amount format.
@@ -16,24 +16,36 @@
 import re
 from logging import getLogger
 
-# log line format output by hadoop jar command
+# log line format output by hadoop jar command, e.g.:
+#
+# 15/12/11 13:26:07 INFO client.RMProxy: Connecting to ResourceManager...
+# 2015-08-22 00:46:18,411 INFO amazon.emr.metrics.MetricsSaver (main): ...
+#
+# or to Hadoop syslog, e.g.:
+#
+# 2016-08-19 13:30:03,816 INFO  [main] impl.YarnClientImpl (Yarn...) - ...
+#
+# These are combined into one pattern so that we only have to scan each
+# line once; the first format is tried first.
 _HADOOP_LOG4J_LINE_RE = re.compile(
     r'^\s*(?P<timestamp>.*?)'
     r'\s+(?P<level>[A-Z]+)'
+    r'(?:'
     r'\s+(?P<logger>\S+)'
     r'(\s+\((?P<thread>.*?)\))?'
-    r'( - |: )'
-    r'(?P<message>.*?)$')
-
-# log line format output to Hadoop syslog
-_HADOOP_LOG4J_LINE_ALTERNATE_RE = re.compile(
-    r'^\s*(?P<timestamp>.*?)'
-    r'\s+(?P<level>[A-Z]+)'
-    r'(\s+\[(?P<thread>.*?)\])'
-    r'\s+(?P<logger>\S+)'
+    r'|'
+    r'(\s+\[(?P<alt_thread>.*?)\])'
+    r'\s+(?P<alt_logger>\S+)'
     r'(\s+\((?P<caller_location>\S+)\))?'
+    r')'
     r'( - |: )'
-    r'(?P<message>.*?)$')
+    r'(?P<message>.*)$')
+
+# every log4j line contains the level surrounded by whitespace. Checking
+# for this first lets us quickly skip over lines that are part of a
+# multi-line message (e.g. counters), which are slow to match against the
+# pattern above
+_HADOOP_LOG4J_LEVEL_RE = re.compile(r'\s[A-Z]+\s')
 
 log = getLogger(__name__)
 
@@ -62,59 +74,94 @@ def _parse_hadoop_log4j_records(lines, pre_filter=None):
     Also yields fake records for leading non-log4j lines (trailing non-log4j
     lines are assumed to be part of a multiline message if not pre-filtered).
     """
-    last_record = None
+    # hold on to the match for the first line of the current record, and
+    # any further lines of its message; we don't build the record until
+    # we know it's complete
+    last_m = None
+    last_start_line = None
+    last_extra_lines = None
+
+    search_level = _HADOOP_LOG4J_LEVEL_RE.search
+    match_line = _HADOOP_LOG4J_LINE_RE.match
+
+    line_num = -1
 
     for line_num, line in enumerate(lines):
         line = line.rstrip('\r\n')
 
-        def fake_record():
-            return dict(
-                caller_location='',
-                level='',
-                logger='',
-                message=line,
-                num_lines=1,
-                start_line=line_num,
-                thread='',
-                timestamp='')
-
         # had to patch this in here to get _parse_hadoop_jar_command_stderr()'s
         # record_callback to fire on the correct line. The problem is that
         # we don't emit records until we see the next line (to handle
         # multiline records), so the callback would fire in the wrong order
-        if pre_filter:
-            if pre_filter(line):
-                if last_record:
-                    last_record['num_lines'] = (
-                        line_num - last_record['start_line'])
-                    yield last_record
-
-                yield fake_record()
+        if pre_filter is not None and pre_filter(line):
+            if last_m:
+                yield _log4j_record(
+                    last_m, last_start_line, line_num - last_start_line,
+                    last_extra_lines)
+                last_m = None
 
-                last_record = None
-                continue
+            yield _fake_log4j_record(line, line_num)
+            continue
 
-        m = (_HADOOP_LOG4J_LINE_RE.match(line) or
-             _HADOOP_LOG4J_LINE_ALTERNATE_RE.match(line))
+        m = search_level(line) and match_line(line)
 
         if m:
-            if last_record:
-                last_record['num_lines'] = (
-                    line_num - last_record['start_line'])
-                yield last_record
-
-            last_record = m.groupdict()
-            last_record.setdefault('caller_location', '')
-            last_record['thread'] = last_record['thread'] or ''
-            last_record['start_line'] = line_num
-        else:
+            if last_m:
+                yield _log4j_record(
+                    last_m, last_start_line, line_num - last_start_line,
+                    last_extra_lines)
+
+            last_m = m
+            last_start_line = line_num
+            last_extra_lines = []
+        elif last_m:
             # add on to previous record
-            if last_record:
-                last_record['message'] += '\n' + line
-            else:
-                yield fake_record()
-
-    if last_record:
-        last_record['num_lines'] = (
-            line_num + 1 - last_record['start_line'])
-        yield last_record
+            last_extra_lines.append(line)
+        else:
+            yield _fake_log4j_record(line, line_num)
+
+    if last_m:
+        yield _log4j_record(
+            last_m, last_start_line, line_num + 1 - last_start_line,
+            last_extra_lines)
+
+
+def _log4j_record(m, start_line, num_lines, extra_lines):
+    """Build a record from a match against the first line of a log4j
+    record, plus any further lines of its message."""
+    message = m.group('message')
+    if extra_lines:
+        message = '\n'.join([message] + extra_lines)
+
+    if m.group('alt_logger') is None:
+        logger = m.group('logger')
+        thread = m.group('thread')
+        caller_location = ''
+    else:
+        logger = m.group('alt_logger')
+        thread = m.group('alt_thread')
+        caller_location = m.group('caller_location')
+
+    return dict(
+        caller_location=caller_location or '',
+        level=m.group('level'),
+        logger=logger,
+        message=message,
+        num_lines=num_lines,
+        start_line=start_line,
+        thread=thread or '',
+        timestamp=m.group('timestamp'),
+    )
+
+
+def _fake_log4j_record(line, line_num):
+    """Build a record for a line that isn't part of a log4j record."""
+    return dict(
+        caller_location='',
+        level='',
+        logger='',
+        message=line,
+        num_lines=1,
+        start_line=line_num,
+        thread='',
+        timestamp='')
@@ -24,7 +24,16 @@ it needs it for the job/application ID.
 
 Your runner should generally have one log interpretation per step,
 though the mixin doesn't care how or where you store them.
+
+If your runner can tell us what cluster a job ran on (see
+:py:meth:`LogInterpretationMixin._log_interpretation_cache_prefix`),
+interpretations of finished logs are also cached on disk, so that other
+runners (and later runs) don't have to download and parse them again.
 """
+import json
+import os
+import re
+import time
 from logging import getLogger
 
 from mrjob.compat import uses_yarn
@@ -34,9 +43,20 @@ from mrjob.logs.history import _interpret_history_log
 from mrjob.logs.history import _ls_history_logs
 from mrjob.logs.task import _interpret_task_logs
 from mrjob.logs.task import _ls_task_logs
+from mrjob.util import _atomic_write_path
+from mrjob.util import _user_cache_dir
 
 log = getLogger(__name__)
 
+# delete cached log interpretations that haven't been used in this many days
+_LOG_INTERPRETATION_CACHE_DAYS = 30
+
+# keep at most this many cached log interpretations
+_MAX_CACHED_LOG_INTERPRETATIONS = 1000
+
+# characters we don't allow in cache filenames
+_UNSAFE_CACHE_FILENAME_RE = re.compile(r'[^\w.-]')
+
 
 # a callback for _interpret_task_logs(). Breaking it out to make
 # testing easier
@@ -87,6 +107,15 @@ class LogInterpretationMixin(object):
         output."""
         return None
 
+    def _log_interpretation_cache_prefix(self):
+        """Return a string identifying the cluster our jobs run on
+        (e.g. a cluster ID), used to cache log interpretations on disk.
+
+        Job and application IDs are only unique within a cluster, so
+        by default (``None``), we don't cache anything.
+        """
+        return None
+
     ### stuff to call ###
 
     def _pick_counters(self, log_interpretation):
@@ -133,9 +162,16 @@ class LogInterpretationMixin(object):
 
         output_dir = step_interpretation.get('output_dir')
 
-        log_interpretation['history'] = _interpret_history_log(
-            self.fs, self._ls_history_logs(
-                job_id=job_id, output_dir=output_dir))
+        history_interpretation = self._get_cached_log_interpretation(
+            'history', job_id)
+        if history_interpretation is None:
+            history_interpretation = _interpret_history_log(
+                self.fs, self._ls_history_logs(
+                    job_id=job_id, output_dir=output_dir))
+            self._cache_log_interpretation(
+                'history', job_id, history_interpretation)
+
+        log_interpretation['history'] = history_interpretation
 
     def _ls_history_logs(self, job_id=None, output_dir=None):
         """Yield history log matches, logging a message for each one."""
@@ -151,8 +187,17 @@ class LogInterpretationMixin(object):
         if 'step' in log_interpretation:
             return
 
-        step_interpretation = self._get_step_log_interpretation(
-            log_interpretation)
+        # the s-XXXXXXXX step ID on EMR
+        step_id = log_interpretation.get('step_id')
+
+        step_interpretation = self._get_cached_log_interpretation(
+            'step', step_id)
+        if step_interpretation is None:
+            step_interpretation = self._get_step_log_interpretation(
+                log_interpretation)
+            self._cache_log_interpretation(
+                'step', step_id, step_interpretation)
+
         if step_interpretation:
             log_interpretation['step'] = step_interpretation
 
@@ -182,14 +227,28 @@ class LogInterpretationMixin(object):
                     log.warning("Can't fetch task logs; missing job ID")
                 return
 
-        log_interpretation['task'] = _interpret_task_logs(
-            self.fs,
-            self._ls_task_logs(
-                application_id=application_id,
-                job_id=job_id,
-                output_dir=output_dir),
-            partial=partial,
-            log_callback=_log_parsing_task_log)
+        task_id = application_id if yarn else job_id
+
+        task_interpretation = self._get_cached_log_interpretation(
+            'task', task_id)
+        # a partial interpretation only helps if that's all we need
+        if (task_interpretation and task_interpretation.get('partial') and
+                not partial):
+            task_interpretation = None
+
+        if task_interpretation is None:
+            task_interpretation = _interpret_task_logs(
+                self.fs,
+                self._ls_task_logs(
+                    application_id=application_id,
+                    job_id=job_id,
+                    output_dir=output_dir),
+                partial=partial,
+                log_callback=_log_parsing_task_log)
+            self._cache_log_interpretation(
+                'task', task_id, task_interpretation)
+
+        log_interpretation['task'] = task_interpretation
 
     def _ls_task_logs(
             self, application_id=None, job_id=None, output_dir=None):
@@ -202,3 +261,102 @@ class LogInterpretationMixin(object):
                 application_id=application_id,
                 job_id=job_id):
             yield match
+
+    def _log_interpretation_cache_path(self, log_type, id_):
+        """Where to cache the interpretation of the *log_type* logs for
+        the given job, application, or step ID, or ``None`` if we can't
+        cache it."""
+        prefix = self._log_interpretation_cache_prefix()
+        if not (prefix and id_):
+            return None
+
+        filename = _UNSAFE_CACHE_FILENAME_RE.sub(
+            '_', '%s-%s-%s.json' % (prefix, log_type, id_))
+
+        return os.path.join(_log_interpretation_cache_dir(), filename)
+
+    def _get_cached_log_interpretation(self, log_type, id_):
+        """Return a cached interpretation of the *log_type* logs for
+        *id_*, or ``None``."""
+        path = self._log_interpretation_cache_path(log_type, id_)
+        if not (path and os.path.exists(path)):
+            return None
+
+        try:
+            with open(path) as f:
+                interpretation = json.load(f)
+            # mark as recently used, so it doesn't get cleaned up
+            os.utime(path, None)
+        except (IOError, OSError, ValueError) as e:
+            log.debug("couldn't read cached %s: %s" % (path, e))
+            return None
+
+        log.debug('using cached %s log interpretation from %s' % (
+            log_type, path))
+        return interpretation
+
+    def _cache_log_interpretation(self, log_type, id_, interpretation):
+        """Cache *interpretation* of the *log_type* logs for *id_*.
+
+        We only cache interpretations that actually found something,
+        since logs may not have been fully copied yet (e.g. to S3) when
+        we first look at them. Partial task log interpretations are
+        cached with their *partial* flag.
+        """
+        if not interpretation:
+            return
+
+        if not (interpretation.get('counters') or
+                interpretation.get('errors')):
+            return
+
+        path = self._log_interpretation_cache_path(log_type, id_)
+        if not path:
+            return
+
+        cache_dir = os.path.dirname(path)
+
+        try:
+            with _atomic_write_path(path) as tmp_path:
+                with open(tmp_path, 'w') as f:
+                    json.dump(interpretation, f)
+        except (IOError, OSError) as e:
+            log.debug("couldn't cache %s log interpretation in %s: %s" % (
+                log_type, path, e))
+            return
+
+        _clean_log_interpretation_cache(cache_dir)
+
+
+def _log_interpretation_cache_dir():
+    """Directory where we cache log interpretations."""
+    return os.path.join(_user_cache_dir(), 'log-interpretations')
+
+
+def _clean_log_interpretation_cache(cache_dir):
+    """Delete cached log interpretations that we haven't used recently,
+    keeping at most ``_MAX_CACHED_LOG_INTERPRETATIONS`` of them."""
+    cutoff = time.time() - _LOG_INTERPRETATION_CACHE_DAYS * 24 * 60 * 60
+
+    mtime_and_paths = []
+
+    for name in os.listdir(cache_dir):
+        if not name.endswith('.json'):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            mtime_and_paths.append((os.path.getmtime(path), path))
+        except (IOError, OSError):
+            # another process could be cleaning up too
+            pass
+
+    # most recently used first
+    mtime_and_paths.sort(reverse=True)
+
+    for i, (mtime, path) in enumerate(mtime_and_paths):
+        if mtime < cutoff or i >= _MAX_CACHED_LOG_INTERPRETATIONS:
+            log.debug('deleting old cached %s' % path)
+            try:
+                os.remove(path)
+            except (IOError, OSError):
+                pass
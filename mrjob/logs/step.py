@@ -211,12 +211,11 @@ def _interpret_hadoop_jar_command_stderr(stderr, record_callback=None):
             else:
                 raise
 
-    def pre_filter(line):
-        return bool(_HADOOP_STREAMING_NON_LOG4J_LINE_RE.match(line))
-
     def yield_records():
-        for record in _parse_hadoop_log4j_records(yield_lines(),
-                                                  pre_filter=pre_filter):
+        # passing match() directly saves a function call per line
+        for record in _parse_hadoop_log4j_records(
+                yield_lines(),
+                pre_filter=_HADOOP_STREAMING_NON_LOG4J_LINE_RE.match):
             if record_callback:
                 record_callback(record)
             yield record
@@ -17,11 +17,14 @@ task and typically appear in the userlogs/ directory."""
 import posixpath
 import re
 
+from mrjob.parallel import _map_ahead
 from mrjob.util import file_ext
 from .ids import _add_implied_task_id
 from .ids import _to_job_id
 from .log4j import _parse_hadoop_log4j_records
-from .wrap import _cat_log
+from .wrap import _LOG_TAIL_MIN_BYTES
+from .wrap import _cat_log_from_end
+from .wrap import _cat_log_head
 from .wrap import _ls_logs
 
 
@@ -61,6 +64,10 @@ _YARN_INPUT_SPLIT_RE = re.compile(
     r'^Processing split:\s+(?P<path>.*)'
     r':(?P<start_line>\d+)\+(?P<num_lines>\d+)$')
 
+# how many task logs to fetch and parse at once, in the background,
+# while we look at the logs in front of them
+_MAX_LOGS_PARSED_AHEAD = 8
+
 # what log paths look like on YARN
 _YARN_TASK_LOG_PATH_RE = re.compile(
     r'^(?P<prefix>.*?/)'
@@ -170,60 +177,148 @@ def _interpret_task_logs(fs, matches, partial=True, log_callback=None):
     result = {}
     syslogs_parsed = set()
 
-    for match in matches:
-        error = {}
+    matches = list(matches)
 
-        # are is this match for a stderr file, or a syslog?
+    # fetch and parse the logs of upcoming matches in the background: the
+    # stderr (or syslog, if there's no stderr), plus the syslog that goes
+    # with the stderr, if it has an error. We still look at results in
+    # order, so we stop at the same error we would otherwise.
+    def parse_logs(match):
         if match.get('syslog'):
-            stderr_path = match['path']
+            task_error = _parse_task_stderr_log(fs, match['path'])
+
             syslog_path = match['syslog']['path']
+            if task_error and syslog_path not in syslogs_parsed:
+                return task_error, _parse_task_syslog_log(fs, syslog_path)
+            else:
+                return task_error, None
+        elif match['path'] not in syslogs_parsed:
+            return _parse_task_syslog_log(fs, match['path']), None
         else:
-            stderr_path = None
-            syslog_path = match['path']
+            return None, None
 
-        if stderr_path:
-            if log_callback:
-                log_callback(stderr_path)
-            task_error = _parse_task_stderr(_cat_log(fs, stderr_path))
+    parsed_logs = _map_ahead(parse_logs, matches, _MAX_LOGS_PARSED_AHEAD)
 
-            if task_error:
-                task_error['path'] = stderr_path
-                error['task_error'] = task_error
+    try:
+        for match, (parsed_log, parsed_syslog) in zip(matches, parsed_logs):
+            error = {}
+
+            # are is this match for a stderr file, or a syslog?
+            if match.get('syslog'):
+                stderr_path = match['path']
+                syslog_path = match['syslog']['path']
             else:
-                continue  # can parse syslog independently later
+                stderr_path = None
+                syslog_path = match['path']
+
+            if stderr_path:
+                if log_callback:
+                    log_callback(stderr_path)
+                task_error = parsed_log
+
+                if task_error:
+                    task_error['path'] = stderr_path
+                    error['task_error'] = task_error
+                else:
+                    continue  # can parse syslog independently later
+
+            # already parsed this syslog in conjunction with an earlier
+            # task error
+            if syslog_path in syslogs_parsed:
+                continue
 
-        # already parsed this syslog in conjunction with an earlier task error
-        if syslog_path in syslogs_parsed:
-            continue
+            if log_callback:
+                log_callback(syslog_path)
+            if stderr_path:
+                syslog_error = parsed_syslog
+            else:
+                syslog_error = parsed_log
+            syslogs_parsed.add(syslog_path)
 
-        if log_callback:
-            log_callback(syslog_path)
-        syslog_error = _parse_task_syslog(_cat_log(fs, syslog_path))
-        syslogs_parsed.add(syslog_path)
+            if not syslog_error.get('hadoop_error'):
+                # if no entry in Hadoop syslog, probably just noise
+                continue
 
-        if not syslog_error.get('hadoop_error'):
-            # if no entry in Hadoop syslog, probably just noise
-            continue
+            error.update(syslog_error)
+            error['hadoop_error']['path'] = syslog_path
+
+            # path in IDs we learned from path
+            for id_key in 'attempt_id', 'container_id':
+                if id_key in match:
+                    error[id_key] = match[id_key]
+            _add_implied_task_id(error)
+
+            result.setdefault('errors', [])
+            result['errors'].append(error)
+
+            if partial:
+                result['partial'] = True
+                break
+    finally:
+        # stop parsing logs in the background
+        parsed_logs.close()
+
+    return result
 
-        error.update(syslog_error)
-        error['hadoop_error']['path'] = syslog_path
 
-        # path in IDs we learned from path
-        for id_key in 'attempt_id', 'container_id':
-            if id_key in match:
-                error[id_key] = match[id_key]
-        _add_implied_task_id(error)
+def _parse_task_syslog_log(fs, path):
+    """Fetch the task syslog at *path* and parse it with
+    :py:func:`_parse_task_syslog`.
 
-        result.setdefault('errors', [])
-        result['errors'].append(error)
+    Task syslogs can be huge, and the error is almost always near the end,
+    so we read the end of the log first, and only read more if we don't
+    find an error. This means that for big logs, we report the first error
+    in the smallest tail of the log that has one (usually the error that
+    killed the task), not necessarily the first error in the log. If there's
+    no error in the last few megabytes, we stream the whole log, and report
+    its first error as usual.
+
+    If we found an error without reading the whole log, we also read the
+    start of the log, which is where the input split is, and the error
+    won't have *start_line*.
+    """
+    for lines, whole_file in _cat_log_from_end(fs, path):
+        result = _parse_task_syslog(lines)
 
-        if partial:
-            result['partial'] = True
+        if whole_file:
+            return result
+
+        if result.get('hadoop_error'):
             break
 
+    # the input split is at the start of the log
+    if 'split' not in result:
+        head_result = _parse_task_syslog(
+            _cat_log_head(fs, path, _LOG_TAIL_MIN_BYTES))
+
+        if 'split' in head_result:
+            result['split'] = head_result['split']
+
+    del result['hadoop_error']['start_line']
+
     return result
 
 
+def _parse_task_stderr_log(fs, path):
+    """Fetch the task stderr at *path* and parse it with
+    :py:func:`_parse_task_stderr`.
+
+    Like :py:func:`_parse_task_syslog_log`, this reads the end of the
+    log first. The task error starts at the last command (``+ ...``) in
+    the log, so we read more until we find one. If we didn't read the whole
+    log, the task error won't have *start_line*.
+    """
+    for lines, whole_file in _cat_log_from_end(fs, path):
+        task_error = _parse_task_stderr(lines)
+
+        if whole_file:
+            return task_error
+
+        if task_error and task_error['message'].startswith('+ '):
+            del task_error['start_line']
+            return task_error
+
+
 def _parse_task_syslog(lines):
     """Parse an error out of a syslog file.
 
@@ -13,14 +13,31 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """Utilities for ls()ing and cat()ing logs without raising exceptions."""
+from io import BytesIO
 from logging import getLogger
 
+from mrjob.parallel import _map_in_threads
 from mrjob.py2 import to_string
+from mrjob.util import file_ext
 
 from .ids import _sort_by_recency
 
 log = getLogger(__name__)
 
+# max number of log dirs (e.g. one per node over SSH) to list at once
+_MAX_LS_THREADS = 16
+
+# when reading logs from the end, start with this many bytes, and double it
+# each time we need more
+_LOG_TAIL_MIN_BYTES = 64 * 1024
+
+# don't hold more than this much of the end of a log in memory; past this,
+# just stream the whole log
+_LOG_TAIL_MAX_BYTES = 4 * 1024 * 1024
+
+# we can't read the end of compressed logs without reading all of them
+_COMPRESSED_LOG_EXTS = ('.bz2', '.gz')
+
 
 def _cat_log(fs, path):
     """fs.cat() the given log, converting lines to strings, and logging
@@ -34,6 +51,68 @@ def _cat_log(fs, path):
         log.warning("couldn't cat() %s: %r" % (path, e))
 
 
+def _cat_log_head(fs, path, num_bytes):
+    """Like :py:func:`_cat_log`, but stop after the line that contains
+    the *num_bytes*-th byte of the log."""
+    bytes_read = 0
+    for line in _cat_log(fs, path):
+        yield line
+        bytes_read += len(line)
+        if bytes_read >= num_bytes:
+            return
+
+
+def _cat_log_from_end(fs, path):
+    """Read larger and larger parts of the end of the given log.
+
+    Yields tuples of ``(lines, whole_file)``: first the last
+    ``_LOG_TAIL_MIN_BYTES`` bytes of the log, then twice that, and so on,
+    until we've read the whole file (*whole_file* is true). Once we'd need
+    more than ``_LOG_TAIL_MAX_BYTES``, we instead yield
+    ``(_cat_log(fs, path), True)``, which streams the whole log. Lines are
+    strings, and don't include the (probably incomplete) first line in each
+    part of the log, so line numbers are only meaningful if *whole_file* is
+    true.
+
+    If the log is compressed, or *fs* can't read the end of a file
+    (see :py:meth:`mrjob.fs.base.Filesystem._tail_file`), just yields
+    ``(_cat_log(fs, path), True)``.
+    """
+    if file_ext(path) in _COMPRESSED_LOG_EXTS:
+        yield _cat_log(fs, path), True
+        return
+
+    num_bytes = _LOG_TAIL_MIN_BYTES
+
+    while True:
+        try:
+            data = fs._tail_file(path, num_bytes)
+        except NotImplementedError:
+            yield _cat_log(fs, path), True
+            return
+        except IOError as e:
+            log.warning("couldn't read end of %s: %r" % (path, e))
+            yield [], True
+            return
+
+        whole_file = len(data) < num_bytes
+
+        if not whole_file:
+            # skip partial line
+            data = data[data.find(b'\n') + 1:] if b'\n' in data else b''
+
+        yield [to_string(line) for line in BytesIO(data)], whole_file
+
+        if whole_file:
+            return
+
+        num_bytes *= 2
+
+        if num_bytes > _LOG_TAIL_MAX_BYTES:
+            yield _cat_log(fs, path), True
+            return
+
+
 def _ls_logs(fs, log_dir_stream, matcher, **kwargs):
     """Return a list matches against log files. Used to implement
     ``_ls_*_logs()`` functions.
@@ -55,22 +134,27 @@ def _ls_logs(fs, log_dir_stream, matcher, **kwargs):
     an empty dict.
     """
     # wrapper for fs.ls() that turns IOErrors into warnings
-    def _fs_ls(path):
+    def _fs_ls(log_dir):
+        paths = []
         try:
             if fs.exists(log_dir):
                 for path in fs.ls(log_dir):
-                    yield path
+                    paths.append(path)
         except IOError as e:
             log.warning("couldn't ls() %s: %r" % (log_dir, e))
 
+        return paths
+
     for log_dirs in log_dir_stream:
         if isinstance(log_dirs, str):
             raise TypeError
 
         matches = []
 
-        for log_dir in log_dirs:
-            for path in _fs_ls(log_dir):
+        # list dirs (e.g. on different nodes) at the same time, so we
+        # aren't waiting on one node after another
+        for paths in _map_in_threads(_fs_ls, log_dirs, _MAX_LS_THREADS):
+            for path in paths:
                 m = matcher(path, **kwargs)
                 if m is not None:
                     m['path'] = path
@@ -362,6 +362,7 @@ _RUNNER_OPTS = dict(
                 deprecated_aliases=['--check-emr-status-every'],
                 help=('How often (in seconds) to check status of your'
                       ' job/cluster'),
+                type='float',
             )),
         ],
     ),
@@ -385,6 +386,47 @@ _RUNNER_OPTS = dict(
             )),
         ],
     ),
+    cloud_dedup_uploads=dict(
+        cloud_role='launch',
+        runners=['dataproc', 'emr'],
+        switches=[
+            (['--cloud-dedup-uploads'], dict(
+                action='store_true',
+                help=('Upload local files into a shared directory in'
+                      ' cloud_tmp_dir, named by their md5 sum, and skip'
+                      ' files that are already there'),
+            )),
+            (['--no-cloud-dedup-uploads'], dict(
+                action='store_false',
+                help=('Upload local files into a new directory for each'
+                      ' job (the default)'),
+            )),
+        ],
+    ),
+    cloud_download_part_size=dict(
+        cloud_role='connect',
+        runners=['emr'],
+        switches=[
+            (['--cloud-download-part-size'], dict(
+                help=('Download files from S3 in parts no bigger than this'
+                      ' many megabytes, fetching several parts at once.'
+                      ' Default is 16 MiB. Set to 0 to always download'
+                      ' files in one piece.'),
+                type='float',
+            )),
+        ],
+    ),
+    cloud_download_threads=dict(
+        cloud_role='connect',
+        runners=['emr'],
+        switches=[
+            (['--cloud-download-threads'], dict(
+                help=('How many parts of a file to download from S3 at'
+                      ' once. Default is 4.'),
+                type='int',
+            )),
+        ],
+    ),
     cloud_fs_sync_secs=dict(
         cloud_role='launch',
         deprecated_aliases=['s3_sync_wait_time'],
@@ -395,7 +437,8 @@ _RUNNER_OPTS = dict(
                 help=('How long to wait for remote FS to reach eventual'
                       ' consistency. This'
                       ' is typically less than a second but the'
-                      ' default is 5.0 to be safe.'),
+                      ' default is 5.0 to be safe. On EMR, this only'
+                      ' matters with --no-s3-strong-consistency.'),
                 type='float',
             )),
         ],
@@ -438,6 +481,17 @@ _RUNNER_OPTS = dict(
             )),
         ],
     ),
+    cloud_upload_threads=dict(
+        cloud_role='launch',
+        runners=['dataproc', 'emr'],
+        switches=[
+            (['--cloud-upload-threads'], dict(
+                help=('How many files (or parts of a file) to upload to S3'
+                      ' or GCS at once. Default is 4.'),
+                type='int',
+            )),
+        ],
+    ),
     cluster_id=dict(
         deprecated_aliases=['emr_job_flow_id'],
         runners=['dataproc', 'emr'],
@@ -587,6 +641,17 @@ _RUNNER_OPTS = dict(
             )),
         ],
     ),
+    fs_cache_secs=dict(
+        runners=['dataproc', 'emr', 'hadoop'],
+        switches=[
+            (['--fs-cache-secs'], dict(
+                help=('Remember the results of listing and checking for'
+                      ' files on remote filesystems for this many seconds.'
+                      ' Default is 0 (no caching).'),
+                type='float',
+            )),
+        ],
+    ),
     gcp_project=dict(
         runners=['dataproc'],
         switches=[
@@ -977,6 +1042,24 @@ _RUNNER_OPTS = dict(
             )),
         ],
     ),
+    s3_strong_consistency=dict(
+        cloud_role='connect',
+        runners=['emr'],
+        switches=[
+            (['--s3-strong-consistency'], dict(
+                action='store_true',
+                help=('Assume S3 has read-after-write consistency and'
+                      ' supports conditional writes, so we never have to'
+                      ' wait for it to sync up (the default)'),
+            )),
+            (['--no-s3-strong-consistency'], dict(
+                action='store_false',
+                help=("Wait --cloud-fs-sync-secs for S3 to sync up, and"
+                      " don't lock pooled clusters with conditional writes."
+                      " Use this with S3-compatible storage that needs it."),
+            )),
+        ],
+    ),
     setup=dict(
         combiner=combine_lists,
         switches=[
@@ -1217,6 +1300,16 @@ _RUNNER_OPTS = dict(
             )),
         ],
     ),
+    webhdfs_url=dict(
+        runners=['hadoop'],
+        switches=[
+            (['--webhdfs-url'], dict(
+                help=('Talk to HDFS through the WebHDFS (or HttpFS) REST API'
+                      ' at this URL (e.g. http://namenode:50070), rather'
+                      ' than running "hadoop fs"'),
+            )),
+        ],
+    ),
     zone=dict(
         cloud_role='launch',
         deprecated_aliases=['aws_availability_zone'],
@@ -0,0 +1,468 @@
+# Copyright 2016 Yelp
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Utilities for doing I/O in background threads.
+
+Like :py:mod:`mrjob.util`, this module only uses the standard library,
+since it's used by :py:func:`~mrjob.util.read_input`.
+"""
+import threading
+from collections import deque
+from itertools import chain
+from itertools import islice
+
+# default number of files to read in the background at once
+_DEFAULT_READ_AHEAD_THREADS = 4
+
+# default cap on how many bytes of lines we'll buffer from files the
+# caller isn't reading yet
+_DEFAULT_READ_AHEAD_BYTES = 64 * 1024 * 1024
+
+# background threads hand off lines in batches of about this many bytes,
+# so we don't have to grab a lock for every line
+_READ_AHEAD_BATCH_BYTES = 64 * 1024
+
+
+def _read_ahead(paths, read_path,
+                max_threads=_DEFAULT_READ_AHEAD_THREADS,
+                max_bytes=_DEFAULT_READ_AHEAD_BYTES):
+    """Yield lines from each of *paths* in order, by calling
+    ``read_path(path)``, which should yield lines.
+
+    While we yield lines from one file, up to *max_threads* background
+    threads open and read the next files, so that we don't pay for
+    opening each file (and waiting for its first byte) serially. Lines
+    from files we haven't reached yet are buffered in memory, up to about
+    *max_bytes* bytes.
+
+    If *read_path* raises an exception, we re-raise it once we reach
+    that file.
+
+    If there's only one path, or *max_threads* is 0, we just read files
+    one after another, without using threads.
+    """
+    paths = list(paths)
+
+    if max_threads < 1 or len(paths) < 2:
+        for path in paths:
+            for line in read_path(path):
+                yield line
+        return
+
+    reader = _ReadAhead(paths, read_path, max_threads, max_bytes)
+    try:
+        for line in reader:
+            yield line
+    finally:
+        reader.close()
+
+
+class _ReadAhead(object):
+    """Helper for :py:func:`_read_ahead`. Background threads claim paths
+    in order and put batches of lines into a buffer for each path;
+    iterating over this object yields those lines in order.
+
+    The thread reading the file we're currently iterating over never
+    waits for memory to free up; otherwise we could deadlock with every
+    other thread waiting for us to consume their lines.
+    """
+    def __init__(self, paths, read_path, max_threads, max_bytes):
+        self._paths = paths
+        self._read_path = read_path
+        self._max_bytes = max_bytes
+
+        self._cond = threading.Condition()
+
+        # one deque of (lines, num_bytes) per path
+        self._batches = [deque() for _ in paths]
+        self._done = [False] * len(paths)
+        self._errors = [None] * len(paths)
+
+        self._buffered_bytes = 0
+        self._current = 0  # index of path we're yielding lines from
+        self._next_to_read = 0  # index of next path a thread should claim
+        self._closed = False
+
+        for _ in range(min(max_threads, len(paths))):
+            thread = threading.Thread(target=self._read_paths)
+            # don't keep Python alive if the caller stops reading
+            thread.daemon = True
+            thread.start()
+
+    def __iter__(self):
+        for i in range(len(self._paths)):
+            with self._cond:
+                self._current = i
+                self._cond.notify_all()
+
+            while True:
+                with self._cond:
+                    while not (self._batches[i] or self._done[i]):
+                        self._cond.wait()
+
+                    if self._batches[i]:
+                        lines, num_bytes = self._batches[i].popleft()
+                        self._buffered_bytes -= num_bytes
+                        self._cond.notify_all()
+                    elif self._errors[i] is not None:
+                        raise self._errors[i]
+                    else:
+                        break
+
+                for line in lines:
+                    yield line
+
+    def close(self):
+        """Tell background threads to stop reading."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _read_paths(self):
+        """Target for background threads."""
+        while True:
+            with self._cond:
+                if self._closed or self._next_to_read >= len(self._paths):
+                    return
+                i = self._next_to_read
+                self._next_to_read += 1
+
+            try:
+                self._read_path_into_buffer(i)
+            except Exception as e:
+                with self._cond:
+                    self._errors[i] = e
+            finally:
+                with self._cond:
+                    self._done[i] = True
+                    self._cond.notify_all()
+
+    def _read_path_into_buffer(self, i):
+        lines = self._read_path(self._paths[i])
+
+        batch = []
+        batch_bytes = 0
+
+        try:
+            for line in lines:
+                batch.append(line)
+                batch_bytes += len(line)
+
+                if batch_bytes >= _READ_AHEAD_BATCH_BYTES:
+                    keep_reading = self._put(i, batch, batch_bytes)
+                    batch = []
+                    batch_bytes = 0
+
+                    if not keep_reading:
+                        return
+        finally:
+            # hand off whatever we read, even if there was an error
+            if batch:
+                self._put(i, batch, batch_bytes)
+
+            # let read_file() and friends clean up
+            if hasattr(lines, 'close'):
+                lines.close()
+
+    def _put(self, i, batch, batch_bytes):
+        """Add a batch of lines to the buffer for the *i*-th path,
+        waiting until there's room. Return ``False`` if we've been closed.
+        """
+        with self._cond:
+            while not (self._closed or i == self._current or
+                       self._buffered_bytes < self._max_bytes):
+                self._cond.wait()
+
+            if self._closed:
+                return False
+
+            self._batches[i].append((batch, batch_bytes))
+            self._buffered_bytes += batch_bytes
+            self._cond.notify_all()
+
+            return True
+
+
+def _map_in_threads(func, items, max_threads):
+    """Call ``func(item)`` for each of *items*, using up to *max_threads*
+    threads at once, and return a list of the results, in order.
+
+    *items* may be a generator; threads take items from it one at a time,
+    only as they're ready to work on them, so we don't need to hold all
+    of *items* in memory at once.
+
+    If any call raises an exception (or getting the next item does), we
+    don't start any new calls; once the calls in progress finish, we
+    re-raise the first exception.
+
+    If *max_threads* is 1 or less, or there's only one item, we don't
+    use threads at all.
+    """
+    items = iter(items)
+
+    if max_threads <= 1:
+        return [func(item) for item in items]
+
+    first_items = list(islice(items, 2))
+    if len(first_items) <= 1:
+        return [func(item) for item in first_items]
+
+    items = chain(first_items, items)
+
+    # map from index of item to result
+    results = {}
+    errors = []
+    lock = threading.Lock()
+    # use a list so that worker threads can update it
+    next_index = [0]
+
+    def work():
+        while True:
+            with lock:
+                if errors:
+                    return
+
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+                except Exception as e:
+                    errors.append(e)
+                    return
+
+                i = next_index[0]
+                next_index[0] += 1
+
+            try:
+                results[i] = func(item)
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+                return
+
+    threads = [threading.Thread(target=work) for _ in range(max_threads)]
+
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+
+    return [results[i] for i in range(next_index[0])]
+
+
+def _prefetch(items, max_ahead=1):
+    """Yield each of *items* (usually a generator), while a background
+    thread fetches up to *max_ahead* more items ahead of time. For
+    example, we can download the next chunk of a file while the caller
+    is still processing this one.
+
+    If getting an item raises an exception, we re-raise it once the
+    caller reaches that point.
+
+    If *max_ahead* is 0, we don't use a thread at all.
+    """
+    if max_ahead < 1:
+        for item in items:
+            yield item
+        return
+
+    prefetcher = _Prefetcher(items, max_ahead)
+    try:
+        for item in prefetcher:
+            yield item
+    finally:
+        prefetcher.close()
+
+
+class _Prefetcher(object):
+    """Helper for :py:func:`_prefetch`. A background thread iterates
+    through *items* and puts them in a buffer; iterating over this object
+    yields them in order."""
+    def __init__(self, items, max_ahead):
+        self._items = items
+        self._max_ahead = max_ahead
+
+        self._cond = threading.Condition()
+
+        self._buffer = deque()
+        self._done = False
+        self._error = None
+        self._closed = False
+
+        thread = threading.Thread(target=self._fetch_items)
+        # don't keep Python alive if the caller stops reading
+        thread.daemon = True
+        thread.start()
+
+    def __iter__(self):
+        while True:
+            with self._cond:
+                while not (self._buffer or self._done):
+                    self._cond.wait()
+
+                if self._buffer:
+                    item = self._buffer.popleft()
+                    self._cond.notify_all()
+                elif self._error is not None:
+                    raise self._error
+                else:
+                    return
+
+            yield item
+
+    def close(self):
+        """Tell the background thread to stop fetching items."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _fetch_items(self):
+        """Target for the background thread."""
+        items = iter(self._items)
+
+        try:
+            while True:
+                # wait for room before fetching, so that we never hold
+                # more than max_ahead items the caller hasn't reached
+                with self._cond:
+                    while not (self._closed or
+                               len(self._buffer) < self._max_ahead):
+                        self._cond.wait()
+
+                    if self._closed:
+                        return
+
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+
+                with self._cond:
+                    self._buffer.append(item)
+                    self._cond.notify_all()
+        except Exception as e:
+            with self._cond:
+                self._error = e
+        finally:
+            # let generators clean up
+            if hasattr(self._items, 'close'):
+                self._items.close()
+
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+
+
+def _map_ahead(func, items, max_ahead):
+    """Yield ``func(item)`` for each of *items*, in order, while up to
+    *max_ahead* background threads call *func* on the items after the
+    one the caller is waiting for. Useful when the caller may stop early
+    (e.g. once it finds what it's looking for), so we shouldn't call
+    *func* on every item up front like :py:func:`_map_in_threads`.
+
+    If a call raises an exception, we re-raise it once the caller
+    reaches that item.
+
+    If *max_ahead* is 0, or there's only one item, we don't use threads
+    at all.
+    """
+    items = list(items)
+
+    if max_ahead < 1 or len(items) < 2:
+        for item in items:
+            yield func(item)
+        return
+
+    mapper = _MapAhead(func, items, max_ahead)
+    try:
+        for result in mapper:
+            yield result
+    finally:
+        mapper.close()
+
+
+class _MapAhead(object):
+    """Helper for :py:func:`_map_ahead`. Background threads claim items in
+    order, but never more than *max_ahead* past the item the caller is
+    waiting for; iterating over this object yields results in order."""
+    def __init__(self, func, items, max_ahead):
+        self._func = func
+        self._items = items
+        self._max_ahead = max_ahead
+
+        self._cond = threading.Condition()
+
+        # map from index of item to (result, exception)
+        self._results = {}
+
+        self._current = 0  # index of item the caller is waiting for
+        self._next_to_map = 0  # index of next item a thread should claim
+        self._closed = False
+
+        for _ in range(min(max_ahead, len(items))):
+            thread = threading.Thread(target=self._map_items)
+            # don't keep Python alive if the caller stops early
+            thread.daemon = True
+            thread.start()
+
+    def __iter__(self):
+        for i in range(len(self._items)):
+            with self._cond:
+                self._current = i
+                self._cond.notify_all()
+
+                while i not in self._results:
+                    self._cond.wait()
+
+                result, error = self._results.pop(i)
+
+            if error is not None:
+                raise error
+
+            yield result
+
+    def close(self):
+        """Tell background threads not to claim any more items."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _map_items(self):
+        """Target for background threads."""
+        while True:
+            with self._cond:
+                while not (self._closed or
+                           self._next_to_map >= len(self._items) or
+                           self._next_to_map <=
+                           self._current + self._max_ahead):
+                    self._cond.wait()
+
+                if self._closed or self._next_to_map >= len(self._items):
+                    return
+
+                i = self._next_to_map
+                self._next_to_map += 1
+
+            try:
+                result = (self._func(self._items[i]), None)
+            except Exception as e:
+                result = (None, e)
+
+            with self._cond:
+                self._results[i] = result
+                self._cond.notify_all()
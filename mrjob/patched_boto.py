@@ -17,25 +17,53 @@
 Don't depend on code in this module; it might go away in later 0.5.x versions
 of mrjob!
 """
+import threading
+from contextlib import contextmanager
+
 import boto.emr.connection
 from boto.emr.emrobject import Cluster
 from boto.emr.emrobject import ClusterTimeline
 from boto.emr.emrobject import EmrObject
 from boto.resultset import ResultSet
 
+# (module, name) -> number of calls currently using the patched version
+_num_patch_users = {}
+_num_patch_users_lock = threading.Lock()
+
+
+@contextmanager
+def _patched(module, name, patched_value, orig_value):
+    """Set *module*.*name* to *patched_value*, and then set it back to
+    *orig_value*.
+
+    This is safe to use from several threads at once; we only put back
+    the original value once every thread is done with the patched one.
+    (Not using patch here because it's an external dependency in
+    Python 2.)
+    """
+    key = (module, name)
+
+    with _num_patch_users_lock:
+        _num_patch_users[key] = _num_patch_users.get(key, 0) + 1
+        setattr(module, name, patched_value)
+
+    try:
+        yield
+    finally:
+        with _num_patch_users_lock:
+            _num_patch_users[key] -= 1
+            if not _num_patch_users[key]:
+                setattr(module, name, orig_value)
+
 
 def _patched_describe_cluster(emr_conn, *args, **kwargs):
     """Wrapper for :py:meth:`boto.emr.EmrConnection.list_steps()`
     that adds the ReleaseLabel and Configurations fields.
     """
     # monkey-patch boto.emr.connection, because that's what
-    # describe_cluster() references. Not using patch here because it's
-    # an external dependency in Python 2
-    try:
-        boto.emr.connection.Cluster = _PatchedCluster
+    # describe_cluster() references.
+    with _patched(boto.emr.connection, 'Cluster', _PatchedCluster, Cluster):
         return emr_conn.describe_cluster(*args, **kwargs)
-    finally:
-        boto.emr.connection.Cluster = Cluster
 
 
 def _patched_list_steps(emr_conn, *args, **kwargs):
@@ -49,13 +77,10 @@ def _patched_list_steps(emr_conn, *args, **kwargs):
     # make a difference for mrjob.
 
     # monkey-patch boto.emr.emrobject, because that's what
-    # StepSummaryList references. Not using patch here because it's
-    # an external dependency in Python 2
-    try:
-        boto.emr.emrobject.ClusterTimeline = _PatchedClusterTimeline
+    # StepSummaryList references.
+    with _patched(boto.emr.emrobject, 'ClusterTimeline',
+                  _PatchedClusterTimeline, ClusterTimeline):
         return emr_conn.list_steps(*args, **kwargs)
-    finally:
-        boto.emr.emrobject.ClusterTimeline = ClusterTimeline
 
 
 def _patched_describe_step(emr_conn, *args, **kwargs):
@@ -63,11 +88,9 @@ def _patched_describe_step(emr_conn, *args, **kwargs):
     that works around around `boto's startdatetime bug
     <https://github.com/boto/boto/issues/3268>`__."""
     # see comment in _patched_list_steps() for details
-    try:
-        boto.emr.emrobject.ClusterTimeline = _PatchedClusterTimeline
+    with _patched(boto.emr.emrobject, 'ClusterTimeline',
+                  _PatchedClusterTimeline, ClusterTimeline):
         return emr_conn.describe_step(*args, **kwargs)
-    finally:
-        boto.emr.emrobject.ClusterTimeline = ClusterTimeline
 
 
 class _Configuration(EmrObject):
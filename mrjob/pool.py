@@ -16,14 +16,22 @@
 # limitations under the License.
 """Utilities related to cluster pooling. This code used to be in mrjob.emr.
 """
+import json
+import os
+import time
 from datetime import datetime
 from datetime import timedelta
 from logging import getLogger
 
 from mrjob.parse import iso8601_to_datetime
+from mrjob.util import _atomic_write_path
+from mrjob.util import _user_cache_dir
 
 log = getLogger(__name__)
 
+# forget about clusters we haven't seen in this many days
+_POOL_INDEX_DAYS = 7
+
 
 ### current versions of these functions, using "cluster" API calls ###
 
@@ -64,3 +72,61 @@ def _pool_hash_and_name(bootstrap_actions):
                 return args[0][5:], args[1]
 
     return (None, None)
+
+
+### pool index ###
+
+# A cluster's bootstrap actions never change, so once we know a cluster's
+# pool hash and name, we don't need to look them up again. We keep them
+# in a JSON file mapping cluster ID to a dictionary with the keys
+# *pool_hash*, *pool_name*, and *last_seen* (a Unix timestamp).
+
+def _pool_index_path():
+    """Where we keep the pool index."""
+    return os.path.join(_user_cache_dir(), 'emr-pool-index.json')
+
+
+def _load_pool_index(path=None):
+    """Load the pool index from *path* (by default,
+    :py:func:`_pool_index_path`). Returns an empty dictionary if it
+    doesn't exist or can't be read."""
+    path = path or _pool_index_path()
+
+    if not os.path.exists(path):
+        return {}
+
+    try:
+        with open(path) as f:
+            index = json.load(f)
+    except (IOError, OSError, ValueError) as e:
+        log.debug("couldn't read pool index from %s: %s" % (path, e))
+        return {}
+
+    if not isinstance(index, dict):
+        return {}
+
+    return index
+
+
+def _save_pool_index(index, path=None, now=None):
+    """Save *index* to *path* (by default, :py:func:`_pool_index_path`),
+    leaving out clusters we haven't seen in ``_POOL_INDEX_DAYS`` days.
+
+    Several runners may do this at once; the last one wins, which is fine,
+    since the index is just a cache.
+    """
+    path = path or _pool_index_path()
+    if now is None:
+        now = time.time()
+
+    cutoff = now - _POOL_INDEX_DAYS * 24 * 60 * 60
+
+    index = dict((cluster_id, entry) for cluster_id, entry in index.items()
+                 if entry.get('last_seen', 0) >= cutoff)
+
+    try:
+        with _atomic_write_path(path) as tmp_path:
+            with open(tmp_path, 'w') as f:
+                json.dump(index, f, sort_keys=True)
+    except (IOError, OSError) as e:
+        log.debug("couldn't save pool index to %s: %s" % (path, e))
@@ -142,20 +142,36 @@ if PY2:
     from urlparse import ParseResult
     from urllib import quote
     from urllib import unquote
+    from urllib import urlencode
     from urllib2 import urlopen
     from urlparse import urlparse
 else:
     from urllib.parse import ParseResult
     from urllib.parse import quote
     from urllib.parse import unquote
+    from urllib.parse import urlencode
     from urllib.request import urlopen
     from urllib.parse import urlparse
 ParseResult
 quote
 unquote
+urlencode
 urlopen
 urlparse
 
+# httplib stuff
+if PY2:
+    from httplib import HTTPConnection
+    from httplib import HTTPException
+    from httplib import HTTPSConnection
+else:
+    from http.client import HTTPConnection
+    from http.client import HTTPException
+    from http.client import HTTPSConnection
+HTTPConnection
+HTTPException
+HTTPSConnection
+
 
 def to_string(s):
     """Convert ``bytes`` to ``str``, leaving ``unicode`` unchanged.
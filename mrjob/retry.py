@@ -12,13 +12,20 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-"""Wrappers for gracefully retrying on error."""
+"""Wrappers for gracefully retrying on error, and for not making calls
+too often in the first place."""
 import logging
+import random
+import threading
 import time
 from functools import wraps
 
 log = logging.getLogger(__name__)
 
+# process-wide token buckets, keyed by name (see _shared_token_bucket())
+_shared_token_buckets = {}
+_shared_token_buckets_lock = threading.Lock()
+
 
 class RetryGoRound(object):
     """Handle flaky mirrors/endpoints by trying them all.
@@ -97,7 +104,8 @@ class RetryWrapper(object):
     # TODO: this doesn't correctly handle object properties or wrapping
     # functions.
     def __init__(self, wrapped, retry_if, backoff=15, multiplier=1.5,
-                 max_tries=10):
+                 max_tries=10, max_backoff=None, jitter=False,
+                 rate_limiter=None, retry_budget=None):
         """
         Wrap the given object
 
@@ -113,6 +121,25 @@ class RetryWrapper(object):
         :type max_tries: int
         :param max_tries: how many tries we get. ``0`` means to keep trying
                           forever
+        :type max_backoff: float
+        :param max_backoff: if set, never back off for longer than this
+        :type jitter: bool
+        :param jitter: if true, sleep for a random amount of time between
+                       zero and the backoff time, so that callers who got
+                       errors at the same time don't retry at the same time
+        :param rate_limiter: optional :py:class:`_TokenBucket` to take a
+                             token from before every call (including
+                             retries)
+        :param retry_budget: optional :py:class:`_TokenBucket` to take a
+                             token from before every retry. If there are
+                             no tokens left, we back off for
+                             *max_backoff* (if set), and then wait for a
+                             token before retrying.
+
+        .. versionchanged:: 0.5.7
+
+           added *max_backoff*, *jitter*, *rate_limiter*, and
+           *retry_budget*
         """
         self.__wrapped = wrapped
 
@@ -128,6 +155,12 @@ class RetryWrapper(object):
 
         self.__max_tries = max_tries
 
+        self.__max_backoff = max_backoff
+        self.__jitter = jitter
+
+        self.__rate_limiter = rate_limiter
+        self.__retry_budget = retry_budget
+
     def __getattr__(self, name):
         """The glue that makes functions retriable, and returns other
         attributes from the wrapped object as-is."""
@@ -145,15 +178,42 @@ class RetryWrapper(object):
             tries = 0
 
             while (not self.__max_tries or tries < self.__max_tries):
+                if self.__rate_limiter:
+                    self.__rate_limiter.acquire()
+
                 try:
                     return f(*args, **kwargs)
                 except Exception as ex:
                     if (self.__retry_if(ex) and
                         (tries < self.__max_tries - 1 or
                          not self.__max_tries)):
+                        # if lots of calls are being retried at once,
+                        # back off as far as we can, and then wait our
+                        # turn. We'd rather be slow than fail
+                        out_of_budget = (
+                            self.__retry_budget and
+                            not self.__retry_budget.try_acquire())
+
+                        if self.__max_backoff:
+                            if out_of_budget:
+                                backoff = self.__max_backoff
+                            else:
+                                backoff = min(backoff, self.__max_backoff)
+
+                        if self.__jitter:
+                            delay = _full_jitter(backoff)
+                        else:
+                            delay = backoff
+
                         log.info('Got retriable error: %r' % ex)
-                        log.info('Backing off for %.1f seconds' % backoff)
-                        time.sleep(backoff)
+                        log.info('Backing off for %.1f seconds' % delay)
+                        time.sleep(delay)
+
+                        if out_of_budget:
+                            log.info('Too many retries at once; waiting'
+                                     ' for our turn')
+                            self.__retry_budget.acquire()
+
                         tries += 1
                         backoff *= self.__multiplier
                     else:
@@ -162,3 +222,134 @@ class RetryWrapper(object):
         # pretend to be the original function
         call_and_maybe_retry.__name__ == f.__name__
         return call_and_maybe_retry
+
+
+def _full_jitter(backoff):
+    """Pick a random delay between zero and *backoff* seconds."""
+    return random.uniform(0, backoff)
+
+
+class _TokenBucket(object):
+    """Limit how often something happens (e.g. API calls), allowing
+    short bursts. This is safe to share between threads.
+
+    Each call to :py:meth:`acquire` or :py:meth:`try_acquire` takes a
+    token; tokens are replenished at *rate* per second, and up to *burst*
+    can be saved up.
+    """
+    def __init__(self, rate, burst=1, clock=None, sleep=None):
+        """
+        :type rate: float
+        :param rate: how many tokens to add per second
+        :type burst: float
+        :param burst: the most tokens we can have at once
+        :param clock: function returning the current time in seconds
+                      (default is :py:func:`time.time`)
+        :param sleep: function to sleep for some number of seconds
+                      (default is :py:func:`time.sleep`)
+        """
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        if burst < 1:
+            raise ValueError('burst must be at least one')
+
+        self._rate = rate
+        self._burst = burst
+        self._clock = clock
+        self._sleep = sleep
+
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._last_time = None
+
+    def _now(self):
+        return (self._clock or time.time)()
+
+    def _refill(self):
+        """Add tokens for the time since we last checked. Call this while
+        holding ``self._lock``."""
+        now = self._now()
+
+        if self._last_time is not None:
+            self._tokens = min(
+                self._burst,
+                self._tokens + (now - self._last_time) * self._rate)
+        self._last_time = now
+
+    def acquire(self):
+        """Take a token, sleeping until one is available if we need to.
+        Returns how long we slept."""
+        with self._lock:
+            self._refill()
+
+            # reserve a token even if we don't have one yet; this means
+            # threads get tokens in the order they asked for them
+            self._tokens -= 1
+            wait = max(0.0, -self._tokens / self._rate)
+
+        if wait:
+            (self._sleep or time.sleep)(wait)
+
+        return wait
+
+    def try_acquire(self):
+        """Take a token if one is available right now, without sleeping.
+        Returns whether we got one."""
+        with self._lock:
+            self._refill()
+
+            if self._tokens < 1:
+                return False
+
+            self._tokens -= 1
+            return True
+
+
+class _RateLimitWrapper(object):
+    """Wrap an object (e.g. a connection) so that every method call
+    first takes a token from *bucket*, a :py:class:`_TokenBucket`."""
+
+    def __init__(self, wrapped, bucket):
+        self.__wrapped = wrapped
+        self.__bucket = bucket
+
+    def __getattr__(self, name):
+        """Rate-limit calls to methods, and return other attributes
+        from the wrapped object as-is."""
+        x = getattr(self.__wrapped, name)
+        if not hasattr(x, '__call__'):
+            return x
+
+        def call_when_allowed(*args, **kwargs):
+            self.__bucket.acquire()
+            return x(*args, **kwargs)
+
+        return call_when_allowed
+
+
+def _shared_token_bucket(name, rate, burst=1):
+    """Get the :py:class:`_TokenBucket` called *name*, which is shared by
+    every thread (and runner) in this process, creating it with the given
+    *rate* and *burst* if it doesn't exist yet.
+
+    Use this to limit how fast we hit a particular service or endpoint
+    (e.g. ``'emr:us-west-2.elasticmapreduce.amazonaws.com'``), no matter
+    how many connections we open to it.
+
+    If the bucket already exists with a different *rate* or *burst*, we
+    keep using the existing one (so that the limit really is shared), and
+    log a warning.
+    """
+    with _shared_token_buckets_lock:
+        if name not in _shared_token_buckets:
+            _shared_token_buckets[name] = _TokenBucket(rate, burst=burst)
+
+        bucket = _shared_token_buckets[name]
+
+        if (rate, burst) != (bucket._rate, bucket._burst):
+            log.warning(
+                'Already limiting %s to %g calls per second (burst %g);'
+                ' ignoring rate %g, burst %g' % (
+                    name, bucket._rate, bucket._burst, rate, burst))
+
+        return bucket
@@ -16,6 +16,7 @@
 import copy
 import datetime
 import getpass
+import hashlib
 import json
 import logging
 import os
@@ -26,6 +27,7 @@ import re
 import shutil
 import sys
 import tempfile
+import time
 from inspect import isfunction
 from inspect import ismethod
 from subprocess import CalledProcessError
@@ -46,6 +48,7 @@ from mrjob.options import _combiners
 from mrjob.options import _deprecated_aliases
 from mrjob.options import CLEANUP_CHOICES
 from mrjob.options import _CLEANUP_DEPRECATED_ALIASES
+from mrjob.parallel import _read_ahead
 from mrjob.py2 import PY2
 from mrjob.py2 import string_types
 from mrjob.setup import WorkingDirManager
@@ -53,6 +56,8 @@ from mrjob.setup import parse_legacy_hash_path
 from mrjob.setup import parse_setup_cmd
 from mrjob.step import STEP_TYPES
 from mrjob.step import _is_spark_step_type
+from mrjob.util import _atomic_write_path
+from mrjob.util import _user_cache_dir
 from mrjob.util import bash_wrap
 from mrjob.util import cmd_line
 from mrjob.util import tar_and_gzip
@@ -66,6 +71,10 @@ GLOB_RE = re.compile(r'^(.*?)([\[\*\?].*)$')
 # buffer for piping files into sort on Windows
 _BUFFER_SIZE = 4096
 
+# delete cached copies of mrjob.tar.gz that haven't been used in this
+# many days
+_MRJOB_TAR_GZ_CACHE_DAYS = 30
+
 
 class RunnerOptionStore(OptionStore):
     # 'base' is aritrary; if an option support all runners, it won't
@@ -437,12 +446,19 @@ class MRJobRunner(object):
 
                 path = base
 
-        # TODO - mtai @ davidmarin - why aren't we using self.fs.cat ?
-        for filename in self.fs.ls(output_dir):
+        def is_output_file(filename):
             subpath = filename[len(output_dir):]
-            if not any(name.startswith('_') for name in split_path(subpath)):
-                for line in self.fs._cat_file(filename):
-                    yield line
+            return not any(
+                name.startswith('_') for name in split_path(subpath))
+
+        # TODO - mtai @ davidmarin - why aren't we using self.fs.cat ?
+        filenames = [filename for filename in self.fs.ls(output_dir)
+                     if is_output_file(filename)]
+
+        # open the next few part files in the background, so that we
+        # don't pay for each file's first-byte latency one at a time
+        for line in _read_ahead(filenames, self.fs._cat_file):
+            yield line
 
     def _cleanup_mode(self, mode=None):
         """Actual cleanup action to take based on various options"""
@@ -451,6 +467,12 @@ class MRJobRunner(object):
         else:
             return mode or self._opts['cleanup']
 
+    def _dedup_upload_dir(self):
+        """Directory in :mrjob-opt:`cloud_tmp_dir` where we upload files
+        named by their md5 sum, so that jobs can share them (see
+        :mrjob-opt:`cloud_dedup_uploads`)."""
+        return self._opts['cloud_tmp_dir'] + 'files-by-md5/'
+
     def _cleanup_cloud_tmp(self):
         """Cleanup any files/directories on cloud storage (e.g. S3) we created
         while running this job. Should be safe to run this at any time, or
@@ -1114,6 +1136,11 @@ class MRJobRunner(object):
 
         It's safe to call this method multiple times (we'll only create
         the tarball once.)
+
+        The tarball is reproducible (same files in, same bytes out), and
+        is cached in :file:`~/.cache/mrjob/` so that we only have to build
+        it once for each version of the mrjob library. If we can't write
+        to the cache, we build the tarball in our local tmp dir instead.
         """
         if not self._mrjob_tar_gz_path:
             # find mrjob library
@@ -1126,24 +1153,17 @@ class MRJobRunner(object):
 
             mrjob_dir = os.path.dirname(mrjob.__file__) or '.'
 
-            tar_gz_path = os.path.join(self._get_local_tmp_dir(),
-                                       'mrjob.tar.gz')
-
-            def filter_path(path):
-                filename = os.path.basename(path)
-                return not(filename.lower().endswith('.pyc') or
-                           filename.lower().endswith('.pyo') or
-                           # filter out emacs backup files
-                           filename.endswith('~') or
-                           # filter out emacs lock files
-                           filename.startswith('.#') or
-                           # filter out MacFuse resource forks
-                           filename.startswith('._'))
-
-            log.debug('archiving %s -> %s as %s' % (
-                mrjob_dir, tar_gz_path, os.path.join('mrjob', '')))
-            tar_and_gzip(
-                mrjob_dir, tar_gz_path, filter=filter_path, prefix='mrjob')
+            tar_gz_path = None
+
+            try:
+                tar_gz_path = _cached_mrjob_tar_gz(mrjob_dir)
+            except (IOError, OSError) as ex:
+                log.warning("Couldn't cache mrjob.tar.gz: %s" % ex)
+
+            if not tar_gz_path:
+                tar_gz_path = os.path.join(self._get_local_tmp_dir(),
+                                           'mrjob.tar.gz')
+                _make_mrjob_tar_gz(mrjob_dir, tar_gz_path)
 
             self._mrjob_tar_gz_path = tar_gz_path
 
@@ -1454,3 +1474,88 @@ class MRJobRunner(object):
             for line in err:
                 log.error('STDERR: %s' % line.rstrip('\r\n'))
         raise CalledProcessError(proc.returncode, args)
+
+
+def _mrjob_tar_gz_filter(path):
+    """Filter for files to include in mrjob.tar.gz"""
+    filename = os.path.basename(path)
+    return not(filename.lower().endswith('.pyc') or
+               filename.lower().endswith('.pyo') or
+               # filter out emacs backup files
+               filename.endswith('~') or
+               # filter out emacs lock files
+               filename.startswith('.#') or
+               # filter out MacFuse resource forks
+               filename.startswith('._'))
+
+
+def _make_mrjob_tar_gz(mrjob_dir, tar_gz_path):
+    """Tar up *mrjob_dir* into *tar_gz_path*, reproducibly."""
+    log.debug('archiving %s -> %s as %s' % (
+        mrjob_dir, tar_gz_path, os.path.join('mrjob', '')))
+    tar_and_gzip(mrjob_dir, tar_gz_path, filter=_mrjob_tar_gz_filter,
+                 prefix='mrjob', mtime=0)
+
+
+def _mrjob_dir_fingerprint(mrjob_dir):
+    """Hash the mrjob version, plus the name and contents of every file
+    we'd put in mrjob.tar.gz, so that the same source files always map
+    to the same cached tarball."""
+    m = hashlib.md5()
+    m.update(mrjob.__version__.encode('utf_8'))
+
+    for dirpath, dirnames, filenames in os.walk(mrjob_dir, followlinks=True):
+        dirnames.sort()
+
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            rel_path = path[len(os.path.join(mrjob_dir, '')):]
+            if _mrjob_tar_gz_filter(rel_path):
+                m.update(('\n%s\n' % rel_path).encode('utf_8'))
+                with open(path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(65536), b''):
+                        m.update(chunk)
+
+    return m.hexdigest()
+
+
+def _cached_mrjob_tar_gz(mrjob_dir):
+    """Return the path of mrjob.tar.gz for *mrjob_dir* in our cache,
+    building it if we need to.
+
+    Cached tarballs that haven't been used for
+    ``_MRJOB_TAR_GZ_CACHE_DAYS`` days are deleted.
+    """
+    cache_dir = os.path.join(_user_cache_dir(), 'mrjob-tar-gz')
+    entry_dir = os.path.join(
+        cache_dir, '%s-%s' % (mrjob.__version__,
+                              _mrjob_dir_fingerprint(mrjob_dir)))
+    tar_gz_path = os.path.join(entry_dir, 'mrjob.tar.gz')
+
+    if os.path.exists(tar_gz_path):
+        log.debug('using cached %s' % tar_gz_path)
+        # mark as recently used, so it doesn't get cleaned up
+        os.utime(entry_dir, None)
+        return tar_gz_path
+
+    with _atomic_write_path(tar_gz_path) as tmp_path:
+        _make_mrjob_tar_gz(mrjob_dir, tmp_path)
+
+    _clean_mrjob_tar_gz_cache(cache_dir)
+
+    return tar_gz_path
+
+
+def _clean_mrjob_tar_gz_cache(cache_dir):
+    """Delete cached mrjob tarballs that we haven't used recently."""
+    cutoff = time.time() - _MRJOB_TAR_GZ_CACHE_DAYS * 24 * 60 * 60
+
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                log.debug('deleting old cached %s' % path)
+                shutil.rmtree(path)
+        except (IOError, OSError):
+            # another process could be cleaning up too
+            pass
@@ -265,18 +265,31 @@ class UploadDirManager(object):
 
     :py:class:`UploadDirManager` assumes URIs to not need to be uploaded
     and thus does not store them. :py:meth:`uri` maps URIs to themselves.
+
+    If you pass in a *digest* function, each file goes in a subdirectory
+    named after the digest of its contents (e.g.
+    ``s3://bucket/dir/<md5>/foo.py``), so that files with the same contents
+    always get the same URI, and don't need to be uploaded twice.
     """
-    def __init__(self, prefix):
+    def __init__(self, prefix, digest=None):
         """Make an :py:class`UploadDirManager`.
 
         :param string prefix: The URI for the directory (e.g.
                               `s3://bucket/dir/`). It doesn't matter if
                               *prefix* has a trailing slash; :py:meth:`uri`
                               will do the right thing.
+        :param digest: optional function which takes the path of a local
+                       file and returns a hex digest of its contents (e.g.
+                       :py:meth:`~mrjob.fs.local.LocalFilesystem.md5sum`).
+                       We only compute each file's digest once, so don't
+                       add files until they're done being written.
         """
         self.prefix = prefix
 
+        self._digest = digest
+
         self._path_to_name = {}
+        self._path_to_digest = {}
         self._names_taken = set()
 
     def add(self, path):
@@ -303,11 +316,18 @@ class UploadDirManager(object):
         if is_uri(path):
             return path
 
-        if path in self._path_to_name:
-            return posixpath.join(self.prefix, self._path_to_name[path])
-        else:
+        if path not in self._path_to_name:
             raise ValueError('%r is not a URI or a known local file' % (path,))
 
+        if self._digest:
+            if path not in self._path_to_digest:
+                self._path_to_digest[path] = self._digest(path)
+
+            return posixpath.join(self.prefix, self._path_to_digest[path],
+                                  self._path_to_name[path])
+        else:
+            return posixpath.join(self.prefix, self._path_to_name[path])
+
     def path_to_uri(self):
         """Get a map from path to URI for all paths that were added,
         so we can figure out which files we need to upload."""
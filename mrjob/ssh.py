@@ -27,21 +27,38 @@ from mrjob.util import cmd_line
 
 log = logging.getLogger(__name__)
 
+# how long a multiplexed master connection stays open after its last
+# session ends
+_SSH_CONTROL_PERSIST_SECS = 60
 
-def _ssh_args(ssh_bin, address, ec2_key_pair_file):
+
+def _ssh_args(ssh_bin, address, ec2_key_pair_file, control_path=None):
     """Helper method for :py:func:`_ssh_run` to build an argument list for
     ``subprocess``. Specifies an identity, disables strict host key checking,
     and adds the ``hadoop`` username.
+
+    If *control_path* is set, share a single (persistent) connection to
+    *address* through the control socket at that path, so that we only
+    pay for the SSH handshake once.
     """
     if ec2_key_pair_file is None:
         raise ValueError('SSH key file path is None')
-    return ssh_bin + [
+
+    args = ssh_bin + [
         '-i', ec2_key_pair_file,
         '-o', 'StrictHostKeyChecking=no',
         '-o', 'UserKnownHostsFile=/dev/null',
-        'hadoop@%s' % (address,),
     ]
 
+    if control_path:
+        args += [
+            '-o', 'ControlMaster=auto',
+            '-o', 'ControlPath=%s' % control_path,
+            '-o', 'ControlPersist=%d' % _SSH_CONTROL_PERSIST_SECS,
+        ]
+
+    return args + ['hadoop@%s' % (address,)]
+
 
 def _check_output(out, err):
     if err:
@@ -56,7 +73,8 @@ def _check_output(out, err):
     return out
 
 
-def _ssh_run(ssh_bin, address, ec2_key_pair_file, cmd_args, stdin=''):
+def _ssh_run(ssh_bin, address, ec2_key_pair_file, cmd_args, stdin='',
+             control_path=None):
     """Shortcut to call ssh on a Hadoop node via ``subprocess``.
 
     :param ssh_bin: Path to ``ssh`` binary
@@ -64,17 +82,20 @@ def _ssh_run(ssh_bin, address, ec2_key_pair_file, cmd_args, stdin=''):
     :param ec2_key_pair_file: Path to the key pair file (argument to ``-i``)
     :param cmd_args: The command you want to run
     :param stdin: String to pass to the process's standard input
+    :param control_path: Path of control socket to multiplex connections
+                         through (see :py:func:`_ssh_args`)
 
     :return: (stdout, stderr)
     """
-    args = _ssh_args(ssh_bin, address, ec2_key_pair_file) + list(cmd_args)
+    args = _ssh_args(ssh_bin, address, ec2_key_pair_file,
+                     control_path=control_path) + list(cmd_args)
     log.debug('> %s' % cmd_line(args))
     p = Popen(args, stdout=PIPE, stderr=PIPE, stdin=PIPE)
     return p.communicate(stdin)
 
 
 def _ssh_run_with_recursion(ssh_bin, address, ec2_key_pair_file, keyfile,
-                            cmd_args):
+                            cmd_args, control_path=None):
     """Some files exist on the master and can be accessed directly via SSH,
     but some files are on the slaves which can only be accessed via the master
     node. To differentiate between hosts, we adopt the UUCP "bang path" syntax
@@ -86,6 +107,9 @@ def _ssh_run_with_recursion(ssh_bin, address, ec2_key_pair_file, keyfile,
 
     For bang paths to work, :py:func:`_ssh_copy_key` must have been run, and
     the ``keyfile`` argument must be the same as was passed to that function.
+
+    *control_path* only applies to the first hop (from ``localhost``);
+    the hop from ``host1`` to ``host2`` stays within the cluster.
     """
     if '!' in address:
         if keyfile is None:
@@ -98,12 +122,29 @@ def _ssh_run_with_recursion(ssh_bin, address, ec2_key_pair_file, keyfile,
             'hadoop@%s' % (host2,),
         ]
         return _ssh_run(ssh_bin, host1, ec2_key_pair_file,
-                        more_args + list(cmd_args))
+                        more_args + list(cmd_args),
+                        control_path=control_path)
     else:
-        return _ssh_run(ssh_bin, address, ec2_key_pair_file, cmd_args)
+        return _ssh_run(ssh_bin, address, ec2_key_pair_file, cmd_args,
+                        control_path=control_path)
 
 
-def _ssh_copy_key(ssh_bin, master_address, ec2_key_pair_file, keyfile):
+def _ssh_stop_control_master(ssh_bin, address, ec2_key_pair_file,
+                             control_path):
+    """Ask the master connection listening on *control_path* (see
+    :py:func:`_ssh_args`) to exit. Does nothing if there isn't one.
+    """
+    args = _ssh_args(ssh_bin, address, ec2_key_pair_file,
+                     control_path=control_path)
+    # -O has to come before the destination
+    args = args[:-1] + ['-O', 'exit'] + args[-1:]
+    log.debug('> %s' % cmd_line(args))
+    p = Popen(args, stdout=PIPE, stderr=PIPE, stdin=PIPE)
+    p.communicate()
+
+
+def _ssh_copy_key(ssh_bin, master_address, ec2_key_pair_file, keyfile,
+                  control_path=None):
     """Prepare master to SSH to slaves by copying the EMR private key to the
     master node. This is done via ``cat`` to avoid having to store an
     ``scp_bin`` variable.
@@ -112,14 +153,18 @@ def _ssh_copy_key(ssh_bin, master_address, ec2_key_pair_file, keyfile):
     :param master_address: Address of node to copy keyfile to
     :param ec2_key_pair_file: Path to the key pair file (argument to ``-i``)
     :param keyfile: What to call the key file on the master
+    :param control_path: Path of control socket to multiplex connections
+                         through (see :py:func:`_ssh_args`)
     """
     with open(ec2_key_pair_file, 'rb') as f:
         args = ['bash -c "cat > %s" && chmod 600 %s' % (keyfile, keyfile)]
         _check_output(*_ssh_run(ssh_bin, master_address, ec2_key_pair_file,
-                                args, stdin=f.read()))
+                                args, stdin=f.read(),
+                                control_path=control_path))
 
 
-def _ssh_slave_addresses(ssh_bin, master_address, ec2_key_pair_file):
+def _ssh_slave_addresses(ssh_bin, master_address, ec2_key_pair_file,
+                         control_path=None):
     """Get the IP addresses of the slave nodes. Fails silently because it
     makes testing easier and if things are broken they will fail before this
     function is called.
@@ -130,12 +175,13 @@ def _ssh_slave_addresses(ssh_bin, master_address, ec2_key_pair_file):
     cmd = "hadoop dfsadmin -report | grep ^Name | cut -f2 -d: | cut -f2 -d' '"
     args = ['bash -c "%s"' % cmd]
     ips = to_string(_check_output(
-        *_ssh_run(ssh_bin, master_address, ec2_key_pair_file, args)))
+        *_ssh_run(ssh_bin, master_address, ec2_key_pair_file, args,
+                  control_path=control_path)))
     return [ip for ip in ips.split('\n') if ip]
 
 
 def _ssh_cat(ssh_bin, address, ec2_key_pair_file, path,
-             keyfile=None, sudo=False):
+             keyfile=None, sudo=False, control_path=None, num_bytes=None):
     """Return the file at ``path`` as a string. Raises ``IOError`` if the
     file doesn't exist or SSH access fails.
 
@@ -146,18 +192,26 @@ def _ssh_cat(ssh_bin, address, ec2_key_pair_file, path,
     :param keyfile: Name of the EMR private key file on the master node in case
                     ``path`` exists on one of the slave nodes
     :param sudo: if true, run command with ``sudo``
+    :param control_path: Path of control socket to multiplex connections
+                         through (see :py:func:`_ssh_args`)
+    :param num_bytes: if set, only return the last *num_bytes* bytes of
+                      the file (using ``tail -c``)
     """
-    cmd_args = ['cat', path]
+    if num_bytes is None:
+        cmd_args = ['cat', path]
+    else:
+        cmd_args = ['tail', '-c', str(num_bytes), path]
     if sudo:
         cmd_args = ['sudo'] + cmd_args
 
     out = _check_output(*_ssh_run_with_recursion(
-        ssh_bin, address, ec2_key_pair_file, keyfile, cmd_args))
+        ssh_bin, address, ec2_key_pair_file, keyfile, cmd_args,
+        control_path=control_path))
     return out
 
 
 def _ssh_ls(ssh_bin, address, ec2_key_pair_file, path,
-            keyfile=None, sudo=False):
+            keyfile=None, sudo=False, control_path=None):
     """Recursively list files under ``path`` on the specified SSH host.
     Return the file at ``path`` as a string. Raises ``IOError`` if the
     path doesn't exist or SSH access fails.
@@ -169,13 +223,16 @@ def _ssh_ls(ssh_bin, address, ec2_key_pair_file, path,
     :param keyfile: Name of the EMR private key file on the master node in case
                     ``path`` exists on one of the slave nodes
     :param sudo: if true, run command with ``sudo``
+    :param control_path: Path of control socket to multiplex connections
+                         through (see :py:func:`_ssh_args`)
     """
     cmd_args = ['find', '-L', path, '-type', 'f']
     if sudo:
         cmd_args = ['sudo'] + cmd_args
 
     out = to_string(_check_output(*_ssh_run_with_recursion(
-        ssh_bin, address, ec2_key_pair_file, keyfile, cmd_args)))
+        ssh_bin, address, ec2_key_pair_file, keyfile, cmd_args,
+        control_path=control_path)))
     if 'No such file or directory' in out:
         raise IOError("No such file or directory: %s" % path)
     return out.split('\n')
@@ -52,7 +52,6 @@ import logging
 import re
 from datetime import datetime
 from datetime import timedelta
-from time import sleep
 from optparse import OptionParser
 
 from mrjob.emr import EMRJobRunner
@@ -66,6 +65,8 @@ from mrjob.options import _alphabetize_options
 from mrjob.options import _pick_runner_opts
 from mrjob.parse import iso8601_to_datetime
 from mrjob.patched_boto import _patched_describe_cluster
+from mrjob.retry import _RateLimitWrapper
+from mrjob.retry import _TokenBucket
 from mrjob.util import strip_microseconds
 
 # match an mrjob job key (used to uniquely identify the job)
@@ -75,8 +76,8 @@ _JOB_KEY_RE = re.compile(r'^(.*)\.(.*)\.(\d+)\.(\d+)\.(\d+)$')
 _STEP_NAME_RE = re.compile(
     r'^(.*)\.(.*)\.(\d+)\.(\d+)\.(\d+): Step (\d+) of (\d+)$')
 
-# wait one second between successive calls to EMR API
-_DELAY = 1
+# make at most one call per second to the EMR API (see #1091)
+_MAX_CALLS_PER_SECOND = 1
 
 log = logging.getLogger(__name__)
 
@@ -608,25 +609,23 @@ def _yield_clusters(max_days_ago=None, now=None, **runner_kwargs):
     if now is None:
         now = datetime.utcnow()
 
-    emr_conn = EMRJobRunner(**runner_kwargs).make_emr_conn()
+    emr_conn = _RateLimitWrapper(
+        EMRJobRunner(**runner_kwargs).make_emr_conn(),
+        _TokenBucket(rate=_MAX_CALLS_PER_SECOND))
 
     # if --max-days-ago is set, only look at recent jobs
     created_after = None
     if max_days_ago is not None:
         created_after = now - timedelta(days=max_days_ago)
 
-    # use _DELAY to sleep 1 second before each API call (see #1091). Could
-    # implement some sort of connection wrapper for this if it becomes more
-    # generally useful.
     for cluster_summary in _yield_all_clusters(
-            emr_conn, created_after=created_after, _delay=_DELAY):
+            emr_conn, created_after=created_after):
         cluster_id = cluster_summary.id
 
-        sleep(_DELAY)
         cluster = _patched_describe_cluster(emr_conn, cluster_id)
-        cluster.steps = _list_all_steps(emr_conn, cluster_id, _delay=_DELAY)
+        cluster.steps = _list_all_steps(emr_conn, cluster_id)
         cluster.bootstrapactions = list(
-            _yield_all_bootstrap_actions(emr_conn, cluster_id, _delay=_DELAY))
+            _yield_all_bootstrap_actions(emr_conn, cluster_id))
 
         yield cluster
 
@@ -56,7 +56,6 @@ from mrjob.job import MRJob
 from mrjob.options import _add_basic_options
 from mrjob.options import _add_runner_options
 from mrjob.options import _alphabetize_options
-from mrjob.parse import parse_s3_uri
 
 
 log = logging.getLogger(__name__)
@@ -91,18 +90,27 @@ def _s3_cleanup(glob_path, time_old, dry_run=False, **runner_kwargs):
     log.info('Deleting all files in %s that are older than %s' %
              (glob_path, time_old))
 
-    for path in runner.fs.ls(glob_path):
-        bucket_name, key_name = parse_s3_uri(path)
-        bucket = runner.fs.get_bucket(bucket_name)
-
-        for key in bucket.list(key_name):
-            last_modified = iso8601_to_datetime(key.last_modified)
-            age = datetime.utcnow() - last_modified
-            if age > time_old:
-                # Delete it
-                log.info('Deleting %s; is %s old' % (key.name, age))
-                if not dry_run:
-                    key.delete()
+    old_keys = _keys_older_than(runner.fs.ls_keys(glob_path), time_old)
+
+    if dry_run:
+        # just log which keys we'd delete
+        for key in old_keys:
+            pass
+    else:
+        # delete keys in bulk as we find them, rather than one request
+        # per key
+        runner.fs.delete_keys(old_keys)
+
+
+def _keys_older_than(keys, time_old):
+    """Yield (and log) each of the boto Keys *keys* that was last modified
+    more than *time_old* ago."""
+    for key in keys:
+        last_modified = iso8601_to_datetime(key.last_modified)
+        age = datetime.utcnow() - last_modified
+        if age > time_old:
+            log.info('Deleting %s; is %s old' % (key.name, age))
+            yield key
 
 
 def _runner_kwargs(options):
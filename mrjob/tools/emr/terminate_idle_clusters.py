@@ -361,6 +361,7 @@ def _terminate_and_notify(runner, cluster_id, cluster_name, num_steps,
             '%s (%s)' % (msg,
                          runner._make_unique_job_key(label='terminate')),
             mins_to_expiration=max_mins_locked,
+            conditional=runner._opts['s3_strong_consistency'],
         )
         if status:
             runner.make_emr_conn().terminate_jobflow(cluster_id)
@@ -17,6 +17,7 @@
 # since MRJobs need to run in Amazon's generic EMR environment
 import contextlib
 import glob
+import gzip
 import itertools
 import logging
 import os
@@ -26,6 +27,7 @@ import shlex
 import shutil
 import sys
 import tarfile
+import tempfile
 import zipfile
 import zlib
 from collections import defaultdict
@@ -40,6 +42,7 @@ try:
 except ImportError:
     bz2 = None
 
+from mrjob.parallel import _read_ahead
 from mrjob.py2 import PY2
 
 log = getLogger(__name__)
@@ -437,6 +440,9 @@ def read_input(path, stdin=None):
 
     You can redefine *stdin* for ease of testing. *stdin* can actually be
     any iterable that yields lines (e.g. a list).
+
+    If *path* matches more than one file, we open and decompress the next
+    few files in background threads while you read the current one.
     """
     if stdin is None:
         stdin = sys.stdin
@@ -451,28 +457,23 @@ def read_input(path, stdin=None):
     paths = glob.glob(path)
     if not paths:
         raise IOError(2, 'No such file or directory: %r' % path)
-    elif len(paths) > 1:
-        for path in paths:
-            for line in read_input(path, stdin=stdin):
-                yield line
-        return
-    else:
-        path = paths[0]
-
-    # recurse through directories
-    if os.path.isdir(path):
-        for dirname, _, filenames in os.walk(path, followlinks=True):
-            for filename in filenames:
-                for line in read_input(os.path.join(dirname, filename),
-                                       stdin=stdin):
-                    yield line
-        return
 
-    # read from files
-    for line in read_file(path):
+    for line in _read_ahead(_expand_input_paths(paths), read_file):
         yield line
 
 
+def _expand_input_paths(paths):
+    """Helper for :py:func:`read_input`. Yield each path in *paths*,
+    recursing through directories."""
+    for path in paths:
+        if os.path.isdir(path):
+            for dirname, _, filenames in os.walk(path, followlinks=True):
+                for filename in filenames:
+                    yield os.path.join(dirname, filename)
+        else:
+            yield path
+
+
 # Thanks to http://lybniz2.sourceforge.net/safeeval.html for
 # explaining how to do this!
 def safeeval(expr, globals=None, locals=None):
@@ -603,11 +604,13 @@ def strip_microseconds(delta):
     return timedelta(delta.days, delta.seconds)
 
 
-def tar_and_gzip(dir, out_path, filter=None, prefix=''):
+def tar_and_gzip(dir, out_path, filter=None, prefix='', mtime=None):
     """Tar and gzip the given *dir* to a tarball at *out_path*.
 
     If we encounter symlinks, include the actual file, not the symlink.
 
+    Files are added in sorted order.
+
     :type dir: str
     :param dir: dir to tar up
     :type out_path: str
@@ -617,6 +620,15 @@ def tar_and_gzip(dir, out_path, filter=None, prefix=''):
     :type prefix: str
     :param prefix: subdirectory inside the tarball to put everything into (e.g.
                    ``'mrjob'``)
+    :type mtime: int
+    :param mtime: if set, use this as the modification time of every file
+                  (and of the gzip header), and don't record who owns each
+                  file. This way, the same files always produce the same
+                  tarball.
+
+    .. versionchanged:: 0.5.7
+
+       added *mtime*, files are sorted
     """
     if not os.path.isdir(dir):
         raise IOError('Not a directory: %r' % (dir,))
@@ -624,20 +636,152 @@ def tar_and_gzip(dir, out_path, filter=None, prefix=''):
     if not filter:
         filter = lambda path: True
 
-    tar_gz = tarfile.open(out_path, mode='w:gz')
+    if mtime is None:
+        out_file = gz = None
+        tar_gz = tarfile.open(out_path, mode='w:gz')
+    else:
+        # leave the filename out of the gzip header too
+        out_file = open(out_path, 'wb')
+        try:
+            gz = gzip.GzipFile(
+                filename='', mode='wb', fileobj=out_file, mtime=mtime)
+        except TypeError:  # Python 2.6 doesn't support mtime
+            gz = gzip.GzipFile(filename='', mode='wb', fileobj=out_file)
+        tar_gz = tarfile.open(fileobj=gz, mode='w')
+
+    try:
+        for dirpath, dirnames, filenames in os.walk(dir, followlinks=True):
+            # walk in a consistent order
+            dirnames.sort()
+
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                # janky version of os.path.relpath() (Python 2.6):
+                rel_path = path[len(os.path.join(dir, '')):]
+                if filter(rel_path):
+                    # copy over real files, not symlinks
+                    real_path = os.path.realpath(path)
+                    path_in_tar_gz = os.path.join(prefix, rel_path)
+
+                    if mtime is None:
+                        tar_gz.add(
+                            real_path, arcname=path_in_tar_gz, recursive=False)
+                    else:
+                        tar_info = tar_gz.gettarinfo(
+                            real_path, arcname=path_in_tar_gz)
+                        tar_info.mtime = mtime
+                        tar_info.uid = tar_info.gid = 0
+                        tar_info.uname = tar_info.gname = ''
+
+                        with open(real_path, 'rb') as f:
+                            tar_gz.addfile(tar_info, f)
+    finally:
+        tar_gz.close()
+        if gz:
+            gz.close()
+            out_file.close()
+
+
+def _user_cache_dir():
+    """Directory where mrjob can cache files between runs
+    (``$XDG_CACHE_HOME/mrjob``, or ``~/.cache/mrjob`` by default).
+
+    This directory may not exist yet.
+    """
+    return os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or expand_path('~/.cache'), 'mrjob')
+
+
+@contextlib.contextmanager
+def _atomic_write_path(path):
+    """Yield the path of a temp file in the same directory as *path*
+    (creating the directory if need be). Once the ``with`` block finishes,
+    move the temp file to *path*, replacing any existing file, so that other
+    processes never see a partially written file. If the block raises an
+    exception, just delete the temp file.
+    """
+    dir_name = os.path.dirname(path) or '.'
+    if not os.path.isdir(dir_name):
+        os.makedirs(dir_name)
+
+    fd, tmp_path = tempfile.mkstemp(dir=dir_name, suffix='.tmp')
+    os.close(fd)
+    try:
+        yield tmp_path
+        _replace_file(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _replace_file(src, dest):
+    """Rename *src* to *dest*, even if *dest* exists (on Windows,
+    :py:func:`os.rename` won't replace an existing file)."""
+    if hasattr(os, 'replace'):  # Python 3.3+
+        os.replace(src, dest)
+        return
+
+    try:
+        os.rename(src, dest)
+    except OSError:
+        if not os.path.exists(dest):
+            raise
+        # not atomic, but the best we can do on Windows in Python 2
+        os.remove(dest)
+        os.rename(src, dest)
+
+
+class _ChunkReader(object):
+    """Minimal read-only file object that reads from a sequence of chunks
+    of bytes (e.g. parts of a file that we downloaded separately).
+
+    Iterating over this yields chunks of bytes, not lines, like
+    :py:class:`boto.s3.Key`.
+    """
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._chunk_iter = iter(chunks)
+
+        # current chunk, and our position in it
+        self._buf = b''
+        self._pos = 0
+
+    def read(self, size=-1):
+        pieces = []
+
+        while size is None or size != 0:
+            if self._pos >= len(self._buf):
+                try:
+                    self._buf = next(self._chunk_iter)
+                except StopIteration:
+                    break
+                self._pos = 0
+                continue
+
+            if size is None or size < 0:
+                piece = self._buf[self._pos:]
+            else:
+                piece = self._buf[self._pos:self._pos + size]
+                size -= len(piece)
+
+            self._pos += len(piece)
+            pieces.append(piece)
+
+        return b''.join(pieces)
+
+    def __iter__(self):
+        if self._pos < len(self._buf):
+            yield self._buf[self._pos:]
+        self._buf = b''
+        self._pos = 0
 
-    for dirpath, dirnames, filenames in os.walk(dir, followlinks=True):
-        for filename in filenames:
-            path = os.path.join(dirpath, filename)
-            # janky version of os.path.relpath() (Python 2.6):
-            rel_path = path[len(os.path.join(dir, '')):]
-            if filter(rel_path):
-                # copy over real files, not symlinks
-                real_path = os.path.realpath(path)
-                path_in_tar_gz = os.path.join(prefix, rel_path)
-                tar_gz.add(real_path, arcname=path_in_tar_gz, recursive=False)
+        for chunk in self._chunk_iter:
+            yield chunk
 
-    tar_gz.close()
+    def close(self):
+        """Close the underlying sequence of chunks, if it's a generator."""
+        if hasattr(self._chunks, 'close'):
+            self._chunks.close()
 
 
 def to_lines(chunks):
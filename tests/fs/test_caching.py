@@ -0,0 +1,162 @@
+# Copyright 2016 Yelp
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from mrjob.fs.caching import CachingFilesystem
+from mrjob.fs.composite import CompositeFilesystem
+from mrjob.fs.local import LocalFilesystem
+from mrjob.fs.s3 import S3Filesystem
+
+from tests.mockboto import MockBotoTestCase
+from tests.py2 import patch
+
+
+class CachingFilesystemTestCase(MockBotoTestCase):
+
+    def setUp(self):
+        super(CachingFilesystemTestCase, self).setUp()
+
+        self.now = 1000000.0
+        self.start(patch('mrjob.fs.caching.time.time',
+                         side_effect=lambda: self.now))
+
+        self.s3_fs = S3Filesystem()
+        self.composite_fs = CompositeFilesystem(
+            self.s3_fs, LocalFilesystem())
+        self.fs = CachingFilesystem(self.composite_fs, cache_secs=60)
+
+        self.add_mock_s3_data({'walrus': {'data/foo': b'abcd',
+                                          'data/bar': b'efg'}})
+
+        # count calls to the wrapped S3 filesystem
+        for name in ('du', 'exists', 'ls', 'md5sum'):
+            self.start(patch.object(self.s3_fs, name,
+                                    wraps=getattr(self.s3_fs, name)))
+
+    def test_ls_is_cached(self):
+        paths = ['s3://walrus/data/bar', 's3://walrus/data/foo']
+
+        self.assertEqual(sorted(self.fs.ls('s3://walrus/data/')), paths)
+        self.assertEqual(sorted(self.fs.ls('s3://walrus/data/')), paths)
+
+        self.assertEqual(self.s3_fs.ls.call_count, 1)
+
+    def test_different_paths_cached_separately(self):
+        self.assertEqual(list(self.fs.ls('s3://walrus/data/foo')),
+                         ['s3://walrus/data/foo'])
+        self.assertEqual(list(self.fs.ls('s3://walrus/data/bar')),
+                         ['s3://walrus/data/bar'])
+
+        self.assertEqual(self.s3_fs.ls.call_count, 2)
+
+    def test_exists_du_and_md5sum_are_cached(self):
+        for _ in range(2):
+            self.assertEqual(self.fs.exists('s3://walrus/data/foo'), True)
+            self.assertEqual(self.fs.exists('s3://walrus/data/baz'), False)
+            self.assertEqual(self.fs.du('s3://walrus/data/'), 7)
+            self.assertEqual(self.fs.md5sum('s3://walrus/data/foo'),
+                             self.s3_fs.md5sum('s3://walrus/data/foo'))
+
+        self.assertEqual(self.s3_fs.exists.call_count, 2)
+        self.assertEqual(self.s3_fs.du.call_count, 1)
+        # called once through the cache, and three times directly
+        self.assertEqual(self.s3_fs.md5sum.call_count, 3)
+
+    def test_exists_uses_cached_ls(self):
+        list(self.fs.ls('s3://walrus/data/'))
+
+        self.assertEqual(self.fs.exists('s3://walrus/data/'), True)
+        self.assertFalse(self.s3_fs.exists.called)
+
+    def test_results_expire(self):
+        list(self.fs.ls('s3://walrus/data/'))
+
+        self.now += 59
+        list(self.fs.ls('s3://walrus/data/'))
+        self.assertEqual(self.s3_fs.ls.call_count, 1)
+
+        self.now += 2
+        list(self.fs.ls('s3://walrus/data/'))
+        self.assertEqual(self.s3_fs.ls.call_count, 2)
+
+    def test_errors_arent_cached(self):
+        with patch.object(self.s3_fs, 'du', side_effect=IOError):
+            self.assertRaises(IOError, self.fs.du, 's3://walrus/data/')
+
+        self.assertEqual(self.fs.du('s3://walrus/data/'), 7)
+
+    def test_rm_clears_cache(self):
+        self.assertEqual(self.fs.exists('s3://walrus/data/foo'), True)
+
+        self.fs.rm('s3://walrus/data/foo')
+
+        self.assertEqual(self.fs.exists('s3://walrus/data/foo'), False)
+
+    def test_touchz_clears_cache(self):
+        self.assertEqual(self.fs.exists('s3://walrus/data/baz'), False)
+
+        with patch.object(self.s3_fs, 'touchz') as m_touchz:
+            self.fs.touchz('s3://walrus/data/baz')
+            m_touchz.assert_called_once_with('s3://walrus/data/baz')
+
+        self.fs.exists('s3://walrus/data/baz')
+        self.assertEqual(self.s3_fs.exists.call_count, 2)
+
+    def test_mkdir_clears_cache(self):
+        list(self.fs.ls('s3://walrus/data/'))
+        self.fs.mkdir('s3://walrus/data/qux/')
+        list(self.fs.ls('s3://walrus/data/'))
+
+        self.assertEqual(self.s3_fs.ls.call_count, 2)
+
+    def test_making_s3_key_clears_cache(self):
+        self.assertEqual(self.fs.exists('s3://walrus/data/baz'), False)
+
+        # passed through to S3Filesystem
+        self.fs.make_s3_key('s3://walrus/data/baz').set_contents_from_string(
+            b'baz')
+
+        self.assertEqual(self.fs.exists('s3://walrus/data/baz'), True)
+
+    def test_other_attributes_passed_through(self):
+        self.assertEqual(self.fs.filesystems,
+                         (self.s3_fs, self.composite_fs.filesystems[1]))
+        self.assertEqual(self.fs.get_s3_key('s3://walrus/data/foo').name,
+                         'data/foo')
+
+    def test_local_paths_not_cached(self):
+        path = self.makefile('foo', b'foo')
+
+        with patch.object(LocalFilesystem, 'exists',
+                          wraps=LocalFilesystem().exists) as m_exists:
+            self.assertEqual(self.fs.exists(path), True)
+            self.assertEqual(self.fs.exists(path), True)
+
+            self.assertEqual(m_exists.call_count, 2)
+
+    def test_lru(self):
+        fs = CachingFilesystem(self.composite_fs, cache_secs=60,
+                               max_entries=2)
+
+        list(fs.ls('s3://walrus/data/foo'))
+        list(fs.ls('s3://walrus/data/bar'))
+        # use foo again, so that bar is least recently used
+        list(fs.ls('s3://walrus/data/foo'))
+        list(fs.ls('s3://walrus/data/'))
+
+        self.assertEqual(self.s3_fs.ls.call_count, 3)
+
+        list(fs.ls('s3://walrus/data/foo'))
+        self.assertEqual(self.s3_fs.ls.call_count, 3)
+
+        list(fs.ls('s3://walrus/data/bar'))
+        self.assertEqual(self.s3_fs.ls.call_count, 4)
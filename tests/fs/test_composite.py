@@ -0,0 +1,72 @@
+# Copyright 2016 Yelp
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from mrjob.fs.composite import CompositeFilesystem
+from mrjob.parse import is_uri
+
+from tests.py2 import Mock
+from tests.py2 import TestCase
+
+
+class CompositeFilesystemManyTestCase(TestCase):
+
+    def setUp(self):
+        super(CompositeFilesystemManyTestCase, self).setUp()
+
+        self.hdfs_fs = Mock()
+        self.hdfs_fs.can_handle_path.side_effect = (
+            lambda path: path.startswith('hdfs://'))
+        self.hdfs_fs.exists.side_effect = (
+            lambda path: path == 'hdfs:///foo')
+
+        self.local_fs = Mock()
+        self.local_fs.can_handle_path.side_effect = (
+            lambda path: not is_uri(path))
+        self.local_fs.exists.return_value = True
+
+        self.fs = CompositeFilesystem(self.hdfs_fs, self.local_fs)
+
+    def test_exists_many(self):
+        self.assertEqual(
+            self.fs.exists_many(['hdfs:///foo', '/bar', 'hdfs:///baz']),
+            [True, True, False])
+
+    def test_put(self):
+        self.fs.put('/local/foo', 'hdfs:///foo')
+
+        self.hdfs_fs.put.assert_called_once_with('/local/foo', 'hdfs:///foo')
+        self.assertFalse(self.local_fs.put.called)
+
+    def test_put_falls_back_on_ioerror(self):
+        self.hdfs_fs.put.side_effect = IOError
+        self.local_fs.can_handle_path.side_effect = lambda path: True
+
+        self.fs.put('/local/foo', 'hdfs:///foo')
+
+        self.local_fs.put.assert_called_once_with('/local/foo', 'hdfs:///foo')
+
+    def test_put_many_dispatches_to_each_filesystem(self):
+        self.fs.put_many([('/local/foo', 'hdfs:///foo'),
+                          ('/local/bar', '/tmp/bar'),
+                          ('/local/baz', 'hdfs:///baz')],
+                         max_threads=3)
+
+        self.hdfs_fs.put_many.assert_called_once_with(
+            [('/local/foo', 'hdfs:///foo'), ('/local/baz', 'hdfs:///baz')],
+            max_threads=3)
+        self.local_fs.put_many.assert_called_once_with(
+            [('/local/bar', '/tmp/bar')], max_threads=3)
+
+    def test_put_many_cant_handle_path(self):
+        self.assertRaises(IOError, self.fs.put_many,
+                          [('/local/foo', 's3://walrus/foo')])
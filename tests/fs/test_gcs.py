@@ -14,6 +14,7 @@
 import bz2
 import io
 import sys
+import threading
 from tests.py2 import patch
 from tests.py2 import mock
 from tests.py2 import skipIf
@@ -32,8 +33,12 @@ except ImportError:
     google_http = None
 
 from mrjob.fs.gcs import GCSFilesystem
+from mrjob.fs.gcs import _GCP_MAX_BACKOFF
+from mrjob.fs.gcs import _GCP_MAX_TRIES
+from mrjob.fs.gcs import _http_with_retries
 
 from tests.compress import gzip_compress
+from tests.mockgoogleapiclient import MockGCSMediaHttp
 from tests.mockgoogleapiclient import MockGoogleAPITestCase
 from tests.sandbox import PatcherTestCase
 
@@ -68,6 +73,104 @@ class GCSFSTestCase(MockGoogleAPITestCase):
         self.assertEqual(list(self.fs._cat_file('gs://walrus/data/foo.gz')),
                          [b'foo\n'] * 10000)
 
+    def test_cat_empty(self):
+        self.put_gcs_multi({
+            'gs://walrus/data/empty': b''
+        })
+
+        self.assertEqual(list(self.fs._cat_file('gs://walrus/data/empty')),
+                         [])
+
+    def test_cat_missing(self):
+        self.put_gcs_multi({
+            'gs://walrus/data/foo': b'foo\n'
+        })
+
+        self.assertRaises(google_errors.HttpError, list,
+                          self.fs._cat_file('gs://walrus/data/bar'))
+
+    def test_cat_in_chunks(self):
+        self.start(patch('mrjob.fs.gcs._DOWNLOAD_CHUNK_SIZE', 100))
+
+        data = b''.join(('line %d\n' % i).encode('ascii')
+                       for i in range(1000))
+        self.put_gcs_multi({
+            'gs://walrus/data/foo': data
+        })
+
+        self.assertEqual(b''.join(self.fs._cat_file('gs://walrus/data/foo')),
+                         data)
+
+        self.assertGreater(self._gcs_client.media_https[0].num_requests, 10)
+
+    def test_cat_streams(self):
+        self.start(patch('mrjob.fs.gcs._DOWNLOAD_CHUNK_SIZE', 100))
+
+        self.put_gcs_multi({
+            'gs://walrus/data/foo': b'foo\n' * 1000
+        })
+
+        lines = self.fs._cat_file('gs://walrus/data/foo')
+        self.assertEqual(next(lines), b'foo\n')
+
+        # we only download a chunk or two ahead
+        self.assertLess(self._gcs_client.media_https[0].num_requests, 5)
+
+        lines.close()
+
+    def test_download_threads_dont_share_http(self):
+        self.start(patch('mrjob.fs.gcs._DOWNLOAD_CHUNK_SIZE', 100))
+
+        self.put_gcs_multi({
+            'gs://walrus/data/bar': b'bar\n' * 100,
+            'gs://walrus/data/foo': b'foo\n' * 100,
+        })
+
+        # give each thread its own HTTP object, like _thread_http() does
+        local = threading.local()
+
+        def thread_http():
+            if not hasattr(local, 'http'):
+                local.http = MockGCSMediaHttp(self._gcs_client)
+            return local.http
+
+        self.start(patch.object(self.fs, '_thread_http',
+                                side_effect=thread_http))
+
+        self.assertEqual(
+            list(self.fs.cat_many(['gs://walrus/data/bar',
+                                   'gs://walrus/data/foo'])),
+            [b'bar\n'] * 100 + [b'foo\n'] * 100)
+
+        used_https = [http for http in self._gcs_client.media_https
+                      if http.num_requests]
+        self.assertTrue(used_https)
+
+        for http in used_https:
+            self.assertEqual(len(http.threads), 1)
+            self.assertNotIn(threading.current_thread(), http.threads)
+
+    def test_exists_many_threads_use_own_http(self):
+        self.put_gcs_multi({
+            'gs://walrus/data/foo': b'',
+        })
+
+        threads = []
+
+        def thread_http():
+            threads.append(threading.current_thread())
+
+        self.start(patch.object(self.fs, '_thread_http',
+                                side_effect=thread_http))
+
+        self.assertEqual(
+            self.fs.exists_many(['gs://walrus/data/foo',
+                                 'gs://walrus/data/bar'], max_threads=2),
+            [True, False])
+
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.current_thread(), threads)
+
     def test_ls_key(self):
         self.put_gcs_multi({
             'gs://walrus/data/foo': b''
@@ -162,6 +265,42 @@ class GCSFSTestCase(MockGoogleAPITestCase):
         self.assertEqual(self.fs.exists('gs://walrus/data/foo'), False)
         self.assertEqual(self.fs.exists('gs://walrus/data/bar/baz'), False)
 
+    def test_rm_in_batches(self):
+        self.put_gcs_multi(dict(
+            ('gs://walrus/data/%03d' % i, b'') for i in range(150)))
+
+        self.fs.rm('gs://walrus/data/')
+
+        self.assertEqual(list(self.fs.ls('gs://walrus/data/')), [])
+        self.assertEqual([len(batch.requests)
+                          for batch in self._gcs_client.batches],
+                         [100, 50])
+
+    def test_rm_nonexistent(self):
+        self.fs.rm('gs://walrus/data/foo')
+        self.assertEqual(self._gcs_client.batches, [])
+
+    def test_ls_pages(self):
+        self.put_gcs_multi(dict(
+            ('gs://walrus/data/%d' % i, b'') for i in range(5)))
+
+        with patch('mrjob.fs.gcs._LS_MAX_RESULTS', 2):
+            self.assertEqual(
+                list(self.fs.ls('gs://walrus/data/')),
+                ['gs://walrus/data/%d' % i for i in range(5)])
+
+        self.assertEqual(self._gcs_client.objects().num_list_requests, 3)
+
+    def test_ls_only_fetches_names(self):
+        self.put_gcs_multi({'gs://walrus/data/foo': b'foo'})
+
+        with patch.object(self._gcs_client.objects(), 'list',
+                          wraps=self._gcs_client.objects().list) as m_list:
+            list(self.fs.ls('gs://walrus/data/'))
+
+            self.assertEqual(m_list.call_args[1]['fields'],
+                             'nextPageToken,items(name)')
+
 
 def _http_exception(status_code):
     mock_resp = mock.Mock()
@@ -221,3 +360,92 @@ class GCSFSHTTPErrorTestCase(PatcherTestCase):
 
             with self.assertRaises(google_http.HttpError):
                 self.fs._download_io(self.gcs_path, io_obj)
+
+    def test_upload_io_uses_generation_match(self):
+        insert_req = self.fs._api_client.objects().insert.return_value
+        insert_req.next_chunk.return_value = (None, {})
+
+        self.fs._upload_io(io.BytesIO(b'foo'), self.gcs_path)
+
+        insert_kwargs = self.fs._api_client.objects().insert.call_args[1]
+        self.assertEqual(insert_kwargs['ifGenerationMatch'], 0)
+
+    def test_upload_io_already_exists(self):
+        insert_req = self.fs._api_client.objects().insert.return_value
+        insert_req.next_chunk.side_effect = _http_exception(412)
+
+        self.assertRaises(Exception, self.fs._upload_io,
+                          io.BytesIO(b'foo'), self.gcs_path)
+
+
+class HTTPWithRetriesTestCase(PatcherTestCase):
+
+    def setUp(self):
+        super(HTTPWithRetriesTestCase, self).setUp()
+
+        self.start(patch('mrjob.retry._shared_token_buckets', {}))
+        self.sleep = self.start(patch('time.sleep'))
+        # time stands still
+        self.start(patch('time.time', return_value=0.0))
+
+        self.http = mock.Mock()
+        self.request = self.http.request
+
+    def response(self, status):
+        return mock.Mock(status=status), b''
+
+    def test_retry_on_too_many_requests(self):
+        ok = self.response(200)
+        self.request.side_effect = [self.response(429), ok]
+
+        http = _http_with_retries('storage', http=self.http)
+
+        self.assertEqual(http.request('https://foo', method='POST'), ok)
+        self.assertEqual(self.request.call_count, 2)
+        self.assertEqual(self.sleep.call_count, 1)
+
+    def test_dont_retry_other_errors(self):
+        error = self.response(500)
+        self.request.return_value = error
+
+        http = _http_with_retries('storage', http=self.http)
+
+        self.assertEqual(http.request('https://foo'), error)
+        self.assertEqual(self.request.call_count, 1)
+        self.assertFalse(self.sleep.called)
+
+    def test_eventually_give_up(self):
+        too_many = self.response(429)
+        self.request.return_value = too_many
+
+        http = _http_with_retries('storage', http=self.http)
+
+        self.assertEqual(http.request('https://foo'), too_many)
+        self.assertEqual(self.request.call_count, _GCP_MAX_TRIES)
+
+    def test_retry_budget(self):
+        self.start(patch('mrjob.fs.gcs._GCP_RETRY_BURST', 2))
+
+        ok = self.response(200)
+        self.request.side_effect = [self.response(429)] * 4 + [ok]
+
+        http = _http_with_retries('storage', http=self.http)
+
+        # out of budget after two retries, but we wait our turn rather
+        # than give up
+        with patch('random.uniform', side_effect=lambda a, b: b):
+            self.assertEqual(http.request('https://foo'), ok)
+
+        self.assertEqual(self.request.call_count, 5)
+        self.assertIn(_GCP_MAX_BACKOFF,
+                      [args[0] for args, _ in self.sleep.call_args_list])
+
+    def test_rate_limit(self):
+        self.request.return_value = self.response(200)
+
+        http = _http_with_retries('dataproc', rate=2, http=self.http)
+
+        http.request('https://foo')
+        http.request('https://foo')
+
+        self.sleep.assert_called_once_with(0.5)
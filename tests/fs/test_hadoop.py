@@ -168,10 +168,62 @@ class HadoopFSTestCase(MockSubprocessTestCase):
     def test_rm_nonexistent(self):
         self.fs.rm('hdfs:///baz')
 
+    def test_put_many(self):
+        local_paths = [self.makefile('foo', 'foo'),
+                       self.makefile('bar', 'bar')]
+
+        self.fs.mkdir('hdfs:///uploads/')
+        self.fs._put_many(local_paths, 'hdfs:///uploads/')
+
+        uploads_dir = os.path.join(get_mock_hdfs_root(self.env), 'uploads')
+        self.assertEqual(sorted(os.listdir(uploads_dir)), ['bar', 'foo'])
+
+        with open(os.path.join(uploads_dir, 'bar')) as f:
+            self.assertEqual(f.read(), 'bar')
+
+        put_cmds = [args for args in self.get_hadoop_cmds()
+                    if args[:2] == ['fs', '-put']]
+        self.assertEqual(put_cmds,
+                         [['fs', '-put'] + local_paths + ['hdfs:///uploads/']])
+
     def test_touchz(self):
         # mockhadoop doesn't implement this.
         pass
 
+    def get_hadoop_cmds(self):
+        with open(os.path.join(self.env['MOCK_HADOOP_TMP'], 'cmd.log')) as f:
+            return [line.split() for line in f]
+
+    def test_put(self):
+        local_path = self.makefile('foo', 'foo')
+
+        self.fs.put(local_path, 'hdfs:///uploads/bar')
+
+        with open(os.path.join(
+                get_mock_hdfs_root(self.env), 'uploads', 'bar')) as f:
+            self.assertEqual(f.read(), 'foo')
+
+    def test_put_many_batches_files_that_keep_their_names(self):
+        foo_path = self.makefile('foo', 'foo')
+        bar_path = self.makefile('bar', 'bar')
+        baz_path = self.makefile('baz', 'baz')
+
+        self.fs.mkdir('hdfs:///uploads/')
+        self.fs.put_many([(foo_path, 'hdfs:///uploads/foo'),
+                          (bar_path, 'hdfs:///uploads/bar'),
+                          (baz_path, 'hdfs:///uploads/qux')])
+
+        uploads_dir = os.path.join(get_mock_hdfs_root(self.env), 'uploads')
+        self.assertEqual(sorted(os.listdir(uploads_dir)),
+                         ['bar', 'foo', 'qux'])
+
+        put_cmds = [args for args in self.get_hadoop_cmds()
+                    if args[:2] == ['fs', '-put']]
+        self.assertEqual(put_cmds, [
+            ['fs', '-put', foo_path, bar_path, 'hdfs:///uploads'],
+            ['fs', '-put', baz_path, 'hdfs:///uploads/qux'],
+        ])
+
 
 class Hadoop1FSTestCase(HadoopFSTestCase):
     def set_up_mock_hadoop(self):
@@ -14,11 +14,15 @@
 # limitations under the License.
 import bz2
 import gzip
+import json
 import os
 from os.path import join
 
 from mrjob.fs.local import LocalFilesystem
+from mrjob.fs.local import _save_md5sum_cache
 
+from tests.compress import gzip_compress
+from tests.py2 import patch
 from tests.sandbox import SandboxedTestCase
 
 
@@ -86,6 +90,32 @@ class LocalFSTestCase(SandboxedTestCase):
         self.assertEqual(list(self.fs._cat_file(input_bz2_path)),
                          [b'bar\n', b'bar\n', b'foo\n'])
 
+    def test_tail_file(self):
+        path = self.makefile('f', b'bar\nfoo\n')
+
+        self.assertEqual(self.fs._tail_file(path, 5), b'\nfoo\n')
+        self.assertEqual(self.fs._tail_file(path, 100), b'bar\nfoo\n')
+
+    def test_cat_many(self):
+        foo_path = self.makefile('foo', b'foo\n')
+        self.makefile(join('bar', 'bar1'), b'bar1\n')
+        baz_path = self.makefile('baz.gz', gzip_compress(b'baz\n'))
+
+        self.assertEqual(
+            list(self.fs.cat_many([baz_path, join(self.tmp_dir, 'bar', '*'),
+                                   foo_path])),
+            [b'baz\n', b'bar1\n', b'foo\n'])
+
+    def test_ls_many(self):
+        self.makefile('f', 'contents')
+        self.makefile(join('d', 'f2'), 'contents')
+
+        self.assertEqual(
+            self.fs.ls_many([join(self.tmp_dir, 'd'),
+                             join(self.tmp_dir, 'nope'),
+                             join(self.tmp_dir, 'f')]),
+            [self.abs_paths('d/f2'), [], self.abs_paths('f')])
+
     def test_mkdir(self):
         path = join(self.tmp_dir, 'dir')
         self.fs.mkdir(path)
@@ -99,6 +129,35 @@ class LocalFSTestCase(SandboxedTestCase):
         path = self.makefile('f', 'contents')
         self.assertEqual(self.fs.exists(path), True)
 
+    def test_exists_many(self):
+        path = self.makefile('f', 'contents')
+
+        self.assertEqual(
+            self.fs.exists_many([path, join(self.tmp_dir, 'nope'), path]),
+            [True, False, True])
+
+    def test_put(self):
+        src = self.makefile('f', b'contents')
+        dest = join(self.tmp_dir, 'uploads', 'f')
+
+        self.fs.put(src, dest)
+
+        with open(dest, 'rb') as f:
+            self.assertEqual(f.read(), b'contents')
+
+    def test_put_many(self):
+        foo_path = self.makefile('foo', b'foo')
+        bar_path = self.makefile('bar', b'bar')
+        uploads_dir = join(self.tmp_dir, 'uploads')
+
+        self.fs.put_many([(foo_path, join(uploads_dir, 'foo')),
+                          (bar_path, join(uploads_dir, 'baz'))])
+
+        self.assertEqual(sorted(os.listdir(uploads_dir)), ['baz', 'foo'])
+
+        with open(join(uploads_dir, 'baz'), 'rb') as f:
+            self.assertEqual(f.read(), b'bar')
+
     def test_rm_file(self):
         path = self.makefile('f', 'contents')
         self.assertEqual(self.fs.exists(path), True)
@@ -125,3 +184,94 @@ class LocalFSTestCase(SandboxedTestCase):
         path = self.makefile('f', 'abcd')
         self.assertEqual(self.fs.md5sum(path),
                          'e2fc714c4727ee9395f324cd2e7f331f')
+
+    def test_md5sum_is_cached(self):
+        path = self.makefile('f', 'abcd')
+        self.assertEqual(self.fs.md5sum(path),
+                         'e2fc714c4727ee9395f324cd2e7f331f')
+
+        with patch.object(self.fs, '_md5sum_file') as m_md5sum_file:
+            self.assertEqual(self.fs.md5sum(path),
+                             'e2fc714c4727ee9395f324cd2e7f331f')
+            # cache is shared between filesystems
+            self.assertEqual(LocalFilesystem().md5sum(path),
+                             'e2fc714c4727ee9395f324cd2e7f331f')
+
+            self.assertFalse(m_md5sum_file.called)
+
+    def test_md5sum_cache_notices_changes(self):
+        path = self.makefile('f', 'abcd')
+        self.assertEqual(self.fs.md5sum(path),
+                         'e2fc714c4727ee9395f324cd2e7f331f')
+
+        # change size
+        with open(path, 'w') as f:
+            f.write('abcde')
+        self.assertEqual(self.fs.md5sum(path),
+                         'ab56b4d92b40713acc5af89985d4b786')
+
+        # change contents and mtime, but not size
+        with open(path, 'w') as f:
+            f.write('bcdef')
+        os.utime(path, (0, 0))
+        self.assertEqual(self.fs.md5sum(path),
+                         '0c4337fdf6d3c5f526f577dd63b87da3')
+
+    def md5sum_cache_path(self):
+        return join(self.tmp_dir, '.cache', 'mrjob', 'md5sums.json')
+
+    def test_md5sum_cached_between_processes(self):
+        path = self.makefile('f', 'abcd')
+        self.assertEqual(self.fs.md5sum(path),
+                         'e2fc714c4727ee9395f324cd2e7f331f')
+
+        # we only write the cache file when the runner asks us to
+        self.assertFalse(os.path.exists(self.md5sum_cache_path()))
+        _save_md5sum_cache()
+        self.assertTrue(os.path.exists(self.md5sum_cache_path()))
+
+        # simulate a new process by emptying the in-memory cache
+        self.start(patch.dict('mrjob.fs.local._md5sum_cache', clear=True))
+        self.start(patch('mrjob.fs.local._md5sum_cache_files_read', set()))
+
+        with patch.object(self.fs, '_md5sum_file') as m_md5sum_file:
+            self.assertEqual(self.fs.md5sum(path),
+                             'e2fc714c4727ee9395f324cd2e7f331f')
+
+            self.assertFalse(m_md5sum_file.called)
+
+    def test_md5sum_cache_file_read_once(self):
+        paths = [self.makefile(name, name) for name in ('a', 'b', 'c')]
+
+        with patch('mrjob.fs.local._read_md5sum_cache_file',
+                   return_value={}) as m_read:
+            for path in paths:
+                self.fs.md5sum(path)
+
+        self.assertEqual(m_read.call_count, 1)
+
+    def test_save_md5sum_cache_leaves_out_missing_files(self):
+        path1 = self.makefile('f1', 'abcd')
+        path2 = self.makefile('f2', 'abcde')
+
+        self.fs.md5sum(path1)
+        self.fs.md5sum(path2)
+        os.remove(path1)
+
+        _save_md5sum_cache()
+
+        with open(self.md5sum_cache_path()) as f:
+            cache = json.load(f)
+
+        self.assertNotIn(path1, cache)
+        self.assertEqual(cache[path2][2], 'ab56b4d92b40713acc5af89985d4b786')
+
+    def test_md5sum_cache_not_writable(self):
+        # can't create a directory inside a regular file
+        os.environ['XDG_CACHE_HOME'] = self.makefile('not_a_dir')
+
+        path = self.makefile('f', 'abcd')
+        self.assertEqual(self.fs.md5sum(path),
+                         'e2fc714c4727ee9395f324cd2e7f331f')
+
+        _save_md5sum_cache()  # shouldn't raise an error
@@ -13,18 +13,27 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import bz2
+import threading
 
 try:
     import boto
+    from boto.s3.multidelete import Error as MultiDeleteError
+    from boto.s3.multidelete import MultiDeleteResult
     boto  # pyflakes
 except ImportError:
     boto = None
 
 from mrjob.fs.s3 import S3Filesystem
+from mrjob.fs.s3 import _AWS_RETRY_BURST
+from mrjob.fs.s3 import wrap_aws_conn
 
 from tests.compress import gzip_compress
 from tests.mockboto import MockBotoTestCase
+from tests.mockboto import MockBucket
+from tests.mockboto import MockKey
+from tests.py2 import Mock
 from tests.py2 import patch
+from tests.sandbox import PatcherTestCase
 
 
 class S3FSTestCase(MockBotoTestCase):
@@ -40,6 +49,20 @@ class S3FSTestCase(MockBotoTestCase):
         self.assertEqual(list(self.fs._cat_file('s3://walrus/data/foo')),
                          [b'foo\n', b'foo\n'])
 
+    def test_tail_file(self):
+        self.add_mock_s3_data(
+            {'walrus': {'data/foo': b'bar\nfoo\n', 'data/empty': b''}})
+
+        self.assertEqual(self.fs._tail_file('s3://walrus/data/foo', 5),
+                         b'\nfoo\n')
+        self.assertEqual(self.fs._tail_file('s3://walrus/data/foo', 100),
+                         b'bar\nfoo\n')
+        self.assertEqual(self.fs._tail_file('s3://walrus/data/empty', 5),
+                         b'')
+
+        self.assertRaises(IOError, self.fs._tail_file,
+                          's3://walrus/data/bar', 5)
+
     def test_cat_bz2(self):
         self.add_mock_s3_data(
             {'walrus': {'data/foo.bz2': bz2.compress(b'foo\n' * 1000)}})
@@ -105,6 +128,42 @@ class S3FSTestCase(MockBotoTestCase):
         self.assertEqual(list(self.fs.ls('s3://w/*b')),
                          ['s3://w/a/b', 's3://w/ab', 's3://w/b'])
 
+    def test_ls_dir_globs(self):
+        self.add_mock_s3_data(
+            {'walrus': {'logs/2016-01/hour=03/a': b'',
+                        'logs/2016-01/hour=04/b': b'',
+                        'logs/2016-02/hour=03/c': b'',
+                        'logs/2016-02/x/hour=03/d': b'',
+                        'logs/other/hour=03/e': b''}})
+
+        self.assertEqual(
+            list(self.fs.ls('s3://walrus/logs/2016-*/hour=03/*')),
+            ['s3://walrus/logs/2016-01/hour=03/a',
+             's3://walrus/logs/2016-02/hour=03/c'])
+
+        self.assertEqual(
+            list(self.fs.ls('s3://walrus/logs/*/hour=0?/')),
+            ['s3://walrus/logs/2016-01/hour=03/a',
+             's3://walrus/logs/2016-01/hour=04/b',
+             's3://walrus/logs/2016-02/hour=03/c',
+             's3://walrus/logs/other/hour=03/e'])
+
+    def test_ls_dir_globs_only_list_matching_dirs(self):
+        self.add_mock_s3_data(
+            {'walrus': {'logs/2016-01/hour=03/a': b'',
+                        'logs/2016-01/hour=04/b': b'',
+                        'logs/other/hour=03/c': b''}})
+
+        with patch.object(MockBucket, 'list', autospec=True,
+                          side_effect=MockBucket.list) as m_list:
+            list(self.fs.ls('s3://walrus/logs/2016-*/hour=03/*'))
+
+            # recursive listings, without a delimiter
+            self.assertEqual(
+                [call[0][1] for call in m_list.call_args_list
+                 if not call[1].get('delimiter')],
+                ['logs/2016-01/hour=03/'])
+
     def test_ls_s3n(self):
         self.add_mock_s3_data(
             {'walrus': {'data/bar': b'abc123',
@@ -129,6 +188,23 @@ class S3FSTestCase(MockBotoTestCase):
         self.assertEqual(self.fs.exists('s3://walrus/data/foo'), True)
         self.assertEqual(self.fs.exists('s3://walrus/data/bar'), False)
 
+    def test_put(self):
+        self.add_mock_s3_data({'walrus': {}})
+        local_path = self.makefile('foo', b'bar')
+
+        self.fs.put(local_path, 's3://walrus/data/foo')
+
+        self.assertEqual(list(self.fs.cat('s3://walrus/data/foo')), [b'bar'])
+
+    def test_exists_many(self):
+        self.add_mock_s3_data({'walrus': {'data/foo': b'foo'}})
+
+        self.assertEqual(
+            self.fs.exists_many(['s3://walrus/data/foo',
+                                 's3://walrus/data/bar',
+                                 's3://walrus/data/']),
+            [True, False, True])
+
     def test_rm(self):
         self.add_mock_s3_data({
             'walrus': {'foo': b''}})
@@ -148,6 +224,168 @@ class S3FSTestCase(MockBotoTestCase):
         self.assertEqual(self.fs.exists('s3://walrus/data/foo'), False)
         self.assertEqual(self.fs.exists('s3://walrus/data/bar/baz'), False)
 
+    def test_rm_in_bulk(self):
+        self.add_mock_s3_data({
+            'walrus': dict(('data/part-%05d' % i, b'') for i in range(2500))})
+
+        with patch.object(MockBucket, 'delete_keys', autospec=True,
+                          side_effect=MockBucket.delete_keys) as m_delete:
+            self.fs.rm('s3://walrus/data/')
+
+            self.assertEqual(
+                sorted(len(call[0][1]) for call in m_delete.call_args_list),
+                [500, 1000, 1000])
+
+        self.assertEqual(list(self.fs.ls('s3://walrus/data/')), [])
+
+    def test_rm_deletes_while_listing(self):
+        self.start(patch('mrjob.fs.s3._DELETE_THREADS', 1))
+
+        self.add_mock_s3_data({
+            'walrus': dict(('data/part-%05d' % i, b'') for i in range(2500))})
+
+        num_listed = [0]
+        listed_when_deleting = []
+
+        real_ls_keys = self.fs.ls_keys
+        real_delete_keys = MockBucket.delete_keys
+
+        def ls_keys(path_glob):
+            for key in real_ls_keys(path_glob):
+                num_listed[0] += 1
+                yield key
+
+        def delete_keys(bucket, key_names, **kwargs):
+            listed_when_deleting.append(num_listed[0])
+            return real_delete_keys(bucket, key_names, **kwargs)
+
+        with patch.object(self.fs, 'ls_keys', side_effect=ls_keys):
+            with patch.object(MockBucket, 'delete_keys', autospec=True,
+                              side_effect=delete_keys):
+                self.fs.rm('s3://walrus/data/')
+
+        # only needed to list one key past the first batch
+        self.assertEqual(listed_when_deleting, [1001, 2001, 2500])
+
+        self.assertEqual(list(self.fs.ls('s3://walrus/data/')), [])
+
+    def test_rm_error(self):
+        self.add_mock_s3_data({
+            'walrus': {'data/foo': b''}})
+
+        result = MultiDeleteResult()
+        result.errors.append(MultiDeleteError(
+            key='data/foo', code='AccessDenied', message='Access Denied'))
+
+        with patch.object(MockBucket, 'delete_keys', return_value=result):
+            self.assertRaises(IOError, self.fs.rm, 's3://walrus/data/foo')
+
+
+class S3FSDownloadPartsTestCase(MockBotoTestCase):
+
+    def setUp(self):
+        super(S3FSDownloadPartsTestCase, self).setUp()
+
+        # track byte ranges requested from S3
+        self.ranges = []
+
+        real_get_contents_as_string = MockKey.get_contents_as_string
+
+        def get_contents_as_string(key, headers=None):
+            if headers and headers.get('Range'):
+                self.ranges.append(headers['Range'])
+            return real_get_contents_as_string(key, headers=headers)
+
+        self.start(patch.object(MockKey, 'get_contents_as_string',
+                                get_contents_as_string))
+
+    def test_small_key_downloaded_in_one_piece(self):
+        self.add_mock_s3_data({'walrus': {'data/foo': b'foo\n'}})
+
+        fs = S3Filesystem(download_part_size=10, download_threads=3)
+
+        self.assertEqual(list(fs._cat_file('s3://walrus/data/foo')),
+                         [b'foo\n'])
+        self.assertEqual(self.ranges, [])
+
+    def test_download_in_parts(self):
+        lines = [('line %03d\n' % i).encode('ascii') for i in range(100)]
+        data = b''.join(lines)
+        self.add_mock_s3_data({'walrus': {'data/foo': data}})
+
+        fs = S3Filesystem(download_part_size=128, download_threads=3)
+
+        self.assertEqual(list(fs._cat_file('s3://walrus/data/foo')), lines)
+
+        self.assertEqual(len(self.ranges), 8)  # 900 bytes / 128
+        self.assertIn('bytes=0-127', self.ranges)
+        self.assertIn('bytes=896-899', self.ranges)
+
+    def test_parts_pinned_to_etag(self):
+        self.add_mock_s3_data({'walrus': {'data/foo': b'foo\n' * 100}})
+
+        fs = S3Filesystem(download_part_size=128, download_threads=3)
+        etag = fs.get_s3_key('s3://walrus/data/foo').etag
+
+        real_get_contents_as_string = MockKey.get_contents_as_string
+        if_match = []
+
+        def get_contents_as_string(key, headers=None):
+            if headers and headers.get('Range'):
+                if_match.append(headers.get('If-Match'))
+            return real_get_contents_as_string(key, headers=headers)
+
+        with patch.object(MockKey, 'get_contents_as_string',
+                          get_contents_as_string):
+            self.assertEqual(list(fs._cat_file('s3://walrus/data/foo')),
+                             [b'foo\n'] * 100)
+
+        self.assertEqual(if_match, [etag] * 4)
+
+    def test_key_replaced_during_download(self):
+        self.add_mock_s3_data({'walrus': {'data/foo': b'foo\n' * 100}})
+
+        fs = S3Filesystem(download_part_size=128, download_threads=3)
+
+        real_get_contents_as_string = MockKey.get_contents_as_string
+
+        def replace_then_get_contents(key, headers=None):
+            self.add_mock_s3_data({'walrus': {'data/foo': b'bar\n' * 100}})
+            return real_get_contents_as_string(key, headers=headers)
+
+        with patch.object(MockKey, 'get_contents_as_string',
+                          replace_then_get_contents):
+            self.assertRaises(boto.exception.S3ResponseError,
+                              list, fs._cat_file('s3://walrus/data/foo'))
+
+    def test_gz_in_parts(self):
+        self.add_mock_s3_data(
+            {'walrus': {'data/foo.gz': gzip_compress(b'foo\n' * 10000)}})
+
+        fs = S3Filesystem(download_part_size=16, download_threads=4)
+
+        self.assertEqual(list(fs._cat_file('s3://walrus/data/foo.gz')),
+                         [b'foo\n'] * 10000)
+        self.assertGreater(len(self.ranges), 1)
+
+    def test_part_size_of_zero_disables_parts(self):
+        self.add_mock_s3_data({'walrus': {'data/foo': b'foo\n' * 100}})
+
+        fs = S3Filesystem(download_part_size=0)
+
+        self.assertEqual(list(fs._cat_file('s3://walrus/data/foo')),
+                         [b'foo\n'] * 100)
+        self.assertEqual(self.ranges, [])
+
+    def test_one_thread_disables_parts(self):
+        self.add_mock_s3_data({'walrus': {'data/foo': b'foo\n' * 100}})
+
+        fs = S3Filesystem(download_part_size=10, download_threads=1)
+
+        self.assertEqual(list(fs._cat_file('s3://walrus/data/foo')),
+                         [b'foo\n'] * 100)
+        self.assertEqual(self.ranges, [])
+
 
 class S3FSRegionTestCase(MockBotoTestCase):
 
@@ -172,6 +410,29 @@ class S3FSRegionTestCase(MockBotoTestCase):
         self.assertEqual(bucket.connection.host,
                          's3-us-west-2.amazonaws.com')
 
+    def test_connections_are_reused(self):
+        self.add_mock_s3_data({'walrus': {'data/foo': b'foo'}},
+                              location='us-west-2')
+
+        fs = S3Filesystem()
+
+        with patch('boto.connect_s3', wraps=boto.connect_s3) as m_connect, \
+                patch('tests.mockboto.MockBucket.get_location',
+                      autospec=True,
+                      side_effect=MockBucket.get_location) as m_get_loc:
+            for _ in range(3):
+                self.assertEqual(fs.exists('s3://walrus/data/foo'), True)
+                self.assertEqual(fs.md5sum('s3://walrus/data/foo'),
+                                 'acbd18db4cc2f85cedef654fccc4a4d8')
+                fs.rm('s3://walrus/data/bar')
+
+            # one connection to the default endpoint, one to us-west-2
+            self.assertEqual(
+                [call[1]['host'] for call in m_connect.call_args_list],
+                ['s3.amazonaws.com', 's3-us-west-2.amazonaws.com'])
+
+            self.assertEqual(m_get_loc.call_count, 1)
+
     def test_get_location_is_forbidden(self):
         self.add_mock_s3_data({'walrus': {}}, location='us-west-2')
 
@@ -223,3 +484,101 @@ class S3FSRegionTestCase(MockBotoTestCase):
         # can't access this bucket from wrong endpoint!
         self.assertRaises(boto.exception.S3ResponseError,
                           fs.get_bucket, 'walrus-west')
+
+
+class WrapAWSConnTestCase(PatcherTestCase):
+
+    def setUp(self):
+        super(WrapAWSConnTestCase, self).setUp()
+
+        self.start(patch('mrjob.retry._shared_token_buckets', {}))
+        self.sleep = self.start(patch('time.sleep'))
+        # time stands still
+        self.start(patch('time.time', return_value=0.0))
+
+    def make_raw_conn(self, host='elasticmapreduce.amazonaws.com'):
+        raw_conn = Mock()
+        raw_conn.host = host
+        raw_conn.f = Mock(__name__='f', return_value=1)
+        return raw_conn
+
+    def test_retry_on_throttling_with_jitter(self):
+        raw_conn = self.make_raw_conn()
+        raw_conn.f.side_effect = [
+            boto.exception.BotoServerError(
+                400, 'Bad Request',
+                '<Error><Code>Throttling</Code></Error>'),
+            1]
+
+        with patch('random.uniform', return_value=7.0) as uniform:
+            self.assertEqual(wrap_aws_conn(raw_conn).f(), 1)
+
+        uniform.assert_called_once_with(0, 20)
+        self.sleep.assert_called_once_with(7.0)
+
+    def test_many_threads_throttled_at_once(self):
+        # more retries than the retry budget allows; they should wait
+        # their turn rather than fail
+        num_threads = _AWS_RETRY_BURST * 2
+
+        raw_conns = [self.make_raw_conn() for _ in range(num_threads)]
+        for raw_conn in raw_conns:
+            raw_conn.f.side_effect = [
+                boto.exception.BotoServerError(
+                    400, 'Bad Request',
+                    '<Error><Code>Throttling</Code></Error>')
+                for _ in range(3)] + [1]
+
+        results = {}
+
+        def call_f(i):
+            results[i] = wrap_aws_conn(raw_conns[i]).f()
+
+        threads = [threading.Thread(target=call_f, args=(i,))
+                   for i in range(num_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, dict((i, 1) for i in range(num_threads)))
+        for raw_conn in raw_conns:
+            self.assertEqual(raw_conn.f.call_count, 4)
+
+    def test_dont_retry_other_errors(self):
+        raw_conn = self.make_raw_conn()
+        raw_conn.f.side_effect = boto.exception.BotoServerError(
+            400, 'Bad Request', '<Error><Code>ValidationError</Code></Error>')
+
+        self.assertRaises(boto.exception.BotoServerError,
+                          wrap_aws_conn(raw_conn).f)
+        self.assertFalse(self.sleep.called)
+
+    def test_no_rate_limit_by_default(self):
+        conn = wrap_aws_conn(self.make_raw_conn())
+
+        for _ in range(10):
+            conn.f()
+
+        self.assertFalse(self.sleep.called)
+
+    def test_rate_limit_shared_by_host(self):
+        conn1 = wrap_aws_conn(self.make_raw_conn(), rate=2)
+        conn2 = wrap_aws_conn(self.make_raw_conn(), rate=2)
+
+        conn1.f()
+        conn2.f()
+        conn1.f()
+
+        self.assertEqual(self.sleep.call_args_list,
+                         [((0.5,),), ((1.0,),)])
+
+    def test_rate_limit_not_shared_between_hosts(self):
+        conn1 = wrap_aws_conn(self.make_raw_conn(), rate=2)
+        conn2 = wrap_aws_conn(self.make_raw_conn(host='iam.amazonaws.com'),
+                              rate=2)
+
+        conn1.f()
+        conn2.f()
+
+        self.assertFalse(self.sleep.called)
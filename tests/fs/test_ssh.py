@@ -136,6 +136,14 @@ class SSHFSTestCase(MockSubprocessTestCase):
         self.assertEqual(list(self.fs._cat_file(remote_path)),
                          [b'foo\n', b'foo\n'])
 
+    def test_tail_file(self):
+        self.make_master_file(os.path.join('data', 'foo'), 'bar\nfoo\n')
+        remote_path = self.fs.join('ssh://testmaster/data', 'foo')
+
+        self.assertEqual(self.fs._tail_file(remote_path, 5), b'\nfoo\n')
+        self.assertEqual(self.fs._tail_file(remote_path, 100),
+                         b'bar\nfoo\n')
+
     def test_cat_bz2(self):
         self.make_master_file(os.path.join('data', 'foo.bz2'),
                               bz2.compress(b'foo\n' * 1000))
@@ -261,3 +269,95 @@ class SSHFSTestCase(MockSubprocessTestCase):
     def test_ssh_slave_hosts_doesnt_care_about_sudo(self):
         self.require_sudo()
         self.test_ssh_slave_hosts()
+
+
+class SSHFSMultiplexTestCase(SSHFSTestCase):
+
+    def setUp(self):
+        super(SSHFSMultiplexTestCase, self).setUp()
+
+        self.fs = SSHFilesystem(['ssh'], self.ec2_key_pair_file,
+                                multiplex=True)
+        self.addCleanup(self.fs.close)
+
+        # record the args of every ssh command
+        self.ssh_calls = []
+
+        def recording_mock_ssh_main(stdin, stdout, stderr, args, environ):
+            self.ssh_calls.append(list(args))
+            return mock_ssh_main(stdin, stdout, stderr, args, environ)
+
+        self.mock_popen(ssh, recording_mock_ssh_main, self.env)
+
+    def control_paths(self):
+        return [arg[len('ControlPath='):]
+                for args in self.ssh_calls for arg in args
+                if arg.startswith('ControlPath=')]
+
+    def test_reuse_control_path(self):
+        self.make_master_file('f', 'contents')
+
+        self.assertEqual(list(self.fs.ls('ssh://testmaster/')),
+                         ['ssh://testmaster/f'])
+        self.assertEqual(list(self.fs._cat_file('ssh://testmaster/f')),
+                         [b'contents'])
+
+        self.assertEqual(len(self.ssh_calls), 2)
+        for args in self.ssh_calls:
+            self.assertIn('ControlMaster=auto', args)
+
+        control_paths = self.control_paths()
+        self.assertEqual(len(control_paths), 2)
+        self.assertEqual(len(set(control_paths)), 1)
+
+    def test_slaves_share_master_control_path(self):
+        self.add_slave()
+        self.add_slave()
+        self.make_master_file('f', 'contents')
+        self.make_slave_file(1, 'f', 'foo\n')
+        self.make_slave_file(2, 'f', 'bar\n')
+
+        list(self.fs.ls('ssh://testmaster/'))
+        list(self.fs.ls('ssh://testmaster!testslave1/'))
+        list(self.fs.ls('ssh://testmaster!testslave2/'))
+
+        # ls on master, copy key to master, ls on each slave
+        self.assertEqual(len(self.ssh_calls), 4)
+        self.assertEqual(len(set(self.control_paths())), 1)
+
+    def test_different_control_path_per_host(self):
+        self.fs._control_path_for('testmaster')
+
+        self.assertNotEqual(self.fs._control_path_for('testmaster'),
+                            self.fs._control_path_for('othermaster'))
+        self.assertEqual(self.fs._control_path_for('testmaster'),
+                         self.fs._control_path_for('testmaster!testslave1'))
+
+    def test_close(self):
+        self.make_master_file('f', 'contents')
+        list(self.fs.ls('ssh://testmaster/'))
+
+        control_path = self.fs._control_path_for('testmaster')
+        control_dir = os.path.dirname(control_path)
+        self.assertTrue(os.path.exists(control_dir))
+
+        self.fs.close()
+
+        self.assertIn('-O', self.ssh_calls[-1])
+        self.assertIn('ControlPath=%s' % control_path, self.ssh_calls[-1])
+        self.assertFalse(os.path.exists(control_dir))
+
+        # can keep using the filesystem after closing it
+        self.assertEqual(list(self.fs.ls('ssh://testmaster/')),
+                         ['ssh://testmaster/f'])
+
+    def test_no_multiplex(self):
+        self.fs = SSHFilesystem(['ssh'], self.ec2_key_pair_file,
+                                multiplex=False)
+        self.make_master_file('f', 'contents')
+
+        list(self.fs.ls('ssh://testmaster/'))
+        self.fs.close()
+
+        self.assertEqual(len(self.ssh_calls), 1)
+        self.assertEqual(self.control_paths(), [])
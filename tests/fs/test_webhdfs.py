@@ -0,0 +1,326 @@
+# Copyright 2016 Yelp
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import bz2
+import os
+import os.path
+
+from mrjob.fs.composite import CompositeFilesystem
+from mrjob.fs.webhdfs import WebHDFSFilesystem
+from mrjob.parse import urlparse
+
+from tests.compress import gzip_compress
+from tests.mockwebhdfs import MockWebHDFSServer
+from tests.py2 import Mock
+from tests.py2 import patch
+from tests.sandbox import SandboxedTestCase
+
+
+class WebHDFSFSTestCase(SandboxedTestCase):
+
+    REDIRECT = True
+
+    def setUp(self):
+        super(WebHDFSFSTestCase, self).setUp()
+
+        self.hdfs_root = self.makedirs('hdfs')
+
+        self.server = MockWebHDFSServer(self.hdfs_root,
+                                        redirect=self.REDIRECT)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+        self.fs = WebHDFSFilesystem(self.server.url, user='mrjob_tests')
+
+        # the namenode's host, with its RPC port
+        self.nn = '%s:8020' % urlparse(self.server.url).hostname
+
+    def make_mock_file(self, name, contents='contents'):
+        return self.makefile(os.path.join(self.hdfs_root, name), contents)
+
+    def test_can_handle_path(self):
+        self.assertEqual(self.fs.can_handle_path('hdfs:///foo'), True)
+        self.assertEqual(
+            self.fs.can_handle_path('hdfs://%s/foo' % self.nn), True)
+        self.assertEqual(self.fs.can_handle_path('s3://walrus/foo'), False)
+        self.assertEqual(self.fs.can_handle_path('/tmp/foo'), False)
+
+    def test_cant_handle_other_namenodes(self):
+        self.assertEqual(
+            self.fs.can_handle_path('hdfs://other-nn:8020/foo'), False)
+
+        self.make_mock_file('f')
+        self.assertRaises(IOError, self.fs.exists, 'hdfs://other-nn:8020/f')
+        self.assertRaises(IOError, self.fs.rm, 'hdfs://other-nn:8020/f')
+        self.assertTrue(self.fs.exists('hdfs:///f'))
+
+    def test_other_namenodes_go_to_hadoop_fs(self):
+        self.make_mock_file('f')
+
+        hadoop_fs = Mock()
+        hadoop_fs.can_handle_path.return_value = True
+        hadoop_fs.exists.return_value = False
+
+        fs = CompositeFilesystem(self.fs, hadoop_fs)
+
+        self.assertEqual(fs.exists('hdfs://other-nn:8020/f'), False)
+        hadoop_fs.exists.assert_called_once_with('hdfs://other-nn:8020/f')
+
+        fs.rm('hdfs://other-nn:8020/f')
+        hadoop_fs.rm.assert_called_once_with('hdfs://other-nn:8020/f')
+        self.assertTrue(self.fs.exists('hdfs:///f'))
+
+    def test_bad_url(self):
+        self.assertRaises(ValueError, WebHDFSFilesystem, 'namenode:50070')
+        self.assertRaises(ValueError, WebHDFSFilesystem, 'hdfs:///')
+
+    def test_ls_empty(self):
+        self.assertEqual(list(self.fs.ls('hdfs:///')), [])
+
+    def test_ls_basic(self):
+        self.make_mock_file('f')
+        self.assertEqual(list(self.fs.ls('hdfs:///')), ['hdfs:///f'])
+
+    def test_ls_recurse(self):
+        self.make_mock_file('f')
+        self.make_mock_file('d/f2')
+        self.assertEqual(sorted(self.fs.ls('hdfs:///')),
+                         ['hdfs:///d/f2', 'hdfs:///f'])
+
+    def test_ls_single_file(self):
+        self.make_mock_file('d/f')
+        self.assertEqual(list(self.fs.ls('hdfs:///d/f')), ['hdfs:///d/f'])
+
+    def test_ls_nonexistent(self):
+        self.assertEqual(list(self.fs.ls('hdfs:///does-not-exist')), [])
+
+    def test_ls_keeps_host(self):
+        self.make_mock_file('f')
+        self.assertEqual(list(self.fs.ls('hdfs://%s/' % self.nn)),
+                         ['hdfs://%s/f' % self.nn])
+
+    def test_ls_glob(self):
+        self.make_mock_file('data/foo')
+        self.make_mock_file('data/bar')
+        self.make_mock_file('data/foo-dir/baz')
+        self.make_mock_file('other/foo')
+
+        self.assertEqual(sorted(self.fs.ls('hdfs:///data/foo*')),
+                         ['hdfs:///data/foo', 'hdfs:///data/foo-dir/baz'])
+        self.assertEqual(sorted(self.fs.ls('hdfs:///*/foo')),
+                         ['hdfs:///data/foo', 'hdfs:///other/foo'])
+
+    def test_ls_spaces(self):
+        self.make_mock_file('foo  bar')
+        self.assertEqual(list(self.fs.ls('hdfs:///')), ['hdfs:///foo  bar'])
+
+    def test_cat_uncompressed(self):
+        self.make_mock_file('data/foo', 'foo\nfoo\n')
+
+        self.assertEqual(list(self.fs._cat_file('hdfs:///data/foo')),
+                         [b'foo\n', b'foo\n'])
+
+    def test_cat_bz2(self):
+        self.make_mock_file('data/foo.bz2', bz2.compress(b'foo\n' * 1000))
+
+        self.assertEqual(list(self.fs._cat_file('hdfs:///data/foo.bz2')),
+                         [b'foo\n'] * 1000)
+
+    def test_cat_gz(self):
+        self.make_mock_file('data/foo.gz', gzip_compress(b'foo\n' * 10000))
+
+        self.assertEqual(list(self.fs._cat_file('hdfs:///data/foo.gz')),
+                         [b'foo\n'] * 10000)
+
+    def test_cat_nonexistent(self):
+        self.assertRaises(IOError, self.fs._cat_file, 'hdfs:///data/foo')
+
+    def test_du(self):
+        self.make_mock_file('data1', 'abcd')
+        self.make_mock_file('more/data2', 'defg')
+        self.make_mock_file('more/data3', 'hijk')
+
+        self.assertEqual(self.fs.du('hdfs:///'), 12)
+        self.assertEqual(self.fs.du('hdfs:///data1'), 4)
+        self.assertEqual(self.fs.du('hdfs:///more'), 8)
+        self.assertEqual(self.fs.du('hdfs:///more/*'), 8)
+        self.assertEqual(self.fs.du('hdfs:///more/data2'), 4)
+
+    def test_du_non_existent(self):
+        self.assertEqual(self.fs.du('hdfs:///does-not-exist'), 0)
+
+    def test_mkdir(self):
+        self.fs.mkdir('hdfs:///d/ave')
+        self.assertEqual(
+            os.path.isdir(os.path.join(self.hdfs_root, 'd', 'ave')), True)
+
+    def test_mkdir_over_file(self):
+        self.make_mock_file('d')
+        self.assertRaises(IOError, self.fs.mkdir, 'hdfs:///d')
+
+    def test_exists_no(self):
+        self.assertEqual(self.fs.exists('hdfs:///f'), False)
+
+    def test_exists_yes(self):
+        self.make_mock_file('f')
+        self.assertEqual(self.fs.exists('hdfs:///f'), True)
+
+    def test_exists_empty_dir(self):
+        self.makedirs(os.path.join(self.hdfs_root, 'd'))
+        self.assertEqual(self.fs.exists('hdfs:///d/'), True)
+
+    def test_exists_glob(self):
+        self.make_mock_file('data/foo')
+        self.assertEqual(self.fs.exists('hdfs:///data/f*'), True)
+        self.assertEqual(self.fs.exists('hdfs:///data/b*'), False)
+
+    def test_rm(self):
+        local_path = self.make_mock_file('f')
+        self.fs.rm('hdfs:///f')
+        self.assertEqual(os.path.exists(local_path), False)
+
+    def test_rm_recursive(self):
+        local_path = self.make_mock_file('foo/bar')
+        self.fs.rm('hdfs:///foo')
+        self.assertEqual(os.path.exists(local_path), False)
+
+    def test_rm_nonexistent(self):
+        self.fs.rm('hdfs:///baz')
+
+    def test_rm_glob(self):
+        self.make_mock_file('data/foo')
+        self.make_mock_file('data/foo-dir/baz')
+        bar_path = self.make_mock_file('data/bar')
+
+        self.fs.rm('hdfs:///data/foo*')
+
+        self.assertEqual(os.listdir(os.path.join(self.hdfs_root, 'data')),
+                         ['bar'])
+        self.assertEqual(os.path.exists(bar_path), True)
+
+        # shouldn't try to delete foo-dir/baz after deleting foo-dir
+        deletes = [r for r in self.server.requests if r[1] == 'DELETE']
+        self.assertEqual(len(deletes), 2)
+
+    def test_touchz(self):
+        self.fs.touchz('hdfs:///d/empty')
+
+        local_path = os.path.join(self.hdfs_root, 'd', 'empty')
+        self.assertEqual(os.path.getsize(local_path), 0)
+
+        # okay to touchz an empty file
+        self.fs.touchz('hdfs:///d/empty')
+
+    def test_touchz_non_empty_file(self):
+        self.make_mock_file('f', 'foo')
+        self.assertRaises(IOError, self.fs.touchz, 'hdfs:///f')
+
+    def test_put(self):
+        local_path = self.makefile('local-file', b'bar\n' * 1000)
+
+        self.fs.put(local_path, 'hdfs:///uploads/file')
+
+        with open(os.path.join(self.hdfs_root, 'uploads', 'file'), 'rb') as f:
+            self.assertEqual(f.read(), b'bar\n' * 1000)
+
+    def test_put_many(self):
+        local_paths = [self.makefile('foo', b'foo'),
+                       self.makefile('bar', b'bar')]
+
+        self.fs.put_many(
+            [(path, 'hdfs:///uploads/' + os.path.basename(path))
+             for path in local_paths])
+
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.hdfs_root, 'uploads'))),
+            ['bar', 'foo'])
+
+    def test_put_existing_file(self):
+        self.make_mock_file('uploads/file', 'foo')
+        local_path = self.makefile('local-file', b'bar')
+
+        self.assertRaises(IOError, self.fs.put,
+                          local_path, 'hdfs:///uploads/file')
+
+    def test_user_name(self):
+        self.fs.exists('hdfs:///f')
+
+        method, op, path, params = self.server.requests[-1]
+        self.assertEqual(params['user.name'], 'mrjob_tests')
+
+    def test_user_name_from_environment(self):
+        os.environ['HADOOP_USER_NAME'] = 'hdfs_user'
+        fs = WebHDFSFilesystem(self.server.url)
+
+        fs.exists('hdfs:///f')
+
+        method, op, path, params = self.server.requests[-1]
+        self.assertEqual(params['user.name'], 'hdfs_user')
+
+    def test_connection_reuse(self):
+        self.make_mock_file('data/foo')
+        self.make_mock_file('data/bar')
+
+        for _ in range(5):
+            self.assertEqual(self.fs.exists('hdfs:///data/foo'), True)
+            self.assertEqual(self.fs.du('hdfs:///data/'), 16)
+            self.fs.mkdir('hdfs:///data/baz')
+
+        self.assertEqual(self.server.num_connections, 1)
+
+    def test_ls_error_falls_back_to_hadoop_fs(self):
+        self.make_mock_file('d/f')
+        self.make_mock_file('d/sub/f2')
+
+        hadoop_fs = Mock()
+        hadoop_fs.ls.return_value = iter(['hdfs:///from/hadoop/fs'])
+
+        fs = CompositeFilesystem(self.fs, hadoop_fs)
+
+        # fail when we list the subdirectory, after the first request
+        real_json_request = self.fs._json_request
+        calls = []
+
+        def json_request(*args, **kwargs):
+            calls.append(args)
+            if len(calls) > 1:
+                raise IOError('namenode is down')
+            return real_json_request(*args, **kwargs)
+
+        with patch.object(self.fs, '_json_request',
+                          side_effect=json_request):
+            self.assertEqual(list(fs.ls('hdfs:///d/')),
+                             ['hdfs:///from/hadoop/fs'])
+
+        hadoop_fs.ls.assert_called_once_with('hdfs:///d/')
+
+    def test_connection_refused_raises_ioerror(self):
+        self.server.stop()
+
+        self.assertRaises(IOError, self.fs.exists, 'hdfs:///f')
+
+
+class HttpFSTestCase(WebHDFSFSTestCase):
+    # HttpFS sends data back directly, rather than redirecting to a datanode
+    REDIRECT = False
+
+    def test_connection_reuse_after_cat(self):
+        self.make_mock_file('data/foo', 'foo\n')
+
+        self.assertEqual(self.fs.exists('hdfs:///data/foo'), True)
+        self.assertEqual(list(self.fs._cat_file('hdfs:///data/foo')),
+                         [b'foo\n'])
+        self.assertEqual(self.fs.exists('hdfs:///data/foo'), True)
+
+        # streaming the file ties up its connection, so we need a new one
+        self.assertEqual(self.server.num_connections, 2)
@@ -0,0 +1,169 @@
+# Copyright 2016 Yelp
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmark parsing of a synthetic YARN history file for a big job.
+
+Usage: python -m tests.logs.bench_history [num_tasks]
+
+This compares :py:func:`~mrjob.logs.history._parse_yarn_history_log`
+against decoding every record in the file (which is what it used to do).
+"""
+import json
+import re
+import sys
+import time
+
+from mrjob.logs.history import _parse_yarn_history_log
+
+from tests.py2 import patch
+
+DEFAULT_NUM_TASKS = 100000
+
+# fail one in this many tasks once
+FAILED_TASK_INTERVAL = 1000
+
+_EVENT_PREFIX = 'org.apache.hadoop.mapreduce.jobhistory.'
+
+_APP_TIMESTAMP = '1452815622929'
+
+# matches nothing, so every record gets decoded
+_NEVER_MATCHES_RE = re.compile(r'(?!)')
+
+
+def make_counters(task_num):
+    """A counters record, like the ones in TASK_FINISHED events. Real
+    tasks have a few dozen counters in several groups."""
+    return dict(
+        name='COUNTERS',
+        groups=[
+            dict(
+                name='org.apache.hadoop.mapreduce.Group%d' % group_num,
+                displayName='Group %d' % group_num,
+                counts=[
+                    dict(name='COUNTER_%d' % counter_num,
+                         displayName='Counter %d' % counter_num,
+                         value=task_num * counter_num)
+                    for counter_num in range(8)
+                ],
+            )
+            for group_num in range(5)
+        ],
+    )
+
+
+def _record_line(record_type, event_type, event):
+    return json.dumps(dict(
+        type=record_type,
+        event={_EVENT_PREFIX + event_type: event})) + '\n'
+
+
+def make_yarn_history_lines(num_tasks, job_finished=True):
+    """Return lines of a YARN history file for a job with
+    *num_tasks* map tasks. One in ``FAILED_TASK_INTERVAL`` tasks fails
+    once before succeeding.
+    """
+    job_id = 'job_%s_0001' % _APP_TIMESTAMP
+
+    lines = ['Avro-Json\n', '\n']
+
+    lines.append(_record_line('JOB_SUBMITTED', 'JobSubmitted', dict(
+        jobid=job_id, jobName='streamjob', userName='hadoop')))
+
+    for task_num in range(num_tasks):
+        task_id = 'task_%s_0001_m_%06d' % (_APP_TIMESTAMP, task_num)
+
+        lines.append(_record_line('TASK_STARTED', 'TaskStarted', dict(
+            taskid=task_id, taskType='MAP', startTime=task_num,
+            splitLocations='ip-10-0-0-1.ec2.internal')))
+
+        num_attempts = 2 if task_num % FAILED_TASK_INTERVAL == 0 else 1
+
+        for attempt_num in range(num_attempts):
+            attempt_id = 'attempt_%s_0001_m_%06d_%d' % (
+                _APP_TIMESTAMP, task_num, attempt_num)
+            container_id = 'container_%s_0001_01_%06d' % (
+                _APP_TIMESTAMP, task_num * 2 + attempt_num)
+
+            lines.append(_record_line(
+                'MAP_ATTEMPT_STARTED', 'TaskAttemptStarted', dict(
+                    taskid=task_id, taskType='MAP', attemptId=attempt_id,
+                    startTime=task_num, trackerName='ip-10-0-0-1',
+                    httpPort=8042, shufflePort=13562,
+                    containerId=container_id)))
+
+            if attempt_num < num_attempts - 1:
+                lines.append(_record_line(
+                    'MAP_ATTEMPT_FAILED',
+                    'TaskAttemptUnsuccessfulCompletion', dict(
+                        taskid=task_id, taskType='MAP',
+                        attemptId=attempt_id, status='FAILED',
+                        error=('Error: java.lang.RuntimeException:'
+                               ' PipeMapRed.waitOutputThreads():'
+                               ' subprocess failed with code 1\n'))))
+            else:
+                # attempts also report progress splits, which makes
+                # these the biggest records in the file
+                lines.append(_record_line(
+                    'MAP_ATTEMPT_FINISHED', 'MapAttemptFinished', dict(
+                        taskid=task_id, attemptId=attempt_id,
+                        taskType='MAP', taskStatus='SUCCEEDED',
+                        hostname='ip-10-0-0-1.ec2.internal',
+                        counters=make_counters(task_num),
+                        clockSplits=list(range(12)),
+                        cpuUsages=list(range(12)),
+                        vMemKbytes=list(range(12)),
+                        physMemKbytes=list(range(12)))))
+
+        lines.append(_record_line('TASK_FINISHED', 'TaskFinished', dict(
+            taskid=task_id, taskType='MAP', status='SUCCEEDED',
+            counters=make_counters(task_num))))
+
+    if job_finished:
+        lines.append(_record_line('JOB_FINISHED', 'JobFinished', dict(
+            jobid=job_id, totalCounters=make_counters(num_tasks))))
+
+    return lines
+
+
+def parse_decoding_every_record(lines):
+    """Parse *lines* without skipping any records."""
+    with patch('mrjob.logs.history._YARN_HISTORY_RECORD_TYPE_RE',
+               _NEVER_MATCHES_RE):
+        return _parse_yarn_history_log(lines)
+
+
+def main(args):
+    num_tasks = int(args[0]) if args else DEFAULT_NUM_TASKS
+
+    lines = make_yarn_history_lines(num_tasks)
+    num_bytes = sum(len(line) for line in lines)
+    print('synthetic history file: %d tasks, %d lines, %.1f MB' % (
+        num_tasks, len(lines), num_bytes / 1024.0 / 1024.0))
+
+    start = time.time()
+    expected = parse_decoding_every_record(lines)
+    slow_secs = time.time() - start
+    print('decoding every record: %.2fs' % slow_secs)
+
+    start = time.time()
+    result = _parse_yarn_history_log(lines)
+    fast_secs = time.time() - start
+    print('_parse_yarn_history_log(): %.2fs (%.1fx)' % (
+        fast_secs, slow_secs / fast_secs))
+
+    if result != expected:
+        raise AssertionError('results differ!')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,80 @@
+# Copyright 2016 Yelp
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmark throughput of the log4j record parser on a synthetic syslog.
+
+Usage: python -m tests.logs.bench_log4j [num_lines]
+"""
+import sys
+import time
+
+from mrjob.logs.log4j import _parse_hadoop_log4j_records
+from mrjob.logs.step import _HADOOP_STREAMING_NON_LOG4J_LINE_RE
+
+DEFAULT_NUM_LINES = 2000000
+
+# log4j lines, in both formats, and the multi-line counters message
+# that the hadoop jar command prints at the end of each job
+_LINES = [
+    '2015-08-22 00:46:18,411 INFO amazon.emr.metrics.MetricsSaver'
+    ' (main): Thread 1 created MetricsLockFreeSaver 1\n',
+    '2015-08-22 00:46:19,537 INFO org.apache.hadoop.mapreduce.Job'
+    ' (main):  map 57% reduce 0%\n',
+    '2015-12-21 14:06:17,707 INFO [main]'
+    ' org.apache.hadoop.mapred.MapTask: Processing split:'
+    ' hdfs:///user/root/input.txt:0+335\n',
+    '  2016-08-19 13:30:03,816 INFO  [main] impl.YarnClientImpl'
+    ' (YarnClientImpl.java:submitApplication(251)) - Submitted'
+    ' application application_1468316211405_1354\n',
+    '15/12/11 13:26:07 INFO client.RMProxy:'
+    ' Connecting to ResourceManager at /0.0.0.0:8032\n',
+    '2015-08-22 00:47:35,323 INFO org.apache.hadoop.mapreduce.Job'
+    ' (main): Counters: 54\n',
+] + [
+    '                FILE: Number of bytes read=%d\n' % i for i in range(40)
+] + [
+    'packageJobJar: [] [/usr/lib/hadoop/hadoop-streaming.jar]'
+    ' /tmp/streamjob.jar tmpDir=null\n',
+]
+
+
+def make_syslog_lines(num_lines):
+    """Return *num_lines* lines of a synthetic Hadoop syslog."""
+    return [_LINES[i % len(_LINES)] for i in range(num_lines)]
+
+
+def _time_parse(lines, **kwargs):
+    start = time.time()
+    num_records = 0
+    for record in _parse_hadoop_log4j_records(lines, **kwargs):
+        num_records += 1
+    return num_records, time.time() - start
+
+
+def main(args):
+    num_lines = int(args[0]) if args else DEFAULT_NUM_LINES
+
+    lines = make_syslog_lines(num_lines)
+    print('synthetic syslog: %d lines' % num_lines)
+
+    pre_filter = _HADOOP_STREAMING_NON_LOG4J_LINE_RE.match
+
+    for desc, kwargs in [('no pre_filter', {}),
+                         ('with pre_filter', dict(pre_filter=pre_filter))]:
+        num_records, secs = _time_parse(lines, **kwargs)
+        print('%s: %d records in %.2fs (%d lines/sec)' % (
+            desc, num_records, secs, num_lines / secs))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
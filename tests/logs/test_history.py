@@ -12,6 +12,7 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import json
 
 from mrjob.logs.history import _interpret_history_log
 from mrjob.logs.history import _match_history_log_path
@@ -20,6 +21,8 @@ from mrjob.logs.history import _parse_pre_yarn_history_records
 from mrjob.logs.history import _parse_pre_yarn_counters
 from mrjob.logs.history import _parse_yarn_history_log
 
+from tests.logs.bench_history import make_yarn_history_lines
+from tests.logs.bench_history import parse_decoding_every_record
 from tests.sandbox import PatcherTestCase
 from tests.py2 import Mock
 from tests.py2 import TestCase
@@ -355,6 +358,47 @@ class ParseYARNHistoryLogTestCase(TestCase):
             )
         )
 
+    def test_only_decode_records_we_use(self):
+        lines = make_yarn_history_lines(10)
+
+        with patch('json.loads', side_effect=json.loads) as mock_loads:
+            _parse_yarn_history_log(lines)
+
+        decoded_types = set(json.loads(args[0])['type']
+                            for args, kwargs in mock_loads.call_args_list)
+
+        self.assertEqual(decoded_types, set(
+            ['MAP_ATTEMPT_FAILED', 'TASK_FINISHED', 'JOB_FINISHED']))
+
+    def test_type_not_at_start_of_record(self):
+        # we can't tell the type of this record without decoding it
+        lines = [
+            '{"event":{'
+            '"org.apache.hadoop.mapreduce.jobhistory.JobFinished":{'
+            '"totalCounters":{"groups":[{"displayName":"Group 0","counts":'
+            '[{"displayName":"Counter 0","value":1}]}]}}},'
+            '"type":"JOB_FINISHED"}\n'
+        ]
+
+        self.assertEqual(
+            _parse_yarn_history_log(lines),
+            dict(counters={'Group 0': {'Counter 0': 1}}))
+
+    def test_same_as_decoding_every_record(self):
+        lines = make_yarn_history_lines(1001)
+
+        self.assertEqual(_parse_yarn_history_log(lines),
+                         parse_decoding_every_record(lines))
+
+    def test_same_as_decoding_every_record_for_failed_job(self):
+        lines = make_yarn_history_lines(1001, job_finished=False)
+
+        result = _parse_yarn_history_log(lines)
+
+        self.assertEqual(len(result['errors']), 2)
+        self.assertEqual(len(result['container_to_attempt_id']), 1003)
+        self.assertEqual(result, parse_decoding_every_record(lines))
+
 
 class ParsePreYARNHistoryLogTestCase(TestCase):
     JOB_COUNTER_LINES = [
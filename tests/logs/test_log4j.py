@@ -112,6 +112,26 @@ class ParseHadoopLog4JRecordsCase(TestCase):
                 )
             ])
 
+    def test_level_like_word_in_message(self):
+        # "ERROR foo:" shouldn't be mistaken for the level and logger
+        lines = StringIO(
+            '2015-12-21 14:06:18,538 WARN [main]'
+            ' org.apache.hadoop.mapred.YarnChild: got ERROR foo: bar\n')
+
+        self.assertEqual(
+            list(_parse_hadoop_log4j_records(lines)), [
+                dict(
+                    caller_location='',
+                    level='WARN',
+                    logger='org.apache.hadoop.mapred.YarnChild',
+                    message='got ERROR foo: bar',
+                    num_lines=1,
+                    start_line=0,
+                    thread='main',
+                    timestamp='2015-12-21 14:06:18,538',
+                )
+            ])
+
     def test_multiline_message(self):
         lines = StringIO(
             '2015-08-22 00:47:35,323 INFO org.apache.hadoop.mapreduce.Job'
@@ -136,6 +156,49 @@ class ParseHadoopLog4JRecordsCase(TestCase):
                 )
             ])
 
+    def test_pre_filter(self):
+        lines = StringIO('15/12/11 13:26:08 INFO streaming.StreamJob:'
+                         ' Running job\n'
+                         'packageJobJar: [] [] /tmp/streamjob.jar\n'
+                         'Streaming Command Failed!\n')
+
+        def pre_filter(line):
+            return line.startswith('packageJobJar: ')
+
+        self.assertEqual(
+            list(_parse_hadoop_log4j_records(lines, pre_filter=pre_filter)), [
+                dict(
+                    caller_location='',
+                    level='INFO',
+                    logger='streaming.StreamJob',
+                    message='Running job',
+                    num_lines=1,
+                    start_line=0,
+                    thread='',
+                    timestamp='15/12/11 13:26:08',
+                ),
+                dict(
+                    caller_location='',
+                    level='',
+                    logger='',
+                    message='packageJobJar: [] [] /tmp/streamjob.jar',
+                    num_lines=1,
+                    start_line=1,
+                    thread='',
+                    timestamp='',
+                ),
+                dict(
+                    caller_location='',
+                    level='',
+                    logger='',
+                    message='Streaming Command Failed!',
+                    num_lines=1,
+                    start_line=2,
+                    thread='',
+                    timestamp='',
+                ),
+            ])
+
     def test_non_log_lines(self):
         lines = StringIO('foo\n'
                          'bar\n'
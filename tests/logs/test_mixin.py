@@ -11,14 +11,21 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import os
+import time
 from copy import deepcopy
 
+from mrjob.fs.local import LocalFilesystem
 from mrjob.logs.mixin import LogInterpretationMixin
+from mrjob.logs.mixin import _clean_log_interpretation_cache
+from mrjob.logs.mixin import _log_interpretation_cache_dir
 from mrjob.logs.mixin import _log_parsing_task_log
+from mrjob.logs.task import _interpret_task_logs as real_interpret_task_logs
 
 from tests.py2 import Mock
 from tests.py2 import patch
 from tests.sandbox import PatcherTestCase
+from tests.sandbox import SandboxedTestCase
 
 
 class LogInterpretationMixinTestCase(PatcherTestCase):
@@ -497,3 +504,177 @@ class PickErrorsTestCase(LogInterpretationMixinTestCase):
 
     def test_step_and_task_logs_only(self):
         self._test_interpret_all_logs(dict(step={}, task={}))
+
+
+class LogInterpretationCacheTestCase(SandboxedTestCase):
+
+    class MockRunner(Mock, LogInterpretationMixin):
+        pass
+
+    def setUp(self):
+        super(LogInterpretationCacheTestCase, self).setUp()
+
+        self._interpret_history_log = (
+            self.start(patch('mrjob.logs.mixin._interpret_history_log')))
+        self._interpret_history_log.return_value = dict(
+            counters={'foo': {'bar': 1}})
+
+        self._interpret_task_logs = (
+            self.start(patch('mrjob.logs.mixin._interpret_task_logs')))
+        self._interpret_task_logs.return_value = dict(
+            errors=[dict(task_error=dict(message='BOOM'))])
+
+    def make_runner(self, cache_prefix='j-CLUSTERID'):
+        runner = self.MockRunner()
+        runner._log_interpretation_cache_prefix = Mock(
+            return_value=cache_prefix)
+        runner._ls_history_logs = Mock()
+        runner._ls_task_logs = Mock()
+        runner.get_hadoop_version = Mock(return_value='2.7.1')
+        runner._get_step_log_interpretation = Mock(
+            return_value=dict(application_id='app_1',
+                              counters={'baz': {'qux': 2}}))
+        return runner
+
+    def interpret_all(self, runner):
+        log_interpretation = dict(step_id='s-STEPID')
+        runner._interpret_step_logs(log_interpretation)
+        log_interpretation['step']['job_id'] = 'job_1'
+        runner._interpret_history_log(log_interpretation)
+        runner._interpret_task_logs(log_interpretation, partial=False)
+        return log_interpretation
+
+    def test_reuse_across_runners(self):
+        runner1 = self.make_runner()
+        log_interpretation1 = self.interpret_all(runner1)
+
+        self.assertTrue(runner1._get_step_log_interpretation.called)
+        self.assertEqual(self._interpret_history_log.call_count, 1)
+        self.assertEqual(self._interpret_task_logs.call_count, 1)
+
+        runner2 = self.make_runner()
+        log_interpretation2 = self.interpret_all(runner2)
+
+        self.assertEqual(log_interpretation2, log_interpretation1)
+
+        self.assertFalse(runner2._get_step_log_interpretation.called)
+        self.assertEqual(self._interpret_history_log.call_count, 1)
+        self.assertEqual(self._interpret_task_logs.call_count, 1)
+
+    def test_keyed_by_cache_prefix(self):
+        self.interpret_all(self.make_runner('j-CLUSTER1'))
+        self.interpret_all(self.make_runner('j-CLUSTER2'))
+
+        self.assertEqual(self._interpret_history_log.call_count, 2)
+        self.assertEqual(self._interpret_task_logs.call_count, 2)
+
+    def test_no_cache_prefix(self):
+        self.interpret_all(self.make_runner(None))
+        self.interpret_all(self.make_runner(None))
+
+        self.assertEqual(self._interpret_history_log.call_count, 2)
+        self.assertFalse(os.path.exists(_log_interpretation_cache_dir()))
+
+    def test_partial_task_interpretation_not_used_for_full(self):
+        self._interpret_task_logs.return_value = dict(
+            errors=[dict(task_error=dict(message='BOOM'))], partial=True)
+
+        self.interpret_all(self.make_runner())
+        self.interpret_all(self.make_runner())
+
+        self.assertEqual(self._interpret_task_logs.call_count, 2)
+
+    def test_reuse_partial_task_interpretation_when_picking_error(self):
+        self._interpret_task_logs.side_effect = real_interpret_task_logs
+
+        stderr_path = self.makefile('stderr', (
+            b'+ python mr_boom.py --step-num=0 --mapper\n'
+            b'Traceback (most recent call last):\n'
+            b'Exception: BOOM\n'))
+        syslog_path = self.makefile('syslog', (
+            b'2015-12-21 14:06:18,538 WARN [main]'
+            b' org.apache.hadoop.mapred.YarnChild: Exception running child'
+            b' : java.lang.RuntimeException: PipeMapRed.waitOutputThreads():'
+            b' subprocess failed with code 1\n'
+            b'        at org.apache.hadoop.streaming.PipeMapRed'
+            b'.waitOutputThreads(PipeMapRed.java:322)\n'))
+
+        def make_runner():
+            runner = self.make_runner()
+            runner.fs = Mock(wraps=LocalFilesystem())
+            runner._ls_task_logs = Mock(return_value=[
+                dict(path=stderr_path, syslog=dict(path=syslog_path))])
+            return runner
+
+        runner1 = make_runner()
+        error1 = runner1._pick_error(dict(step_id='s-STEPID'))
+
+        self.assertEqual(error1['task_error']['message'].split('\n')[-1],
+                         'Exception: BOOM')
+        self.assertTrue(runner1._ls_task_logs.called)
+
+        runner2 = make_runner()
+        error2 = runner2._pick_error(dict(step_id='s-STEPID'))
+
+        self.assertEqual(error2, error1)
+        self.assertFalse(runner2._ls_task_logs.called)
+        self.assertFalse(runner2.fs.cat.called)
+        self.assertFalse(runner2.fs._tail_file.called)
+
+    def test_dont_cache_empty_interpretation(self):
+        # logs may not have been copied to S3 yet
+        self._interpret_history_log.return_value = {}
+
+        self.interpret_all(self.make_runner())
+        self.interpret_all(self.make_runner())
+
+        self.assertEqual(self._interpret_history_log.call_count, 2)
+
+    def test_ignore_corrupt_cache_file(self):
+        self.interpret_all(self.make_runner())
+
+        cache_dir = _log_interpretation_cache_dir()
+        for name in os.listdir(cache_dir):
+            with open(os.path.join(cache_dir, name), 'w') as f:
+                f.write('{')
+
+        self.interpret_all(self.make_runner())
+
+        self.assertEqual(self._interpret_history_log.call_count, 2)
+
+
+class CleanLogInterpretationCacheTestCase(SandboxedTestCase):
+
+    def setUp(self):
+        super(CleanLogInterpretationCacheTestCase, self).setUp()
+
+        self.cache_dir = _log_interpretation_cache_dir()
+        os.makedirs(self.cache_dir)
+
+    def make_entry(self, name, days_ago):
+        path = os.path.join(self.cache_dir, name)
+        with open(path, 'w') as f:
+            f.write('{}')
+
+        mtime = time.time() - days_ago * 24 * 60 * 60
+        os.utime(path, (mtime, mtime))
+
+    def test_delete_old_entries(self):
+        self.make_entry('new.json', 1)
+        self.make_entry('old.json', 45)
+
+        _clean_log_interpretation_cache(self.cache_dir)
+
+        self.assertEqual(os.listdir(self.cache_dir), ['new.json'])
+
+    def test_max_entries(self):
+        self.start(patch('mrjob.logs.mixin._MAX_CACHED_LOG_INTERPRETATIONS',
+                         2))
+
+        for i in range(4):
+            self.make_entry('%d.json' % i, i)
+
+        _clean_log_interpretation_cache(self.cache_dir)
+
+        self.assertEqual(sorted(os.listdir(self.cache_dir)),
+                         ['0.json', '1.json'])
@@ -12,17 +12,23 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import threading
+
+from mrjob.fs.local import LocalFilesystem
 from mrjob.logs.task import _interpret_task_logs
 from mrjob.logs.task import _ls_task_logs
 from mrjob.logs.task import _match_task_log_path
 from mrjob.logs.task import _parse_task_stderr
+from mrjob.logs.task import _parse_task_stderr_log
 from mrjob.logs.task import _parse_task_syslog
+from mrjob.logs.task import _parse_task_syslog_log
 
 from tests.py2 import call
 from tests.py2 import Mock
 from tests.py2 import TestCase
 from tests.py2 import patch
 from tests.sandbox import PatcherTestCase
+from tests.sandbox import SandboxedTestCase
 
 
 class MatchTaskLogPathTestCase(TestCase):
@@ -123,16 +129,16 @@ class InterpretTaskLogsTestCase(PatcherTestCase):
 
         # instead of mocking out contents of files, just mock out
         # what _parse_task_{syslog,stderr}() should return, and have
-        # _cat_log() just pass through the path
+        # _cat_log_from_end() just pass through the path
         self.mock_paths = []
         self.path_to_mock_result = {}
 
         self.mock_paths_catted = []
 
-        def mock_cat_log(fs, path):
+        def mock_cat_log_from_end(fs, path):
             if path in self.mock_paths:
                 self.mock_paths_catted.append(path)
-            return path
+            yield path, True
 
         # (the actual log-parsing functions take lines from the log)
         def mock_parse_task_syslog(path_from_mock_cat_log):
@@ -154,8 +160,12 @@ class InterpretTaskLogsTestCase(PatcherTestCase):
         self.mock_fs.exists = Mock(side_effect=mock_exists)
         self.mock_fs.ls = Mock(side_effect=mock_ls)
 
-        self.mock_cat_log = self.start(
-            patch('mrjob.logs.task._cat_log', side_effect=mock_cat_log))
+        # read logs one at a time, so we can check which ones we read
+        self.start(patch('mrjob.logs.task._MAX_LOGS_PARSED_AHEAD', 0))
+
+        self.mock_cat_log_from_end = self.start(
+            patch('mrjob.logs.task._cat_log_from_end',
+                  side_effect=mock_cat_log_from_end))
 
         self.start(patch('mrjob.logs.task._parse_task_syslog',
                          side_effect=mock_parse_task_syslog))
@@ -462,6 +472,77 @@ class InterpretTaskLogsTestCase(PatcherTestCase):
             syslog1_path,
         ])
 
+    def test_parse_ahead_gives_same_results(self):
+        stderr1_path = '/userlogs/attempt_201512232143_0008_m_000001_3/stderr'
+        syslog1_path = '/userlogs/attempt_201512232143_0008_m_000001_3/syslog'
+        stderr2_path = '/userlogs/attempt_201512232143_0008_m_000002_3/stderr'
+        syslog2_path = '/userlogs/attempt_201512232143_0008_m_000002_3/syslog'
+        syslog3_path = '/userlogs/attempt_201512232143_0008_m_000003_3/syslog'
+
+        self.mock_paths = [
+            stderr1_path,
+            syslog1_path,
+            stderr2_path,
+            syslog2_path,
+            syslog3_path,
+        ]
+
+        self.path_to_mock_result = {
+            syslog1_path: dict(hadoop_error=dict(message='BOOM1')),
+            stderr1_path: dict(message='BoomException'),
+            syslog2_path: dict(hadoop_error=dict(message='BOOM2')),
+            syslog3_path: dict(hadoop_error=dict(message='BOOM3')),
+        }
+
+        for partial in (True, False):
+            one_at_a_time = self.interpret_task_logs(partial=partial)
+
+            with patch('mrjob.logs.task._MAX_LOGS_PARSED_AHEAD', 8):
+                self.assertEqual(self.interpret_task_logs(partial=partial),
+                                 one_at_a_time)
+
+        # sanity-check that we found the stderr error first
+        self.assertEqual(
+            self.interpret_task_logs()['errors'][0]['task_error']['path'],
+            stderr1_path)
+
+    def test_parse_paired_syslog_ahead(self):
+        stderr1_path = '/userlogs/attempt_201512232143_0008_m_000001_3/stderr'
+        syslog1_path = '/userlogs/attempt_201512232143_0008_m_000001_3/syslog'
+        stderr2_path = '/userlogs/attempt_201512232143_0008_m_000002_3/stderr'
+        syslog2_path = '/userlogs/attempt_201512232143_0008_m_000002_3/syslog'
+
+        self.mock_paths = [
+            stderr1_path,
+            syslog1_path,
+            stderr2_path,
+            syslog2_path,
+        ]
+
+        self.path_to_mock_result = {
+            stderr1_path: dict(message='BoomException1'),
+            syslog1_path: dict(hadoop_error=dict(message='BOOM1')),
+            stderr2_path: dict(message='BoomException2'),
+            syslog2_path: dict(hadoop_error=dict(message='BOOM2')),
+        }
+
+        syslog_threads = set()
+
+        def mock_parse_task_syslog(path_from_mock_cat_log):
+            syslog_threads.add(threading.current_thread())
+            return self.path_to_mock_result.get(path_from_mock_cat_log, {})
+
+        self.start(patch('mrjob.logs.task._MAX_LOGS_PARSED_AHEAD', 8))
+        self.start(patch('mrjob.logs.task._parse_task_syslog',
+                         side_effect=mock_parse_task_syslog))
+
+        self.assertEqual(
+            len(self.interpret_task_logs(partial=False)['errors']), 2)
+
+        # syslogs that go with stderr errors are parsed in the background
+        # too, rather than one at a time as we reach them
+        self.assertTrue(syslog_threads)
+        self.assertNotIn(threading.current_thread(), syslog_threads)
 
     def test_pre_yarn_sorting(self):
         # NOTE: we currently don't have to handle errors from multiple
@@ -518,6 +599,127 @@ class InterpretTaskLogsTestCase(PatcherTestCase):
         )
 
 
+class ParseTaskLogFromEndTestCase(SandboxedTestCase):
+
+    SPLIT_LINE = (
+        '2015-12-21 14:06:17,707 INFO [main]'
+        ' org.apache.hadoop.mapred.MapTask: Processing split:'
+        ' hdfs:///user/root/input.txt:0+335\n')
+
+    INFO_LINE = (
+        '2015-12-21 14:06:17,708 INFO [main]'
+        ' org.apache.hadoop.mapred.MapTask: numReduceTasks: 1\n')
+
+    ERROR_LINES = [
+        '2015-12-21 14:06:18,538 WARN [main]'
+        ' org.apache.hadoop.mapred.YarnChild: Exception running child'
+        ' : java.lang.RuntimeException: PipeMapRed.waitOutputThreads():'
+        ' subprocess failed with code 1\n',
+        '        at org.apache.hadoop.streaming.PipeMapRed'
+        '.waitOutputThreads(PipeMapRed.java:322)\n',
+    ]
+
+    PYTHON_ERROR_LINES = [
+        '+ python mr_boom.py --step-num=0 --mapper\n',
+        'Traceback (most recent call last):\n',
+        'Exception: BOOM\n',
+    ]
+
+    def setUp(self):
+        super(ParseTaskLogFromEndTestCase, self).setUp()
+
+        self.start(patch('mrjob.logs.wrap._LOG_TAIL_MIN_BYTES', 1024))
+        self.start(patch('mrjob.logs.task._LOG_TAIL_MIN_BYTES', 1024))
+
+        self.fs = LocalFilesystem()
+        self.tail_file = self.start(patch.object(
+            self.fs, '_tail_file', side_effect=self.fs._tail_file))
+
+    def make_log(self, name, lines):
+        return self.makefile(name, ''.join(lines).encode('utf_8'))
+
+    def max_bytes_tailed(self):
+        return max(num_bytes for (path, num_bytes), _ in
+                   self.tail_file.call_args_list)
+
+    def test_small_syslog(self):
+        lines = [self.SPLIT_LINE, self.INFO_LINE] + self.ERROR_LINES
+        path = self.make_log('syslog', lines)
+
+        self.assertEqual(_parse_task_syslog_log(self.fs, path),
+                         _parse_task_syslog(lines))
+
+    def test_big_syslog(self):
+        lines = ([self.SPLIT_LINE] + [self.INFO_LINE] * 10000 +
+                 self.ERROR_LINES)
+        path = self.make_log('syslog', lines)
+
+        expected = _parse_task_syslog(lines)
+        # we don't know what line the error is on
+        del expected['hadoop_error']['start_line']
+
+        self.assertEqual(_parse_task_syslog_log(self.fs, path), expected)
+        self.assertEqual(self.max_bytes_tailed(), 1024)
+
+    def test_big_syslog_error_near_start(self):
+        lines = ([self.SPLIT_LINE] + self.ERROR_LINES +
+                 [self.INFO_LINE] * 10000)
+        path = self.make_log('syslog', lines)
+
+        self.assertEqual(_parse_task_syslog_log(self.fs, path),
+                         _parse_task_syslog(lines))
+
+    def test_big_syslog_two_errors(self):
+        # we only read the end of the log, so we report the last error
+        lines = ([self.SPLIT_LINE] + self.ERROR_LINES +
+                 [self.INFO_LINE] * 10000 + self.ERROR_LINES)
+        path = self.make_log('syslog', lines)
+
+        expected = _parse_task_syslog(
+            [self.SPLIT_LINE, self.INFO_LINE] + self.ERROR_LINES)
+        del expected['hadoop_error']['start_line']
+
+        self.assertEqual(_parse_task_syslog_log(self.fs, path), expected)
+        self.assertEqual(self.max_bytes_tailed(), 1024)
+
+    def test_big_syslog_no_error(self):
+        lines = [self.SPLIT_LINE] + [self.INFO_LINE] * 10000
+        path = self.make_log('syslog', lines)
+
+        self.assertEqual(_parse_task_syslog_log(self.fs, path),
+                         _parse_task_syslog(lines))
+
+    def test_huge_syslog_error_near_start(self):
+        # past _LOG_TAIL_MAX_BYTES, we stream the whole log
+        self.start(patch('mrjob.logs.wrap._LOG_TAIL_MAX_BYTES', 4096))
+
+        lines = ([self.SPLIT_LINE] + self.ERROR_LINES +
+                 [self.INFO_LINE] * 10000)
+        path = self.make_log('syslog', lines)
+
+        self.assertEqual(_parse_task_syslog_log(self.fs, path),
+                         _parse_task_syslog(lines))
+        self.assertEqual(self.max_bytes_tailed(), 4096)
+
+    def test_big_stderr(self):
+        lines = ['some noise\n'] * 10000 + self.PYTHON_ERROR_LINES
+        path = self.make_log('stderr', lines)
+
+        expected = _parse_task_stderr(lines)
+        del expected['start_line']
+
+        self.assertEqual(_parse_task_stderr_log(self.fs, path), expected)
+        self.assertEqual(self.max_bytes_tailed(), 1024)
+
+    def test_big_stderr_without_command(self):
+        # the error is the entire stderr, so we have to read all of it
+        lines = ['some noise\n'] * 10000
+        path = self.make_log('stderr', lines)
+
+        self.assertEqual(_parse_task_stderr_log(self.fs, path),
+                         _parse_task_stderr(lines))
+
+
 class ParseTaskSyslogTestCase(TestCase):
 
     def test_empty(self):
@@ -15,7 +15,9 @@
 from io import BytesIO
 
 from mrjob.logs.wrap import _cat_log
+from mrjob.logs.wrap import _cat_log_from_end
 from mrjob.logs.wrap import _ls_logs
+from mrjob.parallel import _map_in_threads
 from mrjob.py2 import StringIO
 from mrjob.util import log_to_stream
 
@@ -98,6 +100,83 @@ class CatLogsTestCase(PatcherTestCase):
         self.assertFalse(self.mock_log.warning.called)
 
 
+class CatLogFromEndTestCase(PatcherTestCase):
+
+    def setUp(self):
+        super(CatLogFromEndTestCase, self).setUp()
+
+        self.start(patch('mrjob.logs.wrap._LOG_TAIL_MIN_BYTES', 8))
+
+        self.mock_data = b'line 1\nline 2\nline 3\nline 4\n'  # 28 bytes
+
+        self.mock_fs = Mock()
+        self.mock_fs.exists = Mock(return_value=True)
+        self.mock_fs.cat = Mock(
+            side_effect=lambda path: BytesIO(self.mock_data))
+        self.mock_fs._tail_file = Mock(
+            side_effect=lambda path, num_bytes: self.mock_data[-num_bytes:])
+
+        self.mock_log = self.start(patch('mrjob.logs.wrap.log'))
+
+    def cat_log_from_end(self, path):
+        return [(list(lines), whole_file)
+                for lines, whole_file in _cat_log_from_end(self.mock_fs, path)]
+
+    def test_widen_until_whole_file(self):
+        self.assertEqual(
+            self.cat_log_from_end('foo'),
+            [(['line 4\n'], False),
+             (['line 3\n', 'line 4\n'], False),  # skip partial '2\n'
+             (['line 1\n', 'line 2\n', 'line 3\n', 'line 4\n'], True)])
+
+        self.assertEqual(
+            [num_bytes for (path, num_bytes), _ in
+             self.mock_fs._tail_file.call_args_list],
+            [8, 16, 32])
+        self.assertFalse(self.mock_fs.cat.called)
+
+    def test_cat_past_max_bytes(self):
+        self.start(patch('mrjob.logs.wrap._LOG_TAIL_MAX_BYTES', 16))
+
+        self.assertEqual(
+            self.cat_log_from_end('foo'),
+            [(['line 4\n'], False),
+             (['line 3\n', 'line 4\n'], False),
+             (['line 1\n', 'line 2\n', 'line 3\n', 'line 4\n'], True)])
+
+        self.assertEqual(
+            [num_bytes for (path, num_bytes), _ in
+             self.mock_fs._tail_file.call_args_list],
+            [8, 16])
+        self.assertTrue(self.mock_fs.cat.called)
+
+    def test_stop_early(self):
+        for lines, whole_file in _cat_log_from_end(self.mock_fs, 'foo'):
+            break
+
+        self.assertEqual(self.mock_fs._tail_file.call_count, 1)
+
+    def test_compressed_log(self):
+        self.assertEqual(
+            self.cat_log_from_end('foo.gz'),
+            [(['line 1\n', 'line 2\n', 'line 3\n', 'line 4\n'], True)])
+
+        self.assertFalse(self.mock_fs._tail_file.called)
+
+    def test_tail_not_implemented(self):
+        self.mock_fs._tail_file.side_effect = NotImplementedError
+
+        self.assertEqual(
+            self.cat_log_from_end('foo'),
+            [(['line 1\n', 'line 2\n', 'line 3\n', 'line 4\n'], True)])
+
+    def test_ioerror(self):
+        self.mock_fs._tail_file.side_effect = IOError
+
+        self.assertEqual(self.cat_log_from_end('foo'), [([], True)])
+        self.assertTrue(self.mock_log.warning.called)
+
+
 class LsLogsTestCase(TestCase):
 
     def setUp(self):
@@ -174,6 +253,24 @@ class LsLogsTestCase(TestCase):
             [dict(path='ssh://node1/logs/syslog'),
              dict(path='ssh://node2/logs/syslog')])
 
+    def test_multiple_log_dirs_listed_concurrently(self):
+        self.mock_paths = [
+            'ssh://node1/logs/syslog',
+            'ssh://node2/logs/syslog',
+        ]
+
+        with patch('mrjob.logs.wrap._map_in_threads',
+                   wraps=_map_in_threads) as m_map_in_threads:
+            self.assertEqual(
+                self._ls_logs([['ssh://node1/logs/', 'ssh://node2/logs/']]),
+                [dict(path='ssh://node1/logs/syslog'),
+                 dict(path='ssh://node2/logs/syslog')])
+
+        self.assertEqual(m_map_in_threads.call_count, 1)
+        self.assertEqual(m_map_in_threads.call_args[0][1],
+                         ['ssh://node1/logs/', 'ssh://node2/logs/'])
+        self.assertGreater(m_map_in_threads.call_args[0][2], 1)
+
     def test_stop_after_match(self):
         self.mock_paths = [
             's3://bucket/logs/node1/syslog',
@@ -19,6 +19,7 @@ import itertools
 import os
 import shutil
 import tempfile
+import threading
 import time
 from datetime import datetime
 from io import BytesIO
@@ -28,6 +29,8 @@ try:
     from boto.emr.instance_group import InstanceGroup
     from boto.emr.step import JarStep
     import boto.exception
+    from boto.s3.multidelete import MultiDeleteResult
+    from boto.s3.prefix import Prefix
     import boto.utils
     boto  # quiet "redefinition of unused ..." warning from pyflakes
 except ImportError:
@@ -179,8 +182,28 @@ class MockBotoTestCase(SandboxedTestCase):
             EMRJobRunner, '_create_mrjob_tar_gz',
             fake_create_mrjob_tar_gz))
 
+        # simulate progress each time the runner checks on its steps
+        real_describe_job_steps = EMRJobRunner._describe_job_steps
+
+        def fake_describe_job_steps(mocked_self, emr_conn, *args, **kwargs):
+            emr_conn.simulate_progress(mocked_self.get_cluster_id())
+            return real_describe_job_steps(
+                mocked_self, emr_conn, *args, **kwargs)
+
+        self.start(patch.object(
+            EMRJobRunner, '_describe_job_steps',
+            fake_describe_job_steps))
+
         self.start(patch.object(time, 'sleep'))
 
+        # don't share API rate limits and retry budgets between tests
+        self.start(patch('mrjob.retry._shared_token_buckets', {}))
+
+        # time doesn't pass when we sleep, so we'd run out of tokens and
+        # add extra calls to time.sleep(). Rate limiting is tested in
+        # tests/test_retry.py and tests/fs/test_s3.py
+        self.start(patch('mrjob.emr._EMR_API_RATE', None))
+
     def add_mock_s3_data(self, data, time_modified=None, location=None):
         """Update self.mock_s3_fs with a map from bucket name
         to key name to data."""
@@ -376,6 +399,21 @@ class MockS3Connection(object):
         self.mock_s3_fs[bucket_name] = {'keys': {}, 'location': location}
 
 
+# make conditional writes to mock S3 atomic
+_mock_s3_lock = threading.Lock()
+
+
+def _md5_hexdigest(data):
+    m = hashlib.md5()
+    m.update(data)
+    return m.hexdigest()
+
+
+def _unquote_etag(etag):
+    """Real S3 ETags are wrapped in double quotes. Mock ones aren't."""
+    return etag.strip('"')
+
+
 class MockBucket(object):
     """Mock out boto.s3.Bucket
     """
@@ -396,23 +434,40 @@ class MockBucket(object):
             raise boto.exception.S3ResponseError(404, 'Not Found')
 
     def new_key(self, key_name):
-        if key_name not in self.mock_state():
-            self.mock_state()[key_name] = (
-                b'', to_iso8601(datetime.utcnow()))
+        # like real boto, this doesn't create the key until we write to it
+        self.mock_state()  # make sure bucket exists
         return MockKey(bucket=self, name=key_name)
 
     def get_key(self, key_name):
         if key_name in self.mock_state():
-            return MockKey(bucket=self, name=key_name, date_to_str=to_rfc1123)
+            key = MockKey(bucket=self, name=key_name, date_to_str=to_rfc1123)
+            # real boto remembers the ETag from when it fetched the key
+            key.etag = _md5_hexdigest(self.mock_state()[key_name][0])
+            return key
         else:
             return None
 
     def get_location(self):
         return self.connection.mock_s3_fs[self.name]['location']
 
-    def list(self, prefix=''):
+    def list(self, prefix='', delimiter=''):
+        """List keys starting with *prefix*. If *delimiter* is set, roll up
+        keys containing *delimiter* after the prefix into
+        :py:class:`~boto.s3.prefix.Prefix` objects, like real S3 does."""
+        prefixes_seen = set()
+
         for key_name in sorted(self.mock_state()):
-            if key_name.startswith(prefix):
+            if not key_name.startswith(prefix):
+                continue
+
+            if delimiter and delimiter in key_name[len(prefix):]:
+                common_prefix = key_name[:key_name.index(
+                    delimiter, len(prefix)) + len(delimiter)]
+
+                if common_prefix not in prefixes_seen:
+                    prefixes_seen.add(common_prefix)
+                    yield Prefix(bucket=self, name=common_prefix)
+            else:
                 yield MockKey(bucket=self, name=key_name,
                               date_to_str=to_iso8601)
 
@@ -420,6 +475,19 @@ class MockBucket(object):
         key = self.new_key(key_name)
         return MockMultiPartUpload(key)
 
+    def delete_keys(self, keys, quiet=False, mfa_token=None, headers=None):
+        """Multi-object delete. *keys* must be a list of key names.
+
+        Like real S3, deleting a key that doesn't exist isn't an error.
+        """
+        if len(keys) > 1000:
+            raise boto.exception.S3ResponseError(400, 'Bad Request')
+
+        for key_name in keys:
+            self.mock_state().pop(key_name, None)
+
+        return MultiDeleteResult(self)
+
 
 class MockKey(object):
     """Mock out boto.s3.Key"""
@@ -430,6 +498,8 @@ class MockKey(object):
         self.date_to_str = date_to_str or to_iso8601
         # position in data, for read() and next()
         self._pos = 0
+        # if None, compute ETag from current data
+        self._etag = None
 
     def read_mock_data(self):
         """Read the bytes for this key out of the fake boto state."""
@@ -441,17 +511,32 @@ class MockKey(object):
     def mock_multipart_upload_was_cancelled(self):
         return isinstance(self.read_mock_data(), MultiPartUploadCancelled)
 
-    def write_mock_data(self, data):
+    def write_mock_data(self, data, headers=None):
         # real boto automatically UTF-8 encodes unicode, but mrjob should
         # always pass bytes
         if not isinstance(data, bytes):
             #data = data.encode('utf_8')
             raise TypeError('mock s3 data must be bytes')
 
-        if self.name in self.bucket.mock_state():
-            self.bucket.mock_state()[self.name] = (data, datetime.utcnow())
-        else:
-            raise boto.exception.S3ResponseError(404, 'Not Found')
+        mock_state = self.bucket.mock_state()
+        headers = headers or {}
+
+        # check preconditions and write atomically, like S3 does
+        with _mock_s3_lock:
+            if 'If-None-Match' in headers:
+                if self.name in mock_state:
+                    raise boto.exception.S3ResponseError(
+                        412, 'Precondition Failed')
+
+            if 'If-Match' in headers:
+                if (self.name not in mock_state or
+                        _unquote_etag(headers['If-Match']) !=
+                        _md5_hexdigest(mock_state[self.name][0])):
+                    raise boto.exception.S3ResponseError(
+                        412, 'Precondition Failed')
+
+            mock_state[self.name] = (data, datetime.utcnow())
+            self._etag = None
 
     def get_contents_to_filename(self, path, headers=None):
         with open(path, 'wb') as f:
@@ -461,11 +546,22 @@ class MockKey(object):
         with open(path, 'rb') as f:
             self.write_mock_data(f.read())
 
-    def get_contents_as_string(self):
-        return self.read_mock_data()
+    def get_contents_as_string(self, headers=None):
+        data = self.read_mock_data()
+
+        if (headers and 'If-Match' in headers and
+                _unquote_etag(headers['If-Match']) != _md5_hexdigest(data)):
+            raise boto.exception.S3ResponseError(412, 'Precondition Failed')
 
-    def set_contents_from_string(self, string):
-        self.write_mock_data(string)
+        # support ranged GETs (e.g. Range: bytes=0-499)
+        if headers and headers.get('Range'):
+            start, end = headers['Range'][len('bytes='):].split('-')
+            data = data[int(start):int(end) + 1]
+
+        return data
+
+    def set_contents_from_string(self, string, headers=None):
+        self.write_mock_data(string, headers=headers)
 
     def delete(self):
         if self.name in self.bucket.mock_state():
@@ -516,11 +612,15 @@ class MockKey(object):
     last_modified = property(_get_last_modified, _set_last_modified)
 
     def _get_etag(self):
-        m = hashlib.md5()
-        m.update(self.get_contents_as_string())
-        return m.hexdigest()
+        if self._etag is None:
+            return _md5_hexdigest(self.get_contents_as_string())
+        else:
+            return self._etag
+
+    def _set_etag(self, etag):
+        self._etag = etag
 
-    etag = property(_get_etag)
+    etag = property(_get_etag, _set_etag)
 
     @property
     def size(self):
@@ -569,7 +669,8 @@ class MockMultiPartUpload(object):
         self.parts = None  # should break any further calls
 
         # record that multipart upload was cancelled
-        cancelled = MultiPartUploadCancelled(self.key.get_contents_as_string())
+        cancelled = MultiPartUploadCancelled(
+            self.key.bucket.mock_state().get(self.key.name, (b'',))[0])
         self.key.set_contents_from_string(cancelled)
 
 
@@ -1280,8 +1381,10 @@ class MockEmrConnection(object):
 
     def simulate_progress(self, cluster_id, now=None):
         """Simulate progress on the given cluster. This is automatically
-        run when we call :py:meth:`describe_step`, and, when the cluster is
-        ``TERMINATING``, :py:meth:`describe_cluster`.
+        run when we call :py:meth:`describe_step`, when
+        :py:class:`~tests.mockboto.MockBotoTestCase` checks on a runner's
+        steps, and, when the cluster is ``TERMINATING``,
+        :py:meth:`describe_cluster`.
 
         :type cluster_id: str
         :param cluster_id: fake cluster ID
@@ -19,6 +19,7 @@ import tempfile
 import time
 import hashlib
 import sys
+import threading
 from datetime import datetime
 from httplib2 import Response
 from io import BytesIO
@@ -184,12 +185,9 @@ class MockGoogleAPITestCase(SandboxedTestCase):
 
         self.gcs_patch_api_client = patch.object(
             GCSFilesystem, 'api_client', self._gcs_client)
-        self.gcs_patch_download_io = patch.object(
-            GCSFilesystem, '_download_io', self._gcs_client.download_io)
         self.gcs_patch_upload_io = patch.object(
             GCSFilesystem, '_upload_io', self._gcs_client.upload_io)
         self.start(self.gcs_patch_api_client)
-        self.start(self.gcs_patch_download_io)
         self.start(self.gcs_patch_upload_io)
 
         self.start(patch('mrjob.dataproc._read_gcloud_config',
@@ -269,9 +267,20 @@ class MockGCSClient(object):
         self._client_objects = MockGCSClientObjects(self)
         self._client_buckets = MockGCSClientBuckets(self)
 
+        # MockGCSMediaHttp objects created by objects().get_media()
+        self.media_https = []
+
+        # MockGCSBatchHttpRequest objects created by new_batch_http_request()
+        self.batches = []
+
     def objects(self):
         return self._client_objects
 
+    def new_batch_http_request(self, callback=None):
+        batch = MockGCSBatchHttpRequest(callback=callback)
+        self.batches.append(batch)
+        return batch
+
     def buckets(self):
         return self._client_buckets
 
@@ -292,21 +301,6 @@ class MockGCSClient(object):
         for gcs_uri, data in gcs_uri_to_data_map.items():
             self.put_gcs(gcs_uri, data)
 
-    def download_io(self, src_uri, io_obj):
-        """
-        Clobber GCSFilesystem._download_io
-        """
-        bucket, name = parse_gcs_uri(src_uri)
-
-        object_dict = _get_deep(self._cache_objects, [bucket, name])
-
-        if not object_dict:
-            raise Exception
-
-        object_data = object_dict['_data']
-        io_obj.write(object_data)
-        return io_obj
-
     def upload_io(self, io_obj, dest_uri):
         """
         Clobber GCSFilesystem._upload_io
@@ -335,15 +329,22 @@ class MockGCSClientObjects(object):
         self._client = client
         self._objects = self._client._cache_objects
 
+        self.num_list_requests = 0
+
     @mock_api
     def list(self, **kwargs):
-        """Emulate objects().list - fields supported - bucket, prefix, fields
+        """Emulate objects().list - fields supported - bucket, prefix, fields,
+        maxResults, pageToken
         """
         bucket = kwargs.get('bucket')
         prefix = kwargs.get('prefix') or ''
         fields = kwargs.get('fields') or _LS_FIELDS_TO_RETURN
+        max_results = kwargs.get('maxResults') or 1000
+        start = int(kwargs.get('pageToken') or 0)
         assert bucket is not None
 
+        self.num_list_requests += 1
+
         # Return only the fields that were requested
         field_match = re.findall('items\((.*?)\)', fields)[0]
         actual_fields = set(field_match.split(','))
@@ -351,7 +352,7 @@ class MockGCSClientObjects(object):
         object_map = _get_deep(self._objects, [bucket], dict())
 
         item_list = []
-        for object_name, current_object in object_map.items():
+        for object_name, current_object in sorted(object_map.items()):
             # Filter out on prefix match
             if not object_name.startswith(prefix):
                 continue
@@ -363,26 +364,119 @@ class MockGCSClientObjects(object):
 
             item_list.append(output_item)
 
-        return dict(items=item_list, kwargs=kwargs)
+        resp = dict(items=item_list[start:start + max_results], kwargs=kwargs)
+
+        if start + max_results < len(item_list):
+            resp['nextPageToken'] = str(start + max_results)
+
+        return resp
 
     def list_next(self, list_request, resp):
-        """list always returns all results in a single shot"""
-        return None
+        """Get the next page of results, if any"""
+        if not resp.get('nextPageToken'):
+            return None
+
+        return self.list(**dict(resp['kwargs'],
+                                pageToken=resp['nextPageToken']))
 
-    @mock_api
     def delete(self, bucket=None, object=None):
-        bucket_dict = self._objects[bucket]
-        del bucket_dict[object]
+        """Emulate objects().delete. Unlike most mock requests, nothing
+        happens until you call execute(), so this works in batches."""
+        def execute(http=None):
+            bucket_dict = self._objects.get(bucket) or {}
+            if object not in bucket_dict:
+                raise mock_google_error(404)
+
+            del bucket_dict[object]
+
+        mocked_req = mock.MagicMock(google_http.HttpRequest)
+        mocked_req.execute.side_effect = execute
+
+        return mocked_req
 
-    @mock_api
     def get_media(self, bucket=None, object=None):
-        raise NotImplementedError('See MockGCSClient.download_io')
+        """Emulate objects().get_media. Returns a request that
+        :py:class:`googleapiclient.http.MediaIoBaseDownload` can use."""
+        uri = 'https://www.googleapis.com/storage/v1/b/%s/o/%s?alt=media' % (
+            bucket, object)
+
+        return mock.Mock(
+            spec=['headers', 'http', 'uri'], headers={},
+            http=MockGCSMediaHttp(self._client), uri=uri)
 
     @mock_api
     def insert(self, bucket=None, name=None, media_body=None):
         raise NotImplementedError('See MockGCSClient.upload_io')
 
 
+class MockGCSBatchHttpRequest(object):
+    """Emulate :py:class:`googleapiclient.http.BatchHttpRequest`.
+    *requests* is a list of the requests added to this batch."""
+    def __init__(self, callback=None):
+        self._callback = callback
+        self.requests = []
+        self._callbacks = []
+
+    def add(self, request, callback=None, request_id=None):
+        self.requests.append(request)
+        self._callbacks.append(callback or self._callback)
+
+    def execute(self, http=None):
+        for i, (request, callback) in enumerate(
+                zip(self.requests, self._callbacks)):
+            try:
+                response, exception = request.execute(), None
+            except google_errors.HttpError as e:
+                response, exception = None, e
+
+            if callback:
+                callback(str(i), response, exception)
+
+
+class MockGCSMediaHttp(object):
+    """Serve ranged GETs of an object's data (from URIs made by
+    :py:meth:`MockGCSClientObjects.get_media`) to
+    :py:class:`googleapiclient.http.MediaIoBaseDownload`.
+
+    *num_requests* is the number of requests served so far, and *threads*
+    is the set of threads that made them.
+    """
+    def __init__(self, client):
+        self._client = client
+
+        self.num_requests = 0
+        self.threads = set()
+        client.media_https.append(self)
+
+    def request(self, uri, method='GET', headers=None, **kwargs):
+        self.num_requests += 1
+        self.threads.add(threading.current_thread())
+
+        bucket, name = re.match(r'^.*/b/(.*?)/o/(.*)\?alt=media$',
+                                uri).groups()
+
+        object_dict = _get_deep(self._client._cache_objects, [bucket, name])
+        if not object_dict:
+            return Response(dict(status=404)), b''
+
+        data = object_dict['_data']
+
+        m = re.match(r'^bytes=(\d+)-(\d+)$', (headers or {}).get('range', ''))
+        if m:
+            start, end = int(m.group(1)), int(m.group(2))
+        else:
+            start, end = 0, len(data) - 1
+
+        if start >= len(data):
+            return Response(dict(status=416)), b''
+
+        chunk = data[start:end + 1]
+        content_range = 'bytes %d-%d/%d' % (
+            start, start + len(chunk) - 1, len(data))
+
+        return Response({'status': 206, 'content-range': content_range}), chunk
+
+
 class MockGCSClientBuckets(object):
     def __init__(self, client):
         assert isinstance(client, MockGCSClient)
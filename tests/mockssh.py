@@ -179,6 +179,24 @@ def main(stdin, stdout, stderr, args, environ):
 
         return 0
 
+    def tail(host, args):
+        """Mock SSH behavior for :py:func:`~mrjob.ssh._ssh_cat()` with
+        *num_bytes* set (``tail -c <num_bytes> <path>``)"""
+        num_bytes = int(args[2])
+        local_dest = rel_posix_to_abs_local(host, args[3], environ)
+        if not os.path.exists(local_dest):
+            print('No such file or directory:', local_dest, file=stderr)
+            return 1
+
+        stdout_buffer = getattr(stdout, 'buffer', stdout)
+
+        with open(local_dest, 'rb') as f:
+            data = f.read()
+
+        stdout_buffer.write(data[-num_bytes:] if num_bytes else b'')
+
+        return 0
+
     def run(host, remote_args, stdout, stderr, environ, slave_key_file=None):
         """Execute a command as a "host." Recursively call for slave if
         necessary.
@@ -189,7 +207,7 @@ def main(stdin, stdout, stderr, args, environ):
         if remote_args[0] == 'sudo':
             remote_args = remote_args[1:]
         elif environ.get('MOCK_SSH_REQUIRES_SUDO'):
-            if remote_args[0] in ('find', 'cat'):
+            if remote_args[0] in ('find', 'cat', 'tail'):
                 print('sudo required', file=stderr)
                 return 1
 
@@ -209,6 +227,10 @@ def main(stdin, stdout, stderr, args, environ):
         if remote_args[0] == 'cat':
             return cat(host, remote_args)
 
+        # tail (this is 'tail -c ...')
+        if remote_args[0] == 'tail':
+            return tail(host, remote_args)
+
         # Recursively call for slaves
         if remote_args[0] == 'ssh':
             # Actually check the existence of the key file on the master node
@@ -264,6 +286,10 @@ def main(stdin, stdout, stderr, args, environ):
 
     host = args[arg_pos].split('@')[1]
 
+    # ssh -O exit (stop multiplexed connection) comes before the host
+    if '-O' in args[:arg_pos]:
+        return 0
+
     # the rest are arguments are what to run on the remote machine
 
     arg_pos += 1
@@ -0,0 +1,257 @@
+# Copyright 2016 Yelp
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""A small WebHDFS server that actually manipulates the filesystem. This
+imitates only things that mrjob actually uses.
+
+HDFS is stored in a local directory (we ignore the scheme and host of
+``hdfs://`` URIs, like mockhadoop does). Like real WebHDFS, requests to
+read or write data are redirected to a "datanode", which is the same server
+with ``datanode=true`` added to the query string.
+
+Use :py:class:`MockWebHDFSServer` in a ``with`` block, or call
+:py:meth:`~MockWebHDFSServer.start` and
+:py:meth:`~MockWebHDFSServer.stop`.
+"""
+import json
+import os
+import os.path
+import shutil
+import threading
+
+from mrjob.parse import urlparse
+from mrjob.py2 import PY2
+from mrjob.py2 import unquote
+
+if PY2:
+    from BaseHTTPServer import BaseHTTPRequestHandler
+    from BaseHTTPServer import HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import parse_qsl
+else:
+    from http.server import BaseHTTPRequestHandler
+    from http.server import HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qsl
+
+_API_PREFIX = '/webhdfs/v1'
+
+
+class MockWebHDFSServer(object):
+    """Serve WebHDFS on localhost, backed by the local directory *root*.
+
+    :param redirect: if false, send data back directly rather than
+                     redirecting to a "datanode", like HttpFS does.
+
+    Attributes you may want to check in tests:
+
+    *requests*: list of ``(method, op, path, params)`` for each request
+    *num_connections*: number of connections made to the server
+    """
+    def __init__(self, root, redirect=True):
+        self.root = root
+        self.redirect = redirect
+
+        self.requests = []
+        self.num_connections = 0
+
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return 'http://%s:%d' % (host, port)
+
+    def start(self):
+        self._server = _ThreadingHTTPServer(
+            ('127.0.0.1', 0), _MockWebHDFSHandler)
+        self._server.mock = self
+
+        # poll often, so that stop() is quick
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        kwargs=dict(poll_interval=0.01))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def local_path(self, path):
+        """Map an HDFS path to where it's stored locally."""
+        return os.path.join(self.root, path.lstrip('/'))
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _MockWebHDFSHandler(BaseHTTPRequestHandler):
+
+    # keep connections alive
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.mock.num_connections += 1
+
+    def log_message(self, format, *args):
+        pass  # don't spam stderr
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def _handle(self, method):
+        url = urlparse(self.path)
+        params = dict(parse_qsl(url.query))
+
+        # always read the body, so that the connection can be reused
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+        if not url.path.startswith(_API_PREFIX):
+            return self._send_error(400, 'IllegalArgumentException',
+                                    'Bad path: %s' % url.path)
+
+        path = unquote(url.path[len(_API_PREFIX):]) or '/'
+        op = params.get('op')
+
+        mock = self.server.mock
+        mock.requests.append((method, op, path, params))
+
+        local_path = mock.local_path(path)
+
+        if method == 'GET' and op == 'LISTSTATUS':
+            if not os.path.exists(local_path):
+                return self._send_not_found(path)
+
+            if os.path.isdir(local_path):
+                statuses = [
+                    _file_status(os.path.join(local_path, name), name)
+                    for name in sorted(os.listdir(local_path))]
+            else:
+                statuses = [_file_status(local_path, '')]
+
+            return self._send_json(
+                200, dict(FileStatuses=dict(FileStatus=statuses)))
+
+        elif method == 'GET' and op == 'GETFILESTATUS':
+            if not os.path.exists(local_path):
+                return self._send_not_found(path)
+
+            return self._send_json(
+                200, dict(FileStatus=_file_status(local_path, '')))
+
+        elif method == 'GET' and op == 'OPEN':
+            if mock.redirect and not params.get('datanode'):
+                return self._send_redirect()
+
+            if not os.path.isfile(local_path):
+                return self._send_not_found(path)
+
+            with open(local_path, 'rb') as f:
+                return self._send(200, f.read(), 'application/octet-stream')
+
+        elif method == 'PUT' and op == 'MKDIRS':
+            if os.path.isfile(local_path):
+                return self._send_json(200, dict(boolean=False))
+
+            if not os.path.isdir(local_path):
+                os.makedirs(local_path)
+
+            return self._send_json(200, dict(boolean=True))
+
+        elif method == 'PUT' and op == 'CREATE':
+            if not params.get('datanode'):
+                return self._send_redirect()
+
+            if (os.path.exists(local_path) and
+                    params.get('overwrite') != 'true'):
+                return self._send_error(403, 'FileAlreadyExistsException',
+                                        '%s already exists' % path)
+
+            parent = os.path.dirname(local_path)
+            if not os.path.isdir(parent):
+                os.makedirs(parent)
+
+            with open(local_path, 'wb') as f:
+                f.write(body)
+
+            return self._send(201, b'', 'application/octet-stream')
+
+        elif method == 'DELETE' and op == 'DELETE':
+            if os.path.isdir(local_path):
+                shutil.rmtree(local_path)
+            elif os.path.exists(local_path):
+                os.remove(local_path)
+            else:
+                return self._send_json(200, dict(boolean=False))
+
+            return self._send_json(200, dict(boolean=True))
+
+        else:
+            return self._send_error(
+                400, 'IllegalArgumentException',
+                'Invalid value for webhdfs parameter "op": %s' % op)
+
+    def _send(self, status, data, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status, value):
+        self._send(status, json.dumps(value).encode('utf_8'),
+                   'application/json')
+
+    def _send_error(self, status, exception, message):
+        self._send_json(status, dict(RemoteException=dict(
+            exception=exception,
+            javaClassName='org.apache.hadoop.' + exception,
+            message=message)))
+
+    def _send_not_found(self, path):
+        self._send_error(404, 'FileNotFoundException',
+                         'File does not exist: %s' % path)
+
+    def _send_redirect(self):
+        host, port = self.server.server_address
+
+        self.send_response(307)
+        self.send_header('Location', 'http://%s:%d%s&datanode=true' % (
+            host, port, self.path))
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+def _file_status(local_path, path_suffix):
+    if os.path.isdir(local_path):
+        return dict(length=0, pathSuffix=path_suffix, type='DIRECTORY')
+    else:
+        return dict(length=os.path.getsize(local_path),
+                    pathSuffix=path_suffix, type='FILE')
@@ -117,6 +117,9 @@ class SandboxedTestCase(EmptyMrjobConfTestCase):
         self.addCleanup(os.environ.update, old_environ)
         self.addCleanup(os.environ.clear)
 
+        # don't cache things (e.g. mrjob.tar.gz) in the real ~/.cache
+        os.environ['XDG_CACHE_HOME'] = os.path.join(self.tmp_dir, '.cache')
+
     def makedirs(self, path):
         abs_path = os.path.join(self.tmp_dir, path)
         if not os.path.isdir(abs_path):
@@ -31,6 +31,7 @@ from mrjob.dataproc import _DEFAULT_CLOUD_TMP_DIR_OBJECT_TTL_DAYS
 from mrjob.dataproc import _DEFAULT_IMAGE_VERSION
 from mrjob.dataproc import _MAX_HOURS_IDLE_BOOTSTRAP_ACTION_PATH
 from mrjob.fs.gcs import parse_gcs_uri
+from mrjob.parallel import _map_in_threads
 from mrjob.py2 import PY2
 from mrjob.py2 import StringIO
 from mrjob.step import StepFailedException
@@ -482,6 +483,104 @@ class TmpBucketTestCase(MockGoogleAPITestCase):
         self.assertEqual(runner._gce_region, US_EAST_GCE_REGION)
 
 
+class DedupUploadsTestCase(MockGoogleAPITestCase):
+
+    def setUp(self):
+        super(DedupUploadsTestCase, self).setUp()
+
+        self.foo_py = os.path.join(self.tmp_dir, 'foo.py')
+        with open(self.foo_py, 'w') as f:
+            f.write('# foo\n')
+
+    def test_default(self):
+        runner = DataprocJobRunner(conf_paths=[])
+        runner._upload_mgr.add(self.foo_py)
+
+        self.assertEqual(runner._upload_mgr.uri(self.foo_py),
+                         runner._job_tmpdir + 'files/foo.py')
+
+    def test_files_named_by_md5(self):
+        runner = DataprocJobRunner(conf_paths=[], cloud_dedup_uploads=True)
+        runner._upload_mgr.add(self.foo_py)
+
+        md5sum = runner.fs.md5sum(self.foo_py)
+
+        self.assertEqual(
+            runner._upload_mgr.uri(self.foo_py),
+            runner._dedup_upload_dir() + '%s/foo.py' % md5sum)
+        self.assertEqual(runner._dedup_upload_dir(),
+                         runner._cloud_tmp_dir + 'files-by-md5/')
+
+    def test_skip_files_already_uploaded(self):
+        runner1 = DataprocJobRunner(conf_paths=[], cloud_dedup_uploads=True)
+        runner1._upload_mgr.add(self.foo_py)
+        runner1._upload_local_files_to_fs()
+
+        uri = runner1._upload_mgr.uri(self.foo_py)
+        self.assertTrue(runner1.fs.exists(uri))
+
+        runner2 = DataprocJobRunner(conf_paths=[], cloud_dedup_uploads=True)
+        runner2._upload_mgr.add(self.foo_py)
+        self.assertEqual(runner2._upload_mgr.uri(self.foo_py), uri)
+
+        with patch.object(runner2.fs, 'put') as m_put:
+            runner2._upload_local_files_to_fs()
+            self.assertFalse(m_put.called)
+
+    def test_checks_existence_all_at_once(self):
+        bar_py = self.makefile('bar.py', b'# bar\n')
+
+        runner = DataprocJobRunner(conf_paths=[], cloud_dedup_uploads=True)
+        runner._upload_mgr.add(self.foo_py)
+        runner._upload_mgr.add(bar_py)
+
+        with patch.object(runner.fs, 'exists_many',
+                          side_effect=runner.fs.exists_many) as m_exists_many:
+            runner._upload_local_files_to_fs()
+
+            self.assertEqual(m_exists_many.call_count, 1)
+            self.assertEqual(
+                sorted(m_exists_many.call_args[0][0]),
+                sorted(runner._upload_mgr.path_to_uri().values()))
+
+        self.assertTrue(runner.fs.exists(runner._upload_mgr.uri(bar_py)))
+
+    def test_saves_md5sum_cache_once(self):
+        bar_py = self.makefile('bar.py', b'# bar\n')
+
+        runner = DataprocJobRunner(conf_paths=[], cloud_dedup_uploads=True)
+        runner._upload_mgr.add(self.foo_py)
+        runner._upload_mgr.add(bar_py)
+
+        with patch('mrjob.dataproc._save_md5sum_cache') as m_save:
+            runner._upload_local_files_to_fs()
+
+        m_save.assert_called_once_with()
+
+
+class UploadLocalFilesTestCase(MockGoogleAPITestCase):
+
+    def test_upload_many_files(self):
+        runner = DataprocJobRunner(conf_paths=[], cloud_upload_threads=4)
+
+        for i in range(10):
+            path = self.makefile('file-%d' % i,
+                                 ('data %d' % i).encode('ascii'))
+            runner._upload_mgr.add(path)
+
+        with patch('mrjob.dataproc._map_in_threads',
+                   wraps=_map_in_threads) as m_map_in_threads:
+            runner._upload_local_files_to_fs()
+
+            self.assertEqual(m_map_in_threads.call_args[0][2], 4)
+
+        for i in range(10):
+            path = os.path.join(self.tmp_dir, 'file-%d' % i)
+            uri = runner._upload_mgr.uri(path)
+            self.assertEqual(b''.join(runner.fs.cat(uri)),
+                             ('data %d' % i).encode('ascii'))
+
+
 class GCEInstanceGroupTestCase(MockGoogleAPITestCase):
 
     maxDiff = None
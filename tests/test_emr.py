@@ -20,6 +20,7 @@ import os
 import os.path
 import posixpath
 import sys
+import threading
 import time
 from datetime import datetime
 from datetime import timedelta
@@ -40,12 +41,16 @@ from mrjob.emr import _decode_configurations_from_api
 from mrjob.emr import _lock_acquire_step_1
 from mrjob.emr import _lock_acquire_step_2
 from mrjob.emr import _list_all_steps
+from mrjob.emr import _next_check_interval
 from mrjob.emr import _yield_all_bootstrap_actions
 from mrjob.emr import _yield_all_clusters
 from mrjob.emr import _yield_all_instance_groups
 from mrjob.emr import filechunkio
+from mrjob.fs.caching import CachingFilesystem
+from mrjob.fs.composite import CompositeFilesystem
 from mrjob.job import MRJob
 from mrjob.parse import parse_s3_uri
+from mrjob.pool import _load_pool_index
 from mrjob.pool import _pool_hash_and_name
 from mrjob.py2 import PY2
 from mrjob.py2 import StringIO
@@ -60,8 +65,11 @@ from mrjob.util import tar_and_gzip
 
 from tests.mockboto import DEFAULT_MAX_STEPS_RETURNED
 from tests.mockboto import MockBotoTestCase
+from tests.mockboto import MockBucket
 from tests.mockboto import MockEmrConnection
 from tests.mockboto import MockEmrObject
+from tests.mockboto import MockKey
+from tests.mockboto import MockMultiPartUpload
 from tests.mockssh import mock_ssh_dir
 from tests.mockssh import mock_ssh_file
 from tests.mr_hadoop_format_job import MRHadoopFormatJob
@@ -192,8 +200,8 @@ class EMRJobRunnerEndToEndTestCase(MockBotoTestCase):
                              '{"key": "value"}')
 
             # keep track of which steps we waited for
-            runner._wait_for_step_to_complete = Mock(
-                wraps=runner._wait_for_step_to_complete)
+            runner._start_waiting_for_step = Mock(
+                wraps=runner._start_waiting_for_step)
 
             runner.run()
 
@@ -257,7 +265,7 @@ class EMRJobRunnerEndToEndTestCase(MockBotoTestCase):
 
         # did we wait for steps in correct order? (regression test for #1316)
         step_ids = [
-            c[0][0] for c in runner._wait_for_step_to_complete.call_args_list]
+            c[0][0] for c in runner._start_waiting_for_step.call_args_list]
         self.assertEqual(step_ids, [step.id for step in steps])
 
     def test_failed_job(self):
@@ -2664,6 +2672,67 @@ class PoolMatchingTestCase(MockBotoTestCase):
             ['-r', 'emr', '--pool-clusters', '--image-version', '3.11.0'],
             job_class=MRNullSpark)
 
+    def test_pool_index(self):
+        _, cluster_id = self.make_pooled_cluster()
+
+        runner = self.make_simple_runner('default')
+
+        self.start(patch.object(
+            MockEmrConnection, 'list_bootstrap_actions',
+            side_effect=MockEmrConnection.list_bootstrap_actions,
+            autospec=True))
+
+        self.assertEqual(runner._usable_clusters(), [(cluster_id, 0)])
+        self.assertEqual(
+            MockEmrConnection.list_bootstrap_actions.call_count, 1)
+
+        index = _load_pool_index()
+        self.assertEqual(index[cluster_id]['pool_name'], 'default')
+        self.assertEqual(index[cluster_id]['pool_hash'], runner._pool_hash())
+
+        # pool hash and name come from the index the second time
+        self.assertEqual(runner._usable_clusters(), [(cluster_id, 0)])
+        self.assertEqual(
+            MockEmrConnection.list_bootstrap_actions.call_count, 1)
+
+    def test_inspect_many_clusters(self):
+        # clusters are inspected in several threads at once
+        cluster_ids = [
+            self.make_pooled_cluster(minutes_ago=i)[1] for i in range(20)]
+
+        runner = self.make_simple_runner('default')
+
+        usable_cluster_ids = [
+            cluster_id for cluster_id, num_steps
+            in runner._usable_clusters()]
+
+        self.assertEqual(sorted(usable_cluster_ids), sorted(cluster_ids))
+
+        # all else being equal, prefer clusters with the longest time
+        # to the end of the hour (the most desirable come last)
+        self.assertEqual(usable_cluster_ids[-1], cluster_ids[0])
+
+    def test_pool_index_skips_clusters_in_other_pools(self):
+        _, cluster_id = self.make_pooled_cluster('other')
+
+        runner = self.make_simple_runner('default')
+
+        self.start(patch.object(
+            MockEmrConnection, 'list_bootstrap_actions',
+            side_effect=MockEmrConnection.list_bootstrap_actions,
+            autospec=True))
+        self.start(patch.object(
+            MockEmrConnection, 'describe_cluster',
+            side_effect=MockEmrConnection.describe_cluster,
+            autospec=True))
+
+        self.assertEqual(runner._usable_clusters(), [])
+        self.assertEqual(runner._usable_clusters(), [])
+
+        self.assertEqual(
+            MockEmrConnection.list_bootstrap_actions.call_count, 1)
+        self.assertFalse(MockEmrConnection.describe_cluster.called)
+
 
 class PoolingRecoveryTestCase(MockBotoTestCase):
 
@@ -2901,6 +2970,214 @@ class S3LockTestCase(MockBotoTestCase):
 
         self.assertFalse(_lock_acquire_step_2(key, 'jf1'), 'Lock should fail')
 
+    def read_lock(self, runner, lock_uri=None):
+        bucket_name, key_name = parse_s3_uri(lock_uri or self.lock_uri)
+        return runner.fs.get_bucket(bucket_name).get_key(
+            key_name).get_contents_as_string()
+
+    def test_conditional_lock_doesnt_wait(self):
+        runner = EMRJobRunner(conf_paths=[])
+
+        self.assertTrue(
+            _attempt_to_acquire_lock(runner.fs, self.lock_uri, 5.0, 'jf1'))
+        self.assertFalse(time.sleep.called)
+
+    def test_lock_with_sync_wait(self):
+        runner = EMRJobRunner(conf_paths=[])
+
+        self.assertTrue(_attempt_to_acquire_lock(
+            runner.fs, self.lock_uri, 5.0, 'jf1', conditional=False))
+        time.sleep.assert_called_once_with(5.0)
+
+    def test_unconditional_expired_lock(self):
+        runner = EMRJobRunner(conf_paths=[])
+
+        self.assertTrue(_attempt_to_acquire_lock(
+            runner.fs, self.expired_lock_uri, 0, 'jf1',
+            mins_to_expiration=5, conditional=False))
+        self.assertEqual(self.read_lock(runner, self.expired_lock_uri),
+                         b'jf1')
+
+    def test_dont_take_unexpired_lock(self):
+        runner = EMRJobRunner(conf_paths=[])
+
+        self.assertFalse(_attempt_to_acquire_lock(
+            runner.fs, self.expired_lock_uri, 0, 'jf1',
+            mins_to_expiration=60))
+        self.assertEqual(self.read_lock(runner, self.expired_lock_uri), b'x')
+
+    def lock_while_other_locker_is_reading(self, lock_uri, **kwargs):
+        """Have jf1 try to acquire the lock at *lock_uri*. Right after jf1
+        reads the lock, jf2 tries to acquire it too.
+
+        Return a map from job key to whether it got the lock."""
+        runner = EMRJobRunner(conf_paths=[])
+        results = {}
+
+        real_get_key = MockBucket.get_key
+
+        def get_key_then_let_jf2_lock(bucket, key_name):
+            key = real_get_key(bucket, key_name)
+
+            if 'jf2' not in results:
+                results['jf2'] = None  # only interrupt jf1
+                results['jf2'] = _attempt_to_acquire_lock(
+                    runner.fs, lock_uri, 0, 'jf2', **kwargs)
+
+            return key
+
+        with patch.object(MockBucket, 'get_key', get_key_then_let_jf2_lock):
+            results['jf1'] = _attempt_to_acquire_lock(
+                runner.fs, lock_uri, 0, 'jf1', **kwargs)
+
+        return results
+
+    def test_contention_for_new_lock(self):
+        # both lockers see that there's no lock, but S3 only lets one
+        # of them create it
+        results = self.lock_while_other_locker_is_reading(self.lock_uri)
+
+        self.assertEqual(results, dict(jf1=False, jf2=True))
+        self.assertEqual(self.read_lock(EMRJobRunner(conf_paths=[])), b'jf2')
+
+    def test_contention_for_expired_lock(self):
+        # both lockers see the same expired lock, but S3 only lets one
+        # of them replace it
+        results = self.lock_while_other_locker_is_reading(
+            self.expired_lock_uri, mins_to_expiration=5)
+
+        self.assertEqual(results, dict(jf1=False, jf2=True))
+        self.assertEqual(
+            self.read_lock(EMRJobRunner(conf_paths=[]),
+                           self.expired_lock_uri), b'jf2')
+
+    def test_contention_without_sync_wait(self):
+        # this is why we needed cloud_fs_sync_secs before we had
+        # conditional writes
+        results = self.lock_while_other_locker_is_reading(
+            self.lock_uri, conditional=False)
+
+        self.assertEqual(results, dict(jf1=True, jf2=True))
+
+    def test_lose_lock_during_sync_wait(self):
+        runner = EMRJobRunner(conf_paths=[])
+
+        def jf2_takes_lock(secs):
+            bucket_name, key_name = parse_s3_uri(self.lock_uri)
+            runner.fs.get_bucket(bucket_name).new_key(
+                key_name).set_contents_from_string(b'jf2')
+
+        time.sleep.side_effect = jf2_takes_lock
+
+        self.assertFalse(_attempt_to_acquire_lock(
+            runner.fs, self.lock_uri, 5.0, 'jf1', conditional=False))
+
+    def test_many_concurrent_lockers(self):
+        runner = EMRJobRunner(conf_paths=[])
+        # make sure the runner has its S3 connection before we start
+        runner.fs.get_bucket('locks')
+
+        results = {}
+        start = threading.Event()
+
+        def lock(job_key):
+            start.wait()
+            results[job_key] = _attempt_to_acquire_lock(
+                runner.fs, self.lock_uri, 0, job_key)
+
+        threads = [threading.Thread(target=lock, args=('jf%d' % i,))
+                   for i in range(10)]
+        for thread in threads:
+            thread.start()
+        start.set()
+        for thread in threads:
+            thread.join()
+
+        winners = [job_key for job_key, got_lock in results.items()
+                   if got_lock]
+        self.assertEqual(len(results), 10)
+        self.assertEqual(len(winners), 1)
+        self.assertEqual(self.read_lock(runner), winners[0].encode('utf_8'))
+
+    def test_fall_back_if_conditional_writes_not_supported(self):
+        runner = EMRJobRunner(conf_paths=[])
+
+        real_set_contents_from_string = MockKey.set_contents_from_string
+
+        def set_contents_from_string(key, string, headers=None):
+            if headers:
+                raise boto.exception.S3ResponseError(501, 'Not Implemented')
+            return real_set_contents_from_string(key, string)
+
+        with patch.object(MockKey, 'set_contents_from_string',
+                          set_contents_from_string):
+            with no_handlers_for_logger('mrjob.emr'):
+                self.assertTrue(_attempt_to_acquire_lock(
+                    runner.fs, self.lock_uri, 5.0, 'jf1'))
+
+        time.sleep.assert_called_once_with(5.0)
+        self.assertEqual(self.read_lock(runner), b'jf1')
+
+    def ignore_conditional_writes(self):
+        """Make mock S3 accept conditional writes, but ignore the
+        condition, like some S3-compatible stores do."""
+        real_set_contents_from_string = MockKey.set_contents_from_string
+
+        def set_contents_from_string(key, string, headers=None):
+            return real_set_contents_from_string(key, string)
+
+        self.start(patch.object(MockKey, 'set_contents_from_string',
+                                set_contents_from_string))
+        self.start(patch('mrjob.emr.log'))
+
+    def test_fall_back_if_conditional_writes_ignored(self):
+        self.ignore_conditional_writes()
+        runner = EMRJobRunner(conf_paths=[])
+
+        self.assertTrue(_attempt_to_acquire_lock(
+            runner.fs, self.lock_uri, 5.0, 'jf1'))
+
+        time.sleep.assert_called_once_with(5.0)
+        self.assertEqual(self.read_lock(runner), b'jf1')
+
+    def test_dont_take_lock_if_conditional_writes_ignored(self):
+        self.ignore_conditional_writes()
+        runner = EMRJobRunner(conf_paths=[])
+
+        self.assertTrue(_attempt_to_acquire_lock(
+            runner.fs, self.lock_uri, 0, 'jf1'))
+
+        # S3 would let jf2 overwrite the lock, but we check first
+        self.assertFalse(_attempt_to_acquire_lock(
+            runner.fs, self.lock_uri, 0, 'jf2'))
+        self.assertEqual(self.read_lock(runner), b'jf1')
+
+    def test_lose_lock_if_conditional_writes_ignored(self):
+        self.ignore_conditional_writes()
+        runner = EMRJobRunner(conf_paths=[])
+
+        def jf2_takes_lock(secs):
+            bucket_name, key_name = parse_s3_uri(self.lock_uri)
+            runner.fs.get_bucket(bucket_name).new_key(
+                key_name).set_contents_from_string(b'jf2')
+
+        time.sleep.side_effect = jf2_takes_lock
+
+        # both conditional writes succeed, but we see that jf2 overwrote
+        # the lock while we waited
+        self.assertFalse(_attempt_to_acquire_lock(
+            runner.fs, self.lock_uri, 5.0, 'jf1'))
+
+    def test_other_errors_arent_swallowed(self):
+        runner = EMRJobRunner(conf_paths=[])
+
+        with patch.object(MockKey, 'set_contents_from_string',
+                          side_effect=boto.exception.S3ResponseError(
+                              403, 'Forbidden')):
+            self.assertRaises(boto.exception.S3ResponseError,
+                              _attempt_to_acquire_lock,
+                              runner.fs, self.lock_uri, 0, 'jf1')
+
 
 class MaxHoursIdleTestCase(MockBotoTestCase):
 
@@ -3131,7 +3408,7 @@ class JobWaitTestCase(MockBotoTestCase):
         def side_effect_lock_uri(*args):
             return args[0]  # Return the only arg given to it.
 
-        def side_effect_acquire_lock(*args):
+        def side_effect_acquire_lock(*args, **kwargs):
             cluster_id = args[1]
             return self.JOB_ID_LOCKS[cluster_id]
 
@@ -3167,6 +3444,17 @@ class JobWaitTestCase(MockBotoTestCase):
         runner = EMRJobRunner(conf_paths=[], pool_wait_minutes=0)
         cluster_id = runner._find_cluster()
 
+        self.assertEqual(cluster_id, None)
+        # S3 is consistent, so no need to sleep after creating temp bucket
+        self.assertEqual(self.sleep_counter, 0)
+
+    def test_sleep_for_eventual_consistency(self):
+        self.mock_cluster_ids.append('j-fail-lock')
+
+        runner = EMRJobRunner(conf_paths=[], pool_wait_minutes=0,
+                              s3_strong_consistency=False)
+        cluster_id = runner._find_cluster()
+
         self.assertEqual(cluster_id, None)
         # sleep once after creating temp bucket
         self.assertEqual(self.sleep_counter, 1)
@@ -3184,7 +3472,7 @@ class JobWaitTestCase(MockBotoTestCase):
         cluster_id = runner._find_cluster()
 
         self.assertEqual(cluster_id, 'j-successful-lock')
-        self.assertEqual(self.sleep_counter, 1)
+        self.assertEqual(self.sleep_counter, 0)
 
     def test_sleep_then_acquire_lock(self):
         self.mock_cluster_ids.append('j-fail-lock')
@@ -3202,7 +3490,16 @@ class JobWaitTestCase(MockBotoTestCase):
         cluster_id = runner._find_cluster()
 
         self.assertEqual(cluster_id, None)
-        self.assertEqual(self.sleep_counter, 3)
+        self.assertEqual(self.sleep_counter, 2)
+
+    def test_try_next_best_cluster_without_looking_again(self):
+        # best cluster comes last
+        self.mock_cluster_ids.extend(['j-successful-lock', 'j-fail-lock'])
+        runner = EMRJobRunner(conf_paths=[], pool_wait_minutes=0)
+        cluster_id = runner._find_cluster()
+
+        self.assertEqual(cluster_id, 'j-successful-lock')
+        self.assertEqual(EMRJobRunner._usable_clusters.call_count, 1)
 
 
 class PoolWaitMinutesOptionTestCase(MockBotoTestCase):
@@ -4021,6 +4318,196 @@ class MultiPartUploadTestCase(MockBotoTestCase):
             s3_key = runner.fs.get_s3_key(self.TEST_S3_URI)
             self.assertTrue(s3_key.mock_multipart_upload_was_cancelled())
 
+    @skipIf(filechunkio is None, 'need filechunkio')
+    def test_parts_uploaded_in_parallel(self):
+        runner = EMRJobRunner(cloud_upload_part_size=self.PART_SIZE_IN_MB,
+                              cloud_upload_threads=3)
+
+        data = b'Mew' * 100  # 6 parts
+
+        with patch('mrjob.emr._map_in_threads',
+                   wraps=mrjob.emr._map_in_threads) as m_map:
+            self.assert_upload_succeeds(runner, data, expect_multipart=True)
+
+        self.assertTrue(m_map.called)
+        self.assertEqual(list(m_map.call_args[0][1]), list(range(6)))
+        self.assertEqual(m_map.call_args[0][2], 3)
+
+    @skipIf(filechunkio is None, 'need filechunkio')
+    def test_retry_part_on_transient_error(self):
+        runner = EMRJobRunner(cloud_upload_part_size=self.PART_SIZE_IN_MB)
+
+        data = b'Mew' * 20  # 2 parts
+
+        real_upload_part_from_file = MockMultiPartUpload.upload_part_from_file
+        part_nums = []
+
+        def upload_part_from_file(mpul, fp, part_num):
+            part_nums.append(part_num)
+            # fail the first time we upload part 2
+            if part_num == 2 and part_nums.count(2) == 1:
+                raise boto.exception.S3ResponseError(503, 'Slow Down')
+            return real_upload_part_from_file(mpul, fp, part_num)
+
+        with patch.object(MockMultiPartUpload, 'upload_part_from_file',
+                          upload_part_from_file):
+            self.assert_upload_succeeds(runner, data, expect_multipart=True)
+
+        # only part 2 should be retried
+        self.assertEqual(sorted(part_nums), [1, 2, 2])
+
+    @skipIf(filechunkio is None, 'need filechunkio')
+    def test_no_retry_on_other_errors(self):
+        runner = EMRJobRunner(cloud_upload_part_size=self.PART_SIZE_IN_MB)
+
+        data = b'Mew' * 20
+
+        with patch.object(
+                MockMultiPartUpload, 'upload_part_from_file',
+                side_effect=boto.exception.S3ResponseError(403, 'Forbidden')):
+            self.assertRaises(boto.exception.S3ResponseError,
+                              self.upload_data, runner, data)
+
+        s3_key = runner.fs.get_s3_key(self.TEST_S3_URI)
+        self.assertTrue(s3_key.mock_multipart_upload_was_cancelled())
+
+    def test_upload_many_files(self):
+        runner = EMRJobRunner(cloud_upload_threads=4)
+
+        for i in range(10):
+            path = os.path.join(self.tmp_dir, 'file-%d' % i)
+            with open(path, 'wb') as f:
+                f.write(('data %d' % i).encode('ascii'))
+            runner._upload_mgr.add(path)
+
+        runner._upload_local_files_to_s3()
+
+        for i in range(10):
+            path = os.path.join(self.tmp_dir, 'file-%d' % i)
+            s3_key = runner.fs.get_s3_key(runner._upload_mgr.uri(path))
+            self.assertEqual(s3_key.get_contents_as_string(),
+                             ('data %d' % i).encode('ascii'))
+
+
+class DedupUploadsTestCase(MockBotoTestCase):
+
+    def setUp(self):
+        super(DedupUploadsTestCase, self).setUp()
+
+        self.foo_py = self.makefile('foo.py', b'# foo\n')
+
+    def test_default(self):
+        runner = EMRJobRunner(conf_paths=[])
+        runner._upload_mgr.add(self.foo_py)
+
+        self.assertEqual(runner._upload_mgr.uri(self.foo_py),
+                         runner._cloud_tmp_dir + 'files/foo.py')
+
+    def test_files_named_by_md5(self):
+        runner = EMRJobRunner(conf_paths=[], cloud_dedup_uploads=True)
+        runner._upload_mgr.add(self.foo_py)
+
+        md5sum = runner.fs.md5sum(self.foo_py)
+
+        self.assertEqual(
+            runner._upload_mgr.uri(self.foo_py),
+            runner._dedup_upload_dir() + '%s/foo.py' % md5sum)
+        self.assertEqual(runner._dedup_upload_dir(),
+                         runner._opts['cloud_tmp_dir'] + 'files-by-md5/')
+
+    def test_skip_files_already_uploaded(self):
+        runner1 = EMRJobRunner(conf_paths=[], cloud_dedup_uploads=True)
+        runner1._upload_mgr.add(self.foo_py)
+        runner1._upload_local_files_to_s3()
+
+        uri = runner1._upload_mgr.uri(self.foo_py)
+        self.assertEqual(
+            runner1.fs.get_s3_key(uri).get_contents_as_string(), b'# foo\n')
+
+        runner2 = EMRJobRunner(conf_paths=[], cloud_dedup_uploads=True)
+        runner2._upload_mgr.add(self.foo_py)
+        self.assertEqual(runner2._upload_mgr.uri(self.foo_py), uri)
+
+        with patch.object(runner2, '_upload_contents') as m_upload_contents:
+            runner2._upload_local_files_to_s3()
+            self.assertFalse(m_upload_contents.called)
+
+    def test_checks_existence_all_at_once(self):
+        bar_py = self.makefile('bar.py', b'# bar\n')
+
+        runner = EMRJobRunner(conf_paths=[], cloud_dedup_uploads=True)
+        runner._upload_mgr.add(self.foo_py)
+        runner._upload_mgr.add(bar_py)
+
+        with patch.object(runner.fs, 'exists_many',
+                          side_effect=runner.fs.exists_many) as m_exists_many:
+            runner._upload_local_files_to_s3()
+
+            self.assertEqual(m_exists_many.call_count, 1)
+            self.assertEqual(
+                sorted(m_exists_many.call_args[0][0]),
+                sorted(runner._upload_mgr.path_to_uri().values()))
+
+        self.assertTrue(runner.fs.exists(runner._upload_mgr.uri(bar_py)))
+
+    def test_saves_md5sum_cache_once(self):
+        bar_py = self.makefile('bar.py', b'# bar\n')
+
+        runner = EMRJobRunner(conf_paths=[], cloud_dedup_uploads=True)
+        runner._upload_mgr.add(self.foo_py)
+        runner._upload_mgr.add(bar_py)
+
+        with patch('mrjob.emr._save_md5sum_cache') as m_save:
+            runner._upload_local_files_to_s3()
+
+        m_save.assert_called_once_with()
+
+    def test_cleanup_leaves_deduped_files(self):
+        runner = EMRJobRunner(conf_paths=[], cloud_dedup_uploads=True)
+        runner._upload_mgr.add(self.foo_py)
+        runner._upload_local_files_to_s3()
+
+        runner._cleanup_cloud_tmp()
+
+        self.assertTrue(runner.fs.exists(runner._upload_mgr.uri(self.foo_py)))
+
+
+class FSCacheSecsTestCase(MockBotoTestCase):
+
+    def test_default(self):
+        runner = EMRJobRunner(conf_paths=[])
+        self.assertIsInstance(runner.fs, CompositeFilesystem)
+
+    def test_fs_cache_secs(self):
+        runner = EMRJobRunner(conf_paths=[], fs_cache_secs=30)
+        self.assertIsInstance(runner.fs, CachingFilesystem)
+        self.assertIsInstance(runner.fs.fs, CompositeFilesystem)
+        self.assertEqual(runner.fs._cache_secs, 30)
+
+
+class DownloadPartsTestCase(MockBotoTestCase):
+
+    def test_defaults(self):
+        runner = EMRJobRunner()
+
+        s3_fs = runner.fs.filesystems[-2]
+        self.assertEqual(s3_fs._download_part_size, 16 * 1024 * 1024)
+        self.assertEqual(s3_fs._download_threads, 4)
+
+    def test_options_passed_to_s3_fs(self):
+        runner = EMRJobRunner(cloud_download_part_size=0.5,
+                              cloud_download_threads=8)
+
+        s3_fs = runner.fs.filesystems[-2]
+        self.assertEqual(s3_fs._download_part_size, 512 * 1024)
+        self.assertEqual(s3_fs._download_threads, 8)
+
+    def test_disable_download_parts(self):
+        runner = EMRJobRunner(cloud_download_part_size=0)
+
+        s3_fs = runner.fs.filesystems[-2]
+        self.assertEqual(s3_fs._download_part_size, 0)
+
 
 class SecurityTokenTestCase(MockBotoTestCase):
 
@@ -5250,14 +5737,14 @@ class WaitForStepsToCompleteTestCase(MockBotoTestCase):
         # mock out logging
         self.start(patch('mrjob.emr.log'))
 
-        # track number of calls to _wait_for_step_to_complete()
+        # track number of calls to _start_waiting_for_step()
         #
         # need to keep a ref to the mock; apparently, when side_effect/autospec
         # is used, we can read mock attributes of
-        # EMRJobRunner._wait_for_step_to_complete but not write them
-        self._wait_for_step_to_complete = self.start(patch.object(
-            EMRJobRunner, '_wait_for_step_to_complete',
-            side_effect=EMRJobRunner._wait_for_step_to_complete,
+        # EMRJobRunner._start_waiting_for_step but not write them
+        self._start_waiting_for_step = self.start(patch.object(
+            EMRJobRunner, '_start_waiting_for_step',
+            side_effect=EMRJobRunner._start_waiting_for_step,
             autospec=True))
 
     def make_runner(self, *extra_args):
@@ -5272,7 +5759,7 @@ class WaitForStepsToCompleteTestCase(MockBotoTestCase):
 
         runner._wait_for_steps_to_complete()
 
-        self.assertEqual(EMRJobRunner._wait_for_step_to_complete.call_count, 2)
+        self.assertEqual(EMRJobRunner._start_waiting_for_step.call_count, 2)
         self.assertTrue(EMRJobRunner._set_up_ssh_tunnel.called)
         self.assertEqual(len(runner._log_interpretations), 2)
         self.assertIsNone(runner._mns_log_interpretation)
@@ -5291,7 +5778,7 @@ class WaitForStepsToCompleteTestCase(MockBotoTestCase):
 
         self.assertIsNotNone(runner._master_node_setup_script_path)
 
-        self.assertEqual(EMRJobRunner._wait_for_step_to_complete.call_count, 3)
+        self.assertEqual(EMRJobRunner._start_waiting_for_step.call_count, 3)
         self.assertTrue(EMRJobRunner._set_up_ssh_tunnel.called)
         self.assertEqual(len(runner._log_interpretations), 2)
         self.assertIsNotNone(runner._mns_log_interpretation)
@@ -5303,7 +5790,7 @@ class WaitForStepsToCompleteTestCase(MockBotoTestCase):
         runner._log_interpretations = ['foo', 'bar', 'baz']
         runner._mns_log_interpretation = 'qux'
 
-        self._wait_for_step_to_complete.side_effect = self.StopTest
+        self._start_waiting_for_step.side_effect = self.StopTest
 
         self.assertRaises(self.StopTest, runner._wait_for_steps_to_complete)
         self.assertEqual(runner._log_interpretations, [])
@@ -5320,7 +5807,7 @@ class WaitForStepsToCompleteTestCase(MockBotoTestCase):
 
         self.assertRaises(self.StopTest, runner._wait_for_steps_to_complete)
 
-        self.assertEqual(EMRJobRunner._wait_for_step_to_complete.call_count, 1)
+        self.assertEqual(EMRJobRunner._start_waiting_for_step.call_count, 1)
 
         mock_cluster = runner._describe_cluster()
         mock_steps = mock_cluster._steps
@@ -5341,7 +5828,7 @@ class WaitForStepsToCompleteTestCase(MockBotoTestCase):
         # run until SSH tunnel is set up
         self.assertRaises(self.StopTest, runner._wait_for_steps_to_complete)
 
-        self.assertFalse(EMRJobRunner._wait_for_step_to_complete.called)
+        self.assertFalse(EMRJobRunner._start_waiting_for_step.called)
 
     def test_open_ssh_tunnel_if_cluster_waiting(self):
         # tests #1115
@@ -5356,7 +5843,7 @@ class WaitForStepsToCompleteTestCase(MockBotoTestCase):
         # run until SSH tunnel is set up
         self.assertRaises(self.StopTest, runner._wait_for_steps_to_complete)
 
-        self.assertFalse(EMRJobRunner._wait_for_step_to_complete.called)
+        self.assertFalse(EMRJobRunner._start_waiting_for_step.called)
 
     def test_open_ssh_tunnel_when_step_pending_but_cluster_running(self):
         # tests #1115
@@ -5380,7 +5867,7 @@ class WaitForStepsToCompleteTestCase(MockBotoTestCase):
         self.assertRaises(self.StopTest, runner._wait_for_steps_to_complete)
 
         # should have only waited for first step
-        self.assertEqual(EMRJobRunner._wait_for_step_to_complete.call_count, 1)
+        self.assertEqual(EMRJobRunner._start_waiting_for_step.call_count, 1)
 
         # cluster should be running, step should still be pending
         self.assertEqual(mock_cluster.status.state, 'RUNNING')
@@ -5390,13 +5877,18 @@ class WaitForStepsToCompleteTestCase(MockBotoTestCase):
     def test_terminated_cluster(self):
         runner = self.make_runner()
 
-        self.start(patch(
-            'mrjob.emr._patched_describe_step',
-            return_value=MockEmrObject(
-                status=MockEmrObject(
-                    state='CANCELLED',
+        step_id = runner._job_steps()[0].id
+
+        self.start(patch.object(
+            runner, '_describe_job_steps',
+            return_value={
+                step_id: MockEmrObject(
+                    id=step_id,
+                    status=MockEmrObject(
+                        state='CANCELLED',
+                    ),
                 ),
-            ),
+            },
         ))
 
         self.start(patch(
@@ -5424,6 +5916,130 @@ class WaitForStepsToCompleteTestCase(MockBotoTestCase):
         self.assertTrue(runner._check_for_key_pair_from_wrong_region.called)
         self.assertTrue(runner._check_for_failed_bootstrap_action.called)
 
+    def test_one_list_steps_call_per_check(self):
+        runner = self.make_runner()
+        # don't wait for logs when fetching counters
+        self.start(patch.object(runner, '_pick_counters', return_value={}))
+        time.sleep.reset_mock()
+
+        self.start(patch.object(MockEmrConnection, 'list_steps',
+                                side_effect=MockEmrConnection.list_steps,
+                                autospec=True))
+        self.start(patch.object(MockEmrConnection, 'describe_step',
+                                side_effect=MockEmrConnection.describe_step,
+                                autospec=True))
+
+        runner._wait_for_steps_to_complete()
+
+        # one call to find our steps, and then one each time we check
+        self.assertEqual(MockEmrConnection.list_steps.call_count,
+                         time.sleep.call_count + 1)
+        self.assertFalse(MockEmrConnection.describe_step.called)
+
+    def test_describe_cluster_once_per_check_while_pending(self):
+        runner = self.make_runner()
+        # don't wait for logs when fetching counters
+        self.start(patch.object(runner, '_pick_counters', return_value={}))
+
+        # stay PENDING for a while
+        runner._describe_cluster().delay_progress_simulation = 5
+
+        step_states = []
+        real_log_step_state = runner._log_step_state
+
+        def log_step_state(step, step_num, cluster=None):
+            step_states.append(step.status.state)
+            return real_log_step_state(step, step_num, cluster)
+
+        self.start(patch.object(runner, '_log_step_state',
+                                side_effect=log_step_state))
+        self.start(patch.object(
+            MockEmrConnection, 'describe_cluster',
+            side_effect=MockEmrConnection.describe_cluster,
+            autospec=True))
+
+        runner._wait_for_steps_to_complete()
+
+        self.assertIn('PENDING', step_states)
+        self.assertIn('RUNNING', step_states)
+
+        # one call to see if we can open the SSH tunnel, and then one
+        # each time we check on a PENDING step
+        self.assertEqual(MockEmrConnection.describe_cluster.call_count,
+                         step_states.count('PENDING') + 1)
+
+    def test_steps_finished_between_checks(self):
+        runner = self.make_runner()
+        # don't wait for logs when fetching counters
+        self.start(patch.object(runner, '_pick_counters', return_value={}))
+        time.sleep.reset_mock()
+
+        # steps complete while we aren't looking
+        for step in runner._describe_cluster()._steps:
+            step.status.state = 'COMPLETED'
+
+        runner._wait_for_steps_to_complete()
+
+        self.assertEqual(time.sleep.call_count, 1)
+        self.assertEqual(EMRJobRunner._start_waiting_for_step.call_count, 2)
+        self.assertEqual(len(runner._log_interpretations), 2)
+
+    def test_check_less_often_while_step_is_pending(self):
+        runner = self.make_runner('--check-cluster-every', '30')
+        # don't wait for logs when fetching counters
+        self.start(patch.object(runner, '_pick_counters', return_value={}))
+        time.sleep.reset_mock()
+
+        # stay PENDING for a while
+        runner._describe_cluster().delay_progress_simulation = 5
+
+        runner._wait_for_steps_to_complete()
+
+        sleep_secs = [args[0] for args, kwargs in time.sleep.call_args_list]
+
+        self.assertEqual(sleep_secs[:6], [5, 5, 10, 20, 30, 30])
+
+    def test_check_often_when_step_is_almost_done(self):
+        runner = self.make_runner('--check-cluster-every', '30')
+        # don't wait for logs when fetching counters
+        self.start(patch.object(runner, '_pick_counters', return_value={}))
+        time.sleep.reset_mock()
+
+        self.start(patch.object(runner, '_log_step_progress',
+                                return_value=95.0))
+
+        # stay RUNNING for a while
+        def delay_once_running(*args, **kwargs):
+            mock_cluster = runner._describe_cluster()
+            if mock_cluster._steps[0].status.state == 'RUNNING':
+                mock_cluster.delay_progress_simulation = 3
+                time.sleep.side_effect = None
+
+        time.sleep.side_effect = delay_once_running
+
+        runner._wait_for_steps_to_complete()
+
+        sleep_secs = [args[0] for args, kwargs in time.sleep.call_args_list]
+
+        self.assertEqual(set(sleep_secs), set([5]))
+
+
+class NextCheckIntervalTestCase(TestCase):
+
+    def test_back_off(self):
+        self.assertEqual(_next_check_interval(5, 5, 30), 10)
+        self.assertEqual(_next_check_interval(10, 5, 30), 20)
+
+    def test_max_interval(self):
+        self.assertEqual(_next_check_interval(20, 5, 30), 30)
+        self.assertEqual(_next_check_interval(30, 5, 30), 30)
+
+    def test_speed_up(self):
+        self.assertEqual(_next_check_interval(30, 5, 30, speed_up=True), 5)
+
+    def test_zero(self):
+        self.assertEqual(_next_check_interval(0, 0, 0), 0)
+
 
 class LsBootstrapStderrLogsTestCase(MockBotoTestCase):
 
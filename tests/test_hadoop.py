@@ -26,6 +26,7 @@ from subprocess import PIPE
 import mrjob.step
 from mrjob.conf import combine_dicts
 from mrjob.fs.hadoop import HadoopFilesystem
+from mrjob.fs.webhdfs import WebHDFSFilesystem
 from mrjob.hadoop import HadoopJobRunner
 from mrjob.hadoop import fully_qualify_hdfs_path
 from mrjob.py2 import PY2
@@ -38,6 +39,7 @@ from tests.mockhadoop import add_mock_hadoop_output
 from tests.mockhadoop import create_mock_hadoop_script
 from tests.mockhadoop import get_mock_hadoop_cmd_args
 from tests.mockhadoop import get_mock_hdfs_root
+from tests.mockwebhdfs import MockWebHDFSServer
 from tests.mr_jar_and_streaming import MRJarAndStreaming
 from tests.mr_just_a_jar import MRJustAJar
 from tests.mr_null_spark import MRNullSpark
@@ -1469,3 +1471,76 @@ class FindBinariesAndJARsTestCase(SandboxedTestCase):
             self.assertTrue(self.get_hadoop_version.called)
             self.assertTrue(self.get_hadoop_streaming_jar.called)
             self.assertTrue(self.get_spark_submit_bin.called)
+
+
+class WebHDFSURLTestCase(MockHadoopTestCase):
+
+    def setUp(self):
+        super(WebHDFSURLTestCase, self).setUp()
+
+        self.hdfs_root = get_mock_hdfs_root()
+
+        self.server = MockWebHDFSServer(self.hdfs_root)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def test_default(self):
+        runner = HadoopJobRunner()
+
+        self.assertFalse(any(isinstance(fs, WebHDFSFilesystem)
+                             for fs in runner.fs.filesystems))
+
+    def test_upload_files_through_webhdfs(self):
+        foo_path = self.makefile('foo.py', b'# foo')
+
+        job = MRWordCount(['-r', 'hadoop', '--webhdfs-url', self.server.url])
+        job.sandbox()
+
+        with job.make_runner() as runner:
+            self.assertIsInstance(runner.fs.filesystems[0],
+                                  WebHDFSFilesystem)
+
+            runner._upload_mgr.add(foo_path)
+            runner._upload_local_files_to_hdfs()
+
+            foo_uri = runner._upload_mgr.uri(foo_path)
+            self.assertEqual(b''.join(runner.fs.cat(foo_uri)), b'# foo')
+
+        # didn't run hadoop fs
+        self.assertFalse(any(args[:1] == ['fs']
+                             for args in get_mock_hadoop_cmd_args()))
+        self.assertIn('CREATE', [op for _, op, _, _ in self.server.requests])
+
+
+class UploadLocalFilesTestCase(MockHadoopTestCase):
+
+    def test_one_put_per_dir(self):
+        foo_path = self.makefile('foo.py', b'# foo')
+        bar_path = self.makefile('bar.txt', b'bar')
+        # will be renamed to qux.txt
+        qux_path = self.makefile('.qux.txt', b'qux')
+
+        job = MRWordCount(['-r', 'hadoop'])
+        job.sandbox()
+
+        with job.make_runner() as runner:
+            for path in (foo_path, bar_path, qux_path):
+                runner._upload_mgr.add(path)
+
+            runner._upload_local_files_to_hdfs()
+
+            for path, contents in [(foo_path, b'# foo'),
+                                   (bar_path, b'bar'),
+                                   (qux_path, b'qux')]:
+                uri = runner._upload_mgr.uri(path)
+                self.assertEqual(b''.join(runner.fs.cat(uri)), contents)
+
+            prefix = runner._upload_mgr.prefix
+
+        fs_cmds = [args[1] for args in get_mock_hadoop_cmd_args()
+                   if args[0] == 'fs']
+        self.assertEqual(fs_cmds.count('-mkdir'), 1)
+        self.assertEqual(fs_cmds.count('-put'), 2)
+
+        self.assertIn(['fs', '-put', bar_path, foo_path, prefix.rstrip('/')],
+                      get_mock_hadoop_cmd_args())
@@ -0,0 +1,361 @@
+# Copyright 2016 Yelp
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import threading
+
+from mrjob.parallel import _map_ahead
+from mrjob.parallel import _map_in_threads
+from mrjob.parallel import _prefetch
+from mrjob.parallel import _read_ahead
+
+from tests.py2 import TestCase
+
+
+class ReadAheadTestCase(TestCase):
+
+    def setUp(self):
+        super(ReadAheadTestCase, self).setUp()
+
+        # map from path to list of lines
+        self.path_to_lines = {}
+        # paths that read_path() was called on
+        self.opened = []
+        self.opened_lock = threading.Lock()
+
+    def add_file(self, path, lines):
+        self.path_to_lines[path] = lines
+
+    def read_path(self, path):
+        with self.opened_lock:
+            self.opened.append(path)
+
+        for line in self.path_to_lines[path]:
+            if isinstance(line, Exception):
+                raise line
+            yield line
+
+    def test_empty(self):
+        self.assertEqual(list(_read_ahead([], self.read_path)), [])
+
+    def test_one_file(self):
+        self.add_file('a', [b'foo\n', b'bar\n'])
+
+        self.assertEqual(list(_read_ahead(['a'], self.read_path)),
+                         [b'foo\n', b'bar\n'])
+
+    def test_lines_stay_in_order(self):
+        paths = []
+        expected_lines = []
+
+        for i in range(20):
+            path = 'part-%05d' % i
+            lines = [('%d-%d\n' % (i, j)).encode('ascii')
+                     for j in range(i * 10)]
+
+            self.add_file(path, lines)
+            paths.append(path)
+            expected_lines.extend(lines)
+
+        self.assertEqual(
+            list(_read_ahead(paths, self.read_path, max_threads=3)),
+            expected_lines)
+
+    def test_tiny_memory_cap(self):
+        # even if every batch is over the memory cap, we shouldn't deadlock
+        paths = []
+        expected_lines = []
+
+        for i in range(5):
+            path = 'part-%05d' % i
+            lines = [b'x' * 100 + b'\n'] * 1000
+
+            self.add_file(path, lines)
+            paths.append(path)
+            expected_lines.extend(lines)
+
+        self.assertEqual(
+            list(_read_ahead(paths, self.read_path,
+                             max_threads=4, max_bytes=1)),
+            expected_lines)
+
+    def test_no_threads(self):
+        self.add_file('a', [b'foo\n'])
+        self.add_file('b', [b'bar\n'])
+
+        self.assertEqual(
+            list(_read_ahead(['a', 'b'], self.read_path, max_threads=0)),
+            [b'foo\n', b'bar\n'])
+
+    def test_reads_ahead(self):
+        self.add_file('a', [b'foo\n'])
+        self.add_file('b', [b'bar\n'])
+
+        lines = _read_ahead(['a', 'b'], self.read_path)
+        self.assertEqual(next(lines), b'foo\n')
+
+        # by the time we've read one line from a, b should be open
+        # (a was done, so its thread has moved on)
+        self.assertEqual(sorted(self.opened), ['a', 'b'])
+
+        self.assertEqual(list(lines), [b'bar\n'])
+
+    def test_error_raised_when_file_is_reached(self):
+        self.add_file('a', [b'foo\n'])
+        self.add_file('b', [b'bar\n', IOError('no more bar')])
+        self.add_file('c', [b'baz\n'])
+
+        lines = _read_ahead(['a', 'b', 'c'], self.read_path)
+
+        self.assertEqual(next(lines), b'foo\n')
+        self.assertEqual(next(lines), b'bar\n')
+        self.assertRaises(IOError, next, lines)
+
+    def test_accepts_generator_of_paths(self):
+        self.add_file('a', [b'foo\n'])
+        self.add_file('b', [b'bar\n'])
+
+        self.assertEqual(
+            list(_read_ahead((p for p in ['a', 'b']), self.read_path)),
+            [b'foo\n', b'bar\n'])
+
+    def test_stop_reading_early(self):
+        for i in range(10):
+            self.add_file(str(i), [b'x\n'] * 100000)
+
+        lines = _read_ahead([str(i) for i in range(10)], self.read_path,
+                            max_threads=2, max_bytes=1024)
+
+        self.assertEqual(next(lines), b'x\n')
+        lines.close()
+
+        # threads should give up without opening every file
+        for thread in threading.enumerate():
+            if thread is not threading.current_thread():
+                thread.join(5)
+
+        self.assertLess(len(self.opened), 10)
+
+
+class MapInThreadsTestCase(TestCase):
+
+    def test_empty(self):
+        self.assertEqual(_map_in_threads(lambda x: x * 2, [], 4), [])
+
+    def test_results_in_order(self):
+        self.assertEqual(_map_in_threads(lambda x: x * 2, range(50), 4),
+                         [x * 2 for x in range(50)])
+
+    def test_no_threads(self):
+        thread_names = []
+
+        def func(x):
+            thread_names.append(threading.current_thread().name)
+            return x
+
+        self.assertEqual(_map_in_threads(func, [1, 2, 3], 1), [1, 2, 3])
+        self.assertEqual(set(thread_names),
+                         set([threading.current_thread().name]))
+
+    def test_uses_threads(self):
+        thread_names = set()
+        lock = threading.Lock()
+
+        def func(x):
+            with lock:
+                thread_names.add(threading.current_thread().name)
+            return x
+
+        _map_in_threads(func, range(10), 3)
+
+        self.assertNotIn(threading.current_thread().name, thread_names)
+
+    def test_error(self):
+        called = []
+
+        def func(x):
+            called.append(x)
+            if x == 0:
+                raise IOError('zero!')
+            return x
+
+        # with one thread, we should stop right away
+        self.assertRaises(IOError, _map_in_threads, func, range(10), 1)
+        self.assertEqual(called, [0])
+
+        self.assertRaises(IOError, _map_in_threads, func, range(10), 2)
+
+    def test_takes_items_as_needed(self):
+        num_taken = [0]
+        taken_when_called = []
+        lock = threading.Lock()
+
+        def items():
+            for i in range(100):
+                with lock:
+                    num_taken[0] += 1
+                yield i
+
+        def func(x):
+            with lock:
+                taken_when_called.append(num_taken[0])
+            return x * 2
+
+        self.assertEqual(_map_in_threads(func, items(), 4),
+                         [x * 2 for x in range(100)])
+
+        # each thread takes one item at a time, so we shouldn't have
+        # gone through every item before making the first call
+        self.assertLess(min(taken_when_called), 10)
+
+    def test_error_getting_item(self):
+        def items():
+            yield 1
+            yield 2
+            raise IOError('no more!')
+
+        self.assertRaises(IOError, _map_in_threads, lambda x: x, items(), 1)
+        self.assertRaises(IOError, _map_in_threads, lambda x: x, items(), 2)
+
+
+class PrefetchTestCase(TestCase):
+
+    def test_empty(self):
+        self.assertEqual(list(_prefetch([])), [])
+
+    def test_yields_items_in_order(self):
+        self.assertEqual(list(_prefetch(range(100))), list(range(100)))
+        self.assertEqual(list(_prefetch(range(100), 5)), list(range(100)))
+
+    def test_no_thread(self):
+        thread_names = []
+
+        def items():
+            for i in range(3):
+                thread_names.append(threading.current_thread().name)
+                yield i
+
+        self.assertEqual(list(_prefetch(items(), 0)), [0, 1, 2])
+        self.assertEqual(set(thread_names),
+                         set([threading.current_thread().name]))
+
+    def test_fetches_ahead(self):
+        fetched = []
+        cond = threading.Condition()
+
+        def items():
+            for i in range(10):
+                with cond:
+                    fetched.append(i)
+                    cond.notify_all()
+                yield i
+
+        prefetched = _prefetch(items(), 2)
+        self.assertEqual(next(prefetched), 0)
+
+        # wait for background thread to fetch 1 and 2
+        with cond:
+            while len(fetched) < 3:
+                cond.wait(5)
+
+        # but no further
+        self.assertEqual(fetched, [0, 1, 2])
+
+        prefetched.close()
+
+    def test_error(self):
+        def items():
+            yield 1
+            yield 2
+            raise IOError
+
+        prefetched = _prefetch(items())
+
+        self.assertEqual(next(prefetched), 1)
+        self.assertEqual(next(prefetched), 2)
+        self.assertRaises(IOError, next, prefetched)
+
+    def test_closes_generator(self):
+        closed = []
+
+        def items():
+            try:
+                for i in range(100):
+                    yield i
+            finally:
+                closed.append(True)
+
+        prefetched = _prefetch(items())
+        self.assertEqual(next(prefetched), 0)
+        prefetched.close()
+
+        for thread in threading.enumerate():
+            if thread is not threading.current_thread():
+                thread.join(5)
+
+        self.assertEqual(closed, [True])
+
+
+class MapAheadTestCase(TestCase):
+
+    def test_empty(self):
+        self.assertEqual(list(_map_ahead(lambda x: x * 2, [], 4)), [])
+
+    def test_results_in_order(self):
+        self.assertEqual(list(_map_ahead(lambda x: x * 2, range(50), 4)),
+                         [x * 2 for x in range(50)])
+
+    def test_no_threads(self):
+        thread_names = []
+
+        def func(x):
+            thread_names.append(threading.current_thread().name)
+            return x
+
+        self.assertEqual(list(_map_ahead(func, [1, 2, 3], 0)), [1, 2, 3])
+        self.assertEqual(set(thread_names),
+                         set([threading.current_thread().name]))
+
+    def test_maps_ahead(self):
+        called = []
+        cond = threading.Condition()
+
+        def func(x):
+            with cond:
+                called.append(x)
+                cond.notify_all()
+            return x
+
+        results = _map_ahead(func, range(10), 3)
+        self.assertEqual(next(results), 0)
+
+        # wait for background threads to get to 1, 2, and 3
+        with cond:
+            while len(called) < 4:
+                cond.wait(5)
+
+        # but no further
+        self.assertEqual(sorted(called), [0, 1, 2, 3])
+
+        results.close()
+
+    def test_error_raised_when_item_is_reached(self):
+        def func(x):
+            if x == 2:
+                raise IOError
+            return x
+
+        results = _map_ahead(func, range(5), 4)
+
+        self.assertEqual(next(results), 0)
+        self.assertEqual(next(results), 1)
+        self.assertRaises(IOError, next, results)
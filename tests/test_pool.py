@@ -13,15 +13,22 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import os
+import time
 from datetime import datetime
 from datetime import timedelta
 
+from mrjob.pool import _POOL_INDEX_DAYS
 from mrjob.pool import _est_time_to_hour
+from mrjob.pool import _load_pool_index
 from mrjob.pool import _pool_hash_and_name
+from mrjob.pool import _pool_index_path
+from mrjob.pool import _save_pool_index
 
 from tests.mockboto import MockEmrObject
 from tests.mockboto import to_iso8601
 from tests.py2 import TestCase
+from tests.sandbox import SandboxedTestCase
 
 
 class EstTimeToEndOfHourTestCase(TestCase):
@@ -183,3 +190,54 @@ class TestPoolHashAndName(TestCase):
         ]
 
         self.assertEqual(_pool_hash_and_name(actions), (None, None))
+
+
+class PoolIndexTestCase(SandboxedTestCase):
+
+    def test_empty(self):
+        self.assertFalse(os.path.exists(_pool_index_path()))
+        self.assertEqual(_load_pool_index(), {})
+
+    def test_round_trip(self):
+        index = {
+            'j-POOLED': dict(pool_hash='0123456789abcdef', pool_name='default',
+                             last_seen=time.time()),
+            'j-NOTPOOLED': dict(pool_hash=None, pool_name=None,
+                                last_seen=time.time()),
+        }
+
+        _save_pool_index(index)
+
+        self.assertTrue(os.path.exists(_pool_index_path()))
+        self.assertEqual(_load_pool_index(), index)
+
+    def test_forget_clusters_we_havent_seen(self):
+        now = time.time()
+        long_ago = now - (_POOL_INDEX_DAYS + 1) * 24 * 60 * 60
+
+        _save_pool_index({
+            'j-RECENT': dict(pool_hash=None, pool_name=None, last_seen=now),
+            'j-OLD': dict(pool_hash=None, pool_name=None, last_seen=long_ago),
+        }, now=now)
+
+        self.assertEqual(list(_load_pool_index()), ['j-RECENT'])
+
+    def test_explicit_path(self):
+        path = os.path.join(self.tmp_dir, 'index.json')
+        index = {'j-CLUSTER': dict(pool_hash=None, pool_name=None,
+                                   last_seen=time.time())}
+
+        _save_pool_index(index, path=path)
+
+        self.assertFalse(os.path.exists(_pool_index_path()))
+        self.assertEqual(_load_pool_index(path=path), index)
+
+    def test_bad_json(self):
+        path = self.makefile('index.json', b'{"j-CLUSTER": ')
+
+        self.assertEqual(_load_pool_index(path=path), {})
+
+    def test_not_a_dict(self):
+        path = self.makefile('index.json', b'["j-CLUSTER"]')
+
+        self.assertEqual(_load_pool_index(path=path), {})
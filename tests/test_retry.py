@@ -14,9 +14,14 @@
 # limitations under the License.
 from mrjob.retry import RetryGoRound
 from mrjob.retry import RetryWrapper
+from mrjob.retry import _RateLimitWrapper
+from mrjob.retry import _TokenBucket
+from mrjob.retry import _shared_token_bucket
 
 from tests.py2 import Mock
 from tests.py2 import TestCase
+from tests.py2 import patch
+from tests.sandbox import PatcherTestCase
 
 
 class RetryGoRoundTestCase(TestCase):
@@ -173,3 +178,259 @@ class RetryWrapperTestCase(TestCase):
         )
         a.f()
         self.assertEqual(a1.f.call_count, 3)
+
+
+class FakeClock(object):
+    """A clock that only moves when you sleep."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, secs):
+        self.sleeps.append(secs)
+        self.now += secs
+
+
+class TokenBucketTestCase(TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def make_bucket(self, rate, burst=1):
+        return _TokenBucket(rate, burst=burst,
+                            clock=self.clock.time, sleep=self.clock.sleep)
+
+    def test_bad_args(self):
+        self.assertRaises(ValueError, _TokenBucket, 0)
+        self.assertRaises(ValueError, _TokenBucket, 1, burst=0)
+
+    def test_burst(self):
+        bucket = self.make_bucket(rate=2, burst=3)
+
+        for _ in range(3):
+            self.assertEqual(bucket.acquire(), 0)
+
+        self.assertEqual(bucket.acquire(), 0.5)
+        self.assertEqual(bucket.acquire(), 0.5)
+
+        self.assertEqual(self.clock.sleeps, [0.5, 0.5])
+
+    def test_tokens_replenish(self):
+        bucket = self.make_bucket(rate=2, burst=3)
+
+        for _ in range(3):
+            bucket.acquire()
+
+        self.clock.now += 1.0
+
+        self.assertEqual(bucket.acquire(), 0)
+        self.assertEqual(bucket.acquire(), 0)
+        self.assertEqual(bucket.acquire(), 0.5)
+
+    def test_cant_save_up_more_than_burst(self):
+        bucket = self.make_bucket(rate=2, burst=3)
+
+        self.clock.now += 100.0
+
+        for _ in range(3):
+            self.assertEqual(bucket.acquire(), 0)
+
+        self.assertEqual(bucket.acquire(), 0.5)
+
+    def test_waiting_callers_queue_up(self):
+        # simulate two threads asking for tokens at the same time, by
+        # not moving the clock when they sleep
+        bucket = _TokenBucket(rate=4, burst=1, clock=self.clock.time,
+                              sleep=self.clock.sleeps.append)
+
+        self.assertEqual(bucket.acquire(), 0)
+        self.assertEqual(bucket.acquire(), 0.25)
+        self.assertEqual(bucket.acquire(), 0.5)
+
+    def test_try_acquire(self):
+        bucket = self.make_bucket(rate=2, burst=2)
+
+        self.assertEqual(bucket.try_acquire(), True)
+        self.assertEqual(bucket.try_acquire(), True)
+        self.assertEqual(bucket.try_acquire(), False)
+
+        self.clock.now += 0.5
+
+        self.assertEqual(bucket.try_acquire(), True)
+        self.assertEqual(bucket.try_acquire(), False)
+
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_try_acquire_after_acquire(self):
+        bucket = self.make_bucket(rate=2, burst=1)
+
+        self.assertEqual(bucket.acquire(), 0)
+        self.assertEqual(bucket.acquire(), 0.5)
+
+        # the token we slept for is spoken for
+        self.assertEqual(bucket.try_acquire(), False)
+
+
+class RateLimitWrapperTestCase(TestCase):
+
+    def test_rate_limits_method_calls(self):
+        clock = FakeClock()
+        bucket = _TokenBucket(rate=1, clock=clock.time, sleep=clock.sleep)
+
+        conn = Mock()
+        conn.f = Mock(return_value=1)
+        conn.x = 100
+
+        wrapped = _RateLimitWrapper(conn, bucket)
+
+        self.assertEqual(wrapped.f(), 1)
+        self.assertEqual(wrapped.f(), 1)
+        self.assertEqual(wrapped.x, 100)
+
+        self.assertEqual(conn.f.call_count, 2)
+        self.assertEqual(clock.sleeps, [1.0])
+
+
+class RetryWrapperBackoffTestCase(PatcherTestCase):
+
+    def setUp(self):
+        super(RetryWrapperBackoffTestCase, self).setUp()
+
+        self.clock = FakeClock()
+        self.sleep = self.start(patch('time.sleep',
+                                      side_effect=self.clock.sleep))
+        self.time = self.start(patch('time.time',
+                                     side_effect=self.clock.time))
+
+        self.conn = Mock()
+        self.conn.f = Mock(__name__='f', side_effect=[
+            IOError, IOError, IOError, IOError, 1])
+
+    def wrap(self, **kwargs):
+        return RetryWrapper(self.conn, retry_if=lambda ex: True,
+                            backoff=1, multiplier=2, max_tries=0,
+                            **kwargs)
+
+    def test_exponential_backoff(self):
+        self.assertEqual(self.wrap().f(), 1)
+        self.assertEqual(self.clock.sleeps, [1, 2, 4, 8])
+
+    def test_max_backoff(self):
+        self.assertEqual(self.wrap(max_backoff=3).f(), 1)
+        self.assertEqual(self.clock.sleeps, [1, 2, 3, 3])
+
+    def test_full_jitter(self):
+        with patch('random.uniform', side_effect=lambda a, b: b / 2.0) as u:
+            self.assertEqual(self.wrap(jitter=True).f(), 1)
+
+        self.assertEqual([args for args, _ in u.call_args_list],
+                         [(0, 1), (0, 2), (0, 4), (0, 8)])
+        self.assertEqual(self.clock.sleeps, [0.5, 1, 2, 4])
+
+    def test_rate_limiter(self):
+        rate_limiter = _TokenBucket(rate=0.25, burst=1)
+        self.conn.f.side_effect = None
+        self.conn.f.return_value = 1
+
+        wrapped = self.wrap(rate_limiter=rate_limiter)
+
+        self.assertEqual(wrapped.f(), 1)
+        self.assertEqual(wrapped.f(), 1)
+        self.assertEqual(wrapped.f(), 1)
+
+        self.assertEqual(self.clock.sleeps, [4, 4])
+
+    def test_rate_limiter_applies_to_retries(self):
+        rate_limiter = _TokenBucket(rate=0.25, burst=1)
+
+        self.assertEqual(self.wrap(rate_limiter=rate_limiter).f(), 1)
+
+        # backoff, then wait for the rest of the 4 seconds
+        self.assertEqual(self.clock.sleeps, [1, 3, 2, 2, 4, 8])
+
+    def test_retry_budget(self):
+        retry_budget = _TokenBucket(rate=0.125, burst=2)
+
+        self.assertEqual(self.wrap(retry_budget=retry_budget).f(), 1)
+
+        # first two retries are free. By the third retry, the budget has
+        # only refilled by 0.375 tokens, so after backing off we wait for
+        # the rest. The fourth retry's backoff is long enough to refill
+        # the budget
+        self.assertEqual(self.clock.sleeps, [1, 2, 4, 1, 8])
+
+    def test_back_off_max_when_out_of_budget(self):
+        retry_budget = _TokenBucket(rate=0.125, burst=2)
+
+        self.assertEqual(
+            self.wrap(retry_budget=retry_budget, max_backoff=6).f(), 1)
+
+        # once we're out of budget, back off as long as we're allowed
+        self.assertEqual(self.clock.sleeps, [1, 2, 6, 6, 1])
+
+    def test_retry_budget_refills_while_backing_off(self):
+        retry_budget = _TokenBucket(rate=1, burst=1)
+
+        self.assertEqual(self.wrap(retry_budget=retry_budget).f(), 1)
+        self.assertEqual(self.clock.sleeps, [1, 2, 4, 8])
+
+    def test_retry_budget_is_shared(self):
+        retry_budget = _TokenBucket(rate=0.125, burst=2)
+
+        other_conn = Mock()
+        other_conn.f = Mock(__name__='f', side_effect=[IOError, IOError, 2])
+        other_wrapped = RetryWrapper(
+            other_conn, retry_if=lambda ex: True, backoff=1,
+            retry_budget=retry_budget)
+
+        self.assertEqual(other_wrapped.f(), 2)
+        self.assertEqual(self.clock.sleeps, [1, 1.5])
+
+        # other_wrapped used up the budget, so we have to wait
+        self.assertEqual(self.wrap(retry_budget=retry_budget).f(), 1)
+        self.assertEqual(self.clock.sleeps[2:4], [1, 4.5])
+
+
+class SharedTokenBucketTestCase(TestCase):
+
+    def setUp(self):
+        patcher = patch('mrjob.retry._shared_token_buckets', {})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        log_patcher = patch('mrjob.retry.log')
+        self.log = log_patcher.start()
+        self.addCleanup(log_patcher.stop)
+
+    def test_same_name_same_bucket(self):
+        bucket = _shared_token_bucket('emr', 5, burst=10)
+
+        self.assertIsInstance(bucket, _TokenBucket)
+        self.assertEqual(bucket._rate, 5)
+        self.assertEqual(bucket._burst, 10)
+
+        self.assertIs(_shared_token_bucket('emr', 5, burst=10), bucket)
+        self.assertFalse(self.log.warning.called)
+
+    def test_warn_about_different_rate(self):
+        bucket = _shared_token_bucket('emr', 5, burst=10)
+
+        # rate and burst only matter the first time
+        self.assertIs(_shared_token_bucket('emr', 1, burst=10), bucket)
+        self.assertEqual(bucket._rate, 5)
+        self.assertTrue(self.log.warning.called)
+
+    def test_warn_about_different_burst(self):
+        bucket = _shared_token_bucket('emr', 5, burst=10)
+
+        self.assertIs(_shared_token_bucket('emr', 5), bucket)
+        self.assertEqual(bucket._burst, 10)
+        self.assertTrue(self.log.warning.called)
+
+    def test_different_names_different_buckets(self):
+        self.assertIsNot(_shared_token_bucket('emr', 5),
+                         _shared_token_bucket('iam', 5))
@@ -35,6 +35,7 @@ from mrjob.local import LocalMRJobRunner
 from mrjob.py2 import PY2
 from mrjob.py2 import StringIO
 from mrjob.runner import MRJobRunner
+from mrjob.runner import _mrjob_dir_fingerprint
 from mrjob.step import INPUT
 from mrjob.step import OUTPUT
 from mrjob.tools.emr.audit_usage import _JOB_KEY_RE
@@ -199,7 +200,7 @@ class TestJobName(TestCase):
         self.assertEqual(match.group(2), 'ads')
 
 
-class CreateMrjobTarGzTestCase(TestCase):
+class CreateMrjobTarGzTestCase(SandboxedTestCase):
 
     def test_create_mrjob_tar_gz(self):
         with no_handlers_for_logger('mrjob.runner'):
@@ -216,6 +217,85 @@ class CreateMrjobTarGzTestCase(TestCase):
                     self.assertFalse(filename.endswith('.pyc'),
                                      msg="%s ends with '.pyc'" % filename)
 
+    def test_cached_between_runners(self):
+        with InlineMRJobRunner(conf_paths=[]) as runner:
+            path1 = runner._create_mrjob_tar_gz()
+
+        self.assertTrue(path1.startswith(
+            os.path.join(self.tmp_dir, '.cache', 'mrjob', 'mrjob-tar-gz')))
+        self.assertEqual(os.path.basename(path1), 'mrjob.tar.gz')
+
+        # cleaning up runner shouldn't delete the cached tarball
+        self.assertTrue(os.path.exists(path1))
+
+        with patch('mrjob.runner._make_mrjob_tar_gz') as m_make:
+            with InlineMRJobRunner(conf_paths=[]) as runner:
+                path2 = runner._create_mrjob_tar_gz()
+
+            self.assertFalse(m_make.called)
+
+        self.assertEqual(path1, path2)
+
+    def test_reproducible(self):
+        with InlineMRJobRunner(conf_paths=[]) as runner:
+            path = runner._create_mrjob_tar_gz()
+
+        with open(path, 'rb') as f:
+            tar_gz_bytes1 = f.read()
+
+        shutil.rmtree(os.path.join(self.tmp_dir, '.cache'))
+
+        with InlineMRJobRunner(conf_paths=[]) as runner:
+            path = runner._create_mrjob_tar_gz()
+
+        with open(path, 'rb') as f:
+            tar_gz_bytes2 = f.read()
+
+        self.assertEqual(tar_gz_bytes1, tar_gz_bytes2)
+
+    def test_cache_not_writable(self):
+        # can't create a directory inside a regular file
+        os.environ['XDG_CACHE_HOME'] = self.makefile('not_a_dir')
+
+        with no_handlers_for_logger('mrjob.runner'):
+            with InlineMRJobRunner(conf_paths=[]) as runner:
+                path = runner._create_mrjob_tar_gz()
+
+                self.assertEqual(
+                    path,
+                    os.path.join(runner._get_local_tmp_dir(), 'mrjob.tar.gz'))
+                self.assertTrue(os.path.exists(path))
+
+    def test_old_tarballs_cleaned_up(self):
+        cache_dir = os.path.join(self.tmp_dir, '.cache', 'mrjob',
+                                 'mrjob-tar-gz')
+        old_dir = os.path.join(cache_dir, '0.0.1-abcdef')
+        recent_dir = os.path.join(cache_dir, '0.0.2-abcdef')
+
+        os.makedirs(old_dir)
+        os.makedirs(recent_dir)
+        os.utime(old_dir, (0, 0))
+
+        with InlineMRJobRunner(conf_paths=[]) as runner:
+            runner._create_mrjob_tar_gz()
+
+        self.assertFalse(os.path.exists(old_dir))
+        self.assertTrue(os.path.exists(recent_dir))
+
+    def test_fingerprint_uses_file_contents(self):
+        mrjob_dir = self.makedirs('fake_mrjob')
+        path = self.makefile(os.path.join('fake_mrjob', 'job.py'), b'abc')
+        os.utime(path, (0, 0))
+
+        fingerprint1 = _mrjob_dir_fingerprint(mrjob_dir)
+
+        # same name, size, and mtime; different contents
+        with open(path, 'wb') as f:
+            f.write(b'xyz')
+        os.utime(path, (0, 0))
+
+        self.assertNotEqual(_mrjob_dir_fingerprint(mrjob_dir), fingerprint1)
+
 
 class TestStreamingOutput(TestCase):
 
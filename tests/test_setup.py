@@ -21,6 +21,7 @@ from mrjob.setup import name_uniquely
 from mrjob.setup import parse_legacy_hash_path
 from mrjob.setup import parse_setup_cmd
 
+from tests.py2 import Mock
 from tests.py2 import TestCase
 from tests.py2 import patch
 
@@ -338,6 +339,30 @@ class UploadDirManagerTestCase(TestCase):
         # checking unknown URIs doesn't add them
         self.assertEqual(sd.path_to_uri(), {'foo/bar.py': 'hdfs:///bar.py'})
 
+    def test_digest(self):
+        digests = {'foo/bar.py': 'abc123', 'bar.py': 'def456'}
+
+        sd = UploadDirManager('s3://bucket/dir/', digest=digests.get)
+        sd.add('foo/bar.py')
+        sd.add('bar.py')
+
+        self.assertEqual(sd.path_to_uri(),
+                         {'foo/bar.py': 's3://bucket/dir/abc123/bar.py',
+                          'bar.py': 's3://bucket/dir/def456/bar-1.py'})
+
+    def test_digest_is_computed_once(self):
+        digest = Mock(return_value='abc123')
+
+        sd = UploadDirManager('s3://bucket/dir/', digest=digest)
+        sd.add('foo/bar.py')
+        sd.add('foo/bar.py')
+
+        self.assertEqual(sd.uri('foo/bar.py'),
+                         's3://bucket/dir/abc123/bar.py')
+        self.assertEqual(sd.uri('foo/bar.py'),
+                         's3://bucket/dir/abc123/bar.py')
+        digest.assert_called_once_with('foo/bar.py')
+
     def uri_adds_trailing_slash(self):
         sd = UploadDirManager('s3://bucket/dir')
         sd.add('foo/bar.py')
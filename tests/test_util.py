@@ -26,6 +26,7 @@ from subprocess import Popen
 
 from mrjob.py2 import PY2
 from mrjob.py2 import StringIO
+from mrjob.util import _atomic_write_path
 from mrjob.util import buffer_iterator_to_line_iterator
 from mrjob.util import cmd_line
 from mrjob.util import file_ext
@@ -409,6 +410,37 @@ class ArchiveTestCase(TestCase):
 
         self.ensure_expected_results(excluded_files=['baz'])
 
+    def test_tar_and_gzip_with_mtime(self):
+        join = os.path.join
+
+        tar_and_gzip(dir=join(self.tmp_dir, 'a'),
+                     out_path=join(self.tmp_dir, 'a1.tar.gz'),
+                     prefix='b', mtime=0)
+
+        # change mtime of a file; shouldn't matter
+        os.utime(join(self.tmp_dir, 'a', 'foo'), (12345, 12345))
+
+        tar_and_gzip(dir=join(self.tmp_dir, 'a'),
+                     out_path=join(self.tmp_dir, 'a2.tar.gz'),
+                     prefix='b', mtime=0)
+
+        with open(join(self.tmp_dir, 'a1.tar.gz'), 'rb') as f1:
+            with open(join(self.tmp_dir, 'a2.tar.gz'), 'rb') as f2:
+                self.assertEqual(f1.read(), f2.read())
+
+        t = tarfile.open(join(self.tmp_dir, 'a1.tar.gz'), 'r:gz')
+        self.assertEqual(t.getnames(),
+                         ['b/bar', 'b/baz', 'b/foo', 'b/qux/quux'])
+        for tar_info in t.getmembers():
+            self.assertEqual(tar_info.mtime, 0)
+            self.assertEqual(tar_info.uid, 0)
+            self.assertEqual(tar_info.uname, '')
+
+        t.extractall(self.tmp_dir)
+        t.close()
+
+        self.ensure_expected_results()
+
     def archive_and_unarchive(self, extension, archive_template,
                               added_files=[]):
         join = os.path.join
@@ -658,3 +690,47 @@ class WhichTestCase(SandboxedTestCase):
             # make sure we protect find_executable() from missing $PATH
             # on Python 2.
             self.assertEqual(which('shekondar'), None)
+
+
+class AtomicWritePathTestCase(SandboxedTestCase):
+
+    def setUp(self):
+        super(AtomicWritePathTestCase, self).setUp()
+        self.path = os.path.join(self.tmp_dir, 'cache', 'foo.json')
+
+    def test_creates_dir_and_file(self):
+        with _atomic_write_path(self.path) as tmp_path:
+            self.assertNotEqual(tmp_path, self.path)
+            self.assertEqual(os.path.dirname(tmp_path),
+                             os.path.dirname(self.path))
+            with open(tmp_path, 'w') as f:
+                f.write('foo')
+
+            # not there until we're done
+            self.assertFalse(os.path.exists(self.path))
+
+        with open(self.path) as f:
+            self.assertEqual(f.read(), 'foo')
+
+        self.assertEqual(os.listdir(os.path.dirname(self.path)),
+                         ['foo.json'])
+
+    def test_replaces_existing_file(self):
+        for data in ('foo', 'bar'):
+            with _atomic_write_path(self.path) as tmp_path:
+                with open(tmp_path, 'w') as f:
+                    f.write(data)
+
+        with open(self.path) as f:
+            self.assertEqual(f.read(), 'bar')
+
+    def test_cleans_up_on_error(self):
+        def write_then_fail():
+            with _atomic_write_path(self.path) as tmp_path:
+                with open(tmp_path, 'w') as f:
+                    f.write('foo')
+                raise IOError
+
+        self.assertRaises(IOError, write_then_fail)
+
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), [])
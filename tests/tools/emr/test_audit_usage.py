@@ -20,6 +20,7 @@ from datetime import datetime
 from datetime import timedelta
 
 import boto.emr.connection
+from mrjob.emr import EMRJobRunner
 from mrjob.tools.emr.audit_usage import _cluster_to_full_summary
 from mrjob.tools.emr.audit_usage import _percent
 from mrjob.tools.emr.audit_usage import _subdivide_interval_by_date
@@ -37,18 +38,18 @@ class AuditUsageTestCase(ToolTestCase):
     def setUp(self):
         super(AuditUsageTestCase, self).setUp()
 
-        self.repeat_sleep = self.start(patch('time.sleep'))
-        # this is called once per cluster (no pagination), so we can
-        # test quantity as well as whether it was called
-        self.describe_cluster_sleep = self.start(
-            patch('mrjob.tools.emr.audit_usage.sleep'))
+        self.sleep = self.start(patch('time.sleep'))
+
+        # only count sleeps between API calls
+        self.start(patch.object(
+            EMRJobRunner, '_wait_for_s3_eventual_consistency'))
 
     def test_with_no_clusters(self):
         self.monkey_patch_stdout()
         main(['-q', '--no-conf'])  # make sure it doesn't crash
 
-        self.assertTrue(self.repeat_sleep.called)
-        self.assertFalse(self.describe_cluster_sleep.called)
+        # only one API call (ListClusters), so no need to wait
+        self.assertFalse(self.sleep.called)
 
     def test_with_one_cluster(self):
         emr_conn = boto.emr.connection.EmrConnection()
@@ -59,8 +60,12 @@ class AuditUsageTestCase(ToolTestCase):
         main(['-q', '--no-conf'])
         self.assertIn(b'j-MOCKCLUSTER0', sys.stdout.getvalue())
 
-        self.assertTrue(self.repeat_sleep.called)
-        self.assertEqual(self.describe_cluster_sleep.call_count, 1)
+        # ListClusters, then DescribeCluster, ListSteps, and
+        # ListBootstrapActions, one second apart (time.sleep() is mocked,
+        # so no time passes, and each wait is a second longer)
+        self.assertEqual(self.sleep.call_count, 3)
+        for i, ((secs,), _) in enumerate(self.sleep.call_args_list):
+            self.assertAlmostEqual(secs, i + 1.0, delta=0.5)
 
 
 class ClusterToFullSummaryTestCase(TestCase):
@@ -41,10 +41,14 @@ class ClusterInspectionTestCase(ToolTestCase):
                 'bootstrap_python_packages': [],
                 'bootstrap_scripts': [],
                 'bootstrap_spark': None,
+                'cloud_dedup_uploads': None,
+                'cloud_download_part_size': None,
+                'cloud_download_threads': None,
                 'cloud_fs_sync_secs': None,
                 'cloud_log_dir': None,
                 'cloud_tmp_dir': None,
                 'cloud_upload_part_size': None,
+                'cloud_upload_threads': None,
                 'conf_paths': None,
                 'core_instance_bid_price': None,
                 'core_instance_type': None,
@@ -73,6 +77,7 @@ class ClusterInspectionTestCase(ToolTestCase):
                 'region': None,
                 'release_label': None,
                 's3_endpoint': None,
+                's3_strong_consistency': None,
                 'subnet': None,
                 'tags': None,
                 'task_instance_bid_price': None,